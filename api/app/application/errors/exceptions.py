@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Optional
 
 
 class AppException(RuntimeError):
@@ -44,4 +44,60 @@ class ServerError(AppException):
     """服务器异常错误"""
 
     def __init__(self, msg: str = "服务器出现异常，请稍后重试"):
-        super().__init__(status_code=500, code=500, msg=msg)
\ No newline at end of file
+        super().__init__(status_code=500, code=500, msg=msg)
+
+class LLMError(AppException):
+    """调用 LLM 提供商出错，保留提供商的错误分类，供重试策略判断是否需要重试"""
+    retryable: bool = True # 是否可以重试
+
+    def __init__(
+        self,
+        msg: str = "调用 LLM 提供商出错，请稍后重试",
+        status_code: int = 500,
+        retry_after: Optional[float] = None, # 提供商建议的重试等待秒数(Retry-After)
+        provider_error: Optional[Exception] = None, # 提供商 SDK 抛出的原始异常
+    ):
+        super().__init__(status_code=status_code, code=status_code, msg=msg)
+        self.retry_after = retry_after
+        self.provider_error = provider_error
+
+    def __str__(self) -> str:
+        return self.msg
+
+class LLMTimeoutError(LLMError):
+    """LLM 请求超时"""
+
+    def __init__(self, msg: str = "LLM 请求超时", **kwargs):
+        super().__init__(msg=msg, status_code=504, **kwargs)
+
+class LLMConnectionError(LLMError):
+    """无法连接到 LLM 提供商"""
+
+    def __init__(self, msg: str = "无法连接到 LLM 提供商", **kwargs):
+        super().__init__(msg=msg, status_code=502, **kwargs)
+
+class LLMRateLimitError(LLMError):
+    """LLM 提供商触发限流(429)"""
+
+    def __init__(self, msg: str = "LLM 提供商触发限流", **kwargs):
+        super().__init__(msg=msg, status_code=429, **kwargs)
+
+class LLMServiceError(LLMError):
+    """LLM 提供商服务端错误(5xx)"""
+
+    def __init__(self, msg: str = "LLM 提供商服务端错误", status_code: int = 502, **kwargs):
+        super().__init__(msg=msg, status_code=status_code, **kwargs)
+
+class LLMBadRequestError(LLMError):
+    """LLM 请求参数、鉴权或权限错误(4xx)，属于永久性错误，重试不会成功"""
+    retryable = False
+
+    def __init__(self, msg: str = "LLM 请求参数错误", status_code: int = 400, **kwargs):
+        super().__init__(msg=msg, status_code=status_code, **kwargs)
+
+class LLMCircuitOpenError(LLMError):
+    """LLM 熔断器处于打开状态，请求被快速拒绝"""
+    retryable = False
+
+    def __init__(self, msg: str = "LLM 提供商连续出错，熔断器已打开，请稍后重试", **kwargs):
+        super().__init__(msg=msg, status_code=503, **kwargs)
@@ -0,0 +1,159 @@
+import logging
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple, Type
+
+from app.domain.external.blob_store import BlobStore
+from app.domain.external.json_parser import JsonParser
+from app.domain.external.llm import LLM
+from app.domain.external.search import SearchEngine
+from app.domain.external.task import Task
+from app.domain.external.task_lease import TaskLease
+from app.domain.external.tokenizer import Tokenizer
+from app.domain.external.tool_cache import ToolResultCache
+from app.domain.models.app_config import AppConfig, LLMConfig
+from app.domain.models.message import Message
+from app.domain.models.tool_cache import ToolCacheScope
+from app.domain.repositories.app_config_repository import AppConfigRepository
+from app.domain.repositories.checkpoint_repository import CheckpointRepository
+from app.domain.services.agent_task_runner import AgentTaskRunner
+from app.domain.services.flows.planner_react import PlannerReActFlow
+from app.domain.services.tools.base import BaseTool
+from app.domain.services.tools.search import SearchTool
+
+logger = logging.getLogger(__name__)
+
+
+class AgentService:
+    """Agent 任务服务，负责创建任务、向任务发送消息，以及在进程重启后恢复存在检查点的任务"""
+
+    def __init__(
+        self,
+        app_config_repository: AppConfigRepository,
+        checkpoint_repository: CheckpointRepository,
+        task_cls: Type[Task],
+        llm_factory: Callable[[LLMConfig], LLM], # 未配置 LLM 路由端点时根据 llm_config 创建 LLM
+        llm_router: LLM, # 共享的 LLM 路由，调用方已在路由之外包装好响应缓存与请求合并
+        json_parser: JsonParser,
+        search_engine: SearchEngine,
+        tool_caches: Optional[Dict[ToolCacheScope, ToolResultCache]] = None, # 进程内/Redis 范围的共享工具结果缓存
+        blob_store: Optional[BlobStore] = None, # 大对象存储，为空时工具结果全部保存在记忆中
+        task_lease: Optional[TaskLease] = None, # 任务租约，多个进程之间保证同一任务只运行一份，为空时只做进程内判断
+        tokenizer: Optional[Tokenizer] = None, # 记忆分词器，为空时按字符估算 token 数
+        input_block_ms: int = 5000, # 任务运行器等待新的用户消息的时间
+    ) -> None:
+        """构造函数，完成 Agent 任务服务的初始化"""
+        self.app_config_repository = app_config_repository
+        self.checkpoint_repository = checkpoint_repository
+        self.task_cls = task_cls
+        self.llm_factory = llm_factory
+        self.llm_router = llm_router
+        self.json_parser = json_parser
+        self.search_engine = search_engine
+        self.tool_caches = tool_caches or {}
+        self.blob_store = blob_store
+        self.task_lease = task_lease
+        self.tokenizer = tokenizer
+        self.input_block_ms = input_block_ms
+
+    async def _load_app_config(self) -> AppConfig:
+        """加载所有应用配置信息"""
+        return await self.app_config_repository.load()
+
+    def _create_llm(self, app_config: AppConfig) -> LLM:
+        """配置了启用的 LLM 路由端点时使用进程内共享的 LLM 路由，否则使用 llm_config 创建 LLM"""
+        if any(endpoint.enabled for endpoint in app_config.llm_router_config.endpoints.values()):
+            return self.llm_router
+        return self.llm_factory(app_config.llm_config)
+
+    def _create_tools(self) -> List[BaseTool]:
+        """创建任务使用的工具集，并安装共享的工具结果缓存，未安装的范围退化为任务内缓存"""
+        tools: List[BaseTool] = [SearchTool(self.search_engine)]
+        for tool in tools:
+            for scope, cache in self.tool_caches.items():
+                tool.set_cache(scope, cache)
+        return tools
+
+    async def _acquire_lease(self, task_id: str) -> Tuple[bool, Optional[str]]:
+        """获取任务的运行租约，返回 (是否获取成功, 租约凭证)，未配置租约时总是成功"""
+        if self.task_lease is None:
+            return True, None
+        token = await self.task_lease.acquire(task_id)
+        return token is not None, token
+
+    async def _release_lease(self, task_id: str, lease_token: str) -> None:
+        """任务未能运行时释放已获取的租约"""
+        try:
+            await self.task_lease.release(task_id, lease_token)
+        except Exception as e:
+            logger.warning(f"释放任务[{task_id}]的运行租约失败: {str(e)}")
+
+    async def _create_task(self, task_id: Optional[str] = None, lease_token: Optional[str] = None) -> Task:
+        """创建任务，流程与任务运行器使用相同的任务 ID 与检查点仓库，传递 task_id 时从检查点恢复"""
+        task_id = task_id or str(uuid.uuid4())
+        app_config = await self._load_app_config()
+        flow = PlannerReActFlow(
+            agent_config=app_config.agent_config,
+            llm=self._create_llm(app_config),
+            json_parser=self.json_parser,
+            tools=self._create_tools(),
+            task_id=task_id,
+            checkpoint_repository=self.checkpoint_repository,
+            blob_store=self.blob_store,
+            tokenizer=self.tokenizer,
+        )
+        task_runner = AgentTaskRunner(
+            flow=flow,
+            checkpoint_repository=self.checkpoint_repository,
+            input_block_ms=self.input_block_ms,
+            task_lease=self.task_lease,
+            lease_token=lease_token,
+        )
+        return self.task_cls.create(task_runner, task_id)
+
+    async def chat(self, message: Message, task_id: Optional[str] = None) -> str:
+        """向任务发送一条用户消息并运行任务，task_id 为空时创建新任务，任务已结束时使用原任务 ID 重新创建
+
+        任务正在其他进程中运行(租约被占用)时只将消息写入输入流，由持有租约的进程处理。
+        """
+        task = self.task_cls.get(task_id) if task_id else None
+        if task is not None:
+            await task.input_stream.put(message.model_dump_json())
+            await task.invoke()
+            return task.id
+
+        task_id = task_id or str(uuid.uuid4())
+        acquired, lease_token = await self._acquire_lease(task_id)
+        task = await self._create_task(task_id, lease_token)
+        await task.input_stream.put(message.model_dump_json())
+        if acquired:
+            await task.invoke()
+        else:
+            logger.info(f"任务[{task_id}]正在其他进程中运行，消息已写入输入流")
+            task.cancel()
+        return task.id
+
+    async def resume_tasks(self) -> List[str]:
+        """恢复所有存在检查点的任务，进程启动时调用，租约被占用(正在其他进程中运行)的任务跳过，单个任务恢复失败不影响其他任务"""
+        resumed_task_ids = []
+        for task_id in await self.checkpoint_repository.list_task_ids():
+            if self.task_cls.get(task_id) is not None:
+                continue
+
+            lease_token = None
+            try:
+                acquired, lease_token = await self._acquire_lease(task_id)
+                if not acquired:
+                    logger.info(f"任务[{task_id}]正在其他进程中运行，跳过恢复")
+                    continue
+
+                task = await self._create_task(task_id, lease_token)
+                await task.invoke()
+                resumed_task_ids.append(task_id)
+            except Exception as e:
+                logger.error(f"恢复任务[{task_id}]失败: {str(e)}")
+                if lease_token is not None:
+                    await self._release_lease(task_id, lease_token)
+
+        if resumed_task_ids:
+            logger.info(f"从检查点恢复了 {len(resumed_task_ids)} 个任务: {resumed_task_ids}")
+        return resumed_task_ids
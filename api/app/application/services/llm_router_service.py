@@ -0,0 +1,80 @@
+from typing import Dict, List
+
+from app.application.errors.exceptions import NotFoundError
+from app.domain.external.llm_router import LLMRouter
+from app.domain.models.app_config import AppConfig, LLMEndpointConfig, LLMRouterConfig
+from app.domain.models.llm_router import LLMEndpointStats
+from app.domain.repositories.app_config_repository import AppConfigRepository
+
+
+class LLMRouterService:
+    """多端点 LLM 路由管理服务"""
+
+    def __init__(self, app_config_repository: AppConfigRepository, llm_router: LLMRouter) -> None:
+        """构造函数，完成 LLM 路由管理服务的初始化"""
+        self.app_config_repository = app_config_repository
+        self.llm_router = llm_router
+
+    async def _load_app_config(self) -> AppConfig:
+        """加载所有应用配置信息"""
+        return await self.app_config_repository.load()
+
+    async def _save_and_apply(self, app_config: AppConfig) -> LLMRouterConfig:
+        """保存应用配置并将最新的路由配置应用到 LLM 路由上"""
+        await self.app_config_repository.save(app_config)
+        self.llm_router.configure(app_config.llm_router_config)
+        return app_config.llm_router_config
+
+    def _keep_api_keys(self, old_endpoints: Dict[str, LLMEndpointConfig], new_endpoints: Dict[str, LLMEndpointConfig]) -> None:
+        """api_key 为空的端点沿用旧配置中的 api_key"""
+        for name, endpoint in new_endpoints.items():
+            if not endpoint.api_key.strip() and name in old_endpoints:
+                endpoint.api_key = old_endpoints[name].api_key
+
+    async def get_router_config(self) -> LLMRouterConfig:
+        """获取 LLM 路由配置"""
+        app_config = await self._load_app_config()
+        return app_config.llm_router_config
+
+    async def update_router_config(self, router_config: LLMRouterConfig) -> LLMRouterConfig:
+        """根据传递的 router_config 整体更新 LLM 路由配置"""
+        app_config = await self._load_app_config()
+        self._keep_api_keys(app_config.llm_router_config.endpoints, router_config.endpoints)
+        app_config.llm_router_config = router_config
+        return await self._save_and_apply(app_config)
+
+    async def update_and_create_endpoints(self, endpoints: Dict[str, LLMEndpointConfig]) -> LLMRouterConfig:
+        """根据传递的数据新增或更新 LLM 端点"""
+        app_config = await self._load_app_config()
+        self._keep_api_keys(app_config.llm_router_config.endpoints, endpoints)
+        app_config.llm_router_config.endpoints.update(endpoints)
+        return await self._save_and_apply(app_config)
+
+    async def delete_endpoint(self, endpoint_name: str) -> LLMRouterConfig:
+        """根据传递的端点名字删除 LLM 端点"""
+        app_config = await self._load_app_config()
+        if endpoint_name not in app_config.llm_router_config.endpoints:
+            raise NotFoundError(f"该 LLM 端点[{endpoint_name}]不存在，请核实后重试")
+
+        del app_config.llm_router_config.endpoints[endpoint_name]
+        return await self._save_and_apply(app_config)
+
+    async def set_endpoint_enabled(self, endpoint_name: str, enabled: bool) -> LLMRouterConfig:
+        """更新 LLM 端点启用状态"""
+        app_config = await self._load_app_config()
+        if endpoint_name not in app_config.llm_router_config.endpoints:
+            raise NotFoundError(f"该 LLM 端点[{endpoint_name}]不存在，请核实后重试")
+
+        app_config.llm_router_config.endpoints[endpoint_name].enabled = enabled
+        return await self._save_and_apply(app_config)
+
+    async def load_router_config(self) -> LLMRouterConfig:
+        """从应用配置中加载路由配置并应用到 LLM 路由上，未变更端点的统计数据会被保留"""
+        app_config = await self._load_app_config()
+        self.llm_router.configure(app_config.llm_router_config)
+        return app_config.llm_router_config
+
+    async def get_endpoint_stats(self) -> List[LLMEndpointStats]:
+        """获取所有已启用端点的运行统计"""
+        await self.load_router_config()
+        return self.llm_router.stats()
@@ -0,0 +1,20 @@
+from typing import Optional, Protocol
+
+class BlobStore(Protocol):
+    """大对象存储协议，用于存放体积较大的工具结果，记忆与事件中只保留引用"""
+
+    async def put(self, key: str, content: str) -> None:
+        """写入文本内容"""
+        ...
+
+    async def get(self, key: str) -> Optional[str]:
+        """读取文本内容，不存在时返回 None"""
+        ...
+
+    async def delete(self, key: str) -> None:
+        """删除对象，不存在时忽略"""
+        ...
+
+    async def delete_prefix(self, prefix: str) -> int:
+        """删除键以 prefix 开头的所有对象，返回删除的对象数"""
+        ...
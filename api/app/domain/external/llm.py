@@ -1,4 +1,4 @@
-from typing import Any, List, Protocol, Dict
+from typing import Any, AsyncGenerator, List, Protocol, Dict
 
 class LLM(Protocol):
     """用于 Agent 应用与 LLM 进行交互的接口协议"""
@@ -19,7 +19,28 @@ class LLM(Protocol):
             tool_choice: 工具选择策略. Defaults to None.
         """
         ...
-    
+
+    def stream(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: List[Dict[str, Any]] = None,
+        response_format: Dict[str, Any] = None,
+        tool_choice: str = None,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """以流式的方式调用 LLM 接口，迭代返回消息增量(delta)
+
+        每个增量的结构与 OpenAI 的 delta 保持一致，例如:
+        {"content": "你好"} 或 {"tool_calls": [{"index": 0, "id": "...", "function": {"name": "...", "arguments": "..."}}]}
+        使用 merge_message_delta 将所有增量合并后，结果与 invoke 返回的消息一致
+
+        Args:
+            messages: 消息列表
+            tools: 工具列表. Defaults to None.
+            response_format: 响应格式. Defaults to None.
+            tool_choice: 工具选择策略. Defaults to None.
+        """
+        ...
+
     @property
     def model_name(self) -> str:
         """返回 LLM 的名字"""
@@ -33,4 +54,38 @@ class LLM(Protocol):
     @property
     def max_tokens(self) -> int:
         """返回 LLM 返回的最大 token 树"""
-        ...
\ No newline at end of file
+        ...
+
+def merge_message_delta(message: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """将 LLM 流式返回的消息增量合并到消息中，返回合并后的消息"""
+    # 1. 角色只会在首个增量中出现，默认为 assistant
+    message.setdefault("role", "assistant")
+    if delta.get("role"):
+        message["role"] = delta["role"]
+
+    # 2. 文本内容直接拼接
+    if delta.get("content"):
+        message["content"] = (message.get("content") or "") + delta["content"]
+    else:
+        message.setdefault("content", None)
+
+    # 3. 工具调用按 index 合并，函数名和 id 只出现一次，参数需要拼接
+    for tool_call_delta in delta.get("tool_calls") or []:
+        tool_calls = message.setdefault("tool_calls", [])
+        index = tool_call_delta.get("index", len(tool_calls))
+        while len(tool_calls) <= index:
+            tool_calls.append({"id": None, "type": "function", "function": {"name": "", "arguments": ""}})
+
+        tool_call = tool_calls[index]
+        if tool_call_delta.get("id"):
+            tool_call["id"] = tool_call_delta["id"]
+        if tool_call_delta.get("type"):
+            tool_call["type"] = tool_call_delta["type"]
+
+        function_delta = tool_call_delta.get("function") or {}
+        if function_delta.get("name"):
+            tool_call["function"]["name"] += function_delta["name"]
+        if function_delta.get("arguments"):
+            tool_call["function"]["arguments"] += function_delta["arguments"]
+
+    return message
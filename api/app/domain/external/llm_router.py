@@ -0,0 +1,16 @@
+from typing import List, Protocol
+
+from app.domain.external.llm import LLM
+from app.domain.models.app_config import LLMRouterConfig
+from app.domain.models.llm_router import LLMEndpointStats
+
+class LLMRouter(LLM, Protocol):
+    """多端点 LLM 路由协议，对外表现为一个 LLM，内部将请求分发到多个端点"""
+
+    def configure(self, router_config: LLMRouterConfig) -> None:
+        """根据传递的路由配置更新端点列表，保留未变更端点的统计数据"""
+        ...
+
+    def stats(self) -> List[LLMEndpointStats]:
+        """获取所有端点的运行统计"""
+        ...
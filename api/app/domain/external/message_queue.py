@@ -1,5 +1,5 @@
 from typing import Tuple
-from typing import Any
+from typing import Any, AsyncIterator, List
 from typing import Protocol
 
 class MessageQueue(Protocol):
@@ -9,12 +9,32 @@ class MessageQueue(Protocol):
         """往消息队列中添加一条消息"""
         ...
 
+    async def put_many(self, messages: List[Any]) -> List[str]:
+        """按顺序往消息队列中批量添加消息，返回对应的消息 id"""
+        ...
+
     async def get(self, start_id: str = None, block_ms: int = None) -> Tuple[str, Any]:
         """根据传递的开始 id + 阻塞实践，获取 1 条数据"""
         ...
     
-    async def pop(self) -> Tuple[str, Any]:
-        """获取并移出消息队列中的第一条消息"""
+    async def get_many(self, start_id: str = None, count: int = None, block_ms: int = None) -> List[Tuple[str, Any]]:
+        """获取 start_id 之后的一批消息，没有消息时最多阻塞 block_ms 毫秒"""
+        ...
+
+    def subscribe(self, start_id: str = None, count: int = None, block_ms: int = None) -> AsyncIterator[Tuple[str, Any]]:
+        """从 start_id 之后开始持续按顺序迭代消息，每次批量读取 count 条，没有新消息时阻塞等待"""
+        ...
+
+    async def pop(self, block_ms: int = None) -> Tuple[str, Any]:
+        """获取并移出消息队列中的第一条消息，传递 block_ms 时阻塞等待新消息
+
+        至少一次投递的队列(如 Redis 消费者组模式)中，pop 取出的消息在调用 ack 之前仍保留在队列中，
+        处理完成后必须调用 ack，否则消息会在空闲超时后被重新投递；其他队列中 ack 为空操作。
+        """
+        ...
+
+    async def ack(self, message_id: str) -> bool:
+        """确认消息已处理完成，支持至少一次投递的队列在确认前会将消息重新投递给其他消费者"""
         ...
 
     async def clear(self) -> None:
@@ -26,7 +46,7 @@ class MessageQueue(Protocol):
         ...
 
     async def size(self) -> int:
-        """获取消息队列的长度"""
+        """获取消息队列中尚未被取出的消息数，已取出但未确认的消息不计算在内"""
         ...
 
     async def delete_message(self, message_id: str) -> bool:
@@ -59,8 +59,8 @@ class Task(Protocol):
         ...
 
     @classmethod
-    def create(cls, task_runner: TaskRunner) -> "Task":
-        """类方法，根据传递的任务运行器创建任务"""
+    def create(cls, task_runner: TaskRunner, task_id: Optional[str] = None) -> "Task":
+        """类方法，根据传递的任务运行器创建任务，传递 task_id 时使用原任务 ID 恢复中断的任务"""
         ...
     
     @classmethod
@@ -0,0 +1,25 @@
+from typing import Optional, Protocol
+
+class TaskLease(Protocol):
+    """任务租约协议，同一个任务同一时间只能被一个进程运行，运行期间由任务运行器定期续期"""
+
+    @property
+    def ttl_seconds(self) -> float:
+        """租约的有效期，持有者需要在有效期内续期"""
+        ...
+
+    async def acquire(self, task_id: str) -> Optional[str]:
+        """获取任务的租约，成功时返回持有凭证，租约被其他持有者占用时返回 None"""
+        ...
+
+    async def renew(self, task_id: str, token: str) -> bool:
+        """使用持有凭证为租约续期，租约已过期或被其他持有者获取时返回 False"""
+        ...
+
+    async def release(self, task_id: str, token: str) -> bool:
+        """使用持有凭证释放租约"""
+        ...
+
+    async def is_held(self, task_id: str) -> bool:
+        """判断任务的租约是否被持有(任务正在某个进程中运行)"""
+        ...
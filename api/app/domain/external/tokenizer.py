@@ -0,0 +1,8 @@
+from typing import Protocol
+
+class Tokenizer(Protocol):
+    """本地分词器协议，用于估算文本的 token 数"""
+
+    def count(self, text: str) -> int:
+        """返回传递文本的 token 数"""
+        ...
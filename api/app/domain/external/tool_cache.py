@@ -0,0 +1,14 @@
+from typing import Optional, Protocol
+
+from app.domain.models.tool_result import ToolResult
+
+class ToolResultCache(Protocol):
+    """工具结果缓存协议，用于进程内或跨节点共享的工具结果缓存"""
+
+    async def get(self, key: str) -> Optional[ToolResult]:
+        """根据缓存键获取工具结果，未命中或已过期时返回 None"""
+        ...
+
+    async def set(self, key: str, result: ToolResult, ttl_seconds: float) -> None:
+        """写入工具结果并设置过期时间"""
+        ...
@@ -9,12 +9,59 @@ class LLMConfig(BaseModel):
     model_name: str = "deepseek-reasoner" # 推理模型如果传递了 tools 底层会自动切换为 chat 模型
     temperature: float = Field(default=0.7)  # 温度
     max_tokens: int = Field(default=8192, ge=0) # 最大输出 token 数
+    parallel_tool_calls: bool = False # 是否允许 LLM 在一轮回复中返回多个工具调用
+
+class LLMEndpointConfig(LLMConfig):
+    """多端点路由中单个 LLM 端点的配置"""
+    enabled: bool = True # 是否启用该端点
+
+class LLMRouterConfig(BaseModel):
+    """多端点 LLM 路由配置，根据各端点的延迟与错误率选择最快的健康端点"""
+    endpoints: Dict[str, LLMEndpointConfig] = Field(default_factory=dict) # 端点名字 -> 端点配置
+    window_size: int = Field(default=100, gt=0) # 统计延迟与错误率的滑动窗口大小
+    min_samples: int = Field(default=5, gt=0) # 判断端点是否健康所需的最少样本数
+    error_rate_threshold: float = Field(default=0.5, gt=0, le=1) # 错误率超过该值时端点进入冷却
+    cooldown_seconds: float = Field(default=30, ge=0) # 端点不健康时的冷却时间
+    hedge_enabled: bool = False # 是否开启对冲请求
+    hedge_percentile: float = Field(default=95, gt=0, lt=100) # 首个请求超过该延迟分位数时发起对冲请求
+    hedge_min_samples: int = Field(default=20, gt=0) # 发起对冲请求所需的最少延迟样本数
+
+class ReplanMode(str, Enum):
+    """子步骤完成后的重新规划策略"""
+    ALWAYS = "always" # 每批子步骤完成后都更新规划
+    ON_FAILURE = "on_failure" # 只在子步骤失败时更新规划
+    ON_DIVERGENCE = "on_divergence" # 子步骤失败或结果偏离预期(启发式判断)时更新规划
+    EVERY_N = "every_n" # 子步骤失败或每完成 N 个子步骤时更新规划
+
+class PlanEventMode(str, Enum):
+    """规划事件的输出方式"""
+    SNAPSHOT = "snapshot" # 每次都输出完整的规划
+    DIFF = "diff" # 输出与上一次规划的差异，并定期输出完整快照用于客户端重新同步
 
 class AgentConfig(BaseModel):
     """Agent 通用配置"""
     max_iterations: int = Field(default=100, gt=0, lt=100) # 最大迭代次数
     max_retries: int = Field(default=3, gt=1, lt=10) # LLM/工具的最大重试次数
     max_search_results: int = Field(default=10, gt=1, lt=30) # 最大搜索结果数
+    stream: bool = False # 是否开启流式输出，开启后会返回消息增量事件
+    max_context_tokens: int = Field(default=65536, gt=0) # 模型上下文窗口大小，发送给 LLM 的消息会被裁剪到该预算内
+    memory_summarize: bool = False # 是否开启记忆摘要，开启后记忆超出阈值时使用 LLM 将早期步骤折叠为摘要
+    memory_summarize_tokens: int = Field(default=32768, gt=0) # 触发记忆摘要的 token 数阈值
+    memory_keep_recent: int = Field(default=6, ge=0) # 折叠记忆时保留的最近消息条数
+    parallel_tool_calls: bool = False # 是否并行执行同一轮回复中的多个工具调用(需要 LLM 同时开启 parallel_tool_calls)，并发数由工具声明的 max_concurrency 在进程内统一限制
+    max_parallel_steps: int = Field(default=1, gt=0) # 同时执行的最大步骤数，大于 1 时依赖已满足的步骤会在独立的 Agent 上并行执行
+    max_prompt_tokens: int = Field(default=0, ge=0) # 单个任务的最大 prompt token 数(按本地估算)，0 表示不限制
+    max_completion_tokens: int = Field(default=0, ge=0) # 单个任务的最大 completion token 数(按本地估算)，0 表示不限制
+    max_task_seconds: float = Field(default=0, ge=0) # 单个任务的最大运行时长，0 表示不限制
+    max_tool_calls: int = Field(default=0, ge=0) # 单个任务的最大工具调用次数，0 表示不限制
+    budget_wind_down_ratio: float = Field(default=0.9, gt=0, le=1) # 预算使用比例达到该值时停止执行剩余步骤并汇总结果
+    replan_mode: ReplanMode = ReplanMode.ALWAYS # 子步骤完成后的重新规划策略
+    replan_every_n_steps: int = Field(default=3, gt=0) # every_n 策略下每完成多少个子步骤更新一次规划
+    plan_event_mode: PlanEventMode = PlanEventMode.SNAPSHOT # 规划事件的输出方式
+    plan_snapshot_interval: int = Field(default=10, gt=0) # diff 模式下每隔多少个规划事件输出一次完整快照
+    tool_result_offload_chars: int = Field(default=16000, ge=0) # 工具结果超过该字符数时写入大对象存储(需要配置存储)，0 表示不单独存储
+    tool_result_preview_chars: int = Field(default=1000, ge=0) # 单独存储的工具结果在记忆中保留的预览字符数
+    checkpoint_turn_interval: int = Field(default=5, ge=0) # 规划与步骤状态未变化时每隔多少轮 LLM 回复保存一次检查点，0 表示只在状态变化时保存
 
 class MCPTransport(str, Enum):
     """MCP 传输类型枚举"""
@@ -62,6 +109,7 @@ class AppConfig(BaseModel):
     llm_config: LLMConfig
     agent_config: AgentConfig
     mcp_config: MCPConfig
+    llm_router_config: LLMRouterConfig = Field(default_factory=LLMRouterConfig)
 
     # Pydantic 配置，允许传递额外的字段初始化
     model_config = ConfigDict(extra="allow")
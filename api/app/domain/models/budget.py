@@ -0,0 +1,93 @@
+import time
+from typing import Optional
+
+from pydantic import BaseModel, Field, PrivateAttr
+
+from app.domain.models.app_config import AgentConfig
+
+
+class TaskBudget(BaseModel):
+    """单个任务的资源预算，限制 prompt/completion token 数、运行时长与工具调用次数，0 表示不限制
+
+    任一预算的使用比例达到 wind_down_ratio 时视为预算不足，流程停止执行剩余子步骤并汇总已有结果，
+    预留的余量用于完成汇总；预算耗尽后 Agent 不再发起新的 LLM 调用。
+    """
+    max_prompt_tokens: int = Field(default=0, ge=0) # 最大 prompt token 数
+    max_completion_tokens: int = Field(default=0, ge=0) # 最大 completion token 数
+    max_seconds: float = Field(default=0, ge=0) # 最大运行时长(不含等待用户输入的时间)
+    max_tool_calls: int = Field(default=0, ge=0) # 最大工具调用次数
+    wind_down_ratio: float = Field(default=0.9, gt=0, le=1) # 进入收尾阶段的预算使用比例
+    prompt_tokens: int = 0 # 已使用的 prompt token 数
+    completion_tokens: int = 0 # 已使用的 completion token 数
+    tool_calls: int = 0 # 已调用工具的次数
+    elapsed_seconds: float = 0 # 已运行时长(不含当前这段运行)
+    winding_down: bool = False # 是否处于收尾阶段
+    _started_at: Optional[float] = PrivateAttr(default=None) # 当前这段运行的开始时间
+
+    @classmethod
+    def from_agent_config(cls, agent_config: AgentConfig) -> "TaskBudget":
+        """根据 Agent 配置创建任务预算"""
+        return cls(
+            max_prompt_tokens=agent_config.max_prompt_tokens,
+            max_completion_tokens=agent_config.max_completion_tokens,
+            max_seconds=agent_config.max_task_seconds,
+            max_tool_calls=agent_config.max_tool_calls,
+            wind_down_ratio=agent_config.budget_wind_down_ratio,
+        )
+
+    @property
+    def limited(self) -> bool:
+        """是否设置了任一预算"""
+        return any([self.max_prompt_tokens, self.max_completion_tokens, self.max_seconds, self.max_tool_calls])
+
+    @property
+    def seconds(self) -> float:
+        """任务累计运行时长"""
+        if self._started_at is None:
+            return self.elapsed_seconds
+        return self.elapsed_seconds + time.monotonic() - self._started_at
+
+    def start(self) -> None:
+        """开始计时，流程每次运行时调用"""
+        if self._started_at is None:
+            self._started_at = time.monotonic()
+
+    def pause(self) -> None:
+        """暂停计时，流程等待用户输入或结束时调用"""
+        if self._started_at is not None:
+            self.elapsed_seconds += time.monotonic() - self._started_at
+            self._started_at = None
+
+    def record_llm(self, prompt_tokens: int, completion_tokens: int) -> None:
+        """记录一次 LLM 调用使用的 token 数"""
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+
+    def record_tool_calls(self, count: int = 1) -> None:
+        """记录工具调用次数"""
+        self.tool_calls += count
+
+    def _check_llm(self, ratio: float) -> Optional[str]:
+        """检查 token 与运行时长预算的使用比例是否达到 ratio，返回第一个达到的预算说明"""
+        usages = [
+            ("prompt token", self.prompt_tokens, self.max_prompt_tokens),
+            ("completion token", self.completion_tokens, self.max_completion_tokens),
+            ("运行时长(秒)", self.seconds, self.max_seconds),
+        ]
+        for name, used, limit in usages:
+            if limit and used >= limit * ratio:
+                return f"{name} {used:.0f}/{limit:.0f}"
+        return None
+
+    def exhausted(self) -> Optional[str]:
+        """token 或运行时长预算是否已耗尽(不能再调用 LLM)，耗尽时返回说明"""
+        return self._check_llm(1)
+
+    def running_low(self, tool_calls: int = 0) -> Optional[str]:
+        """预算是否不足：token/运行时长达到收尾比例，或者再发起 tool_calls 个(至少 1 个)工具调用会超出收尾比例"""
+        reason = self._check_llm(self.wind_down_ratio)
+        if reason:
+            return reason
+        if self.max_tool_calls and self.tool_calls + max(tool_calls, 1) > self.max_tool_calls * self.wind_down_ratio:
+            return f"工具调用次数 {self.tool_calls}/{self.max_tool_calls}"
+        return None
@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from app.domain.models.budget import TaskBudget
+from app.domain.models.memory import Memory
+from app.domain.models.message import Message
+from app.domain.models.plan import Plan
+
+
+class Checkpoint(BaseModel):
+    """任务检查点，记录流程恢复执行所需的最小状态：规划(含步骤状态与结果)、Agent 记忆以及用户消息"""
+    task_id: str # 任务 ID
+    sequence: int = 0 # 检查点序号，每次保存递增
+    status: str = "" # 流程的执行状态
+    waiting: bool = False # 流程是否在等待用户输入
+    message: Optional[Message] = None # 当前正在处理的用户消息
+    plan: Optional[Plan] = None # 规划
+    planner_memory: Memory = Field(default_factory=Memory) # PlannerAgent 的记忆
+    react_memory: Memory = Field(default_factory=Memory) # ReActAgent 的记忆
+    budget: Optional[TaskBudget] = None # 任务预算及使用量
+    created_at: datetime = Field(default_factory=datetime.now) # 检查点创建时间
@@ -5,7 +5,7 @@ from pydantic import BaseModel, Field
 import uuid
 
 from app.domain.models.file import File
-from app.domain.models.plan import Plan, Step
+from app.domain.models.plan import Plan, PlanDiff, Step
 from app.domain.models.tool_result import ToolResult
 
 class PlanEventStatus(str, Enum):
@@ -36,6 +36,15 @@ class PlanEvent(BaseEvent):
     type: Literal["plan"] = "plan"
     plan: Plan # 规划
     status: PlanEventStatus = PlanEventStatus.CREATED # 规划事件状态
+    sequence: int = 0 # 规划事件序号，规划差异事件依赖该序号检测丢失的事件
+
+class PlanDiffEvent(BaseEvent):
+    """规划差异事件：只携带与上一个规划事件相比发生变化的内容"""
+    type: Literal["plan_diff"] = "plan_diff"
+    plan_id: str # 规划 ID
+    diff: PlanDiff # 与上一个规划事件的差异
+    status: PlanEventStatus = PlanEventStatus.UPDATED # 规划事件状态
+    sequence: int = 0 # 规划事件序号，必须紧跟上一个规划事件的序号
 
 class TitleEvent(BaseEvent):
     """标题事件"""
@@ -55,6 +64,14 @@ class MessageEvent(BaseEvent):
     message: str = "" # 消息本身
     attachments: List[File] = Field(default_factory=list) # 附件列表
 
+class MessageDeltaEvent(BaseEvent):
+    """消息增量事件：流式输出时 ai 消息的部分内容"""
+    type: Literal["message_delta"] = "message_delta"
+    role: Literal["user", "assistent"] = "assistent" # 消息角色
+    message_id: str = "" # 增量所属消息的 ID，同一次 LLM 调用的增量共享同一个 ID
+    delta: str = "" # 消息增量内容
+    aborted: bool = False # 为 True 时该 ID 已发送的增量作废(LLM 调用重试或回复为空)，客户端应丢弃
+
 class BrowserToolContent(BaseModel):
     """浏览器工具扩展内容"""
     screenshot: str # 浏览器快照截图
@@ -77,6 +94,8 @@ class ToolEvent(BaseEvent):
     function_args: Dict[str, Any] # LLM 生成的工具调用参数
     function_result: Optional[ToolResult] = None # 工具调用结果
     status: ToolEventStatus = ToolEventStatus.CALLING # 工具事件状态
+    cached: bool = False # 工具结果是否来自缓存
+    timed_out: bool = False # 工具调用是否超时
 
 class WaitEvent(BaseEvent):
     """等待事件：等待用户输入确认"""
@@ -95,9 +114,11 @@ class DoneEvent(BaseEvent):
 # 定义应用事件类型声明
 Event = Union[
     PlanEvent,
+    PlanDiffEvent,
     TitleEvent,
     StepEvent,
     MessageEvent,
+    MessageDeltaEvent,
     ToolEvent,
     WaitEvent,
     ErrorEvent,
@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+
+
+class LLMEndpointStats(BaseModel):
+    """多端点路由中单个 LLM 端点的运行统计"""
+    name: str = Field(default="", description="端点名字")
+    model_name: str = Field(default="", description="端点使用的模型名字")
+    healthy: bool = Field(default=True, description="端点当前是否健康")
+    requests: int = Field(default=0, description="累计请求次数")
+    errors: int = Field(default=0, description="累计错误次数")
+    hedged: int = Field(default=0, description="作为对冲请求被调用的次数")
+    in_flight: int = Field(default=0, description="当前正在执行的请求数")
+    error_rate: float = Field(default=0.0, description="滑动窗口内的错误率")
+    p50_ms: float = Field(default=0.0, description="滑动窗口内的 p50 延迟，单位毫秒")
+    p99_ms: float = Field(default=0.0, description="滑动窗口内的 p99 延迟，单位毫秒")
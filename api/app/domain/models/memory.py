@@ -1,47 +1,209 @@
-from typing import Any, Dict, List, Optional
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+import copy
+import json
 import logging
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
+
+from app.domain.external.tokenizer import Tokenizer
 
 logger = logging.getLogger(__name__)
 
+# 每条消息除内容外的固定开销(角色、分隔符等)
+MESSAGE_TOKEN_OVERHEAD = 4
+
+# 压缩后的工具结果标记，用于保证重复压缩时结果不变
+REMOVED_CONTENT = "(REMOVED)"
+TRUNCATED_SUFFIX = "...(内容过长已截断)"
+
+class CompactMode(str, Enum):
+    """工具结果的压缩方式"""
+    KEEP = "keep" # 始终保留
+    DROP = "drop" # 移除结果
+    TRUNCATE = "truncate" # 截断结果
+    KEEP_LAST = "keep_last" # 只保留最近 N 次调用的结果
+    SUMMARIZE = "summarize" # 保留结果，直到记忆触发摘要折叠时由 LLM 汇总进摘要
+
+class CompactPolicy(BaseModel):
+    """工具结果在记忆中的保留策略，通过 @tool 装饰器声明"""
+    mode: CompactMode = CompactMode.KEEP # 压缩方式
+    min_age: int = Field(default=1, ge=0) # 工具结果之后至少经过多少轮 AI 回复才进行压缩
+    max_chars: int = Field(default=1000, gt=0) # truncate 模式下保留的最大字符数
+    keep_last: int = Field(default=1, ge=0) # keep_last 模式下保留最近多少次调用的结果
+
+def estimate_tokens(text: str) -> int:
+    """在没有分词器时粗略估算 token 数：中日韩字符按 1 个 token 计算，其余字符按 4 个字符 1 个 token 计算"""
+    cjk = sum(1 for char in text if "\u2e80" <= char <= "\u9fff" or "\uac00" <= char <= "\ud7af")
+    return cjk + (len(text) - cjk + 3) // 4
+
 class Memory(BaseModel):
     """记忆类，定义 Agent 的记忆基础信息"""
     messages: List[Dict[str, Any]] = Field(default_factory=list)
+    _tokenizer: Optional[Tokenizer] = PrivateAttr(default=None) # 分词器，为空时使用 estimate_tokens 估算
+    _token_counts: List[int] = PrivateAttr(default_factory=list) # 与 messages 一一对应的 token 数
 
     def get_message_role(self, message: Dict[str, Any]) -> str:
         """根据传递的消息来获取信息的角色信息"""
         return message.get("role")
 
+    def set_tokenizer(self, tokenizer: Optional[Tokenizer]) -> None:
+        """设置分词器并重新计算所有消息的 token 数"""
+        self._tokenizer = tokenizer
+        self._token_counts = [self.count_message_tokens(message) for message in self.messages]
+
+    def count_tokens(self, text: str) -> int:
+        """计算文本的 token 数"""
+        if self._tokenizer is not None:
+            return self._tokenizer.count(text)
+        return estimate_tokens(text)
+
+    def count_message_tokens(self, message: Dict[str, Any]) -> int:
+        """计算单条消息的 token 数，包含内容、工具调用以及固定开销"""
+        tokens = MESSAGE_TOKEN_OVERHEAD
+        content = message.get("content")
+        if content:
+            tokens += self.count_tokens(content if isinstance(content, str) else json.dumps(content, ensure_ascii=False))
+        if message.get("tool_calls"):
+            tokens += self.count_tokens(json.dumps(message["tool_calls"], ensure_ascii=False))
+        return tokens
+
+    def _get_token_counts(self) -> List[int]:
+        """获取所有消息的 token 数，messages 被外部直接修改导致数量不一致时重新计算"""
+        if len(self._token_counts) != len(self.messages):
+            self._token_counts = [self.count_message_tokens(message) for message in self.messages]
+        return self._token_counts
+
     def add_message(self, message: Dict[str, Any]) -> None:
         """往记忆中添加一条消息"""
+        token_counts = self._get_token_counts()
         self.messages.append(message)
+        token_counts.append(self.count_message_tokens(message))
 
     def add_messages(self, messages: List[Dict[str, Any]]) -> None:
         """往记忆中添加多条消息"""
-        self.messages.extend(messages)
+        for message in messages:
+            self.add_message(message)
 
     def get_messages(self) -> List[Dict[str, Any]]:
         return self.messages
 
+    def get_messages_within(self, max_tokens: int) -> List[Dict[str, Any]]:
+        """获取不超过 max_tokens 的消息列表：保留系统消息和尽可能多的最新消息，且不以孤立的工具结果开头"""
+        token_counts = self._get_token_counts()
+        if sum(token_counts) <= max_tokens:
+            return self.messages
+
+        # 1. 系统消息始终保留
+        head = 1 if self.messages and self.get_message_role(self.messages[0]) == "system" else 0
+        budget = max_tokens - sum(token_counts[:head])
+
+        # 2. 从最新的消息开始倒序累加，直到超出预算
+        start = len(self.messages)
+        while start > head and token_counts[start - 1] <= budget:
+            budget -= token_counts[start - 1]
+            start -= 1
+
+        # 3. 工具结果必须紧跟对应的工具调用消息，截断后开头的工具结果需要一并丢弃
+        while start < len(self.messages) and self.get_message_role(self.messages[start]) == "tool":
+            start += 1
+
+        # 4. 预算内没有完整的消息时，最新的消息始终保留，以工具结果结尾时连同对应的工具调用消息一起保留(超出的部分由调用方压缩)
+        if start == len(self.messages):
+            start = len(self.messages) - 1
+            while start > head and self.get_message_role(self.messages[start]) == "tool":
+                start -= 1
+
+        logger.debug(f"记忆超出上下文预算 {max_tokens}，截断最早的 {start - head} 条消息")
+        return self.messages[:head] + self.messages[start:]
+
+    def fork(self) -> "Memory":
+        """复制一份独立的记忆，用于并行执行的 Agent，复制的记忆共享同一个分词器"""
+        memory = Memory(messages=copy.deepcopy(self.messages))
+        memory._tokenizer = self._tokenizer
+        memory._token_counts = list(self._get_token_counts())
+        return memory
+
     def get_last_message(self) -> Optional[Dict[str, Any]]:
         return self.messages[-1] if len(self.messages) > 0 else None
 
     def roll_back(self) -> None:
+        token_counts = self._get_token_counts()
         self.messages = self.messages[:-1]
+        self._token_counts = token_counts[:-1]
+
+    def _compact_content(self, content: Any, policy: CompactPolicy, keep: bool) -> Any:
+        """根据保留策略压缩单条工具结果，返回压缩后的内容"""
+        if policy.mode == CompactMode.DROP or (policy.mode == CompactMode.KEEP_LAST and not keep):
+            return REMOVED_CONTENT
+
+        if policy.mode == CompactMode.TRUNCATE:
+            text = content if isinstance(content, str) else json.dumps(content, ensure_ascii=False)
+            if len(text) > policy.max_chars and not text.endswith(TRUNCATED_SUFFIX):
+                return text[:policy.max_chars] + TRUNCATED_SUFFIX
+
+        return content
+
+    def compact(self, policies: Optional[Dict[str, CompactPolicy]] = None) -> None:
+        """记忆压缩，按照工具声明的保留策略压缩已经执行过的工具(搜索/网页源码获取/浏览器访问结果)消息"""
+        policies = policies or {}
+        token_counts = self._get_token_counts()
+
+        # 1. 倒序遍历，统计每条工具结果之后的 AI 回复轮数(年龄)以及同名工具出现的次数
+        age = 0
+        seen: Dict[str, int] = {}
+        for index in range(len(self.messages) - 1, -1, -1):
+            message = self.messages[index]
+            role = self.get_message_role(message)
+            if role == "assistant":
+                age += 1
+                continue
+            if role != "tool":
+                continue
 
-    def compact(self) -> None:
-        """记忆压缩，将记忆中已经执行的工具(搜索/网页源码获取/浏览器访问结果)这类已经执行过的消息进行压缩简化"""
-        for message in self.messages:
-            if self.get_message_role(message) == "tool":
-                # todo: 工具的名字待定
-                if message.get("function_name") in []:
-                    # todo: 工具的调用结果待确定
-                    message["content"] = "(REMOVED)"
-                    logger.debug(f"从记忆中移除对应工具的结果: {message['function_name']}")
+            function_name = message.get("function_name")
+            seen[function_name] = seen.get(function_name, 0) + 1
+            policy = policies.get(function_name)
+            if policy is None or policy.mode in [CompactMode.KEEP, CompactMode.SUMMARIZE] or age < policy.min_age:
+                continue
+
+            # 2. 根据策略压缩工具结果并更新 token 数
+            content = self._compact_content(message.get("content"), policy, seen[function_name] <= policy.keep_last)
+            if content != message.get("content"):
+                message["content"] = content
+                token_counts[index] = self.count_message_tokens(message)
+                logger.debug(f"按照 {policy.mode.value} 策略压缩工具[{function_name}]的结果")
+
+    def get_foldable_range(self, keep_recent: int) -> Tuple[int, int]:
+        """获取可以折叠为摘要的消息区间[start, end)，保留系统消息与最近 keep_recent 条消息
+
+        区间结束于一条用户消息或一条发起工具调用的助手消息之前，工具调用消息与其工具结果总是相邻，
+        因此在这两种边界处切分不会拆散工具调用/工具结果对，单个步骤内的多轮工具调用也可以被折叠。
+        """
+        start = 1 if self.messages and self.get_message_role(self.messages[0]) == "system" else 0
+        end = len(self.messages) - keep_recent
+        while start < end < len(self.messages) and not self._is_fold_boundary(self.messages[end]):
+            end -= 1
+        return start, max(start, end)
+
+    def _is_fold_boundary(self, message: Dict[str, Any]) -> bool:
+        """判断折叠区间能否结束于该消息之前：用户消息或开启新一轮工具调用的助手消息"""
+        role = self.get_message_role(message)
+        return role == "user" or (role == "assistant" and bool(message.get("tool_calls")))
+
+    def fold(self, start: int, end: int, summary: str) -> None:
+        """将 [start, end) 区间内的消息折叠为一条摘要消息"""
+        token_counts = self._get_token_counts()
+        digest = {"role": "user", "content": f"以下是之前执行过程的摘要：\n{summary}"}
+        self.messages[start:end] = [digest]
+        token_counts[start:end] = [self.count_message_tokens(digest)]
+        logger.debug(f"将记忆中的 {end - start} 条消息折叠为摘要")
+
+    @property
+    def total_tokens(self) -> int:
+        """记忆中所有消息的 token 总数"""
+        return sum(self._get_token_counts())
 
     @property
     def empty(self) -> bool:
         """检查记忆是否为空"""
         return len(self.messages) == 0
-    
-    
\ No newline at end of file
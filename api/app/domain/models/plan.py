@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field
 import uuid
 
@@ -19,6 +19,7 @@ class Step(BaseModel):
     error: Optional[str] = None # 错误信息
     success: bool = False # 是否执行成功
     attachments: List[str] = Field(default_factory=list) # 附件列表信息
+    dependencies: List[str] = Field(default_factory=list) # 依赖的步骤 ID 列表，依赖全部结束后才能执行
 
     @property
     def done(self) -> bool:
@@ -26,6 +27,20 @@ class Step(BaseModel):
         return self.status in [ExecutionStatus.COMPLETED, ExecutionStatus.FAILED]
 
 
+class PlanDiff(BaseModel):
+    """两个规划快照之间的差异，只记录发生变化的内容"""
+    fields: Dict[str, Any] = Field(default_factory=dict) # 规划自身发生变化的字段(不含 steps)
+    added: List[Step] = Field(default_factory=list) # 新增的步骤
+    removed: List[str] = Field(default_factory=list) # 移除的步骤 ID
+    changed: Dict[str, Dict[str, Any]] = Field(default_factory=dict) # 步骤 ID -> 发生变化的字段
+    order: Optional[List[str]] = None # 步骤顺序发生变化时的新顺序
+
+    @property
+    def empty(self) -> bool:
+        """差异是否为空"""
+        return not (self.fields or self.added or self.removed or self.changed or self.order is not None)
+
+
 class Plan(BaseModel):
     """规划领域模型，用于存储用户传递消息拆分出来的子任务/子步骤"""
     id: str = Field(default_factory=lambda: str(uuid.uuid4())) # 计划 ID
@@ -43,6 +58,65 @@ class Plan(BaseModel):
         """计划是否结束"""
         return self.status in [ExecutionStatus.COMPLETED, ExecutionStatus.FAILED]
 
+    def get_ready_steps(self) -> List[Step]:
+        """获取所有可以执行的步骤：未结束且依赖的步骤均已结束，不存在的依赖会被忽略"""
+        done_ids = {step.id for step in self.steps if step.done}
+        step_ids = {step.id for step in self.steps}
+        return [
+            step for step in self.steps
+            if not step.done and all(
+                dependency in done_ids or dependency not in step_ids or dependency == step.id
+                for dependency in step.dependencies
+            )
+        ]
+
     def get_next_step(self) -> Optional[Step]:
-        """获取下一个执行步骤"""
-        return next((step for step in self.steps if not step.done), None)
\ No newline at end of file
+        """获取下一个执行步骤，优先返回依赖已满足的步骤，依赖存在环时按顺序返回第一个未结束的步骤"""
+        ready_steps = self.get_ready_steps()
+        if ready_steps:
+            return ready_steps[0]
+        return next((step for step in self.steps if not step.done), None)
+
+    def diff(self, new_plan: "Plan") -> PlanDiff:
+        """计算从当前规划到新规划的差异，步骤按 ID 对比"""
+        diff = PlanDiff()
+        old_data = self.model_dump(mode="json", exclude={"steps"})
+        for key, value in new_plan.model_dump(mode="json", exclude={"steps"}).items():
+            if old_data.get(key) != value:
+                diff.fields[key] = value
+
+        old_steps = {step.id: step.model_dump(mode="json") for step in self.steps}
+        new_ids = [step.id for step in new_plan.steps]
+        for step in new_plan.steps:
+            old_step = old_steps.get(step.id)
+            if old_step is None:
+                diff.added.append(step.model_copy(deep=True))
+                continue
+            changed = {key: value for key, value in step.model_dump(mode="json").items() if old_step.get(key) != value}
+            if changed:
+                diff.changed[step.id] = changed
+
+        # 保留的步骤维持原顺序、新增的步骤追加在末尾时不需要记录顺序
+        diff.removed = [step_id for step_id in old_steps if step_id not in new_ids]
+        kept_ids = [step_id for step_id in old_steps if step_id in new_ids]
+        if new_ids != kept_ids + [step.id for step in diff.added]:
+            diff.order = new_ids
+        return diff
+
+    def apply_diff(self, diff: PlanDiff) -> "Plan":
+        """将差异应用到当前规划的副本上并返回新规划"""
+        data = self.model_dump(mode="json", exclude={"steps"})
+        data.update(diff.fields)
+        steps = {}
+        for step in self.steps:
+            if step.id in diff.removed:
+                continue
+            step_data = step.model_dump(mode="json")
+            step_data.update(diff.changed.get(step.id, {}))
+            steps[step.id] = Step.model_validate(step_data)
+        for step in diff.added:
+            steps[step.id] = step.model_copy(deep=True)
+
+        order = diff.order if diff.order is not None else list(steps)
+        data["steps"] = [steps[step_id] for step_id in order if step_id in steps]
+        return Plan.model_validate(data)
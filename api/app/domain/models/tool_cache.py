@@ -0,0 +1,36 @@
+import hashlib
+import json
+from enum import Enum
+from typing import Any, Callable, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ToolCacheScope(str, Enum):
+    """工具结果缓存范围"""
+    TASK = "task" # 任务内缓存，保存在工具集实例上，随任务结束释放
+    PROCESS = "process" # 进程内缓存，同一进程的所有任务共享
+    REDIS = "redis" # Redis 缓存，多个节点共享
+
+class ToolCachePolicy(BaseModel):
+    """工具结果缓存策略，通过 @tool 装饰器声明"""
+    enabled: bool = True # 是否缓存工具结果
+    ttl_seconds: float = Field(default=300, gt=0) # 缓存过期时间
+    scope: ToolCacheScope = ToolCacheScope.TASK # 缓存范围
+    key_normalizer: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None # 计算缓存键前对参数的规范化处理
+
+def normalize_tool_arguments(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """默认的参数规范化：去除空值和字符串首尾空白"""
+    return {
+        key: value.strip() if isinstance(value, str) else value
+        for key, value in arguments.items()
+        if value is not None
+    }
+
+def tool_cache_key(tool_name: str, arguments: Dict[str, Any], policy: ToolCachePolicy) -> str:
+    """根据工具名字和规范化后的参数计算缓存键"""
+    normalized = normalize_tool_arguments(arguments)
+    if policy.key_normalizer is not None:
+        normalized = policy.key_normalizer(normalized)
+    payload = json.dumps(normalized, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return f"{tool_name}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
@@ -1,5 +1,5 @@
 from typing import Any, Generic, Optional, TypeVar
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 T = TypeVar("T")
 
@@ -7,4 +7,16 @@ class ToolResult(BaseModel, Generic[T]):
     """工具结果领域模型"""
     success: bool = True # 是否成功调用
     message: Optional[str] = None # 额外的信息提示
-    data: Optional[T] = None # 工具的执行结果/数据
\ No newline at end of file
+    data: Optional[T] = None # 工具的执行结果/数据
+    cached: bool = Field(default=False, exclude=True) # 是否来自缓存，不参与序列化，避免写入记忆
+    timed_out: bool = Field(default=False, exclude=True) # 是否因超时被取消，不参与序列化，超时原因记录在 message 中
+
+class ToolStats(BaseModel):
+    """单个工具的调用统计信息"""
+    calls: int = 0 # 实际执行次数(不含缓存命中)
+    cache_hits: int = 0 # 缓存命中次数
+    timeouts: int = 0 # 超时次数
+    errors: int = 0 # 抛出异常的次数
+    in_flight: int = 0 # 当前正在执行的调用数
+    max_in_flight: int = 0 # 同时执行的最大调用数
+    total_seconds: float = 0 # 累计执行耗时
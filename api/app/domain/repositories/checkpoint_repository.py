@@ -0,0 +1,22 @@
+from typing import List, Optional, Protocol
+
+from app.domain.models.checkpoint import Checkpoint
+
+class CheckpointRepository(Protocol):
+    """任务检查点仓库接口"""
+
+    async def save(self, checkpoint: Checkpoint) -> None:
+        """保存任务的最新检查点，覆盖之前的检查点"""
+        ...
+
+    async def load(self, task_id: str) -> Optional[Checkpoint]:
+        """加载任务的最新检查点，不存在时返回 None"""
+        ...
+
+    async def delete(self, task_id: str) -> None:
+        """删除任务的检查点"""
+        ...
+
+    async def list_task_ids(self) -> List[str]:
+        """列出所有存在检查点的任务 ID，用于进程重启后恢复运行中的任务"""
+        ...
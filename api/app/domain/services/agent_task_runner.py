@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from typing import AsyncGenerator, Optional
+
+from app.domain.external.task import Task, TaskRunner
+from app.domain.external.task_lease import TaskLease
+from app.domain.models.event import BaseEvent
+from app.domain.models.message import Message
+from app.domain.repositories.checkpoint_repository import CheckpointRepository
+from app.domain.services.flows.base import FlowStatus
+from app.domain.services.flows.planner_react import PlannerReActFlow
+
+logger = logging.getLogger(__name__)
+
+
+class AgentTaskRunner(TaskRunner):
+    """Agent 任务运行器，从任务输入流中逐条取出用户消息交给 PlannerReActFlow 处理，并将流程事件写入任务输出流
+
+    1. 传递检查点仓库时，运行前先加载任务的检查点，恢复流程状态后继续执行中断的规划；
+    2. 输入流超过 input_block_ms 没有新消息时结束运行，等待用户输入的流程保留检查点，
+       收到新消息时使用原任务 ID 重新创建任务即可从检查点继续执行；
+    3. 每条消息处理完成后才调用 ack 确认，处理中途进程崩溃的消息可以被重新领取；
+    4. 任务结束时流程已完成(检查点已删除、不会再恢复)，删除流程单独存储的工具结果；
+    5. 传递任务租约时，运行期间每隔 1/3 有效期续期一次，运行结束(包括取消)后释放租约。
+    """
+
+    def __init__(
+        self,
+        flow: PlannerReActFlow, # 任务对应的流程，创建时需要传递相同的 task_id 与检查点仓库
+        checkpoint_repository: Optional[CheckpointRepository] = None, # 检查点仓库，为空时不从检查点恢复
+        input_block_ms: int = 5000, # 每次等待新的用户消息的时间
+        task_lease: Optional[TaskLease] = None, # 任务租约，为空时不做跨进程互斥
+        lease_token: Optional[str] = None, # 创建任务前获取到的租约凭证
+    ) -> None:
+        self._flow = flow
+        self._checkpoint_repository = checkpoint_repository
+        self._input_block_ms = input_block_ms
+        self._task_lease = task_lease if lease_token else None
+        self._lease_token = lease_token
+
+    @property
+    def flow(self) -> PlannerReActFlow:
+        """只读属性，返回任务对应的流程"""
+        return self._flow
+
+    async def _put_events(self, task: Task, events: AsyncGenerator[BaseEvent, None]) -> None:
+        """将流程产生的事件按顺序写入任务的输出流"""
+        async for event in events:
+            await task.output_stream.put(event.model_dump_json())
+
+    async def _restore(self, task: Task) -> None:
+        """加载任务的检查点，存在时恢复流程状态并继续执行中断的规划"""
+        if self._checkpoint_repository is None:
+            return
+
+        checkpoint = await self._checkpoint_repository.load(task.id)
+        if checkpoint is None:
+            return
+
+        logger.info(f"任务[{task.id}]从检查点[{checkpoint.sequence}]恢复")
+        self._flow.restore(checkpoint)
+        await self._put_events(task, self._flow.resume())
+
+    async def _heartbeat(self, task: Task) -> None:
+        """定期为任务租约续期，续期失败说明租约已过期，其他进程可能接管该任务"""
+        interval = self._task_lease.ttl_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if not await self._task_lease.renew(task.id, self._lease_token):
+                    logger.warning(f"任务[{task.id}]的运行租约已失效")
+            except Exception as e:
+                logger.warning(f"任务[{task.id}]续期运行租约失败: {str(e)}")
+
+    async def _release_lease(self, task: Task) -> None:
+        """释放任务租约，释放失败时租约在有效期后自动过期"""
+        try:
+            await self._task_lease.release(task.id, self._lease_token)
+        except Exception as e:
+            logger.warning(f"任务[{task.id}]释放运行租约失败: {str(e)}")
+
+    async def invoke(self, task: Task) -> None:
+        """运行任务：持有租约期间定期续期，运行结束后释放租约"""
+        if self._task_lease is None:
+            await self._run(task)
+            return
+
+        heartbeat = asyncio.create_task(self._heartbeat(task))
+        try:
+            await self._run(task)
+        finally:
+            heartbeat.cancel()
+            await self._release_lease(task)
+
+    async def _run(self, task: Task) -> None:
+        """先从检查点恢复，再循环处理输入流中的用户消息，直到输入流空闲"""
+        # 1. 从检查点恢复中断的流程
+        await self._restore(task)
+
+        # 2. 循环取出用户消息交给流程处理，没有新消息时结束运行
+        while True:
+            message_id, data = await task.input_stream.pop(block_ms=self._input_block_ms)
+            if message_id is None:
+                logger.info(f"任务[{task.id}]输入流空闲，结束运行，流程等待用户输入: {self._flow.waiting}")
+                return
+
+            try:
+                message = Message.model_validate_json(data)
+            except ValueError as e:
+                logger.error(f"任务[{task.id}]丢弃无法解析的消息[{message_id}]: {str(e)}")
+                await task.input_stream.ack(message_id)
+                continue
+
+            await self._put_events(task, self._flow.invoke(message))
+
+            # 3. 消息处理完成后确认，消费者组模式下未确认的消息会被重新领取
+            await task.input_stream.ack(message_id)
+
+    async def destory(self) -> None:
+        """流程不持有外部资源，检查点保留在仓库中供进程重启后恢复"""
+        logger.info("销毁 Agent 任务运行器")
+
+    async def on_done(self, task: Task) -> None:
+        """任务结束时记录流程状态，流程已完成时删除单独存储的工具结果，等待用户输入或中断的流程保留以便恢复"""
+        logger.info(f"任务[{task.id}]运行结束，流程状态: {self._flow.status.value}")
+        if self._flow.status == FlowStatus.COMPLETED:
+            await self._flow.delete_blobs()
@@ -1,17 +1,25 @@
 from abc import ABC
 import logging
-from typing import Any, AsyncGenerator, Dict, List, Optional
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional, Union
 import asyncio
+import json
 import uuid
 
+from app.domain.external.blob_store import BlobStore
 from app.domain.external.json_parser import JsonParser
-from app.domain.external.llm import LLM
-from app.domain.models.event import ErrorEvent, Event, MessageEvent, ToolEvent, ToolEventStatus
-from app.domain.models.memory import Memory
+from app.domain.external.llm import LLM, merge_message_delta
+from app.domain.models.event import BaseEvent, ErrorEvent, Event, MessageDeltaEvent, MessageEvent, ToolEvent, ToolEventStatus
+from app.domain.models.memory import CompactPolicy, Memory
 from app.domain.models.message import Message
 from app.domain.models.tool_result import ToolResult
 from app.domain.models.app_config import AgentConfig
+from app.domain.models.budget import TaskBudget
+from app.domain.services.json_stream import JsonFieldStreamer
+from app.domain.services.prompts.memory import COMPACT_MEMORY_PROMPT
+from app.domain.services.retry import backoff_delay, get_retry_after, is_retryable
 from app.domain.services.tools.base import BaseTool
+from app.domain.services.tools.blob import BlobTool, tool_result_blob_prefix
+from app.domain.services.tools.registry import ToolRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +28,8 @@ class BaseAgent(ABC):
     name: str = "" # 智能体名字
     _system_prompt: str = "" # 系统预设提示词
     _format: Optional[str] = None # Agent 的响应格式
-    _retry_interval: float = 1.0 # 重试间隔
+    _retry_interval: float = 1.0 # 重试间隔(指数退避的基础间隔)
+    _max_retry_interval: float = 30.0 # 指数退避的最大间隔
     _tool_choice: Optional[str] = None # 工具选择策略
 
     def __init__(
@@ -30,85 +39,204 @@ class BaseAgent(ABC):
         memory: Memory,             # 记忆
         json_parser: JsonParser,    # JSON 输出解析器
         tools: List[BaseTool],      # 工具列表
+        budget: Optional[TaskBudget] = None, # 任务预算，多个 Agent 可以共享同一个预算
+        blob_store: Optional[BlobStore] = None, # 大对象存储，超过阈值的工具结果单独存储
+        blob_key_prefix: Optional[str] = None, # 单独存储的工具结果的键前缀，流程传递按任务划分的前缀
     ) -> None:
         self._agent_config = agent_config
+        self._budget = budget
+        self._blob_store = blob_store
+        self._blob_key_prefix = blob_key_prefix or tool_result_blob_prefix()
         self._llm = llm
         self._memory = memory
         self._json_parser = json_parser
         self._tools = tools
+        self._tool_registry = ToolRegistry(tools)
+        self._llm_turn_callback: Optional[Callable[[], Awaitable[None]]] = None # 每轮 LLM 回复写入记忆后的回调
 
     @property
     def memory(self) -> Memory:
         return self._memory
 
+    @property
+    def budget(self) -> Optional[TaskBudget]:
+        """只读属性，返回 Agent 使用的任务预算"""
+        return self._budget
+
+    @property
+    def tool_registry(self) -> ToolRegistry:
+        """只读属性，返回 Agent 的工具索引，动态加载工具的工具集加载完成后重新注册到该索引中"""
+        return self._tool_registry
+
+    def set_llm_turn_callback(self, callback: Optional[Callable[[], Awaitable[None]]]) -> None:
+        """设置每轮 LLM 回复写入记忆后执行的回调，流程借此在每轮对话后保存检查点"""
+        self._llm_turn_callback = callback
+
     def _get_available_tools(self) -> List[Dict[str, Any]]:
         """获取 Agent 所有可用的工具列表参数声明"""
-        available_tools = []
-        for tool in self._tools:
-            available_tools.extend(tool.get_tools())
-        return available_tools
+        return self._tool_registry.get_tools()
     
+    def _get_compact_policies(self) -> Dict[str, CompactPolicy]:
+        """获取 Agent 所有工具声明的记忆保留策略"""
+        policies = {}
+        for tool in self._tools:
+            policies.update(tool.get_compact_policies())
+        return policies
+
     def _get_tool(self, tool_name: str) -> BaseTool:
         """获取对应工具所在的工具集"""
-        for tool in self._tools:
-            if tool.has_tool(tool_name):
-                return tool
-        raise ValueError(f"未知工具: {tool_name}")
+        tool = self._tool_registry.get(tool_name)
+        if tool is None:
+            raise ValueError(f"未知工具: {tool_name}")
+        return tool
 
-    async def _invoke_llm(self, messages: List[Dict[str, Any]], format: Optional[str] = None) -> Dict[str, Any]:
-        """调用语言模型并处理记忆内容"""
-        # 1. 将消息添加到记忆中
+    def _get_context_messages(self, tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """获取发送给 LLM 的消息列表，超出上下文预算时先压缩记忆，仍超出则裁剪最早的消息"""
+        # 1. 上下文预算需要扣除模型的最大输出 token 数以及工具声明占用的 token 数
+        budget = self._agent_config.max_context_tokens - self._llm.max_tokens
+        if tools:
+            budget -= self._memory.count_tokens(json.dumps(tools, ensure_ascii=False))
+
+        # 2. 未超出预算直接返回全部记忆
+        if self._memory.total_tokens <= budget:
+            return self._memory.get_messages()
+
+        # 3. 超出预算时先按保留策略压缩记忆，再按预算裁剪
+        logger.info(f"记忆 token 数 {self._memory.total_tokens} 超出上下文预算 {budget}，执行压缩与裁剪")
+        self._memory.compact(self._get_compact_policies())
+        return self._memory.get_messages_within(budget)
+
+    def _filter_tool_calls(self, tool_calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """筛选本轮需要执行的工具调用"""
+        if not self._agent_config.parallel_tool_calls:
+            return tool_calls[:1]
+
+        # 需要等待用户输入的工具会中断执行，该工具只能单独调用
+        for tool_call in tool_calls:
+            if tool_call.get("function", {}).get("name") == "message_ask_user":
+                return [tool_call]
+        return tool_calls
+
+    async def _handle_llm_message(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """处理 LLM 返回的消息并添加到记忆中，空回复时返回 None 表示需要重试"""
+        # 1. 处理 AI 响应内容，避免空回复
+        if message.get("role") == "assistant":
+            if not message.get("content") and not message.get("tool_calls"):
+                logger.warning(f"LLM 回复了空内容，执行重试")
+                await self._add_to_memory([
+                    {"role": "assistant", "content": ""},
+                    {"role": "user", "content": "AI 无响应内容，请继续。"}
+                ])
+                return None
+
+            # 2. 取出非空消息并处理工具调用
+            filtered_message = {"role": "assistant", "content": message.get("content")}
+            if message.get("tool_calls"):
+                # 3. 取出工具调用的数据，未开启并行工具调用时限制 LLM 一次只能调用一个工具
+                filtered_message["tool_calls"] = self._filter_tool_calls(message.get("tool_calls"))
+        else:
+            # 4. 非 AI 消息则记录日志并存储消息
+            logger.warning(f"LLM 响应内容无法确认消息角色: {message.get('role')}")
+            filtered_message = message
+
+        # 5. 将消息添加到记忆中
+        await self._add_to_memory([filtered_message])
+        return filtered_message
+
+    async def _invoke_llm_events(
+        self,
+        messages: List[Dict[str, Any]],
+        format: Optional[str] = None,
+    ) -> AsyncGenerator[Union[MessageDeltaEvent, Dict[str, Any]], None]:
+        """调用语言模型并处理记忆内容，流式模式下迭代返回消息增量事件，最后返回完整的消息"""
+        # 1. 将消息添加到记忆中并压缩记忆
         await self._add_to_memory(messages)
+        await self.compact_memory()
 
         # 2. 组装语言模型的响应格式
         response_format = {"type": format} if format else None
 
         # 3. 循环向 LLM 发起提问直到最大重试次数
-        for _ in range(self._agent_config.max_retries):
+        error: Optional[Exception] = None
+        for attempt in range(self._agent_config.max_retries):
+            message_id = str(uuid.uuid4())
+            streamed = False # 本次调用是否已经返回过增量事件
             try:
-                # 4. 调用语言模型获取响应内容
-                message = await self._llm.invoke(
-                    messages=messages,
-                    tools=self._get_available_tools(),
-                    response_format=response_format,
-                    tool_choice=self._tool_choice,
-                )
-
-                # 5. 处理 AI 响应内容，避免空回复
-                if message.get("role") == "assistant":
-                    if not message.get("content") and not message.get("tool_calls"):
-                        logger.warning(f"LLM 回复了空内容，执行重试")
-                        await self._add_to_memory([
-                            {"role": "assistant", "content": ""},
-                            {"role": "user", "content": "AI 无响应内容，请继续。"}
-                        ])
-                        await asyncio.sleep(self._retry_interval)
-                        continue
-
-                    # 6. 取出非空消息并处理工具调用
-                    filtered_message = {"role": "assistant", "content": message.get("content")}
-                    if message.get("tool_calls"):
-                        # 7. 取出工具调用的数据，限制 LLM 一次只能调用一个工具
-                        filtered_message["tool_calls"] = message.get("tool_calls")[:1]
+                tools = self._get_available_tools()
+                kwargs = {
+                    "messages": self._get_context_messages(tools),
+                    "tools": tools,
+                    "response_format": response_format,
+                    "tool_choice": self._tool_choice,
+                }
+
+                # 4. 调用语言模型获取响应内容，流式模式下边接收增量边返回事件，JSON 回复只返回 message 字段解码后的内容
+                if self._agent_config.stream:
+                    message: Dict[str, Any] = {}
+                    field_streamer = JsonFieldStreamer("message") if format == "json_object" else None
+                    async for delta in self._llm.stream(**kwargs):
+                        merge_message_delta(message, delta)
+                        content = delta.get("content") or ""
+                        if field_streamer is not None:
+                            content = field_streamer.feed(content)
+                        if content:
+                            streamed = True
+                            yield MessageDeltaEvent(message_id=message_id, delta=content)
                 else:
-                    # 8. 非 AI 消息则记录日志并存储消息
-                    logger.warning(f"LLM 响应内容无法确认消息角色: {message.get("role")}")
-                    filtered_message = message
+                    message = await self._llm.invoke(**kwargs)
 
-                # 9. 将消息添加到记忆中
-                await self._add_to_memory([filtered_message])
+                # 5. 按本地估算记录本次调用使用的 token 数，未裁剪时直接使用记忆缓存的 token 数
+                if self._budget is not None:
+                    context_messages = kwargs["messages"]
+                    if context_messages is self._memory.get_messages():
+                        prompt_tokens = self._memory.total_tokens
+                    else:
+                        prompt_tokens = sum(self._memory.count_message_tokens(item) for item in context_messages)
+                    self._budget.record_llm(prompt_tokens, self._memory.count_message_tokens(message))
+
+                # 6. 处理响应内容，空回复则进行重试
+                filtered_message = await self._handle_llm_message(message)
+                if filtered_message is None:
+                    if streamed:
+                        yield MessageDeltaEvent(message_id=message_id, aborted=True)
+                    await asyncio.sleep(backoff_delay(attempt, self._retry_interval, self._max_retry_interval))
+                    continue
 
+                if self._llm_turn_callback is not None:
+                    await self._llm_turn_callback()
+                yield filtered_message
+                return
             except Exception as e:
-                logger.error(f"调用语言模型发生错误: {str(e)}")
-                await asyncio.sleep(self._retry_interval)
+                # 7. 已返回的增量作废，永久性错误(如请求参数错误、熔断器打开)直接抛出，其余错误按指数退避重试
+                error = e
+                if streamed:
+                    yield MessageDeltaEvent(message_id=message_id, aborted=True)
+                if not is_retryable(e):
+                    logger.error(f"调用语言模型发生不可重试的错误: {str(e)}")
+                    raise
+
+                delay = backoff_delay(attempt, self._retry_interval, self._max_retry_interval, get_retry_after(e))
+                logger.error(f"调用语言模型发生错误: {str(e)}，{delay:.2f}s 后重试")
+                await asyncio.sleep(delay)
                 continue
 
+        raise RuntimeError(f"调用语言模型失败，已达到最大重试次数: {self._agent_config.max_retries}") from error
+
+    async def _invoke_llm(self, messages: List[Dict[str, Any]], format: Optional[str] = None) -> Dict[str, Any]:
+        """调用语言模型并处理记忆内容，忽略流式增量直接返回完整消息"""
+        message = None
+        async for item in self._invoke_llm_events(messages, format):
+            if not isinstance(item, BaseEvent):
+                message = item
+        return message
+
     async def _invoke_tool(self, tool: BaseTool, tool_name: str, arguments: Dict[str, Any]) -> ToolResult:
-        """调用工具"""
+        """调用工具，工具抛出异常时重试，超时由工具集统一取消并返回超时结果，不会重复执行"""
         err = ""
         for _ in range(self._agent_config.max_retries):
             try:
-                return await tool.invoke(tool_name, **arguments)
+                result = await tool.invoke(tool_name, **arguments)
+                return await self._offload_tool_result(tool, result)
             except Exception as e:
                 err = str(e)
                 logger.exception(f"调用工具[{tool_name}]出错，错误: {err}")
@@ -117,6 +245,53 @@ class BaseAgent(ABC):
         
         return ToolResult(success=False, message=err)
     
+    async def _offload_tool_result(self, tool: BaseTool, result: ToolResult) -> ToolResult:
+        """工具结果超过阈值时写入大对象存储，记忆与事件中只保留引用和预览，写入失败时保留原始结果"""
+        threshold = self._agent_config.tool_result_offload_chars
+        if self._blob_store is None or threshold <= 0 or isinstance(tool, BlobTool):
+            return result
+
+        content = result.model_dump_json()
+        if len(content) <= threshold:
+            return result
+
+        blob_key = f"{self._blob_key_prefix}{uuid.uuid4()}.json"
+        try:
+            await self._blob_store.put(blob_key, content)
+        except Exception as e:
+            logger.warning(f"工具结果写入大对象存储失败，保留原始结果: {str(e)}")
+            return result
+
+        preview = content[:self._agent_config.tool_result_preview_chars]
+        return ToolResult(
+            success=result.success,
+            message=(
+                f"工具结果共 {len(content)} 个字符，已单独存储，data.preview 为前 {len(preview)} 个字符，"
+                f"需要更多内容时使用 read_tool_result 工具分段读取"
+            ),
+            data={"blob_key": blob_key, "total_chars": len(content), "preview": preview},
+            cached=result.cached,
+            timed_out=result.timed_out,
+        )
+
+    def _tool_event(
+        self,
+        tool_call: Dict[str, Any],
+        status: ToolEventStatus,
+        result: Optional[ToolResult] = None,
+    ) -> ToolEvent:
+        """根据解析后的工具调用构建工具事件"""
+        return ToolEvent(
+            tool_call_id=tool_call["tool_call_id"],
+            tool_name=tool_call["tool"].name,
+            function_name=tool_call["function_name"],
+            function_args=tool_call["function_args"],
+            function_result=result,
+            status=status,
+            cached=result.cached if result is not None else False,
+            timed_out=result.timed_out if result is not None else False,
+        )
+
     async def _add_to_memory(self, messages: List[Dict[str, Any]]) -> None:
         """将对应的信息添加到记忆中"""
         if self._memory.empty:
@@ -127,8 +302,34 @@ class BaseAgent(ABC):
         self._memory.add_messages(messages)
 
     async def compact_memory(self) -> None:
-        """压缩记忆"""
-        self._memory.compact()
+        """压缩记忆：按照工具声明的保留策略压缩历史工具结果，开启摘要且仍超出阈值时将早期步骤折叠为摘要"""
+        # 1. 按保留策略压缩工具结果，该操作是幂等的，每轮调用 LLM 前都会执行
+        self._memory.compact(self._get_compact_policies())
+
+        # 2. 判断是否需要使用 LLM 折叠早期步骤
+        if (
+            not self._agent_config.memory_summarize or
+            self._memory.total_tokens <= self._agent_config.memory_summarize_tokens
+        ):
+            return
+
+        start, end = self._memory.get_foldable_range(self._agent_config.memory_keep_recent)
+        if end - start < 2:
+            return
+
+        # 3. 调用 LLM 生成摘要，失败时保留原始记忆
+        history = json.dumps(self._memory.get_messages()[start:end], ensure_ascii=False, default=str)
+        try:
+            message = await self._llm.invoke(messages=[
+                {"role": "user", "content": COMPACT_MEMORY_PROMPT.format(history=history)},
+            ])
+        except Exception as e:
+            logger.error(f"调用语言模型生成记忆摘要发生错误: {str(e)}")
+            return
+
+        if message.get("content"):
+            self._memory.fold(start, end, message["content"])
+            logger.info(f"记忆折叠完成，当前记忆 token 数: {self._memory.total_tokens}")
 
     async def roll_back(self, message: Message) -> None:
         """Agent 状态回滚，该函数用于确保 Agent 消息列表状态是正确的，用于发送新消息、停止任务、通知用户"""
@@ -160,57 +361,114 @@ class BaseAgent(ABC):
             # 5. 否则直接删除最后一条消息
             self._memory.roll_back()
 
+    def _budget_exhausted(self) -> Optional[str]:
+        """检查任务预算是否已耗尽，收尾阶段允许继续调用 LLM 完成汇总"""
+        if self._budget is None or self._budget.winding_down:
+            return None
+        return self._budget.exhausted()
+
+    def _budget_running_low(self, tool_calls: int) -> Optional[str]:
+        """检查任务预算是否足够发起本轮工具调用，收尾阶段不再调用工具"""
+        if self._budget is None:
+            return None
+        if self._budget.winding_down:
+            return "任务处于收尾阶段"
+        return self._budget.running_low(tool_calls)
+
     async def invoke(self, query: str, format: Optional[str] = None) -> AsyncGenerator[Event, None]:
-        """传递消息+响应格式调用程序生成异步迭代内容"""
+        """传递消息+响应格式调用程序生成异步迭代内容，每次调用 LLM 和工具前检查任务预算"""
         format = format if format else self._format
-        
-        message = await self._invoke_llm(
+
+        reason = self._budget_exhausted()
+        if reason:
+            yield ErrorEvent(error=f"任务预算已耗尽: {reason}")
+            return
+
+        message = None
+        async for item in self._invoke_llm_events(
             [{"role": "user", "content": query}],
             format,
-        )
+        ):
+            if isinstance(item, BaseEvent):
+                yield item
+            else:
+                message = item
 
         for _ in range(self._agent_config.max_iterations):
             if not message.get("tool_calls"):
                 break
-            tool_messages = []
+            # 1. 解析本轮的所有工具调用
+            tool_calls = []
             for tool_call in message["tool_calls"]:
                 if not tool_call.get("function"):
                     continue
 
-                tool_call_id = tool_call["id"] or str(uuid.uuid4())
                 function_name = tool_call["function"]["name"]
-                function_args = await self._json_parser.invoke(tool_call["function"]["arguments"])
-                tool = self._get_tool(function_name)
-
-                # 返回工具即将调用事件，TODO: tool_content 还没写
-                yield ToolEvent(
-                    tool_call_id=tool_call_id,
-                    tool_name=tool.name,
-                    function_name=function_name,
-                    function_args=function_args,
-                    status=ToolEventStatus.CALLING,
-                )
-
-                result = await self._invoke_tool(tool, function_name, function_args)
-
-                # 返回工具执行结果事件
-                yield ToolEvent(
-                    tool_call_id=tool_call_id,
-                    tool_name=tool.name,
-                    function_name=function_name,
-                    function_args=function_args,
-                    function_result=result,
-                    status=ToolEventStatus.CALLED,
-                )
-
-                tool_messages.append({
-                    "role": "tool",
-                    "tool_call_id": tool_call_id,
+                tool_calls.append({
+                    "tool_call_id": tool_call["id"] or str(uuid.uuid4()),
+                    "tool": self._get_tool(function_name),
                     "function_name": function_name,
-                    "content": result.model_dump(),
+                    "function_args": await self._json_parser.invoke(tool_call["function"]["arguments"]),
                 })
-            
-            message = await self._invoke_llm(tool_messages)
+
+            # 2. 预算不足时撤回本轮工具调用消息并结束，由流程进入收尾阶段
+            reason = self._budget_running_low(len(tool_calls))
+            if reason:
+                logger.warning(f"任务预算不足，停止调用工具: {reason}")
+                self._memory.roll_back()
+                yield ErrorEvent(error=f"任务预算不足，停止调用工具: {reason}")
+                return
+            if self._budget is not None:
+                self._budget.record_tool_calls(len(tool_calls))
+
+            # 3. 执行工具调用，并行模式下先按顺序返回所有调用中事件，全部执行完毕后再按顺序返回调用结果
+            if self._agent_config.parallel_tool_calls and len(tool_calls) > 1:
+                for tool_call in tool_calls:
+                    yield self._tool_event(tool_call, ToolEventStatus.CALLING)
+                # 并发数由工具集在进程内统一限制(工具集的 max_concurrency 与 @tool 声明的 max_concurrency)
+                results = await asyncio.gather(*(
+                    self._invoke_tool(tool_call["tool"], tool_call["function_name"], tool_call["function_args"])
+                    for tool_call in tool_calls
+                ))
+                for tool_call, result in zip(tool_calls, results):
+                    yield self._tool_event(tool_call, ToolEventStatus.CALLED, result)
+            else:
+                results = []
+                for tool_call in tool_calls:
+                    # 返回工具即将调用事件，TODO: tool_content 还没写
+                    yield self._tool_event(tool_call, ToolEventStatus.CALLING)
+                    result = await self._invoke_tool(
+                        tool_call["tool"],
+                        tool_call["function_name"],
+                        tool_call["function_args"],
+                    )
+                    results.append(result)
+                    # 返回工具执行结果事件
+                    yield self._tool_event(tool_call, ToolEventStatus.CALLED, result)
+
+            # 4. 按照工具调用的顺序将结果添加到消息列表中
+            tool_messages = [
+                {
+                    "role": "tool",
+                    "tool_call_id": tool_call["tool_call_id"],
+                    "function_name": tool_call["function_name"],
+                    "content": result.model_dump(),
+                }
+                for tool_call, result in zip(tool_calls, results)
+            ]
+
+            # 5. 预算耗尽时只保存工具结果，不再调用 LLM
+            reason = self._budget_exhausted()
+            if reason:
+                await self._add_to_memory(tool_messages)
+                yield ErrorEvent(error=f"任务预算已耗尽: {reason}")
+                return
+
+            async for item in self._invoke_llm_events(tool_messages):
+                if isinstance(item, BaseEvent):
+                    yield item
+                else:
+                    message = item
         else:
             yield ErrorEvent(error=f"Agent 迭代操作最大次数: {self._agent_config.max_iterations}，任务处理失败")
 
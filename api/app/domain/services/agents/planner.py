@@ -59,7 +59,7 @@ class PlannerAgent(BaseAgent):
                 yield PlanEvent(plan=plan, status=PlanEventStatus.CREATED)
             else:
                 # 返回不是消息事件的事件
-                yield Event
+                yield event
 
     async def update_plan(self, plan: Plan, step: Step) -> AsyncGenerator[BaseEvent, None]:
         """根据传递的原始规划+子步骤更新事件"""
@@ -83,18 +83,15 @@ class PlannerAgent(BaseAgent):
                 # 6.拷贝更新计划中的steps，避免造成数据污染
                 new_steps = [Step.model_validate(step) for step in updated_plan.steps]
 
-                # 7.查询旧计划中第一个未完成的计划
-                first_pending_index = None
-                for idx, step in enumerate(plan.steps):
-                    if not step.done:
-                        first_pending_index = idx
-                        break
-                
+                # 7.保留旧计划中所有已结束的步骤(并行执行时已结束的步骤可能排在未完成步骤之后)
+                done_steps = [step for step in plan.steps if step.done]
+                done_ids = {step.id for step in done_steps}
+
                 # 8.判断是否有未完成的步骤，如果有则执行更新
-                if first_pending_index is not None:
-                    # 9.获取历史已完成的子步骤并更新
-                    updated_steps = plan.steps[:first_pending_index]
-                    updated_steps.extend(new_steps)
+                if len(done_steps) < len(plan.steps):
+                    # 9.使用新步骤替换未完成的步骤，忽略与已结束步骤重复的步骤
+                    updated_steps = done_steps
+                    updated_steps.extend(step for step in new_steps if step.id not in done_ids)
 
                     # 10.更新plan规划
                     plan.steps = updated_steps
@@ -103,4 +100,4 @@ class PlannerAgent(BaseAgent):
                 yield PlanEvent(plan=plan, status=PlanEventStatus.UPDATED)
             else:
                 # 其他事件则直接返回
-                yield Event
\ No newline at end of file
+                yield event
\ No newline at end of file
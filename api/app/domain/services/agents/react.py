@@ -32,9 +32,9 @@ class ReActAgent(BaseAgent):
         yield StepEvent(step=step, status=StepEventStatus.STARTED)
 
         # 3.调用 invoke 获取 Agent 的返回内容
-        async for event in self.invoke(self):
+        async for event in self.invoke(query):
             # 4.判断事件类型执行不同操作
-            if isinstance(eval, ToolEvent):
+            if isinstance(event, ToolEvent):
                 # 5.工具事件需要判断工具的名称是否为 message_ask_user
                 if event.function_name == "message_ask_user":
                     # 6.工具如果在调用中，我们需要返回一条消息告知用户需要让用户处理什么
@@ -48,6 +48,8 @@ class ReActAgent(BaseAgent):
                         yield WaitEvent()
                         return
                     continue
+                # 其他工具事件直接返回
+                yield event
             elif isinstance(event, MessageEvent):
                 # 8.返回消息事件，意味着 content有 内容，content 有内容则代表执行 Agent 已运行完毕
                 step.status = ExecutionStatus.COMPLETED
@@ -66,7 +68,7 @@ class ReActAgent(BaseAgent):
 
                 # 12.如果子步骤拿到了结果，还需要返回一段消息给用户(将结果返回给用户)
                 if step.result:
-                    yield MessageEvent(role="assistant", message=step.result)
+                    yield MessageEvent(role="assistent", message=step.result)
                 continue
             elif isinstance(event, ErrorEvent):
                 # 13. 错误事件更新步骤的状态
@@ -77,7 +79,7 @@ class ReActAgent(BaseAgent):
                 yield StepEvent(step=step, status=StepEventStatus.FAILED)
             else:
                 # 15. 其他场景将事件直接返回
-                yield Event
+                yield event
         
         # 16.循环迭代完成后代表子步骤已实现，需要更新状态
         step.status = ExecutionStatus.COMPLETED
@@ -0,0 +1,31 @@
+from abc import ABC, abstractmethod
+from enum import Enum
+from typing import AsyncGenerator
+
+from app.domain.models.event import BaseEvent
+from app.domain.models.message import Message
+
+
+class FlowStatus(str, Enum):
+    """流程的执行状态"""
+    IDLE = "idle" # 空闲
+    PLANNING = "planning" # 创建规划中
+    EXECUTING = "executing" # 执行子步骤中
+    UPDATING = "updating" # 更新规划中
+    SUMMARIZING = "summarizing" # 汇总结果中
+    COMPLETED = "completed" # 已完成
+
+
+class BaseFlow(ABC):
+    """基础流程，流程负责编排多个 Agent 协作完成用户的任务"""
+
+    @abstractmethod
+    def invoke(self, message: Message) -> AsyncGenerator[BaseEvent, None]:
+        """传递用户消息运行流程，迭代返回流程中产生的事件"""
+        raise NotImplementedError
+
+    @property
+    @abstractmethod
+    def done(self) -> bool:
+        """只读属性，返回流程是否结束"""
+        raise NotImplementedError
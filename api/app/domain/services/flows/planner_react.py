@@ -0,0 +1,429 @@
+import asyncio
+import logging
+from typing import AsyncGenerator, List, Optional, Tuple
+
+from app.domain.external.blob_store import BlobStore
+from app.domain.external.json_parser import JsonParser
+from app.domain.external.llm import LLM
+from app.domain.external.tokenizer import Tokenizer
+from app.domain.models.app_config import AgentConfig
+from app.domain.models.budget import TaskBudget
+from app.domain.models.checkpoint import Checkpoint
+from app.domain.models.event import (
+    BaseEvent,
+    DoneEvent,
+    MessageEvent,
+    PlanEvent,
+    PlanEventStatus,
+    StepEvent,
+    StepEventStatus,
+    TitleEvent,
+    WaitEvent,
+)
+from app.domain.models.memory import Memory
+from app.domain.models.message import Message
+from app.domain.models.plan import ExecutionStatus, Plan, Step
+from app.domain.repositories.checkpoint_repository import CheckpointRepository
+from app.domain.services.agents.planner import PlannerAgent
+from app.domain.services.agents.react import ReActAgent
+from app.domain.services.plan_events import PlanEventEncoder
+from app.domain.services.tools.base import BaseTool
+from app.domain.services.tools.blob import BlobTool, tool_result_blob_prefix
+from .base import BaseFlow, FlowStatus
+from .replan import ReplanPolicy
+
+logger = logging.getLogger(__name__)
+
+
+class PlannerReActFlow(BaseFlow):
+    """规划 + 执行流程：PlannerAgent 创建规划，ReActAgent 执行子步骤，每批子步骤完成后更新规划，最后汇总结果
+
+    max_parallel_steps 大于 1 时，依赖已满足的多个子步骤会分别在独立的 ReActAgent 上并行执行，
+    每个 Agent 使用从主 ReActAgent 复制(fork)出来的记忆，执行完毕后按步骤顺序合并回主记忆。
+
+    传递检查点仓库后，流程在创建规划、每批子步骤完成以及更新规划后保存检查点，
+    每轮 LLM 回复后只在规划与步骤状态变化或距上次保存已经过 checkpoint_turn_interval 轮时保存，
+    进程重启后可以通过 restore + resume 重建 PlannerAgent/ReActAgent 并从最近的检查点继续执行。
+
+    所有 Agent 共享同一个任务预算，预算不足时流程停止执行剩余子步骤，直接汇总已有结果。
+    每批子步骤完成后由重新规划策略决定是否调用 PlannerAgent 更新规划。
+    流程输出的规划事件都经过 PlanEventEncoder 编码，diff 模式下只输出规划的差异。
+    """
+
+    def __init__(
+        self,
+        agent_config: AgentConfig,  # Agent 配置
+        llm: LLM,                   # 语言模型协议
+        json_parser: JsonParser,    # JSON 输出解析器
+        tools: List[BaseTool],      # 工具列表
+        task_id: Optional[str] = None, # 任务 ID，用作检查点的键
+        checkpoint_repository: Optional[CheckpointRepository] = None, # 检查点仓库，为空时不保存检查点
+        blob_store: Optional[BlobStore] = None, # 大对象存储，为空时工具结果全部保存在记忆中
+        tokenizer: Optional[Tokenizer] = None, # 记忆分词器，为空时按字符估算 token 数
+    ) -> None:
+        self._agent_config = agent_config
+        self._llm = llm
+        self._json_parser = json_parser
+        self._blob_store = blob_store
+        self._tokenizer = tokenizer
+        self._task_id = task_id
+        self._blob_key_prefix = tool_result_blob_prefix(task_id) # 工具结果按任务单独存储，流程结束后整体删除
+        # 开启大对象存储时额外提供分段读取工具结果的工具，只能读取本任务的工具结果
+        self._tools = tools + [BlobTool(blob_store, self._blob_key_prefix)] if blob_store is not None else tools
+        self._checkpoint_repository = checkpoint_repository if task_id else None
+        self._checkpoint_sequence = 0
+        self._checkpoint_state: Optional[Tuple] = None # 最近一次保存检查点时的规划与步骤状态
+        self._turns_since_checkpoint = 0 # 最近一次保存检查点后的 LLM 回复轮数
+        self._status = FlowStatus.IDLE
+        self._plan: Optional[Plan] = None
+        self._message: Optional[Message] = None
+        self._waiting = False
+        self._budget = TaskBudget.from_agent_config(agent_config)
+        self._replan_policy = ReplanPolicy.from_agent_config(agent_config)
+        self._plan_event_encoder = PlanEventEncoder(agent_config.plan_event_mode, agent_config.plan_snapshot_interval)
+        self._create_agents(Memory(), Memory())
+
+    def _create_agents(self, planner_memory: Memory, react_memory: Memory) -> None:
+        """使用传递的记忆创建 PlannerAgent/ReActAgent，开启检查点时在每轮 LLM 回复后按需保存检查点"""
+        # 检查点中的记忆不保存分词器，每次创建 Agent 时重新设置
+        if self._tokenizer is not None:
+            planner_memory.set_tokenizer(self._tokenizer)
+            react_memory.set_tokenizer(self._tokenizer)
+        self.planner = PlannerAgent(
+            agent_config=self._agent_config,
+            llm=self._llm,
+            memory=planner_memory,
+            json_parser=self._json_parser,
+            tools=self._tools,
+            budget=self._budget,
+            blob_store=self._blob_store,
+            blob_key_prefix=self._blob_key_prefix,
+        )
+        self.react = ReActAgent(
+            agent_config=self._agent_config,
+            llm=self._llm,
+            memory=react_memory,
+            json_parser=self._json_parser,
+            tools=self._tools,
+            budget=self._budget,
+            blob_store=self._blob_store,
+            blob_key_prefix=self._blob_key_prefix,
+        )
+        if self._checkpoint_repository is not None:
+            self.planner.set_llm_turn_callback(self._on_llm_turn)
+            self.react.set_llm_turn_callback(self._on_llm_turn)
+
+    @property
+    def status(self) -> FlowStatus:
+        """只读属性，返回流程当前的执行状态"""
+        return self._status
+
+    @property
+    def plan(self) -> Optional[Plan]:
+        """只读属性，返回流程当前的规划"""
+        return self._plan
+
+    @property
+    def budget(self) -> TaskBudget:
+        """只读属性，返回流程的任务预算"""
+        return self._budget
+
+    @property
+    def replan_policy(self) -> ReplanPolicy:
+        """只读属性，返回流程的重新规划策略"""
+        return self._replan_policy
+
+    @property
+    def waiting(self) -> bool:
+        """只读属性，返回流程是否在等待用户输入"""
+        return self._waiting
+
+    @property
+    def done(self) -> bool:
+        """只读属性，返回流程是否结束"""
+        return self._status in [FlowStatus.IDLE, FlowStatus.COMPLETED]
+
+    async def invoke(self, message: Message) -> AsyncGenerator[BaseEvent, None]:
+        """传递用户消息运行流程，迭代返回规划、步骤、工具、消息等事件，流程暂停或结束时停止预算计时"""
+        self._budget.start()
+        try:
+            async for event in self._invoke(message):
+                yield self._encode_event(event)
+        finally:
+            self._budget.pause()
+
+    async def _invoke(self, message: Message) -> AsyncGenerator[BaseEvent, None]:
+        """运行流程：创建规划或继续执行等待用户输入的规划"""
+        self._waiting = False
+        self._message = message
+        # 1. 流程等待用户输入时收到新消息，回滚 Agent 的状态后继续执行原规划
+        if self._status == FlowStatus.EXECUTING and self._plan is not None and not self._plan.done:
+            logger.info("流程收到用户输入，继续执行原规划")
+            await self.planner.roll_back(message)
+            await self.react.roll_back(message)
+        else:
+            # 2. 调用 PlannerAgent 创建规划
+            self._status = FlowStatus.PLANNING
+            self._plan = None
+            logger.info(f"流程开始创建规划: {message.message[:50]}")
+            async for event in self.planner.create_plan(message):
+                if isinstance(event, PlanEvent) and event.status == PlanEventStatus.CREATED:
+                    self._plan = event.plan
+                    yield TitleEvent(title=event.plan.title)
+                    yield MessageEvent(role="assistent", message=event.plan.message)
+                yield event
+
+            if self._plan is None:
+                self._status = FlowStatus.COMPLETED
+                yield DoneEvent()
+                return
+            await self._save_checkpoint()
+
+        async for event in self._execute_plan(self._message):
+            yield event
+
+    async def resume(self) -> AsyncGenerator[BaseEvent, None]:
+        """从检查点恢复后继续执行流程，已完成的子步骤不会重复执行，等待用户输入的流程需要通过 invoke 传递新消息"""
+        if self._message is None or self._waiting or self._status == FlowStatus.COMPLETED:
+            return
+
+        # 1. 规划尚未创建时重新运行整个流程
+        if self._plan is None:
+            async for event in self.invoke(self._message):
+                yield event
+            return
+
+        # 2. 丢弃检查点之后尚未得到结果的工具调用，未完成的子步骤会重新执行，已得到的工具结果保留在记忆中
+        for agent in [self.planner, self.react]:
+            last_message = agent.memory.get_last_message()
+            if last_message and last_message.get("tool_calls"):
+                agent.memory.roll_back()
+
+        logger.info(f"任务[{self._task_id}]从检查点[{self._checkpoint_sequence}]恢复执行，流程状态: {self._status.value}")
+        self._budget.start()
+        try:
+            async for event in self._execute_plan(self._message):
+                yield self._encode_event(event)
+        finally:
+            self._budget.pause()
+
+    def _encode_event(self, event: BaseEvent) -> BaseEvent:
+        """为规划事件分配序号，diff 模式下转换成规划差异事件"""
+        if isinstance(event, PlanEvent):
+            return self._plan_event_encoder.encode(event)
+        return event
+
+    def restore(self, checkpoint: Checkpoint) -> None:
+        """根据检查点恢复流程状态，并使用检查点中的记忆重建 PlannerAgent/ReActAgent"""
+        self._task_id = checkpoint.task_id
+        self._checkpoint_sequence = checkpoint.sequence
+        self._status = FlowStatus(checkpoint.status) if checkpoint.status else FlowStatus.IDLE
+        self._waiting = checkpoint.waiting
+        self._message = checkpoint.message
+        self._plan = checkpoint.plan
+        if checkpoint.budget is not None:
+            self._budget = checkpoint.budget
+        self._checkpoint_state = self._get_checkpoint_state()
+        self._turns_since_checkpoint = 0
+        self._create_agents(checkpoint.planner_memory, checkpoint.react_memory)
+
+    def checkpoint(self) -> Checkpoint:
+        """生成当前流程状态的检查点"""
+        return Checkpoint(
+            task_id=self._task_id or "",
+            sequence=self._checkpoint_sequence,
+            status=self._status.value,
+            waiting=self._waiting,
+            message=self._message,
+            plan=self._plan,
+            planner_memory=self.planner.memory,
+            react_memory=self.react.memory,
+            # 检查点中的运行时长包含当前这段运行
+            budget=TaskBudget.model_validate({**self._budget.model_dump(), "elapsed_seconds": self._budget.seconds}),
+        )
+
+    def _get_checkpoint_state(self) -> Tuple:
+        """获取决定恢复进度的流程状态：流程状态、规划状态以及每个子步骤的状态"""
+        return (
+            self._status,
+            self._waiting,
+            self._plan.status if self._plan is not None else None,
+            tuple((step.id, step.status) for step in self._plan.steps) if self._plan is not None else (),
+        )
+
+    async def _on_llm_turn(self) -> None:
+        """每轮 LLM 回复后的回调，检查点包含完整记忆，状态未变化时每隔 checkpoint_turn_interval 轮才保存一次"""
+        self._turns_since_checkpoint += 1
+        interval = self._agent_config.checkpoint_turn_interval
+        if self._get_checkpoint_state() != self._checkpoint_state or (interval > 0 and self._turns_since_checkpoint >= interval):
+            await self._save_checkpoint()
+
+    async def _save_checkpoint(self) -> None:
+        """保存检查点，规划创建前没有可恢复的进度不做保存，保存失败只记录日志不影响任务执行"""
+        if self._checkpoint_repository is None or self._plan is None:
+            return
+
+        self._checkpoint_sequence += 1
+        try:
+            await self._checkpoint_repository.save(self.checkpoint())
+            self._checkpoint_state = self._get_checkpoint_state()
+            self._turns_since_checkpoint = 0
+        except Exception as e:
+            logger.warning(f"任务[{self._task_id}]保存检查点失败: {str(e)}")
+
+    async def _delete_checkpoint(self) -> None:
+        """流程结束后删除检查点"""
+        if self._checkpoint_repository is None:
+            return
+
+        try:
+            await self._checkpoint_repository.delete(self._task_id)
+        except Exception as e:
+            logger.warning(f"任务[{self._task_id}]删除检查点失败: {str(e)}")
+
+    async def delete_blobs(self) -> None:
+        """删除流程单独存储的工具结果，流程结束且不会再恢复时调用，删除失败只记录日志"""
+        if self._blob_store is None or self._task_id is None:
+            return
+
+        try:
+            deleted = await self._blob_store.delete_prefix(self._blob_key_prefix)
+            logger.info(f"任务[{self._task_id}]删除了 {deleted} 个单独存储的工具结果")
+        except Exception as e:
+            logger.warning(f"任务[{self._task_id}]删除单独存储的工具结果失败: {str(e)}")
+
+    async def _execute_plan(self, message: Message) -> AsyncGenerator[BaseEvent, None]:
+        """执行规划中未完成的子步骤，全部完成后汇总结果并结束流程"""
+        # 1. 循环取出未完成的子步骤交给 ReActAgent 执行，执行完成后更新规划
+        self._plan.status = ExecutionStatus.RUNNING
+        while True:
+            steps = self._get_steps_to_execute()
+            if not steps:
+                break
+
+            # 预算不足时进入收尾阶段，剩余子步骤不再执行，预留的预算用于汇总已有结果
+            reason = self._budget.running_low()
+            if reason:
+                logger.warning(f"任务[{self._task_id}]预算不足({reason})，停止执行剩余子步骤并汇总结果")
+                self._budget.winding_down = True
+                yield MessageEvent(role="assistent", message=f"任务预算不足({reason})，停止执行剩余步骤并汇总已有结果。")
+                break
+
+            self._status = FlowStatus.EXECUTING
+            waiting = False
+            async for event in self._execute_steps(steps, message):
+                yield event
+                if isinstance(event, WaitEvent):
+                    waiting = True
+
+            # 2. Agent 需要等待用户输入，中断流程并保留状态
+            if waiting:
+                self._waiting = True
+                await self._save_checkpoint()
+                return
+
+            # 3. 一批子步骤执行完毕后按重新规划策略更新规划，规划中包含了本批所有子步骤的结果
+            self._status = FlowStatus.UPDATING
+            await self._save_checkpoint()
+            # 预算不足时跳过更新规划，下一轮循环直接进入收尾阶段
+            if self._budget.running_low() or not self._replan_policy.should_replan(self._plan, steps):
+                continue
+            async for event in self.planner.update_plan(self._plan, steps[-1]):
+                yield event
+            await self._save_checkpoint()
+
+        # 4. 所有子步骤执行完毕，汇总结果
+        self._status = FlowStatus.SUMMARIZING
+        async for event in self.react.summarize():
+            yield event
+
+        # 5. 规划完成并结束流程
+        self._plan.status = ExecutionStatus.COMPLETED
+        yield PlanEvent(plan=self._plan, status=PlanEventStatus.COMPLETED)
+        self._status = FlowStatus.COMPLETED
+        await self._delete_checkpoint()
+        yield DoneEvent()
+
+    def _get_steps_to_execute(self) -> List[Step]:
+        """获取下一批需要执行的子步骤，未开启并行时每批只有一个子步骤"""
+        if self._agent_config.max_parallel_steps > 1:
+            ready_steps = self._plan.get_ready_steps()
+            if ready_steps:
+                return ready_steps[:self._agent_config.max_parallel_steps]
+
+        step = self._plan.get_next_step()
+        return [step] if step is not None else []
+
+    async def _execute_steps(self, steps: List[Step], message: Message) -> AsyncGenerator[BaseEvent, None]:
+        """执行一批子步骤，多个子步骤时在独立的 ReActAgent 上并行执行，事件按产生的先后顺序返回"""
+        # 1. 只有一个子步骤时直接使用主 ReActAgent 执行，遇到等待事件立即中断
+        if len(steps) == 1:
+            async for event in self.react.execute_step(self._plan, steps[0], message):
+                yield event
+                if isinstance(event, WaitEvent):
+                    return
+            return
+
+        # 2. 为每个子步骤创建使用复制记忆的 ReActAgent
+        logger.info(f"并行执行 {len(steps)} 个子步骤: {[step.id for step in steps]}")
+        base_length = len(self.react.memory.get_messages())
+        agents = [
+            ReActAgent(
+                agent_config=self._agent_config,
+                llm=self._llm,
+                memory=self.react.memory.fork(),
+                json_parser=self._json_parser,
+                tools=self._tools,
+                budget=self._budget,
+                blob_store=self._blob_store,
+                blob_key_prefix=self._blob_key_prefix,
+            )
+            for _ in steps
+        ]
+
+        # 3. 所有 Agent 将 (序号, 事件) 写入同一个队列，事件为 None 表示对应的 Agent 执行结束
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def run(index: int, agent: ReActAgent, step: Step) -> None:
+            try:
+                async for event in agent.execute_step(self._plan, step, message):
+                    await queue.put((index, event))
+            except Exception as e:
+                logger.error(f"并行执行子步骤[{step.id}]出错: {str(e)}")
+                step.status = ExecutionStatus.FAILED
+                step.error = str(e)
+                await queue.put((index, StepEvent(step=step, status=StepEventStatus.FAILED)))
+            finally:
+                await queue.put((index, None))
+
+        tasks = [asyncio.create_task(run(index, agent, step)) for index, (agent, step) in enumerate(zip(agents, steps))]
+        waiting_index: Optional[int] = None
+        try:
+            finished = 0
+            while finished < len(tasks):
+                index, event = await queue.get()
+                if event is None:
+                    finished += 1
+                    continue
+                yield event
+                # 某个子步骤需要等待用户输入时停止其他子步骤，整个流程进入等待状态
+                if isinstance(event, WaitEvent):
+                    waiting_index = index
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        # 4. 被中断的子步骤重置为待执行，记忆不合并，恢复执行后重新执行
+        for index, step in enumerate(steps):
+            if index != waiting_index and not step.done:
+                step.status = ExecutionStatus.PENDING
+
+        # 5. 按子步骤顺序将已结束的 Agent 新增的消息合并回主记忆，等待用户输入的 Agent 最后合并，
+        # 保证主记忆以 message_ask_user 工具调用结尾，收到用户输入后 roll_back 能够正确补全工具结果
+        merged = [index for index, step in enumerate(steps) if step.done and index != waiting_index]
+        if waiting_index is not None:
+            merged.append(waiting_index)
+        for index in merged:
+            self.react.memory.add_messages(agents[index].memory.get_messages()[base_length:])
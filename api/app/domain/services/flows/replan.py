@@ -0,0 +1,101 @@
+"""
+重新规划策略：决定一批子步骤完成后是否需要调用 PlannerAgent.update_plan。
+
+每次更新规划都需要把整个规划的 JSON 重新发给 LLM，而大部分子步骤只是按预期完成，并不会改变后续步骤，
+因此除了 always 策略外，其余策略只在子步骤失败、结果偏离预期或每完成 N 个子步骤时才更新规划，
+规划中已经没有未完成的子步骤时也不再更新(update_plan 此时不会修改规划)。
+"""
+
+import logging
+from typing import List, Tuple
+
+from pydantic import BaseModel
+
+from app.domain.models.app_config import AgentConfig, ReplanMode
+from app.domain.models.plan import ExecutionStatus, Plan, Step
+
+logger = logging.getLogger(__name__)
+
+# 结果中出现这些内容时认为子步骤偏离了预期
+DIVERGENCE_KEYWORDS: Tuple[str, ...] = (
+    "失败", "无法", "未能", "未找到", "没有找到", "不存在", "出错", "错误", "超时", "需要调整",
+    "failed", "unable", "cannot", "can't", "not found", "error", "timeout", "timed out",
+)
+
+
+class ReplanStats(BaseModel):
+    """重新规划统计信息"""
+    evaluated: int = 0 # 判断次数
+    replanned: int = 0 # 更新规划的次数
+    skipped: int = 0 # 跳过更新规划的次数
+
+
+class ReplanPolicy:
+    """根据重新规划策略判断一批子步骤完成后是否需要更新规划"""
+
+    def __init__(
+        self,
+        mode: ReplanMode = ReplanMode.ALWAYS,
+        every_n_steps: int = 3,
+        divergence_keywords: Tuple[str, ...] = DIVERGENCE_KEYWORDS,
+    ) -> None:
+        self._mode = mode
+        self._every_n_steps = every_n_steps
+        self._divergence_keywords = tuple(keyword.lower() for keyword in divergence_keywords)
+        self._steps_since_replan = 0
+        self._stats = ReplanStats()
+
+    @classmethod
+    def from_agent_config(cls, agent_config: AgentConfig) -> "ReplanPolicy":
+        """根据 Agent 配置创建重新规划策略"""
+        return cls(mode=agent_config.replan_mode, every_n_steps=agent_config.replan_every_n_steps)
+
+    @property
+    def mode(self) -> ReplanMode:
+        """只读属性，返回重新规划策略"""
+        return self._mode
+
+    @staticmethod
+    def is_failed(step: Step) -> bool:
+        """子步骤是否失败"""
+        return step.status == ExecutionStatus.FAILED or not step.success or bool(step.error)
+
+    def is_divergent(self, step: Step) -> bool:
+        """启发式判断子步骤是否偏离预期：失败、没有结果或结果中包含失败相关的描述"""
+        if self.is_failed(step) or not step.result:
+            return True
+        result = step.result.lower()
+        return any(keyword in result for keyword in self._divergence_keywords)
+
+    def _decide(self, plan: Plan, steps: List[Step]) -> bool:
+        if self._mode == ReplanMode.ALWAYS:
+            return True
+
+        # 没有未完成的子步骤时 update_plan 不会修改规划
+        if all(step.done for step in plan.steps):
+            return False
+
+        if any(self.is_failed(step) for step in steps):
+            return True
+        if self._mode == ReplanMode.ON_DIVERGENCE:
+            return any(self.is_divergent(step) for step in steps)
+        if self._mode == ReplanMode.EVERY_N:
+            return self._steps_since_replan >= self._every_n_steps
+        return False
+
+    def should_replan(self, plan: Plan, steps: List[Step]) -> bool:
+        """传递规划和刚完成的一批子步骤，判断是否需要更新规划并记录统计信息"""
+        self._stats.evaluated += 1
+        self._steps_since_replan += len(steps)
+        if self._decide(plan, steps):
+            self._stats.replanned += 1
+            self._steps_since_replan = 0
+            return True
+
+        self._stats.skipped += 1
+        logger.debug(f"重新规划策略[{self._mode.value}]跳过更新规划，子步骤: {[step.id for step in steps]}")
+        return False
+
+    def stats(self) -> ReplanStats:
+        """返回重新规划统计信息"""
+        return self._stats.model_copy()
@@ -0,0 +1,116 @@
+"""
+JSON 字符串字段的增量解码：
+
+1. LLM 以 json_object 格式流式回复时，每个增量只是 JSON 文本的片段，不能直接展示给用户；
+2. JsonFieldStreamer 逐字符扫描增量，只在进入顶层指定字段的字符串值后输出解码后的字符；
+3. 转义序列(包括 \\uXXXX 与代理对)被拆分在两个增量之间时，等待后续增量补全后再输出。
+"""
+
+from typing import List, Optional
+
+_ESCAPES = {
+    "\"": "\"",
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+
+class JsonFieldStreamer:
+    """从流式 JSON 文本中增量提取顶层对象指定字段的字符串值"""
+
+    def __init__(self, field: str = "message") -> None:
+        self._field = field
+        self._depth = 0 # 当前所在的对象/数组嵌套层数
+        self._in_string = False # 是否处于字符串内部
+        self._escape = False # 上一个字符是否为转义符
+        self._unicode: Optional[str] = None # 正在读取的 \uXXXX 十六进制数字
+        self._high_surrogate: Optional[int] = None # 等待低位代理的高位代理
+        self._reading_key = False # 当前字符串是否为顶层对象的键
+        self._reading_field = False # 当前字符串是否为目标字段的值
+        self._after_colon = False # 顶层对象中是否已读到键后的冒号
+        self._key: List[str] = []
+        self._last_key: Optional[str] = None
+        self._done = False
+
+    @property
+    def done(self) -> bool:
+        """目标字段的字符串值是否已读取完毕"""
+        return self._done
+
+    def _decode(self, ch: str) -> Optional[str]:
+        """解码字符串内部的一个字符，返回解码结果(转义未完成时为空串)，遇到结束引号时返回 None"""
+        if self._unicode is not None:
+            self._unicode += ch
+            if len(self._unicode) < 4:
+                return ""
+            code = int(self._unicode, 16)
+            self._unicode = None
+            if 0xD800 <= code < 0xDC00:
+                self._high_surrogate = code
+                return ""
+            if 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+                code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+            self._high_surrogate = None
+            return chr(code)
+
+        if self._escape:
+            self._escape = False
+            if ch == "u":
+                self._unicode = ""
+                return ""
+            return _ESCAPES.get(ch, ch)
+
+        if ch == "\\":
+            self._escape = True
+            return ""
+        if ch == "\"":
+            return None
+        return ch
+
+    def feed(self, chunk: str) -> str:
+        """输入一段 JSON 文本增量，返回目标字段新解码出的内容"""
+        output: List[str] = []
+        for ch in chunk:
+            if self._done:
+                break
+
+            # 1. 字符串内部：目标字段的值直接输出，顶层键记录下来用于匹配字段名
+            if self._in_string:
+                decoded = self._decode(ch)
+                if decoded is not None:
+                    if self._reading_field:
+                        output.append(decoded)
+                    elif self._reading_key:
+                        self._key.append(decoded)
+                    continue
+
+                self._in_string = False
+                if self._reading_field:
+                    self._done = True
+                elif self._reading_key:
+                    self._last_key = "".join(self._key)
+                continue
+
+            # 2. 字符串外部：只跟踪嵌套层数与顶层的键值分隔符
+            if ch == "\"":
+                self._in_string = True
+                top_level = self._depth == 1
+                self._reading_key = top_level and not self._after_colon
+                self._reading_field = top_level and self._after_colon and self._last_key == self._field
+                self._key = []
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+            elif ch == ":" and self._depth == 1:
+                self._after_colon = True
+            elif ch == "," and self._depth == 1:
+                self._after_colon = False
+                self._last_key = None
+
+        return "".join(output)
@@ -0,0 +1,107 @@
+"""
+规划事件的差异编码与重建：
+
+1. 服务端使用 PlanEventEncoder 将规划事件编码为差异事件，事件体积不再随规划的更新次数增长；
+2. 每个规划事件都带有递增的序号，第一次输出、规划变更以及每隔 snapshot_interval 个事件输出一次完整快照；
+3. 客户端使用 PlanReconstructor 按序号应用快照与差异重建规划，发现序号不连续时等待下一个快照重新同步。
+"""
+
+import logging
+from typing import Optional, Union
+
+from app.domain.models.app_config import PlanEventMode
+from app.domain.models.event import PlanDiffEvent, PlanEvent
+from app.domain.models.plan import Plan
+
+logger = logging.getLogger(__name__)
+
+
+class PlanEventEncoder:
+    """规划事件编码器，为规划事件分配序号，diff 模式下将规划事件转换成差异事件"""
+
+    def __init__(self, mode: PlanEventMode = PlanEventMode.SNAPSHOT, snapshot_interval: int = 10) -> None:
+        self._mode = mode
+        self._snapshot_interval = snapshot_interval
+        self._sequence = 0
+        self._since_snapshot = 0
+        self._last_plan: Optional[Plan] = None # 上一次输出时的规划快照
+
+    @property
+    def sequence(self) -> int:
+        """只读属性，返回最近一个规划事件的序号"""
+        return self._sequence
+
+    def encode(self, event: PlanEvent) -> Union[PlanEvent, PlanDiffEvent]:
+        """编码规划事件，规划对象在后续执行中会被原地修改，因此需要保存一份快照用于计算差异"""
+        self._sequence += 1
+        snapshot = event.plan.model_copy(deep=True)
+        last_plan, self._last_plan = self._last_plan, snapshot
+
+        # 1. 快照模式、第一次输出、规划变更或者达到快照间隔时输出完整快照
+        if (
+            self._mode == PlanEventMode.SNAPSHOT or
+            last_plan is None or
+            last_plan.id != snapshot.id or
+            self._since_snapshot + 1 >= self._snapshot_interval
+        ):
+            self._since_snapshot = 0
+            return event.model_copy(update={"plan": snapshot, "sequence": self._sequence})
+
+        # 2. 其余情况只输出与上一次规划的差异
+        self._since_snapshot += 1
+        return PlanDiffEvent(
+            id=event.id,
+            created_at=event.created_at,
+            plan_id=snapshot.id,
+            diff=last_plan.diff(snapshot),
+            status=event.status,
+            sequence=self._sequence,
+        )
+
+
+class PlanReconstructor:
+    """客户端规划重建器，按序号应用规划快照与差异事件"""
+
+    def __init__(self) -> None:
+        self._plan: Optional[Plan] = None
+        self._sequence = 0
+        self._needs_resync = False
+
+    @property
+    def plan(self) -> Optional[Plan]:
+        """只读属性，返回当前重建的规划"""
+        return self._plan
+
+    @property
+    def sequence(self) -> int:
+        """只读属性，返回最近应用的规划事件序号"""
+        return self._sequence
+
+    @property
+    def needs_resync(self) -> bool:
+        """只读属性，返回是否丢失了差异事件，需要等待下一个完整快照"""
+        return self._needs_resync
+
+    def apply(self, event: Union[PlanEvent, PlanDiffEvent]) -> Optional[Plan]:
+        """应用规划事件并返回重建后的规划，差异事件无法应用时返回 None 并等待下一个完整快照"""
+        # 1. 完整快照直接替换当前规划
+        if isinstance(event, PlanEvent):
+            self._plan = event.plan.model_copy(deep=True)
+            self._sequence = event.sequence
+            self._needs_resync = False
+            return self._plan
+
+        # 2. 差异事件必须紧跟当前规划的序号
+        if (
+            self._needs_resync or
+            self._plan is None or
+            self._plan.id != event.plan_id or
+            event.sequence != self._sequence + 1
+        ):
+            logger.warning(f"规划差异事件序号不连续(当前 {self._sequence}，收到 {event.sequence})，等待完整快照重新同步")
+            self._needs_resync = True
+            return None
+
+        self._plan = self._plan.apply_diff(event.diff)
+        self._sequence = event.sequence
+        return self._plan
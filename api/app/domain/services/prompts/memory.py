@@ -0,0 +1,13 @@
+# 记忆压缩提示词模板，将早期的执行过程折叠为一段摘要，内部有 history 占位符
+COMPACT_MEMORY_PROMPT = """
+你正在压缩任务执行过程中的历史记录，你需要将以下历史消息总结为一段简洁的摘要，供后续步骤继续执行任务时参考。
+
+注意：
+- 保留用户的需求、已完成的步骤以及每个步骤的关键结论
+- 保留工具调用得到的关键事实、数据、URL 链接和文件路径，不要编造任何历史中不存在的信息
+- 省略重复的内容、冗长的工具原始输出以及与任务无关的细节
+- 使用历史消息中使用的工作语言，直接输出摘要文本，不要输出 JSON
+
+历史消息(history):
+{history}
+"""
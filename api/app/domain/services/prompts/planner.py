@@ -17,6 +17,7 @@ CREATE_PLAN_PROMPT = """
 - 你的计划必须简洁明了，不要添加任何不必要的细节
 - 你的步骤必须是原子性且独立的，以便下一个执行者可以使用工具逐一执行它们
 - 你需要判断任务是否可以拆分为多个步骤，如果可以，返回多个步骤；否则，返回单个步骤
+- 每个步骤需要通过 dependencies 声明必须先完成的步骤 ID，相互独立的步骤(如分别调研多个对象)不要互相依赖，以便并行执行
 
 返回格式要求：
 - 必须返回符合以下 TypeScript 接口定义的 JSON 格式
@@ -36,6 +37,8 @@ interface CreatePlanResponse {{
     id: string;
     /** 步骤描述 **/
     description: string;
+    /** 必须先完成的步骤 ID 列表，没有依赖时为空数组 **/
+    dependencies: string[];
   }}>;
   /** 根据上下文生成的计划目标 **/
   goal: string;
@@ -53,7 +56,18 @@ JSON 输出示例:
   "steps": [
     {{
       "id": "1",
-      "description": "步骤1描述"
+      "description": "步骤1描述",
+      "dependencies": []
+    }},
+    {{
+      "id": "2",
+      "description": "步骤2描述",
+      "dependencies": []
+    }},
+    {{
+      "id": "3",
+      "description": "汇总步骤1和步骤2的结果",
+      "dependencies": ["1", "2"]
     }}
   ]
 }}
@@ -86,6 +100,7 @@ UPDATE_PLAN_PROMPT = """
 - 如果步骤已完成或者不再必要，请将其删除
 - 仔细阅读步骤结果以确定是否成功，如果不成功，请更改后续步骤
 - 根据步骤结果，你需要相应地更新计划步骤
+- 保留步骤的 dependencies，已完成的步骤 ID 仍然可以作为依赖
 
 返回格式要求：
 - 必须返回符合以下 TypeScript 接口定义的 JSON 格式
@@ -100,6 +115,8 @@ interface UpdatePlanResponse {{
     id: string;
     /** 步骤描述 **/
     description: string;
+    /** 必须先完成的步骤 ID 列表，没有依赖时为空数组 **/
+    dependencies: string[];
   }}>;
 }}
 ```
@@ -109,7 +126,8 @@ JSON输出示例：
   "steps": [
     {{
       "id": "1",
-      "description": "步骤1描述"
+      "description": "步骤1描述",
+      "dependencies": []
     }}
   ]
 }}
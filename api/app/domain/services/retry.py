@@ -0,0 +1,30 @@
+import random
+from typing import Optional
+
+
+def is_retryable(e: BaseException) -> bool:
+    """判断异常是否可以重试，异常通过 retryable 属性声明，未声明的异常默认可以重试"""
+    return getattr(e, "retryable", True)
+
+
+def get_retry_after(e: BaseException) -> Optional[float]:
+    """获取异常携带的建议重试等待秒数(如提供商返回的 Retry-After)"""
+    retry_after = getattr(e, "retry_after", None)
+    return float(retry_after) if retry_after is not None else None
+
+
+def backoff_delay(
+    attempt: int,
+    base_interval: float,
+    max_interval: float,
+    retry_after: Optional[float] = None,
+) -> float:
+    """计算第 attempt 次(从 0 开始)重试前的等待秒数
+
+    使用带随机抖动的指数退避(full jitter)，避免大量调用方在同一时刻重试，
+    提供商给出 Retry-After 时至少等待该时长。
+    """
+    delay = random.uniform(0, min(max_interval, base_interval * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
@@ -4,20 +4,41 @@ MiniManus 工具设计思路：
 1. 所有工具都必须继承一个 BaseTool 基类，拥有统一的 invoke 方法用于调用该类下的对应工具；
 2. 定义一个装饰器，被该装饰器装饰的方法会填充 _tool_name、_tool_description、_tool_schema 属性；
 3. 工具类可以通过 get_tools 快速获取基于缓存的 schema 参数信息，这样 LLM 就可以便捷调用；
-4. LLM 生成的内容有可能会有幻觉，在调用工具前需要筛选出 LLM 生成参数中符合工具的相关数据。
+4. LLM 生成的内容有可能会有幻觉，在调用工具前需要筛选出 LLM 生成参数中符合工具的相关数据；
+5. 装饰器可以同时声明工具结果在记忆中的保留策略(compact_policy)，Agent 压缩记忆时按策略处理历史工具结果；
+6. 工具集在类定义时(__init_subclass__)建立 工具名 -> 方法名 的注册表并缓存方法签名，调用时只需要一次字典查找；
+7. 装饰器可以声明工具结果的缓存策略(cache)，invoke 命中缓存时直接返回结果而不再执行工具；
+8. 装饰器可以声明工具的超时时间(timeout)与最大并发数(max_concurrency)，工具集还有一个整体的并发上限(舱壁)，
+   由 invoke 统一执行，超时后取消工具协程并返回超时结果，避免一个卡住或饱和的后端拖垮整个任务；
+9. 并发上限在进程内按工具集类共享，每个任务都会创建新的工具实例，按实例限制无法保护共同的后端。
 """
 
-from typing import Any, Callable, Dict, List
+from contextlib import AsyncExitStack
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
 import inspect
+import logging
+import time
 
-from app.domain.models.tool_result import ToolResult
+from app.domain.external.tool_cache import ToolResultCache
+from app.domain.models.memory import CompactPolicy
+from app.domain.models.tool_cache import ToolCachePolicy, ToolCacheScope, tool_cache_key
+from app.domain.models.tool_result import ToolResult, ToolStats
 
+logger = logging.getLogger(__name__)
+
+# 进程内共享的并发限制: (工具集类, 工具名字/空字符串表示舱壁) -> (创建时的事件循环, 信号量)
+_semaphores: Dict[Tuple[type, str], Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = {}
 
 def tool(
     name: str,
     description: str,
     parameters: Dict[str, Dict[str, Any]],
     required: List[str],
+    compact_policy: Optional[CompactPolicy] = None,
+    cache: Optional[ToolCachePolicy] = None,
+    timeout: Optional[float] = None,
+    max_concurrency: Optional[int] = None,
 ) -> Callable:
     """定义 OpenAI 工具装饰器，用于将一个函数/方法添加上对应的工具声明"""
     
@@ -37,10 +58,15 @@ def tool(
             }
         }
 
-        # 2. 将对应属性绑定到 func 上
+        # 2. 将对应属性绑定到 func 上，同时缓存方法的参数名用于过滤 LLM 生成的参数
         func._tool_name = name
         func._tool_description = description
         func._tool_schema = tool_schema
+        func._tool_compact_policy = compact_policy
+        func._tool_cache_policy = cache
+        func._tool_timeout = timeout
+        func._tool_max_concurrency = max_concurrency
+        func._tool_parameters = frozenset(inspect.signature(func).parameters)
         return func
     
     return decorator
@@ -48,56 +74,186 @@ def tool(
 class BaseTool:
     """基础工具类，管理统一的工具集"""
     name: str = "" # 工具集名字
+    timeout: Optional[float] = 120 # 工具默认超时时间(秒)，@tool 未声明 timeout 时使用，None 表示不限制
+    max_concurrency: int = 0 # 工具集的最大并发调用数(舱壁)，0 表示不限制
+    _tool_methods: Dict[str, str] = {} # 工具名字 -> 方法名字，在类定义时生成
+    _tool_schemas: List[Dict[str, Any]] = [] # 工具声明列表，在类定义时生成
+    _tool_compact_policies: Dict[str, CompactPolicy] = {} # 工具名字 -> 保留策略，在类定义时生成
+    _tool_cache_policies: Dict[str, ToolCachePolicy] = {} # 工具名字 -> 缓存策略，在类定义时生成
+    _tool_timeouts: Dict[str, float] = {} # 工具名字 -> 超时时间，在类定义时生成
+    _tool_max_concurrency: Dict[str, int] = {} # 工具名字 -> 最大并发数，在类定义时生成
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        """在子类定义时扫描被 @tool 装饰的方法(包含继承的方法)，建立工具注册表"""
+        super().__init_subclass__(**kwargs)
+        tool_methods: Dict[str, str] = {}
+        tool_schemas: List[Dict[str, Any]] = []
+        tool_compact_policies: Dict[str, CompactPolicy] = {}
+        tool_cache_policies: Dict[str, ToolCachePolicy] = {}
+        tool_timeouts: Dict[str, float] = {}
+        tool_max_concurrency: Dict[str, int] = {}
+        for attr_name in sorted(dir(cls)):
+            method = getattr(cls, attr_name, None)
+            if not callable(method) or not hasattr(method, "_tool_name"):
+                continue
+
+            tool_name = getattr(method, "_tool_name")
+            tool_methods[tool_name] = attr_name
+            tool_schemas.append(getattr(method, "_tool_schema"))
+            if getattr(method, "_tool_compact_policy", None) is not None:
+                tool_compact_policies[tool_name] = getattr(method, "_tool_compact_policy")
+            cache_policy = getattr(method, "_tool_cache_policy", None)
+            if cache_policy is not None and cache_policy.enabled:
+                tool_cache_policies[tool_name] = cache_policy
+            if getattr(method, "_tool_timeout", None) is not None:
+                tool_timeouts[tool_name] = getattr(method, "_tool_timeout")
+            if getattr(method, "_tool_max_concurrency", None):
+                tool_max_concurrency[tool_name] = getattr(method, "_tool_max_concurrency")
+
+        cls._tool_methods = tool_methods
+        cls._tool_schemas = tool_schemas
+        cls._tool_compact_policies = tool_compact_policies
+        cls._tool_cache_policies = tool_cache_policies
+        cls._tool_timeouts = tool_timeouts
+        cls._tool_max_concurrency = tool_max_concurrency
 
     def __init__(self) -> None:
-        """构造函数，完成缓存初始化"""
-        self._tools_cache = None
+        """构造函数，根据类的工具注册表建立 工具名字 -> 绑定方法 的映射"""
+        self._bound_methods: Dict[str, Callable] = {
+            tool_name: getattr(self, attr_name) for tool_name, attr_name in self._tool_methods.items()
+        }
+        self._task_cache: Dict[str, Tuple[float, ToolResult]] = {} # 任务内缓存: 缓存键 -> (过期时间, 工具结果)
+        self._caches: Dict[ToolCacheScope, ToolResultCache] = {} # 进程内/Redis 范围使用的共享缓存
+        self._stats: Dict[str, ToolStats] = {tool_name: ToolStats() for tool_name in self._tool_methods}
 
     @classmethod
-    def _filter_parameter(cls, method: Callable, kwargs: Dict[str, Any]) -> Dict[str, Any]:
-        """过滤无用参数"""
-        filtered_kwargs = {}
+    def _get_semaphore(cls, name: str, limit: int) -> asyncio.Semaphore:
+        """获取进程内按工具集类共享的信号量，信号量绑定事件循环，事件循环变化时(如多次 asyncio.run)重新创建"""
+        loop = asyncio.get_running_loop()
+        entry = _semaphores.get((cls, name))
+        if entry is None or entry[0] is not loop:
+            entry = (loop, asyncio.Semaphore(limit))
+            _semaphores[(cls, name)] = entry
+        return entry[1]
 
-        sign = inspect.signature(method)
-        for key, value in kwargs.items():
-            if key in sign.parameters:
-                filtered_kwargs[key] = value
-        
-        return filtered_kwargs
+    def set_cache(self, scope: ToolCacheScope, cache: ToolResultCache) -> None:
+        """设置指定范围使用的共享缓存，未设置的范围退化为任务内缓存"""
+        self._caches[scope] = cache
+
+    @classmethod
+    def _filter_parameter(cls, method: Callable, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """过滤无用参数，优先使用装饰器缓存的参数名"""
+        parameters = getattr(method, "_tool_parameters", None)
+        if parameters is None:
+            parameters = inspect.signature(method).parameters
+        return {key: value for key, value in kwargs.items() if key in parameters}
 
     def get_tools(self) -> List[Dict[str, Any]]:
         """获取所有以注册的工具列表 schema 信息，用于 LLM 绑定工具"""
-        if self._tools_cache is not None:
-            return self._tools_cache
+        return self._tool_schemas
+
+    def get_tool_names(self) -> List[str]:
+        """获取工具集内所有工具的名字，动态加载工具的工具集(如 MCP)需要重写该方法"""
+        return list(self._tool_methods.keys())
+
+    def get_compact_policies(self) -> Dict[str, CompactPolicy]:
+        """获取所有声明了保留策略的工具，返回工具名字到保留策略的映射"""
+        return self._tool_compact_policies
 
-        tools = []
-        for _, method in inspect.getmembers(self, inspect.ismethod):
-            if hasattr(method, "_tool_schema"):
-                tools.append(getattr(method, "_tool_schema"))
+    def get_cache_policies(self) -> Dict[str, ToolCachePolicy]:
+        """获取所有声明了缓存策略的工具，返回工具名字到缓存策略的映射"""
+        return self._tool_cache_policies
 
-        self._tools_cache = tools
-        return tools
+    async def _get_cached(self, policy: ToolCachePolicy, key: str) -> Optional[ToolResult]:
+        """按缓存范围读取工具结果"""
+        cache = self._caches.get(policy.scope)
+        if cache is not None:
+            return await cache.get(key)
+
+        entry = self._task_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._task_cache[key]
+            return None
+        return result.model_copy(deep=True)
+
+    async def _set_cached(self, policy: ToolCachePolicy, key: str, result: ToolResult) -> None:
+        """按缓存范围写入工具结果"""
+        cache = self._caches.get(policy.scope)
+        if cache is not None:
+            await cache.set(key, result, policy.ttl_seconds)
+            return
+        self._task_cache[key] = (time.monotonic() + policy.ttl_seconds, result.model_copy(deep=True))
+
+    def get_timeout(self, tool_name: str) -> Optional[float]:
+        """获取工具的超时时间，未声明时使用工具集的默认超时时间"""
+        return self._tool_timeouts.get(tool_name, self.timeout)
+
+    def get_stats(self) -> Dict[str, ToolStats]:
+        """获取工具集内每个工具的调用统计信息"""
+        return {tool_name: stats.model_copy() for tool_name, stats in self._stats.items()}
+
+    async def _invoke_method(self, tool_name: str, method: Callable, kwargs: Dict[str, Any]) -> ToolResult:
+        """在工具集舱壁与工具并发限制内执行工具，超时后取消工具协程并返回超时结果"""
+        stats = self._stats.setdefault(tool_name, ToolStats())
+        timeout = self.get_timeout(tool_name)
+        async with AsyncExitStack() as stack:
+            # 1. 依次进入工具集舱壁和工具自身的并发限制(同一工具集类的所有实例共享)，排队时间不计入超时时间
+            if self.max_concurrency > 0:
+                await stack.enter_async_context(self._get_semaphore("", self.max_concurrency))
+            if tool_name in self._tool_max_concurrency:
+                await stack.enter_async_context(self._get_semaphore(tool_name, self._tool_max_concurrency[tool_name]))
+
+            # 2. 记录调用统计，wait_for 超时时会取消工具协程，取消信号会传递到工具内部
+            stats.calls += 1
+            stats.in_flight += 1
+            stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+            start = time.perf_counter()
+            try:
+                return await asyncio.wait_for(method(**kwargs), timeout=timeout)
+            except asyncio.TimeoutError:
+                stats.timeouts += 1
+                logger.warning(f"工具[{tool_name}]执行超时({timeout}s)，已取消执行")
+                return ToolResult(success=False, message=f"工具[{tool_name}]执行超时({timeout}s)，已取消执行", timed_out=True)
+            except Exception:
+                stats.errors += 1
+                raise
+            finally:
+                stats.in_flight -= 1
+                stats.total_seconds += time.perf_counter() - start
 
     def has_tool(self, tool_name: str) -> bool:
         """判断是否存在指定的工具"""
-        for _, method in inspect.inspect.getmembers(self, inspect.ismethod):
-            if hasattr(method, "_tool_name") and getattr(method, "_tool_name") == tool_name:
-                return True
-        return False
-
+        return tool_name in self._tool_methods
 
     async def invoke(self, tool_name: str, **kwargs) -> ToolResult:
         """调用指定工具并获取结果"""
-        # 1. 循环遍历工具集的所有方法
-        for _, method in inspect.getmembers(self, inspect.ismethod):
-            # 2. 判断对应是否存在 _tool_name 属性
-            if hasattr(method, "_tool_name") and getattr(method, "_tool_name") == tool_name:
-                # 3. 筛选传递的 kwargs 参数，保留 method 对应的参数，其余的剔除
-                filtered_kwargs = self._filter_parameter(method, kwargs)
-                # 4. 调用方法获取工具结果
-                return await method(**filtered_kwargs)
-        
-        # 5. 没找到对应工具
-        return ValueError(f"工具[{tool_name}]未找到")
-
-    
\ No newline at end of file
+        # 1. 根据注册表查找工具对应的绑定方法
+        method = self._bound_methods.get(tool_name)
+        if method is None:
+            raise ValueError(f"工具[{tool_name}]未找到")
+
+        # 2. 筛选传递的 kwargs 参数，保留 method 对应的参数，其余的剔除
+        filtered_kwargs = self._filter_parameter(method, kwargs)
+
+        # 3. 未声明缓存策略的工具直接调用方法获取工具结果
+        policy = self._tool_cache_policies.get(tool_name)
+        if policy is None:
+            return await self._invoke_method(tool_name, method, filtered_kwargs)
+
+        # 4. 命中缓存时直接返回缓存的结果并标记为来自缓存
+        key = tool_cache_key(tool_name, filtered_kwargs, policy)
+        result = await self._get_cached(policy, key)
+        if result is not None:
+            logger.debug(f"工具[{tool_name}]结果缓存命中: {key}")
+            self._stats.setdefault(tool_name, ToolStats()).cache_hits += 1
+            result.cached = True
+            return result
+
+        # 5. 未命中时调用工具，只缓存成功的结果
+        result = await self._invoke_method(tool_name, method, filtered_kwargs)
+        if result.success:
+            await self._set_cached(policy, key, result)
+        return result
@@ -0,0 +1,62 @@
+from typing import Any, Dict, Optional
+
+from app.domain.external.blob_store import BlobStore
+from app.domain.models.memory import CompactMode, CompactPolicy
+from app.domain.models.tool_result import ToolResult
+from .base import BaseTool, tool
+
+# 单次读取的最大字符数，保证读取结果本身不会再次超过单独存储的阈值
+MAX_READ_CHARS = 8000
+
+def tool_result_blob_prefix(task_id: Optional[str] = None) -> str:
+    """单独存储的工具结果的键前缀，按任务划分目录，任务结束后按前缀整体删除"""
+    return f"tool-results/{task_id}/" if task_id else "tool-results/"
+
+class BlobTool(BaseTool):
+    """大对象工具包，提供分段读取单独存储的工具结果的能力"""
+    name: str = "blob"
+
+    def __init__(self, blob_store: BlobStore, blob_key_prefix: Optional[str] = None) -> None:
+        super().__init__()
+        self.blob_store = blob_store
+        self.blob_key_prefix = blob_key_prefix or tool_result_blob_prefix() # 只允许读取该前缀下的工具结果，流程传递按任务划分的前缀
+
+    @tool(
+        name="read_tool_result",
+        description="读取因体积过大而单独存储的工具结果。当工具结果中只有 blob_key 和预览内容、而完成任务需要更多内容时使用，可以通过 offset 分段读取。",
+        parameters={
+            "blob_key": {
+                "type": "string",
+                "description": "工具结果中返回的 blob_key。"
+            },
+            "offset": {
+                "type": "integer",
+                "description": "（可选）从第几个字符开始读取，默认为 0。"
+            },
+            "length": {
+                "type": "integer",
+                "description": f"（可选）读取的字符数，默认且最多为 {MAX_READ_CHARS}。"
+            },
+        },
+        required=["blob_key"],
+        # 分段读取的内容经过 2 轮 AI 回复后只保留前 1000 个字符，需要时可以重新读取
+        compact_policy=CompactPolicy(mode=CompactMode.TRUNCATE, min_age=2, max_chars=1000),
+    )
+    async def read_tool_result(self, blob_key: str, offset: int = 0, length: int = MAX_READ_CHARS) -> ToolResult[Dict[str, Any]]:
+        # 拒绝读取当前任务之外的键，避免通过 blob_key 读取其他任务的工具结果
+        if not blob_key.startswith(self.blob_key_prefix) or ".." in blob_key.split("/"):
+            return ToolResult(success=False, message=f"无权读取该工具结果: {blob_key}")
+
+        content = await self.blob_store.get(blob_key)
+        if content is None:
+            return ToolResult(success=False, message=f"未找到工具结果: {blob_key}")
+
+        offset = max(0, offset)
+        chunk = content[offset:offset + max(1, min(length, MAX_READ_CHARS))]
+        return ToolResult(data={
+            "blob_key": blob_key,
+            "offset": offset,
+            "content": chunk,
+            "total_chars": len(content),
+            "has_more": offset + len(chunk) < len(content),
+        })
@@ -0,0 +1,63 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+from .base import BaseTool
+
+logger = logging.getLogger(__name__)
+
+
+class ToolRegistry:
+    """工具索引，维护所有工具集中 工具名字 -> 工具集 的映射，Agent 通过一次字典查找定位工具所在的工具集
+
+    索引同时决定暴露给 LLM 的工具声明与工具调用的分发，两者始终一致：同名工具只暴露并分发给先注册的工具集。
+    动态加载工具的工具集(如 MCP)需要重写 get_tool_names/get_tools/invoke，加载完成后再次调用 register 更新索引。
+    """
+
+    def __init__(self, tools: Optional[List[BaseTool]] = None) -> None:
+        self._index: Dict[str, BaseTool] = {}
+        self._toolsets: List[BaseTool] = []
+        for tool in tools or []:
+            self.register(tool)
+
+    def register(self, tool: BaseTool) -> None:
+        """注册(或重新注册)工具集中的所有工具，同名工具以先注册的工具集为准"""
+        if tool not in self._toolsets:
+            self._toolsets.append(tool)
+
+        # 重新注册时移除工具集中已经不存在的工具
+        tool_names = set(tool.get_tool_names())
+        for tool_name in [name for name, registered in self._index.items() if registered is tool and name not in tool_names]:
+            del self._index[tool_name]
+
+        for tool_name in tool.get_tool_names():
+            registered = self._index.get(tool_name)
+            if registered is not None and registered is not tool:
+                logger.warning(f"工具[{tool_name}]已被工具集[{registered.name}]注册，忽略工具集[{tool.name}]中的同名工具")
+                continue
+            self._index[tool_name] = tool
+
+    def unregister(self, tool: BaseTool) -> None:
+        """移除工具集及其所有工具"""
+        if tool in self._toolsets:
+            self._toolsets.remove(tool)
+        for tool_name in [name for name, registered in self._index.items() if registered is tool]:
+            del self._index[tool_name]
+
+    def get(self, tool_name: str) -> Optional[BaseTool]:
+        """获取工具所在的工具集，未找到时返回 None"""
+        return self._index.get(tool_name)
+
+    def get_tools(self) -> List[Dict[str, Any]]:
+        """获取所有已注册工具的 schema 信息，用于 LLM 绑定工具，只包含索引中分发给对应工具集的工具"""
+        return [
+            schema
+            for tool in self._toolsets
+            for schema in tool.get_tools()
+            if self._index.get(schema["function"]["name"]) is tool
+        ]
+
+    def __contains__(self, tool_name: str) -> bool:
+        return tool_name in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
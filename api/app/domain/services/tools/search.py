@@ -1,9 +1,19 @@
-from typing import Optional
+from typing import Any, Dict, Optional
 from app.domain.external.search import SearchEngine
+from app.domain.models.memory import CompactMode, CompactPolicy
+from app.domain.models.tool_cache import ToolCachePolicy, ToolCacheScope
 from app.domain.models.search import SearchResult
 from app.domain.models.tool_result import ToolResult
 from .base import BaseTool, tool
 
+def normalize_search_arguments(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """搜索参数规范化：query 忽略大小写与多余空白，date_range 为 all 时等同于不传"""
+    normalized = dict(arguments)
+    normalized["query"] = " ".join(str(arguments.get("query", "")).lower().split())
+    if normalized.get("date_range") == "all":
+        normalized.pop("date_range")
+    return normalized
+
 class SearchTool(BaseTool):
     """搜索工具包，提供与搜索引擎交互的能力"""
     name:str = "search"
@@ -25,8 +35,15 @@ class SearchTool(BaseTool):
                 "enum": ["all", "past_hour", "past_day", "past_week", "past_month", "past_year"],
                 "description": "（可选）搜索结果的时间范围过滤。当用户询问特定时效性的新闻或事件时（如'昨天'、'上周'），必须指定此参数，默认为'all'。"
             },
-            "required": ["query"]
-        }
+        },
+        required=["query"],
+        # 搜索结果体积较大，经过 2 轮 AI 回复后只保留前 1000 个字符
+        compact_policy=CompactPolicy(mode=CompactMode.TRUNCATE, min_age=2, max_chars=1000),
+        # 相同的研究类查询在任务内和任务间经常重复出现，搜索结果在进程内缓存 10 分钟
+        cache=ToolCachePolicy(ttl_seconds=600, scope=ToolCacheScope.PROCESS, key_normalizer=normalize_search_arguments),
+        timeout=30,
+        # 所有任务共用同一个搜索引擎 API 配额，进程内同时进行的搜索不超过 8 个
+        max_concurrency=8,
     )
     async def search_web(self, query: str, date_range: Optional[str] = None) -> ToolResult[SearchResult]:
-        return await self.search_engine.invoke(query, date_range)
\ No newline at end of file
+        return await self.search_engine.invoke(query, date_range)
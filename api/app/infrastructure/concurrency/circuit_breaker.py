@@ -0,0 +1,123 @@
+"""
+熔断器：
+
+1. closed 状态下正常放行，连续失败次数达到阈值后进入 open 状态；
+2. open 状态下直接拒绝请求，让调用方快速失败而不是各自重试数分钟；
+3. 打开超过 reset_seconds 后进入 half_open 状态，只放行一个探测请求，成功则关闭熔断器，失败则重新打开；
+4. 熔断器按名字在进程内共享，同一个提供商端点的所有调用方共用同一个熔断器。
+"""
+
+import logging
+import time
+from enum import Enum
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str, Enum):
+    """熔断器状态"""
+    CLOSED = "closed" # 关闭，正常放行
+    OPEN = "open" # 打开，拒绝所有请求
+    HALF_OPEN = "half_open" # 半开，只放行一个探测请求
+
+
+class CircuitBreakerStats(BaseModel):
+    """熔断器统计信息"""
+    name: str # 熔断器名字
+    state: CircuitState # 当前状态
+    consecutive_failures: int = 0 # 连续失败次数
+    opened: int = 0 # 累计打开次数
+    rejected: int = 0 # 累计拒绝的请求数
+
+
+class CircuitBreaker:
+    """连续失败计数熔断器"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: Optional[int] = None,
+        reset_seconds: Optional[float] = None,
+    ) -> None:
+        settings = get_settings()
+        self._name = name
+        self._failure_threshold = (
+            failure_threshold if failure_threshold is not None else settings.llm_circuit_breaker_failure_threshold
+        )
+        self._reset_seconds = reset_seconds if reset_seconds is not None else settings.llm_circuit_breaker_reset_seconds
+        self._state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_started_at = 0.0
+        self._stats = CircuitBreakerStats(name=name, state=CircuitState.CLOSED)
+
+    @property
+    def state(self) -> CircuitState:
+        """返回熔断器当前状态，打开时间超过 reset_seconds 后视为半开"""
+        if self._state == CircuitState.OPEN and time.monotonic() >= self._opened_at + self._reset_seconds:
+            self._state = CircuitState.HALF_OPEN
+            self._probe_started_at = 0.0
+        return self._state
+
+    def retry_after(self) -> float:
+        """返回熔断器距离进入半开状态的剩余秒数"""
+        return max(0.0, self._opened_at + self._reset_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        """判断是否放行请求，半开状态下同一时间只放行一个探测请求"""
+        state = self.state
+        if state == CircuitState.CLOSED:
+            return True
+
+        # 探测请求被取消时不会记录结果，超过 reset_seconds 后允许发起新的探测
+        now = time.monotonic()
+        if state == CircuitState.HALF_OPEN and now >= self._probe_started_at + self._reset_seconds:
+            self._probe_started_at = now
+            logger.info(f"熔断器[{self._name}]进入半开状态，放行探测请求")
+            return True
+
+        self._stats.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        """记录一次成功调用，关闭熔断器"""
+        if self._state != CircuitState.CLOSED:
+            logger.info(f"熔断器[{self._name}]探测成功，关闭熔断器")
+        self._state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        """记录一次失败调用，连续失败达到阈值或半开探测失败时打开熔断器"""
+        self._consecutive_failures += 1
+        if self._state == CircuitState.HALF_OPEN or self._consecutive_failures >= self._failure_threshold:
+            if self._state != CircuitState.OPEN:
+                self._stats.opened += 1
+            self._state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+            logger.warning(
+                f"熔断器[{self._name}]连续失败 {self._consecutive_failures} 次，打开 {self._reset_seconds}s"
+            )
+
+    def stats(self) -> CircuitBreakerStats:
+        """返回熔断器统计信息"""
+        return self._stats.model_copy(update={
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+        })
+
+
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """根据名字获取进程内共享的熔断器，不存在时按配置创建"""
+    circuit_breaker = _circuit_breakers.get(name)
+    if circuit_breaker is None:
+        circuit_breaker = CircuitBreaker(name)
+        _circuit_breakers[name] = circuit_breaker
+    return circuit_breaker
@@ -0,0 +1,218 @@
+"""
+令牌桶限流器：
+
+1. 同时维护请求桶(RPM)与 token 桶(TPM)，两个桶都有足够余量时才放行，容量为每分钟配额，按秒匀速补充；
+2. 调用方通过 asyncio.Lock 排队，锁按照先来先得的顺序唤醒等待者，保证大请求不会被小请求持续插队饿死；
+3. 请求完成后按实际输出扣减 token 桶，允许余量为负数，后续调用方会等待到余量恢复；
+4. 开启 Redis 后令牌桶状态保存在 Redis 中并通过 Lua 脚本原子扣减，多个节点共享同一份配额；
+5. 提供商返回 429 时可以调用 pause 暂停放行，所有调用方一起等待而不是各自重试。
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.infrastructure.storage.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# 原子地补充并扣减两个令牌桶，余量不足时返回需要等待的毫秒数
+# KEYS[1] 请求桶 KEYS[2] token 桶
+# ARGV: 请求桶容量, 请求数, token 桶容量, token 数, 是否强制扣减(1/0)
+_ACQUIRE_SCRIPT = """
+local now_ts = redis.call("TIME")
+local now = tonumber(now_ts[1]) * 1000 + math.floor(tonumber(now_ts[2]) / 1000)
+local force = ARGV[5] == "1"
+local levels = {}
+local wait = 0
+for i = 1, 2 do
+    local capacity = tonumber(ARGV[i * 2 - 1])
+    local amount = math.min(tonumber(ARGV[i * 2]), capacity)
+    if capacity > 0 then
+        local rate = capacity / 60000
+        local data = redis.call("HMGET", KEYS[i], "tokens", "ts")
+        local level = tonumber(data[1]) or capacity
+        local ts = tonumber(data[2]) or now
+        level = math.min(capacity, level + math.max(0, now - ts) * rate)
+        levels[i] = level
+        if not force and level < amount then
+            wait = math.max(wait, (amount - level) / rate)
+        end
+    end
+end
+if wait > 0 then
+    return math.ceil(wait)
+end
+for i = 1, 2 do
+    local capacity = tonumber(ARGV[i * 2 - 1])
+    if capacity > 0 then
+        local amount = math.min(tonumber(ARGV[i * 2]), capacity)
+        redis.call("HSET", KEYS[i], "tokens", tostring(levels[i] - amount), "ts", now)
+        redis.call("PEXPIRE", KEYS[i], 120000)
+    end
+end
+return 0
+"""
+
+
+class RateLimiterStats(BaseModel):
+    """限流器统计信息"""
+    waiting: int = 0 # 当前排队等待的调用方数量
+    acquired: int = 0 # 累计放行次数
+    throttled: int = 0 # 累计需要等待的放行次数
+    requests_available: float = 0 # 请求桶当前余量(仅进程内模式)
+    tokens_available: float = 0 # token 桶当前余量(仅进程内模式)
+    last_wait_ms: float = 0 # 最近一次放行的等待时间
+    avg_wait_ms: float = 0 # 平均等待时间
+    max_wait_ms: float = 0 # 最长等待时间
+    estimated_wait_ms: float = 0 # 新调用方预计需要等待的时间(仅进程内模式)
+
+
+class _TokenBucket:
+    """进程内令牌桶，容量为每分钟配额，按秒匀速补充，容量为 0 表示不限制"""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.rate = capacity / 60
+        self.level = float(capacity)
+        self.updated_at = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def refill(self, now: float) -> None:
+        if self.unlimited:
+            return
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """返回余量足够扣减 amount 所需的等待秒数，超过容量的请求按容量计算避免永远等待"""
+        if self.unlimited:
+            return 0.0
+        self.refill(now)
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def consume(self, amount: float, now: float) -> None:
+        if self.unlimited:
+            return
+        self.refill(now)
+        self.level -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """请求数 + token 数双令牌桶限流器，进程内所有调用方共享同一个实例"""
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        use_redis: bool = False,
+    ) -> None:
+        self._name = name
+        self._requests = _TokenBucket(requests_per_minute)
+        self._tokens = _TokenBucket(tokens_per_minute)
+        self._use_redis = use_redis
+        self._lock = asyncio.Lock()
+        self._paused_until = 0.0
+        self._stats = RateLimiterStats()
+        self._total_wait = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        """是否配置了任意一项配额"""
+        return not (self._requests.unlimited and self._tokens.unlimited)
+
+    async def _reserve_redis(self, tokens: int, force: bool = False) -> Optional[float]:
+        """通过 Redis 扣减配额，返回需要等待的秒数，Redis 不可用时返回 None"""
+        try:
+            wait_ms = await get_redis().client.eval(
+                _ACQUIRE_SCRIPT,
+                2,
+                f"ratelimit:{self._name}:requests",
+                f"ratelimit:{self._name}:tokens",
+                self._requests.capacity,
+                0 if force else 1,
+                self._tokens.capacity,
+                tokens,
+                1 if force else 0,
+            )
+            return int(wait_ms) / 1000
+        except Exception as e:
+            logger.warning(f"限流器[{self._name}]访问 Redis 失败，退化为进程内限流: {str(e)}")
+            return None
+
+    async def _reserve(self, tokens: int) -> float:
+        """尝试扣减一次请求和 tokens 个 token，成功返回 0，否则返回需要等待的秒数"""
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+
+        if self._use_redis:
+            wait = await self._reserve_redis(tokens)
+            if wait is not None:
+                return wait
+
+        wait = max(self._requests.wait_time(1, now), self._tokens.wait_time(tokens, now))
+        if wait <= 0:
+            self._requests.consume(1, now)
+            self._tokens.consume(tokens, now)
+        return wait
+
+    async def acquire(self, tokens: int = 0) -> float:
+        """等待直到配额足够放行一次请求，返回等待的秒数，调用方按到达顺序依次放行"""
+        if not self.enabled:
+            return 0.0
+
+        start = time.monotonic()
+        self._stats.waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    wait = await self._reserve(tokens)
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(wait)
+        finally:
+            self._stats.waiting -= 1
+
+        waited = time.monotonic() - start
+        self._stats.acquired += 1
+        self._total_wait += waited
+        self._stats.last_wait_ms = waited * 1000
+        self._stats.max_wait_ms = max(self._stats.max_wait_ms, waited * 1000)
+        if waited > 0.001:
+            self._stats.throttled += 1
+            logger.debug(f"限流器[{self._name}]放行请求，等待 {waited:.3f}s")
+        return waited
+
+    async def consume(self, tokens: int) -> None:
+        """请求完成后按实际用量补扣 token，不等待，余量可以变为负数"""
+        if tokens <= 0 or self._tokens.unlimited:
+            return
+
+        if self._use_redis and await self._reserve_redis(tokens, force=True) is not None:
+            return
+        self._tokens.consume(tokens, time.monotonic())
+
+    def pause(self, seconds: float) -> None:
+        """暂停放行一段时间，用于提供商返回 429 时让所有调用方一起退避"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        logger.warning(f"限流器[{self._name}]暂停放行 {seconds:.1f}s")
+
+    def stats(self) -> RateLimiterStats:
+        """返回限流统计信息以及新调用方预计需要等待的时间"""
+        now = time.monotonic()
+        wait = max(self._requests.wait_time(1, now), self._tokens.wait_time(1, now), self._paused_until - now, 0.0)
+        return self._stats.model_copy(update={
+            "requests_available": self._requests.level,
+            "tokens_available": self._tokens.level,
+            "avg_wait_ms": self._total_wait / self._stats.acquired * 1000 if self._stats.acquired else 0.0,
+            "estimated_wait_ms": wait * 1000,
+        })
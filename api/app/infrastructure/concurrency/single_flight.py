@@ -0,0 +1,187 @@
+"""
+相同请求合并(single-flight)：
+
+1. 同一时刻多个调用方发起指纹相同的请求时，只有第一个调用方(leader)真正执行，其余调用方等待同一个 Future 并共享结果；
+2. process 范围只在当前进程内合并，cluster 范围会在进程内合并的基础上，再通过 Redis 锁在多个节点之间合并；
+3. cluster 范围下 leader 将结果短暂写入 Redis，其他节点轮询读取，leader 失败或超时的情况下其他节点会自行执行兜底；
+4. 结果按 leader 的锁值分别存储，其他节点先读取锁值再读取对应的结果，不会读到之前某次执行遗留的结果。
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from enum import Enum
+from typing import Awaitable, Callable, Dict, Generic, Optional, TypeVar
+
+from pydantic import BaseModel
+from redis.asyncio import Redis
+
+from app.infrastructure.storage.redis import get_redis
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 只有锁的持有者才能释放锁
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+else
+    return 0
+end
+"""
+
+
+class SingleFlightScope(str, Enum):
+    """请求合并范围"""
+    PROCESS = "process" # 进程内合并
+    CLUSTER = "cluster" # 通过 Redis 跨节点合并
+
+
+class SingleFlightStats(BaseModel):
+    """请求合并统计信息"""
+    calls: int = 0 # 调用总次数
+    executions: int = 0 # 实际执行次数
+    saved: int = 0 # 合并后节省的执行次数
+    in_flight: int = 0 # 当前正在执行的请求数
+
+
+class SingleFlight(Generic[T]):
+    """相同请求合并器，相同 key 的并发调用只会执行一次"""
+
+    def __init__(
+        self,
+        name: str,
+        scope: Optional[SingleFlightScope] = None,
+        dumps: Optional[Callable[[T], str]] = None,
+        loads: Optional[Callable[[str], T]] = None,
+    ) -> None:
+        """构造函数，cluster 范围需要传递 dumps/loads 用于在 Redis 中传递结果"""
+        settings = get_settings()
+        self._name = name
+        self._scope = SingleFlightScope(scope or settings.single_flight_scope)
+        self._dumps = dumps
+        self._loads = loads
+        self._lock_ttl_seconds = settings.single_flight_lock_ttl_seconds
+        self._result_ttl_seconds = settings.single_flight_result_ttl_seconds
+        self._poll_interval = settings.single_flight_poll_interval_ms / 1000
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._stats = SingleFlightStats()
+
+        if self._scope == SingleFlightScope.CLUSTER and (dumps is None or loads is None):
+            raise ValueError("cluster 范围的请求合并必须传递 dumps/loads")
+
+    @property
+    def scope(self) -> SingleFlightScope:
+        """返回请求合并范围"""
+        return self._scope
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        """执行 func，相同 key 的并发调用共享同一次执行的结果"""
+        self._stats.calls += 1
+
+        # 1. 已有相同请求在执行，则直接等待其结果
+        future = self._in_flight.get(key)
+        if future is not None:
+            self._stats.saved += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # leader 被取消时等待者不应被牵连，重新发起请求
+                if future.cancelled():
+                    self._stats.saved -= 1
+                    return await self.do(key, func)
+                raise
+
+        # 2. 当前调用方成为 leader，创建 Future 供其他调用方等待
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            if self._scope == SingleFlightScope.CLUSTER:
+                result = await self._do_cluster(key, func)
+            else:
+                self._stats.executions += 1
+                result = await func()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 避免没有其他等待者时出现 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    async def _do_cluster(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        """通过 Redis 锁在多个节点之间合并请求"""
+        lock_key = f"singleflight:{self._name}:lock:{key}"
+        lock_value = str(uuid.uuid4())
+
+        try:
+            redis = get_redis().client
+            acquired = await redis.set(lock_key, lock_value, nx=True, ex=self._lock_ttl_seconds)
+        except Exception as e:
+            # Redis 不可用时退化为进程内合并
+            logger.warning(f"请求合并[{self._name}]获取 Redis 锁失败，退化为进程内合并: {str(e)}")
+            self._stats.executions += 1
+            return await func()
+
+        # 1. 获取到锁则由当前节点执行，并将结果写入 Redis 供其他节点读取
+        if acquired:
+            try:
+                self._stats.executions += 1
+                result = await func()
+                try:
+                    await redis.set(self._result_key(key, lock_value), self._dumps(result), ex=self._result_ttl_seconds)
+                except Exception as e:
+                    logger.warning(f"请求合并[{self._name}]写入执行结果失败: {str(e)}")
+                return result
+            finally:
+                try:
+                    await redis.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, lock_value)
+                except Exception as e:
+                    logger.warning(f"请求合并[{self._name}]释放 Redis 锁失败: {str(e)}")
+
+        # 2. 其他节点正在执行，读取其锁值并轮询对应的结果，锁释放后仍无结果或轮询时 Redis 出错则自行执行
+        try:
+            data = None
+            leader_value = await redis.get(lock_key)
+            if leader_value is not None:
+                data = await self._wait_result(redis, lock_key, leader_value, self._result_key(key, leader_value))
+        except Exception as e:
+            logger.warning(f"请求合并[{self._name}]读取其他节点的结果失败，自行执行请求: {str(e)}")
+            data = None
+
+        if data is not None:
+            self._stats.saved += 1
+            return self._loads(data)
+
+        logger.warning(f"请求合并[{self._name}]未等到其他节点的结果，自行执行请求")
+        self._stats.executions += 1
+        return await func()
+
+    def _result_key(self, key: str, lock_value: str) -> str:
+        """leader 写入执行结果的键，按 leader 的锁值区分每一次执行"""
+        return f"singleflight:{self._name}:result:{key}:{lock_value}"
+
+    async def _wait_result(self, redis: Redis, lock_key: str, leader_value: str, result_key: str) -> Optional[str]:
+        """轮询 leader 写入的结果，直到 leader 释放锁或超过锁的过期时间，没有结果时返回 None"""
+        deadline = time.monotonic() + self._lock_ttl_seconds
+        while time.monotonic() < deadline:
+            data = await redis.get(result_key)
+            if data is not None:
+                return data
+            if await redis.get(lock_key) != leader_value:
+                break
+            await asyncio.sleep(self._poll_interval)
+
+        return await redis.get(result_key)
+
+    def stats(self) -> SingleFlightStats:
+        """返回请求合并统计信息"""
+        return self._stats.model_copy(update={"in_flight": len(self._in_flight)})
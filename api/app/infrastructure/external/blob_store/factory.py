@@ -0,0 +1,17 @@
+from functools import lru_cache
+
+from app.domain.external.blob_store import BlobStore
+from core.config import get_settings
+
+
+@lru_cache
+def get_blob_store() -> BlobStore:
+    """根据配置获取进程内共享的大对象存储：local 使用本地磁盘，oss 使用阿里云 OSS"""
+    backend = get_settings().blob_store_backend
+    if backend == "oss":
+        from app.infrastructure.external.blob_store.oss_blob_store import OSSBlobStore
+        return OSSBlobStore()
+    if backend == "local":
+        from app.infrastructure.external.blob_store.local_blob_store import LocalBlobStore
+        return LocalBlobStore()
+    raise ValueError(f"不支持的大对象存储: {backend}")
@@ -0,0 +1,71 @@
+import asyncio
+import shutil
+from pathlib import Path
+from typing import Optional
+
+from app.domain.external.blob_store import BlobStore
+from core.config import get_settings
+
+
+class LocalBlobStore(BlobStore):
+    """基于本地磁盘的大对象存储，适用于单机部署与本地开发"""
+
+    def __init__(self, root_dir: Optional[str] = None) -> None:
+        self._root_dir = Path.cwd().joinpath(root_dir or get_settings().blob_store_local_dir).resolve()
+
+    def _path(self, key: str) -> Path:
+        """根据键计算文件路径，拒绝指向存储目录之外的键"""
+        path = self._root_dir.joinpath(key).resolve()
+        if self._root_dir not in path.parents:
+            raise ValueError(f"非法的对象键: {key}")
+        return path
+
+    @staticmethod
+    def _write(path: Path, content: str) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+
+    @staticmethod
+    def _read(path: Path) -> Optional[str]:
+        return path.read_text(encoding="utf-8") if path.exists() else None
+
+    def _delete_prefix(self, prefix: str) -> int:
+        """删除键以 prefix 开头的文件与目录，以 / 结尾的前缀删除整个目录"""
+        path = self._root_dir.joinpath(prefix)
+        directory, name = (path, "") if prefix.endswith("/") else (path.parent, path.name)
+        directory = directory.resolve()
+        if directory != self._root_dir and self._root_dir not in directory.parents:
+            raise ValueError(f"非法的对象键前缀: {prefix}")
+        if not directory.is_dir():
+            return 0
+
+        deleted = 0
+        for child in directory.iterdir():
+            if not child.name.startswith(name):
+                continue
+            if child.is_dir():
+                deleted += sum(1 for item in child.rglob("*") if item.is_file())
+                shutil.rmtree(child)
+            else:
+                child.unlink()
+                deleted += 1
+
+        if prefix.endswith("/") and directory != self._root_dir:
+            shutil.rmtree(directory, ignore_errors=True)
+        return deleted
+
+    async def put(self, key: str, content: str) -> None:
+        """在线程池中写入文件，避免阻塞事件循环"""
+        await asyncio.to_thread(self._write, self._path(key), content)
+
+    async def get(self, key: str) -> Optional[str]:
+        """在线程池中读取文件"""
+        return await asyncio.to_thread(self._read, self._path(key))
+
+    async def delete(self, key: str) -> None:
+        """在线程池中删除文件，文件不存在时忽略"""
+        await asyncio.to_thread(self._path(key).unlink, missing_ok=True)
+
+    async def delete_prefix(self, prefix: str) -> int:
+        """在线程池中删除键以 prefix 开头的所有文件"""
+        return await asyncio.to_thread(self._delete_prefix, prefix)
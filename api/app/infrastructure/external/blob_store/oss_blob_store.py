@@ -0,0 +1,66 @@
+import logging
+from typing import Optional
+
+import alibabacloud_oss_v2 as oss
+
+from app.domain.external.blob_store import BlobStore
+from app.infrastructure.storage.oss import get_oss
+
+logger = logging.getLogger(__name__)
+
+
+class OSSBlobStore(BlobStore):
+    """基于阿里云 OSS 的大对象存储，多个节点共享"""
+
+    def __init__(self, key_prefix: str = "blobs/") -> None:
+        self._key_prefix = key_prefix
+
+    async def put(self, key: str, content: str) -> None:
+        """将文本内容上传到 OSS"""
+        client = get_oss()
+        await client.client.put_object(oss.PutObjectRequest(
+            bucket=client.bucket,
+            key=self._key_prefix + key,
+            body=content.encode("utf-8"),
+        ))
+
+    async def get(self, key: str) -> Optional[str]:
+        """从 OSS 下载文本内容，对象不存在时返回 None"""
+        client = get_oss()
+        try:
+            result = await client.client.get_object(oss.GetObjectRequest(
+                bucket=client.bucket,
+                key=self._key_prefix + key,
+            ))
+        except oss.exceptions.OperationError as e:
+            logger.warning(f"读取 OSS 对象[{key}]失败: {str(e)}")
+            return None
+        return result.body.content.decode("utf-8")
+
+    async def delete(self, key: str) -> None:
+        """删除 OSS 对象，对象不存在时 OSS 同样返回成功"""
+        client = get_oss()
+        await client.client.delete_object(oss.DeleteObjectRequest(
+            bucket=client.bucket,
+            key=self._key_prefix + key,
+        ))
+
+    async def delete_prefix(self, prefix: str) -> int:
+        """分页列出键以 prefix 开头的对象，每页通过一次批量删除请求删除(每页最多 1000 个)"""
+        client = get_oss()
+        paginator = client.client.list_objects_v2_paginator()
+        deleted = 0
+        async for page in paginator.iter_page(
+            oss.ListObjectsV2Request(bucket=client.bucket, prefix=self._key_prefix + prefix),
+            limit=1000,
+        ):
+            objects = [oss.DeleteObject(key=item.key) for item in page.contents or []]
+            if not objects:
+                continue
+            await client.client.delete_multiple_objects(oss.DeleteMultipleObjectsRequest(
+                bucket=client.bucket,
+                objects=objects,
+                quiet=True,
+            ))
+            deleted += len(objects)
+        return deleted
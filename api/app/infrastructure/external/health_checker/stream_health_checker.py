@@ -0,0 +1,28 @@
+import logging
+
+from app.domain.external.health_checker import HealthChecker
+from app.domain.models.health_status import HealthStatus
+from app.infrastructure.external.message_queue.stream_sweeper import StreamSweeper
+
+logger = logging.getLogger(__name__)
+
+class StreamHealthChecker(HealthChecker):
+    """任务消息流健康检查器，返回清理器最近一次扫描得到的消息流数量与内存占用，不额外访问 Redis"""
+
+    def __init__(self, stream_sweeper: StreamSweeper) -> None:
+        self._stream_sweeper = stream_sweeper
+
+    async def check(self) -> HealthStatus:
+        try:
+            return HealthStatus(
+                service="task_streams",
+                status="ok",
+                details=self._stream_sweeper.stats().model_dump_json(),
+            )
+        except Exception as e:
+            logger.error(f"任务消息流健康检查失败: {str(e)}")
+            return HealthStatus(
+                service="task_streams",
+                status="error",
+                details=f"{str(e)}"
+            )
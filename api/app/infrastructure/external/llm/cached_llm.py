@@ -0,0 +1,249 @@
+import asyncio
+import copy
+import json
+import logging
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from app.domain.external.llm import LLM, merge_message_delta
+from app.infrastructure.external.llm.fingerprint import llm_request_fingerprint
+from app.infrastructure.storage.redis import get_redis
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCacheStats(BaseModel):
+    """LLM 响应缓存统计信息"""
+    memory_hits: int = 0 # 进程内缓存命中次数
+    redis_hits: int = 0 # Redis 缓存命中次数
+    misses: int = 0 # 未命中次数
+    bypassed: int = 0 # 未走缓存的请求次数(如温度大于 0)
+    size: int = 0 # 进程内缓存当前条目数
+
+    @property
+    def hit_rate(self) -> float:
+        """缓存命中率"""
+        total = self.memory_hits + self.redis_hits + self.misses
+        return (self.memory_hits + self.redis_hits) / total if total else 0.0
+
+
+class LLMResponseCache:
+    """LLM 响应缓存，由进程内 LRU + Redis 两级组成，进程内所有 CachedLLM 共享同一个实例"""
+
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        use_redis: Optional[bool] = None,
+        key_prefix: str = "llm:cache:",
+    ) -> None:
+        settings = get_settings()
+        self._max_size = max_size if max_size is not None else settings.llm_cache_max_size
+        self._ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.llm_cache_ttl_seconds
+        self._use_redis = use_redis if use_redis is not None else settings.llm_cache_redis_enabled
+        self._key_prefix = key_prefix
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = asyncio.Lock()
+        self._stats = LLMCacheStats()
+
+    def _get_local(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, message = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return message
+
+    def _set_local(self, key: str, message: Dict[str, Any]) -> None:
+        self._entries[key] = (time.monotonic() + self._ttl_seconds, message)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """根据请求指纹获取缓存的消息，依次查询进程内缓存和 Redis"""
+        async with self._lock:
+            message = self._get_local(key)
+            if message is not None:
+                self._stats.memory_hits += 1
+                return copy.deepcopy(message)
+
+        if self._use_redis:
+            try:
+                data = await get_redis().client.get(self._key_prefix + key)
+            except Exception as e:
+                logger.warning(f"读取 LLM Redis 缓存失败: {str(e)}")
+                data = None
+
+            if data:
+                message = json.loads(data)
+                async with self._lock:
+                    self._set_local(key, message)
+                    self._stats.redis_hits += 1
+                return copy.deepcopy(message)
+
+        async with self._lock:
+            self._stats.misses += 1
+        return None
+
+    async def set(self, key: str, message: Dict[str, Any]) -> None:
+        """将消息写入两级缓存，空回复不做缓存"""
+        if not message.get("content") and not message.get("tool_calls"):
+            return
+
+        async with self._lock:
+            self._set_local(key, message)
+
+        if self._use_redis:
+            try:
+                await get_redis().client.set(
+                    self._key_prefix + key,
+                    json.dumps(message, ensure_ascii=False),
+                    ex=self._ttl_seconds,
+                )
+            except Exception as e:
+                logger.warning(f"写入 LLM Redis 缓存失败: {str(e)}")
+
+    def record_bypass(self) -> None:
+        """记录一次未走缓存的请求"""
+        self._stats.bypassed += 1
+
+    def clear(self) -> None:
+        """清空进程内缓存"""
+        self._entries.clear()
+
+    def stats(self) -> LLMCacheStats:
+        """返回缓存统计信息"""
+        return self._stats.model_copy(update={"size": len(self._entries)})
+
+
+@lru_cache
+def get_llm_response_cache() -> LLMResponseCache:
+    """获取进程内共享的 LLM 响应缓存"""
+    return LLMResponseCache()
+
+
+class CachedLLM(LLM):
+    """带响应缓存的 LLM，包装任意 LLM 协议实现，命中缓存时不再请求提供商"""
+
+    def __init__(
+        self,
+        llm: LLM,
+        cache: Optional[LLMResponseCache] = None,
+        allow_sampling: Optional[bool] = None,
+    ) -> None:
+        self._llm = llm
+        self._cache = cache if cache is not None else get_llm_response_cache()
+        self._allow_sampling = (
+            allow_sampling if allow_sampling is not None else get_settings().llm_cache_allow_sampling
+        )
+
+    @property
+    def model_name(self) -> str:
+        """返回 LLM 的名字"""
+        return self._llm.model_name
+
+    @property
+    def temperature(self) -> float:
+        """返回 LLM 的温度"""
+        return self._llm.temperature
+
+    @property
+    def max_tokens(self) -> int:
+        """返回 LLM 返回的最大 token 树"""
+        return self._llm.max_tokens
+
+    @property
+    def cache(self) -> LLMResponseCache:
+        """返回所使用的响应缓存"""
+        return self._cache
+
+    def _cache_key(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: List[Dict[str, Any]] = None,
+        response_format: Dict[str, Any] = None,
+        tool_choice: str = None,
+    ) -> Optional[str]:
+        """计算请求的缓存键，温度大于 0 且未允许缓存采样结果时返回 None 表示不走缓存"""
+        if self.temperature > 0 and not self._allow_sampling:
+            self._cache.record_bypass()
+            return None
+
+        return llm_request_fingerprint(
+            model_name=self.model_name,
+            temperature=self.temperature,
+            messages=messages,
+            tools=tools,
+            response_format=response_format,
+            tool_choice=tool_choice,
+        )
+
+    async def invoke(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: List[Dict[str, Any]] = None,
+        response_format: Dict[str, Any] = None,
+        tool_choice: str = None,
+    ) -> Dict[str, Any]:
+        """调用 LLM 接口，优先从缓存中读取"""
+        key = self._cache_key(messages, tools, response_format, tool_choice)
+        if key is not None:
+            message = await self._cache.get(key)
+            if message is not None:
+                logger.debug(f"LLM 响应缓存命中: {key}")
+                return message
+
+        message = await self._llm.invoke(
+            messages=messages,
+            tools=tools,
+            response_format=response_format,
+            tool_choice=tool_choice,
+        )
+        if key is not None:
+            await self._cache.set(key, message)
+        return message
+
+    async def stream(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: List[Dict[str, Any]] = None,
+        response_format: Dict[str, Any] = None,
+        tool_choice: str = None,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """流式调用 LLM 接口，命中缓存时将完整消息作为单个增量返回"""
+        key = self._cache_key(messages, tools, response_format, tool_choice)
+        if key is not None:
+            message = await self._cache.get(key)
+            if message is not None:
+                logger.debug(f"LLM 响应缓存命中: {key}")
+                delta = {"role": message.get("role"), "content": message.get("content")}
+                if message.get("tool_calls"):
+                    delta["tool_calls"] = [
+                        {"index": index, **tool_call} for index, tool_call in enumerate(message["tool_calls"])
+                    ]
+                yield delta
+                return
+
+        message: Dict[str, Any] = {}
+        async for delta in self._llm.stream(
+            messages=messages,
+            tools=tools,
+            response_format=response_format,
+            tool_choice=tool_choice,
+        ):
+            merge_message_delta(message, delta)
+            yield delta
+
+        if key is not None:
+            await self._cache.set(key, message)
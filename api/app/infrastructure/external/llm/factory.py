@@ -0,0 +1,23 @@
+from typing import Optional
+
+from app.domain.external.llm import LLM
+from app.domain.models.app_config import LLMConfig
+from app.infrastructure.external.llm.cached_llm import CachedLLM, LLMResponseCache
+from app.infrastructure.external.llm.openai_llm import OpenAILLM
+from app.infrastructure.external.llm.rate_limited_llm import RateLimitedLLM
+from app.infrastructure.external.llm.single_flight_llm import SingleFlightLLM
+
+
+def create_provider_llm(llm_config: LLMConfig) -> LLM:
+    """创建单个提供商端点的 LLM，请求前按 token 限流，LLM 路由的每个端点使用该工厂"""
+    return RateLimitedLLM(OpenAILLM(llm_config))
+
+
+def wrap_llm(llm: LLM, cache: Optional[LLMResponseCache] = None) -> LLM:
+    """为 LLM(单个端点或 LLM 路由)加上相同请求合并与响应缓存，确定性请求优先读取缓存"""
+    return CachedLLM(SingleFlightLLM(llm), cache=cache)
+
+
+def create_llm(llm_config: LLMConfig) -> LLM:
+    """根据 LLM 提供商配置创建 LLM：限流后合并相同请求，确定性请求优先读取响应缓存"""
+    return wrap_llm(create_provider_llm(llm_config))
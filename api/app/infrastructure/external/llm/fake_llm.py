@@ -0,0 +1,137 @@
+"""
+可编排的本地 LLM 替身，用于在没有真实提供商的情况下测试与压测 Agent 框架本身的开销：
+
+1. 回复由脚本决定，脚本可以是按顺序返回的消息列表，也可以是根据请求动态生成消息的函数；
+2. 可以配置首 token 延迟与每秒输出 token 数，按回复的 token 数模拟生成耗时；
+3. 不包含任何随机性，相同的脚本与请求总是返回相同的结果。
+"""
+
+import asyncio
+import copy
+import json
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Union
+
+from app.domain.external.llm import LLM
+from app.domain.models.memory import estimate_tokens
+
+# 根据请求生成回复的脚本函数，参数为消息列表与工具列表
+FakeLLMResponder = Callable[[List[Dict[str, Any]], Optional[List[Dict[str, Any]]]], Dict[str, Any]]
+
+
+def fake_tool_call(call_id: str, function_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """构建一条 OpenAI 格式的工具调用"""
+    return {
+        "id": call_id,
+        "type": "function",
+        "function": {"name": function_name, "arguments": json.dumps(arguments, ensure_ascii=False)},
+    }
+
+
+class FakeLLM(LLM):
+    """可编排的本地 LLM，实现 LLM 协议"""
+
+    def __init__(
+        self,
+        script: Union[List[Dict[str, Any]], FakeLLMResponder],
+        latency_ms: float = 0, # 首 token 延迟
+        tokens_per_second: float = 0, # 每秒输出 token 数，0 表示不模拟生成耗时
+        stream_chunk_chars: int = 16, # 流式输出时每个增量的字符数
+        model_name: str = "fake-llm",
+        temperature: float = 0.0,
+        max_tokens: int = 8192,
+    ) -> None:
+        self._script = script
+        self._latency = latency_ms / 1000
+        self._tokens_per_second = tokens_per_second
+        self._stream_chunk_chars = stream_chunk_chars
+        self._model_name = model_name
+        self._temperature = temperature
+        self._max_tokens = max_tokens
+        self._cursor = 0
+        self.calls = 0 # 累计调用次数
+        self.requests: List[List[Dict[str, Any]]] = [] # 每次调用收到的消息列表
+
+    @property
+    def model_name(self) -> str:
+        """返回 LLM 的名字"""
+        return self._model_name
+
+    @property
+    def temperature(self) -> float:
+        """返回 LLM 的温度"""
+        return self._temperature
+
+    @property
+    def max_tokens(self) -> int:
+        """返回 LLM 返回的最大 token 树"""
+        return self._max_tokens
+
+    def _next_message(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """根据脚本获取下一条回复"""
+        self.calls += 1
+        self.requests.append(messages)
+        if callable(self._script):
+            message = self._script(messages, tools)
+        else:
+            if self._cursor >= len(self._script):
+                raise RuntimeError(f"FakeLLM 脚本已耗尽，共 {len(self._script)} 条回复")
+            message = self._script[self._cursor]
+            self._cursor += 1
+        return {"role": "assistant", **copy.deepcopy(message)}
+
+    def _generation_seconds(self, message: Dict[str, Any]) -> float:
+        """按回复的 token 数计算模拟的生成耗时"""
+        if self._tokens_per_second <= 0:
+            return 0.0
+        text = (message.get("content") or "") + json.dumps(message.get("tool_calls") or [], ensure_ascii=False)
+        return estimate_tokens(text) / self._tokens_per_second
+
+    async def invoke(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: List[Dict[str, Any]] = None,
+        response_format: Dict[str, Any] = None,
+        tool_choice: str = None,
+    ) -> Dict[str, Any]:
+        """按照脚本返回回复，并模拟首 token 延迟与生成耗时"""
+        message = self._next_message(messages, tools)
+        delay = self._latency + self._generation_seconds(message)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return message
+
+    async def stream(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: List[Dict[str, Any]] = None,
+        response_format: Dict[str, Any] = None,
+        tool_choice: str = None,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """按照脚本流式返回回复，内容按固定字符数切分为多个增量，工具调用在最后一个增量中返回"""
+        message = self._next_message(messages, tools)
+        if self._latency > 0:
+            await asyncio.sleep(self._latency)
+
+        content = message.get("content") or ""
+        chunks = [
+            content[index:index + self._stream_chunk_chars]
+            for index in range(0, len(content), self._stream_chunk_chars)
+        ]
+        chunk_delay = self._generation_seconds(message) / max(len(chunks), 1)
+
+        yield {"role": "assistant"}
+        for chunk in chunks:
+            if chunk_delay > 0:
+                await asyncio.sleep(chunk_delay)
+            yield {"content": chunk}
+
+        if message.get("tool_calls"):
+            yield {
+                "tool_calls": [
+                    {"index": index, **tool_call} for index, tool_call in enumerate(message["tool_calls"])
+                ]
+            }
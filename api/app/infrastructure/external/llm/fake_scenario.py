@@ -0,0 +1,139 @@
+"""
+PlannerAgent + ReActAgent 的确定性剧本：根据请求中的提示词判断当前处于哪个阶段，返回对应格式的回复。
+
+- 创建规划：返回包含 steps 个步骤的规划，最后一个步骤依赖前面所有步骤，其余步骤相互独立；
+- 执行步骤：先发起 tool_rounds 轮 search_web 工具调用(每轮 tool_calls_per_round 个)，再返回步骤结果，
+  ask_user_steps 中的步骤在整个任务第一次执行时先调用 message_ask_user 等待用户输入；
+- 更新规划：原样返回剩余未完成的步骤；
+- 汇总结果：返回最终消息。
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.domain.services.prompts.planner import CREATE_PLAN_PROMPT, UPDATE_PLAN_PROMPT
+from app.domain.services.prompts.react import EXECUTION_PROMPT, SUMMARIZE_PROMPT
+from app.infrastructure.external.llm.fake_llm import fake_tool_call
+
+
+def _first_line(template: str) -> str:
+    return template.strip().splitlines()[0]
+
+
+_CREATE_PLAN_MARKER = _first_line(CREATE_PLAN_PROMPT)
+_UPDATE_PLAN_MARKER = _first_line(UPDATE_PLAN_PROMPT)
+_EXECUTION_MARKER = _first_line(EXECUTION_PROMPT)
+_SUMMARIZE_MARKER = _first_line(SUMMARIZE_PROMPT)
+# 更新规划提示词中紧挨着规划 JSON 的标题行
+_PLAN_JSON_MARKER = UPDATE_PLAN_PROMPT.split("{plan}")[0].rstrip().splitlines()[-1]
+
+
+class PlannerReActScript:
+    """按照 PlannerAgent + ReActAgent 的提示词生成确定性回复的 FakeLLM 剧本"""
+
+    def __init__(
+        self,
+        steps: int = 3, # 规划的步骤数
+        tool_rounds: int = 2, # 每个步骤调用工具的轮数
+        tool_calls_per_round: int = 1, # 每轮返回的工具调用数
+        result_chars: int = 200, # 每个步骤结果的字符数
+        ask_user_steps: Sequence[str] = (), # 需要先询问用户的步骤 ID
+    ) -> None:
+        self.steps = steps
+        self.tool_rounds = tool_rounds
+        self.tool_calls_per_round = tool_calls_per_round
+        self.result_chars = result_chars
+        self.ask_user_steps = set(ask_user_steps)
+
+    @staticmethod
+    def _last_user_index(messages: List[Dict[str, Any]]) -> int:
+        for index in range(len(messages) - 1, -1, -1):
+            if messages[index].get("role") == "user":
+                return index
+        raise ValueError("请求中没有用户消息")
+
+    def _filler(self, seed: str) -> str:
+        text = hashlib.md5(seed.encode("utf-8")).hexdigest()
+        return (text * (self.result_chars // len(text) + 1))[:self.result_chars]
+
+    def _create_plan(self) -> Dict[str, Any]:
+        return {"content": json.dumps({
+            "message": "好的，我将分步骤完成这个任务。",
+            "language": "zh",
+            "goal": "完成压测任务",
+            "title": "压测任务",
+            "steps": [
+                {
+                    "id": str(index + 1),
+                    "description": f"步骤 {index + 1}",
+                    "dependencies": [str(dependency + 1) for dependency in range(index)] if index == self.steps - 1 else [],
+                }
+                for index in range(self.steps)
+            ],
+        }, ensure_ascii=False)}
+
+    @staticmethod
+    def _update_plan(content: str) -> Dict[str, Any]:
+        plan = json.loads(content.rsplit(_PLAN_JSON_MARKER, 1)[1].strip())
+        steps = [
+            {"id": step["id"], "description": step["description"], "dependencies": step["dependencies"]}
+            for step in plan["steps"]
+            if step["status"] not in ["completed", "failed"]
+        ]
+        return {"content": json.dumps({"steps": steps}, ensure_ascii=False)}
+
+    def _execute_step(
+        self,
+        messages: List[Dict[str, Any]],
+        user_index: int,
+        tools: Optional[List[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        content = messages[user_index]["content"]
+        step = content.strip().splitlines()[-1]
+        # 每轮的工具结果紧跟在对应的工具调用消息之后，按 AI 回复中的工具调用消息数统计轮数
+        rounds = sum(1 for message in messages[user_index + 1:] if message.get("tool_calls"))
+        tool_names = [tool["function"]["name"] for tool in tools or []]
+
+        # 需要询问用户的步骤在用户回复之前(记忆中没有询问记录)先调用 message_ask_user
+        asked = any(
+            tool_call["function"]["name"] == "message_ask_user"
+            for message in messages for tool_call in message.get("tool_calls") or []
+        )
+        if step.split()[-1] in self.ask_user_steps and not asked and "message_ask_user" in tool_names:
+            call_id = "call_" + hashlib.md5(f"{step}:ask".encode("utf-8")).hexdigest()[:16]
+            return {"content": None, "tool_calls": [fake_tool_call(call_id, "message_ask_user", {"text": f"{step} 需要确认"})]}
+
+        if rounds < self.tool_rounds and "search_web" in tool_names:
+            tool_calls = []
+            for index in range(self.tool_calls_per_round):
+                call_id = "call_" + hashlib.md5(f"{step}:{rounds}:{index}".encode("utf-8")).hexdigest()[:16]
+                query = f"{step} 关键词 {rounds + 1}-{index + 1}"
+                tool_calls.append(fake_tool_call(call_id, "search_web", {"query": query}))
+            return {"content": None, "tool_calls": tool_calls}
+
+        return {"content": json.dumps({
+            "success": True,
+            "result": f"{step} 已完成: {self._filler(step)}",
+            "attachments": [],
+        }, ensure_ascii=False)}
+
+    def __call__(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        user_index = self._last_user_index(messages)
+        content = messages[user_index]["content"] or ""
+
+        if _CREATE_PLAN_MARKER in content:
+            return self._create_plan()
+        if _UPDATE_PLAN_MARKER in content:
+            return self._update_plan(content)
+        if _EXECUTION_MARKER in content:
+            return self._execute_step(messages, user_index, tools)
+        if _SUMMARIZE_MARKER in content:
+            return {"content": json.dumps({"message": "任务已全部完成。", "attachments": []}, ensure_ascii=False)}
+
+        # 其他请求(如记忆摘要)直接返回纯文本
+        return {"content": "已完成。"}
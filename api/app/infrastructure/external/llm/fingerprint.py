@@ -0,0 +1,52 @@
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+# 参与指纹计算的消息字段，其余字段(如 function_name、refusal 等)不影响 LLM 的输出
+_MESSAGE_KEYS = ("role", "content", "name", "tool_calls", "tool_call_id")
+
+
+def _dumps(value: Any) -> str:
+    """将数据序列化为稳定的 JSON 字符串(键排序、无多余空格)"""
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def normalize_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """规范化消息列表，只保留影响输出的字段并去除空值和首尾空白"""
+    normalized = []
+    for message in messages:
+        item = {}
+        for key in _MESSAGE_KEYS:
+            value = message.get(key)
+            if value is None or value == []:
+                continue
+            item[key] = value.strip() if isinstance(value, str) else value
+        normalized.append(item)
+    return normalized
+
+
+def tools_hash(tools: Optional[List[Dict[str, Any]]]) -> str:
+    """计算工具声明列表的哈希值"""
+    if not tools:
+        return ""
+    return hashlib.sha256(_dumps(tools).encode("utf-8")).hexdigest()
+
+
+def llm_request_fingerprint(
+    model_name: str,
+    temperature: float,
+    messages: List[Dict[str, Any]],
+    tools: Optional[List[Dict[str, Any]]] = None,
+    response_format: Optional[Dict[str, Any]] = None,
+    tool_choice: Optional[str] = None,
+) -> str:
+    """根据模型、温度、规范化后的消息、工具 schema 哈希和响应格式计算请求指纹"""
+    payload = {
+        "model": model_name,
+        "temperature": temperature,
+        "messages": normalize_messages(messages),
+        "tools": tools_hash(tools),
+        "response_format": response_format,
+        "tool_choice": tool_choice,
+    }
+    return hashlib.sha256(_dumps(payload).encode("utf-8")).hexdigest()
@@ -0,0 +1,292 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, AsyncGenerator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.application.errors.exceptions import ServerError
+from app.domain.external.llm import LLM
+from app.domain.external.llm_router import LLMRouter
+from app.domain.models.app_config import LLMEndpointConfig, LLMRouterConfig
+from app.domain.models.llm_router import LLMEndpointStats
+from app.domain.services.retry import is_retryable
+from app.infrastructure.external.llm.factory import create_provider_llm
+from app.infrastructure.external.llm.openai_llm import OpenAILLM
+
+logger = logging.getLogger(__name__)
+
+
+class _Endpoint:
+    """路由中的单个端点，记录滑动窗口内的延迟与调用结果"""
+
+    def __init__(self, name: str, config: LLMEndpointConfig, llm: LLM, window_size: int) -> None:
+        self.name = name
+        self.config = config
+        self.llm = llm
+        self.samples: Deque[Tuple[float, bool]] = deque(maxlen=window_size) # (延迟秒数, 是否成功)
+        self.requests = 0
+        self.errors = 0
+        self.hedged = 0
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """计算成功请求延迟的分位数，没有样本时返回 None"""
+        latencies = sorted(latency for latency, ok in self.samples if ok)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(len(latencies) * percentile / 100))
+        return latencies[index]
+
+    @property
+    def latency_samples(self) -> int:
+        return sum(1 for _, ok in self.samples if ok)
+
+    @property
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for _, ok in self.samples if not ok) / len(self.samples)
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.cooldown_until
+
+    @property
+    def score(self) -> float:
+        """端点的期望延迟：p50 延迟按成功率放大，没有任何样本的端点得分为 0 以便优先探测"""
+        if not self.samples:
+            return 0.0
+        p50 = self.percentile(50)
+        if p50 is None:
+            return float("inf")
+        return p50 / max(1 - self.error_rate, 0.01)
+
+
+class LatencyAwareLLMRouter(LLMRouter):
+    """基于延迟感知的多端点 LLM 路由
+
+    1. 每个端点记录滑动窗口内的延迟与错误率，错误率超过阈值的端点进入冷却期；
+    2. 每次请求选择健康端点中期望延迟(p50 按成功率放大)最低的端点，没有样本的端点优先被探测；
+    3. 开启对冲后，首个请求超过该端点的延迟分位数仍未返回时，向次优端点发起第二个请求，先返回者胜出；
+    4. 请求出现可重试的错误时依次切换到下一个端点，不可重试的错误(如 400、熔断)直接抛出且不计入端点统计。
+    """
+
+    def __init__(
+        self,
+        router_config: Optional[LLMRouterConfig] = None,
+        llm_factory: Callable[[LLMEndpointConfig], LLM] = OpenAILLM,
+    ) -> None:
+        self._llm_factory = llm_factory
+        self._config = LLMRouterConfig()
+        self._endpoints: Dict[str, _Endpoint] = {}
+        self.configure(router_config or LLMRouterConfig())
+
+    def configure(self, router_config: LLMRouterConfig) -> None:
+        """根据传递的路由配置更新端点列表，保留未变更端点的统计数据"""
+        endpoints = {}
+        for name, endpoint_config in router_config.endpoints.items():
+            if not endpoint_config.enabled:
+                continue
+
+            endpoint = self._endpoints.get(name)
+            if endpoint is None or endpoint.config != endpoint_config:
+                endpoint = _Endpoint(name, endpoint_config, self._llm_factory(endpoint_config), router_config.window_size)
+            elif endpoint.samples.maxlen != router_config.window_size:
+                endpoint.samples = deque(endpoint.samples, maxlen=router_config.window_size)
+            endpoints[name] = endpoint
+
+        self._config = router_config
+        self._endpoints = endpoints
+        logger.info(f"LLM 路由端点已更新: {list(endpoints.keys())}")
+
+    def _primary(self) -> _Endpoint:
+        """返回首个端点，用于对外提供模型名字等属性"""
+        if not self._endpoints:
+            raise ServerError("LLM 路由未配置可用端点")
+        return next(iter(self._endpoints.values()))
+
+    @property
+    def model_name(self) -> str:
+        """返回 LLM 的名字"""
+        return self._primary().llm.model_name
+
+    @property
+    def temperature(self) -> float:
+        """返回 LLM 的温度"""
+        return self._primary().llm.temperature
+
+    @property
+    def max_tokens(self) -> int:
+        """返回 LLM 返回的最大 token 树"""
+        return self._primary().llm.max_tokens
+
+    def _rank(self) -> List[_Endpoint]:
+        """对端点排序：健康端点按期望延迟和在途请求数升序，全部不健康时按冷却结束时间排序"""
+        now = time.monotonic()
+        endpoints = list(self._endpoints.values())
+        if not endpoints:
+            raise ServerError("LLM 路由未配置可用端点")
+
+        healthy = [endpoint for endpoint in endpoints if endpoint.healthy(now)]
+        if not healthy:
+            return sorted(endpoints, key=lambda endpoint: endpoint.cooldown_until)
+
+        return sorted(
+            healthy,
+            key=lambda endpoint: (endpoint.score, endpoint.in_flight),
+        )
+
+    def _record(self, endpoint: _Endpoint, latency: float, ok: bool) -> None:
+        """记录调用结果，错误率超过阈值时端点进入冷却"""
+        endpoint.samples.append((latency, ok))
+        if ok:
+            return
+
+        endpoint.errors += 1
+        if (
+            len(endpoint.samples) >= self._config.min_samples
+            and endpoint.error_rate >= self._config.error_rate_threshold
+        ):
+            endpoint.cooldown_until = time.monotonic() + self._config.cooldown_seconds
+            logger.warning(f"LLM 端点[{endpoint.name}]错误率 {endpoint.error_rate:.2f} 过高，冷却 {self._config.cooldown_seconds}s")
+
+    async def _call(self, endpoint: _Endpoint, func: Callable[[LLM], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """调用指定端点并记录延迟与结果，被取消的调用(对冲失败方)与不可重试的错误不计入统计"""
+        endpoint.requests += 1
+        endpoint.in_flight += 1
+        start = time.monotonic()
+        try:
+            result = await func(endpoint.llm)
+            self._record(endpoint, time.monotonic() - start, True)
+            return result
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if not is_retryable(e):
+                # 请求参数错误、熔断等不可重试的错误与端点健康无关，换端点也不会成功
+                raise
+            logger.warning(f"LLM 端点[{endpoint.name}]调用失败: {str(e)}")
+            self._record(endpoint, time.monotonic() - start, False)
+            raise
+        finally:
+            endpoint.in_flight -= 1
+
+    def _hedge_delay(self, endpoint: _Endpoint) -> Optional[float]:
+        """返回发起对冲请求前的等待时间，样本不足或未开启对冲时返回 None"""
+        if not self._config.hedge_enabled or endpoint.latency_samples < self._config.hedge_min_samples:
+            return None
+        return endpoint.percentile(self._config.hedge_percentile)
+
+    async def invoke(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: List[Dict[str, Any]] = None,
+        response_format: Dict[str, Any] = None,
+        tool_choice: str = None,
+    ) -> Dict[str, Any]:
+        """将请求路由到最快的健康端点，必要时发起对冲请求或切换端点"""
+        async def func(llm: LLM) -> Dict[str, Any]:
+            return await llm.invoke(
+                messages=messages,
+                tools=tools,
+                response_format=response_format,
+                tool_choice=tool_choice,
+            )
+
+        candidates = self._rank()
+        primary = candidates.pop(0)
+        pending = {asyncio.create_task(self._call(primary, func))}
+
+        try:
+            # 1. 首个请求超过延迟分位数仍未返回，向次优端点发起对冲请求
+            hedge_delay = self._hedge_delay(primary)
+            if hedge_delay is not None and candidates:
+                done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+                if not done:
+                    hedge = candidates.pop(0)
+                    hedge.hedged += 1
+                    logger.info(f"LLM 端点[{primary.name}]超过 p{self._config.hedge_percentile:g} 延迟，向[{hedge.name}]发起对冲请求")
+                    pending.add(asyncio.create_task(self._call(hedge, func)))
+
+            # 2. 先成功返回者胜出，全部失败时切换到下一个端点，不可重试的错误直接抛出
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                    if not is_retryable(error):
+                        raise error
+
+                if not pending and candidates:
+                    pending = {asyncio.create_task(self._call(candidates.pop(0), func))}
+
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def stream(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: List[Dict[str, Any]] = None,
+        response_format: Dict[str, Any] = None,
+        tool_choice: str = None,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """流式请求不做对冲，只在返回首个增量之前出现可重试的错误时切换端点"""
+        error: Optional[BaseException] = None
+        for endpoint in self._rank():
+            endpoint.requests += 1
+            endpoint.in_flight += 1
+            start = time.monotonic()
+            started = False
+            try:
+                async for delta in endpoint.llm.stream(
+                    messages=messages,
+                    tools=tools,
+                    response_format=response_format,
+                    tool_choice=tool_choice,
+                ):
+                    started = True
+                    yield delta
+                self._record(endpoint, time.monotonic() - start, True)
+                return
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                logger.warning(f"LLM 端点[{endpoint.name}]流式调用失败: {str(e)}")
+                self._record(endpoint, time.monotonic() - start, False)
+                if started:
+                    raise
+                error = e
+            finally:
+                endpoint.in_flight -= 1
+
+        raise error
+
+    def stats(self) -> List[LLMEndpointStats]:
+        """获取所有端点的运行统计"""
+        now = time.monotonic()
+        return [
+            LLMEndpointStats(
+                name=endpoint.name,
+                model_name=endpoint.config.model_name,
+                healthy=endpoint.healthy(now),
+                requests=endpoint.requests,
+                errors=endpoint.errors,
+                hedged=endpoint.hedged,
+                in_flight=endpoint.in_flight,
+                error_rate=endpoint.error_rate,
+                p50_ms=(endpoint.percentile(50) or 0.0) * 1000,
+                p99_ms=(endpoint.percentile(99) or 0.0) * 1000,
+            )
+            for endpoint in self._endpoints.values()
+        ]
+
+
+@lru_cache
+def get_llm_router() -> LatencyAwareLLMRouter:
+    """获取进程内共享的 LLM 路由实例，每个端点按 token 限流，响应缓存与请求合并由调用方包装在路由之外"""
+    return LatencyAwareLLMRouter(llm_factory=create_provider_llm)
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import logging
+from functools import lru_cache
+from typing import Any, Dict
+
+import httpx
+import openai
+from openai import AsyncOpenAI
+
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class OpenAIClientPool:
+    """AsyncOpenAI 客户端池，相同 (base_url, api_key, 其他选项) 的 OpenAILLM 共享同一个客户端及其 HTTP 连接池"""
+
+    def __init__(self) -> None:
+        self._clients: Dict[str, AsyncOpenAI] = {}
+
+    @staticmethod
+    def _client_key(base_url: str, api_key: str, options: Dict[str, Any]) -> str:
+        """计算客户端的键，api_key 只参与哈希计算，避免明文出现在键中"""
+        payload = json.dumps(
+            {"base_url": base_url, "api_key": api_key, "options": options},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _create_http_client() -> httpx.AsyncClient:
+        """按照配置创建带连接池限制的 HTTP 客户端，启用 HTTP/2 但未安装 h2 时回退到 HTTP/1.1"""
+        settings = get_settings()
+        http2 = settings.llm_http2_enabled
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("未安装 h2，LLM 客户端回退到 HTTP/1.1，可通过 pip install httpx[http2] 安装")
+                http2 = False
+
+        return openai.DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=settings.llm_http_max_connections,
+                max_keepalive_connections=settings.llm_http_max_keepalive_connections,
+                keepalive_expiry=settings.llm_http_keepalive_expiry,
+            ),
+            http2=http2,
+        )
+
+    def get_client(self, base_url: str, api_key: str, **options) -> AsyncOpenAI:
+        """获取指定配置的客户端，不存在时创建"""
+        key = self._client_key(base_url, api_key, options)
+        client = self._clients.get(key)
+        if client is None:
+            client = AsyncOpenAI(
+                base_url=base_url,
+                api_key=api_key,
+                http_client=self._create_http_client(),
+                **options,
+            )
+            self._clients[key] = client
+            logger.info(f"创建 AsyncOpenAI 客户端: {base_url}，当前客户端数: {len(self._clients)}")
+        return client
+
+    @property
+    def size(self) -> int:
+        """返回池中的客户端数量"""
+        return len(self._clients)
+
+    async def shutdown(self) -> None:
+        """关闭池中所有客户端的连接"""
+        for client in self._clients.values():
+            try:
+                await client.close()
+            except Exception as e:
+                logger.warning(f"关闭 AsyncOpenAI 客户端失败: {str(e)}")
+        if self._clients:
+            logger.info(f"成功关闭 {len(self._clients)} 个 AsyncOpenAI 客户端")
+        self._clients.clear()
+
+        # 清除缓存
+        get_openai_client_pool.cache_clear()
+
+
+@lru_cache
+def get_openai_client_pool() -> OpenAIClientPool:
+    """获取进程内共享的 AsyncOpenAI 客户端池"""
+    return OpenAIClientPool()
@@ -1,20 +1,72 @@
 import logging
-from typing import Any, List, Dict
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncGenerator, List, Dict, Optional
 
 from app.domain.external.llm import LLM
 from app.domain.models.app_config import LLMConfig
-from app.application.errors.exceptions import ServerError
-
-from openai import AsyncOpenAI
+from app.application.errors.exceptions import (
+    LLMBadRequestError,
+    LLMCircuitOpenError,
+    LLMConnectionError,
+    LLMError,
+    LLMRateLimitError,
+    LLMServiceError,
+    LLMTimeoutError,
+)
+from app.infrastructure.concurrency.circuit_breaker import get_circuit_breaker
+from app.infrastructure.external.llm.openai_client_pool import get_openai_client_pool
+
+import openai
 
 logger = logging.getLogger(__name__)
 
+def _parse_retry_after(e: openai.APIStatusError) -> Optional[float]:
+    """解析响应头中的 Retry-After(秒数或 HTTP 日期)，没有时返回 None"""
+    headers = e.response.headers if e.response is not None else {}
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def classify_openai_error(e: Exception) -> LLMError:
+    """将 OpenAI SDK 抛出的异常转换为对应的 LLM 异常，保留错误分类与 Retry-After"""
+    if isinstance(e, LLMError):
+        return e
+    if isinstance(e, openai.APITimeoutError):
+        return LLMTimeoutError(provider_error=e)
+    if isinstance(e, openai.APIConnectionError):
+        return LLMConnectionError(provider_error=e)
+    if isinstance(e, openai.APIStatusError):
+        msg = f"LLM 提供商返回错误({e.status_code}): {e.message}"
+        retry_after = _parse_retry_after(e)
+        if e.status_code == 429:
+            return LLMRateLimitError(msg=msg, retry_after=retry_after, provider_error=e)
+        if e.status_code in (408, 409) or e.status_code >= 500:
+            return LLMServiceError(msg=msg, status_code=e.status_code, retry_after=retry_after, provider_error=e)
+        return LLMBadRequestError(msg=msg, status_code=e.status_code, provider_error=e)
+    return LLMServiceError(msg=f"调用 LLM 提供商出错: {str(e)}", provider_error=e)
+
 class OpenAILLM(LLM):
     """基于 OpenAI SDK/兼容 OpenAI 格式的 LLM 调用类"""
 
     def __init__(self, llm_config: LLMConfig, **kwargs) -> None:
-        """构造函数，完成异步 OpenAI 客户端的创建和参数初始化"""
-        self._client = AsyncOpenAI(
+        """构造函数，从客户端池获取共享的异步 OpenAI 客户端并完成参数初始化"""
+        self._client = get_openai_client_pool().get_client(
             base_url=str(llm_config.base_url),
             api_key=llm_config.api_key,
             **kwargs,
@@ -22,7 +74,9 @@ class OpenAILLM(LLM):
         self._model_name = llm_config.model_name
         self._temperature = llm_config.temperature
         self._max_tokens = llm_config.max_tokens
+        self._parallel_tool_calls = llm_config.parallel_tool_calls
         self._timeout_sec = 3600
+        self._circuit_breaker = get_circuit_breaker(f"llm:{llm_config.base_url}:{llm_config.model_name}")
 
     @property
     def model_name(self) -> str:
@@ -40,6 +94,45 @@ class OpenAILLM(LLM):
         return self._max_tokens
 
 
+    def _build_request_kwargs(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: List[Dict[str, Any]] = None,
+        response_format: Dict[str, Any] = None,
+        tool_choice: str = None,
+    ) -> Dict[str, Any]:
+        """组装调用 chat.completions.create 的请求参数"""
+        kwargs = {
+            "model": self._model_name,
+            "temperature": self._temperature,
+            "max_tokens": self._max_tokens,
+            "messages": messages,
+            "response_format": response_format,
+            "timeout": self._timeout_sec,
+        }
+        if tools:
+            logger.info(f"调用 OpenAI 客户端向 LLM 发起请求并携带工具信息：{self._model_name}")
+            kwargs.update({
+                "tools": tools,
+                "tool_choice": tool_choice,
+                "parallel_tool_calls": self._parallel_tool_calls, # 是否允许并行工具调用(deepseek没有这个参数)
+            })
+        else:
+            logger.info(f"调用 OpenAI 客户端向 LLM 发起请求并未携带工具信息：{self._model_name}")
+        return kwargs
+
+    def _check_circuit_breaker(self) -> None:
+        """熔断器打开时快速失败"""
+        if not self._circuit_breaker.allow():
+            raise LLMCircuitOpenError(retry_after=self._circuit_breaker.retry_after())
+
+    def _handle_error(self, e: Exception) -> LLMError:
+        """对异常进行分类，可重试的错误(超时/限流/5xx)计入熔断器，永久性错误(请求本身有误)不改变熔断器状态"""
+        error = classify_openai_error(e)
+        if error.retryable:
+            self._circuit_breaker.record_failure()
+        return error
+
     async def invoke(
         self,
         messages: List[Dict[str, Any]],
@@ -47,7 +140,7 @@ class OpenAILLM(LLM):
         response_format: Dict[str, Any] = None,
         tool_choice: str = None,
     ) -> Dict[str, Any]:
-        """调用 LLM 接口，该接口可转为流式
+        """调用 LLM 接口
 
         Args:
             messages: 消息列表
@@ -55,36 +148,50 @@ class OpenAILLM(LLM):
             response_format: 响应格式. Defaults to None.
             tool_choice: 工具选择策略. Defaults to None.
         """
+        self._check_circuit_breaker()
         try:
-            if tools:
-                logger.info(f"调用 OpenAI 客户端向 LLM 发起请求并携带工具信息：{self._model_name}")
-                response = await self._client.chat.completions.create(
-                    model=self._model_name,
-                    temperature=self._temperature,
-                    max_tokens=self._max_tokens,
-                    messages=messages,
-                    response_format=response_format,
-                    tools=tools,
-                    tool_choice=tool_choice,
-                    parallel_tool_calls=False, # 关闭并行工具调用(deepseek没有这个参数)
-                    timeout=self._timeout_sec,
-                )
-            else:
-                logger.info(f"调用 OpenAI 客户端向 LLM 发起请求并未携带工具信息：{self._model_name}")
-                response = await self._client.chat.completions.create(
-                    model=self._model_name,
-                    temperature=self._temperature,
-                    max_tokens=self._max_tokens,
-                    messages=messages,
-                    response_format=response_format,
-                    timeout=self._timeout_sec,
-                )
-            
-            logger.info(f"OpenAI 客户端返回内容: {response.model_dump()}")
-            return response.choices[0].message.model_dump()
+            response = await self._client.chat.completions.create(
+                **self._build_request_kwargs(messages, tools, response_format, tool_choice),
+            )
         except Exception as e:
             logger.error(f"调用 OpenAI 客户端发生异常: {str(e)}")
-            raise ServerError("调用 OpenAI 客户端向 LLM 发起请求出错")
+            raise self._handle_error(e) from e
+
+        self._circuit_breaker.record_success()
+        logger.info(f"OpenAI 客户端返回内容: {response.model_dump()}")
+        return response.choices[0].message.model_dump()
+
+    async def stream(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: List[Dict[str, Any]] = None,
+        response_format: Dict[str, Any] = None,
+        tool_choice: str = None,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """以流式的方式调用 LLM 接口，迭代返回消息增量(delta)
+
+        Args:
+            messages: 消息列表
+            tools: 工具列表. Defaults to None.
+            response_format: 响应格式. Defaults to None.
+            tool_choice: 工具选择策略. Defaults to None.
+        """
+        self._check_circuit_breaker()
+        try:
+            response = await self._client.chat.completions.create(
+                **self._build_request_kwargs(messages, tools, response_format, tool_choice),
+                stream=True,
+            )
+
+            async for chunk in response:
+                if not chunk.choices:
+                    continue
+                yield chunk.choices[0].delta.model_dump(exclude_none=True)
+        except Exception as e:
+            logger.error(f"调用 OpenAI 客户端流式输出发生异常: {str(e)}")
+            raise self._handle_error(e) from e
+
+        self._circuit_breaker.record_success()
 
 
 if __name__ == "__main__":
@@ -103,5 +210,8 @@ if __name__ == "__main__":
 
         response = await llm.invoke([{"role": "user", "content": "Hi"}])
         print(response)
+
+        async for delta in llm.stream([{"role": "user", "content": "Hi"}]):
+            print(delta)
     
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,117 @@
+import json
+import logging
+from functools import lru_cache
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from app.domain.external.llm import LLM, merge_message_delta
+from app.domain.models.memory import Memory
+from app.infrastructure.concurrency.rate_limiter import RateLimiter
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# 提供商返回 429 且没有 Retry-After 时的默认暂停秒数
+DEFAULT_RATE_LIMIT_PAUSE_SECONDS = 1.0
+
+
+@lru_cache
+def get_llm_rate_limiter() -> RateLimiter:
+    """获取进程内共享的 LLM 限流器"""
+    settings = get_settings()
+    return RateLimiter(
+        name="llm",
+        requests_per_minute=settings.llm_rate_limit_rpm,
+        tokens_per_minute=settings.llm_rate_limit_tpm,
+        use_redis=settings.llm_rate_limit_redis_enabled,
+    )
+
+
+class RateLimitedLLM(LLM):
+    """带 RPM/TPM 限流的 LLM，包装任意 LLM 协议实现，所有实例共享同一个限流器的配额"""
+
+    def __init__(self, llm: LLM, rate_limiter: Optional[RateLimiter] = None) -> None:
+        self._llm = llm
+        self._rate_limiter = rate_limiter if rate_limiter is not None else get_llm_rate_limiter()
+        self._memory = Memory() # 仅用于复用消息 token 数的估算逻辑
+
+    @property
+    def model_name(self) -> str:
+        """返回 LLM 的名字"""
+        return self._llm.model_name
+
+    @property
+    def temperature(self) -> float:
+        """返回 LLM 的温度"""
+        return self._llm.temperature
+
+    @property
+    def max_tokens(self) -> int:
+        """返回 LLM 返回的最大 token 树"""
+        return self._llm.max_tokens
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        """返回所使用的限流器"""
+        return self._rate_limiter
+
+    def _estimate_prompt_tokens(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]] = None) -> int:
+        """估算请求的输入 token 数(消息 + 工具声明)"""
+        tokens = sum(self._memory.count_message_tokens(message) for message in messages)
+        if tools:
+            tokens += self._memory.count_tokens(json.dumps(tools, ensure_ascii=False))
+        return tokens
+
+    def _on_error(self, e: Exception) -> None:
+        """提供商返回 429 时暂停限流器放行，所有调用方一起退避"""
+        if getattr(e, "status_code", None) != 429:
+            return
+        retry_after = getattr(e, "retry_after", None)
+        self._rate_limiter.pause(retry_after if retry_after else DEFAULT_RATE_LIMIT_PAUSE_SECONDS)
+
+    async def invoke(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: List[Dict[str, Any]] = None,
+        response_format: Dict[str, Any] = None,
+        tool_choice: str = None,
+    ) -> Dict[str, Any]:
+        """按输入 token 数申请配额后调用 LLM，完成后按输出 token 数补扣配额"""
+        await self._rate_limiter.acquire(self._estimate_prompt_tokens(messages, tools))
+        try:
+            message = await self._llm.invoke(
+                messages=messages,
+                tools=tools,
+                response_format=response_format,
+                tool_choice=tool_choice,
+            )
+        except Exception as e:
+            self._on_error(e)
+            raise
+
+        await self._rate_limiter.consume(self._memory.count_message_tokens(message))
+        return message
+
+    async def stream(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: List[Dict[str, Any]] = None,
+        response_format: Dict[str, Any] = None,
+        tool_choice: str = None,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """流式调用 LLM，配额的申请与补扣方式与 invoke 相同"""
+        await self._rate_limiter.acquire(self._estimate_prompt_tokens(messages, tools))
+        message: Dict[str, Any] = {}
+        try:
+            async for delta in self._llm.stream(
+                messages=messages,
+                tools=tools,
+                response_format=response_format,
+                tool_choice=tool_choice,
+            ):
+                merge_message_delta(message, delta)
+                yield delta
+        except Exception as e:
+            self._on_error(e)
+            raise
+        finally:
+            await self._rate_limiter.consume(self._memory.count_message_tokens(message))
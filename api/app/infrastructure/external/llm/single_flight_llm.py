@@ -0,0 +1,88 @@
+import copy
+import json
+import logging
+from functools import lru_cache
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from app.domain.external.llm import LLM
+from app.infrastructure.concurrency.single_flight import SingleFlight
+from app.infrastructure.external.llm.fingerprint import llm_request_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache
+def get_llm_single_flight() -> SingleFlight[Dict[str, Any]]:
+    """获取进程内共享的 LLM 请求合并器"""
+    return SingleFlight(
+        name="llm",
+        dumps=lambda message: json.dumps(message, ensure_ascii=False),
+        loads=json.loads,
+    )
+
+
+class SingleFlightLLM(LLM):
+    """合并相同并发请求的 LLM，包装任意 LLM 协议实现，指纹相同的并发请求只会向提供商发起一次"""
+
+    def __init__(self, llm: LLM, single_flight: Optional[SingleFlight[Dict[str, Any]]] = None) -> None:
+        self._llm = llm
+        self._single_flight = single_flight if single_flight is not None else get_llm_single_flight()
+
+    @property
+    def model_name(self) -> str:
+        """返回 LLM 的名字"""
+        return self._llm.model_name
+
+    @property
+    def temperature(self) -> float:
+        """返回 LLM 的温度"""
+        return self._llm.temperature
+
+    @property
+    def max_tokens(self) -> int:
+        """返回 LLM 返回的最大 token 树"""
+        return self._llm.max_tokens
+
+    async def invoke(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: List[Dict[str, Any]] = None,
+        response_format: Dict[str, Any] = None,
+        tool_choice: str = None,
+    ) -> Dict[str, Any]:
+        """调用 LLM 接口，相同指纹的并发请求共享同一次调用的结果"""
+        key = llm_request_fingerprint(
+            model_name=self.model_name,
+            temperature=self.temperature,
+            messages=messages,
+            tools=tools,
+            response_format=response_format,
+            tool_choice=tool_choice,
+        )
+        message = await self._single_flight.do(
+            key,
+            lambda: self._llm.invoke(
+                messages=messages,
+                tools=tools,
+                response_format=response_format,
+                tool_choice=tool_choice,
+            ),
+        )
+        # 多个调用方共享同一个结果，返回副本避免相互影响
+        return copy.deepcopy(message)
+
+    async def stream(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: List[Dict[str, Any]] = None,
+        response_format: Dict[str, Any] = None,
+        tool_choice: str = None,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """流式调用 LLM 接口，流式请求的增量无法在多个调用方之间共享，直接透传"""
+        async for delta in self._llm.stream(
+            messages=messages,
+            tools=tools,
+            response_format=response_format,
+            tool_choice=tool_choice,
+        ):
+            yield delta
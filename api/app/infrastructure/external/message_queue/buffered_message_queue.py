@@ -0,0 +1,133 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, List, Optional, Tuple
+
+from app.domain.external.message_queue import MessageQueue
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedMessageQueue(MessageQueue):
+    """带写缓冲的消息队列，将并发写入的消息攒成一批后通过 put_many 一次写入底层队列(group commit)
+
+    1. put 将消息放入缓冲区，等待所在批次写入底层队列后返回真实的消息 id，与协议语义一致；
+    2. 没有正在进行的写入时，后台写入任务等待 max_delay_ms(为 0 时不等待)后将缓冲区中最多 max_size 条消息一次写入，
+       写入期间到达的消息进入下一批，多个并发写入方的消息因此合并成一次往返，顺序写入方不会额外等待；
+    3. 写入失败时按指数退避重试，超过 max_retries 次后将异常传递给等待的写入方，消息不会被静默丢弃；
+    4. 所有写入由同一个后台任务串行执行，保证消息顺序与 put 的调用顺序一致，读取操作直接委托给底层队列。
+    """
+
+    def __init__(
+        self,
+        queue: MessageQueue,
+        max_size: int = 32, # 每批最多写入的消息数
+        max_delay_ms: float = 0, # 每轮写入前等待更多消息加入的时间，0 表示不等待
+        max_retries: int = 3, # 批量写入失败时的最大重试次数
+        retry_interval_ms: float = 100, # 首次重试前的等待时间，之后按指数退避
+    ) -> None:
+        self._queue = queue
+        self._max_size = max(1, max_size)
+        self._max_delay = max_delay_ms / 1000
+        self._max_retries = max_retries
+        self._retry_interval = retry_interval_ms / 1000
+        self._buffer: List[Tuple[Any, asyncio.Future]] = [] # (消息, 等待消息 id 的 future)
+        self._writer: Optional[asyncio.Task] = None
+
+    def _ensure_writer(self) -> None:
+        """没有正在运行的后台写入任务时启动一个"""
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write_loop())
+
+    async def _write_loop(self) -> None:
+        """后台写入任务，按批次写入缓冲区中的消息直到缓冲区为空"""
+        batch: List[Tuple[Any, asyncio.Future]] = []
+        try:
+            if self._max_delay > 0:
+                await asyncio.sleep(self._max_delay)
+            while self._buffer:
+                batch = self._buffer[:self._max_size]
+                del self._buffer[:len(batch)]
+                await self._write_batch(batch)
+                batch = []
+        except asyncio.CancelledError:
+            # 写入任务被取消时通知所有等待的写入方
+            for _, future in batch + self._buffer:
+                future.cancel()
+            self._buffer.clear()
+            raise
+
+    async def _write_batch(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        """写入一批消息并回填消息 id，失败时按指数退避重试，重试耗尽后将异常传递给写入方"""
+        attempt = 0
+        while True:
+            try:
+                message_ids = await self._queue.put_many([message for message, _ in batch])
+                break
+            except Exception as e:
+                if attempt >= self._max_retries:
+                    logger.error(f"批量写入 {len(batch)} 条缓冲消息失败，已重试 {attempt} 次: {str(e)}")
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    return
+                delay = self._retry_interval * (2 ** attempt)
+                attempt += 1
+                logger.warning(f"批量写入缓冲消息失败，{delay:.2f}s 后第 {attempt} 次重试: {str(e)}")
+                await asyncio.sleep(delay)
+
+        for (_, future), message_id in zip(batch, message_ids):
+            if not future.done():
+                future.set_result(message_id)
+
+    async def flush(self) -> None:
+        """等待缓冲区中的消息全部写入底层队列"""
+        while self._writer is not None and not self._writer.done():
+            await asyncio.shield(self._writer)
+
+    async def put(self, message: Any) -> str:
+        """往缓冲区中添加一条消息，等待所在批次写入后返回消息 id"""
+        future = asyncio.get_running_loop().create_future()
+        self._buffer.append((message, future))
+        self._ensure_writer()
+        return await future
+
+    async def put_many(self, messages: List[Any]) -> List[str]:
+        """将消息按顺序加入缓冲区，与其他写入方的消息合并写入，返回传递消息的 id"""
+        if not messages:
+            return []
+
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in messages]
+        self._buffer.extend(zip(messages, futures))
+        self._ensure_writer()
+        return list(await asyncio.gather(*futures))
+
+    async def get(self, start_id: str = None, block_ms: int = None) -> Tuple[str, Any]:
+        return await self._queue.get(start_id, block_ms)
+
+    async def get_many(self, start_id: str = None, count: int = None, block_ms: int = None) -> List[Tuple[str, Any]]:
+        return await self._queue.get_many(start_id, count, block_ms)
+
+    def subscribe(self, start_id: str = None, count: int = None, block_ms: int = None) -> AsyncIterator[Tuple[str, Any]]:
+        return self._queue.subscribe(start_id, count, block_ms)
+
+    async def pop(self, block_ms: int = None) -> Tuple[str, Any]:
+        return await self._queue.pop(block_ms)
+
+    async def ack(self, message_id: str) -> bool:
+        return await self._queue.ack(message_id)
+
+    async def clear(self) -> None:
+        """等待缓冲消息写入后清空底层队列"""
+        await self.flush()
+        await self._queue.clear()
+
+    async def is_empty(self) -> bool:
+        return await self.size() == 0
+
+    async def size(self) -> int:
+        """获取消息队列的长度，包含尚未开始写入的缓冲消息"""
+        return len(self._buffer) + await self._queue.size()
+
+    async def delete_message(self, message_id: str) -> bool:
+        return await self._queue.delete_message(message_id)
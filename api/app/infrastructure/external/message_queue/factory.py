@@ -0,0 +1,32 @@
+from typing import Optional
+
+from app.domain.external.message_queue import MessageQueue
+from core.config import get_settings
+
+
+def create_message_queue(
+    stream_name: str,
+    consumer_group: Optional[str] = None, # 消费者组，只对 Redis 生效
+    maxlen: int = 0, # 保留的最大消息数，0 表示使用后端的默认值
+    max_age_seconds: int = 0, # 保留的最长消息时间，0 表示不按时间裁剪
+    backpressure: bool = False, # 内存后端达到最大消息数时是否阻塞写入方
+) -> MessageQueue:
+    """根据配置创建消息队列：redis 使用 Redis Stream，memory 使用进程内队列(同名队列在进程内共享)"""
+    backend = get_settings().message_queue_backend
+    if backend == "redis":
+        from app.infrastructure.external.message_queue.redis_message_queue import RedisStreamMessageQueue
+        return RedisStreamMessageQueue(
+            stream_name,
+            consumer_group=consumer_group,
+            maxlen=maxlen,
+            max_age_seconds=max_age_seconds,
+        )
+    if backend == "memory":
+        from app.infrastructure.external.message_queue.memory_message_queue import MemoryMessageQueue
+        return MemoryMessageQueue.get_or_create(
+            stream_name,
+            max_size=maxlen or None,
+            backpressure=backpressure,
+            max_age_seconds=max_age_seconds,
+        )
+    raise ValueError(f"不支持的消息队列: {backend}")
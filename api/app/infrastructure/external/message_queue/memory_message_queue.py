@@ -0,0 +1,203 @@
+import asyncio
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.domain.external.message_queue import MessageQueue
+from core.config import get_settings
+
+StreamId = Tuple[int, int]
+
+
+def parse_stream_id(message_id: str) -> StreamId:
+    """将 毫秒时间戳-序号 形式的消息 id 解析为可比较的元组，省略序号时视为 0"""
+    ms, _, seq = message_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+class MemoryMessageQueue(MessageQueue):
+    """进程内的消息队列，与 Redis Stream 保持相同的消息 id 与顺序语义，适用于单节点部署与测试
+
+    1. 消息 id 为 毫秒时间戳-序号，严格递增，get/get_many/subscribe 读取 start_id 之后的消息；
+    2. 消息数达到 max_size 时，开启 backpressure 的队列(如任务输入流)阻塞写入方，直到消息被 pop/delete 移出，
+       否则按 MAXLEN 语义丢弃最早的消息(如被多个客户端读取的任务输出流)；
+    3. 同名的消息队列通过 get_or_create 在进程内共享，pop 取出即移除，ack 只为兼容协议。
+    """
+
+    _registry: Dict[str, "MemoryMessageQueue"] = {}
+
+    def __init__(
+        self,
+        stream_name: str,
+        max_size: Optional[int] = None, # 最大消息数，为空时使用配置
+        backpressure: bool = False, # 达到最大消息数时阻塞写入方，否则丢弃最早的消息
+        max_age_seconds: int = 0, # 写入时丢弃超过该时间的消息，0 表示不按时间裁剪
+    ) -> None:
+        self._stream_name = stream_name
+        self._max_size = max_size or get_settings().message_queue_memory_max_size
+        self._backpressure = backpressure
+        self._max_age_seconds = max_age_seconds
+        self._ids: List[StreamId] = [] # 与 _messages 一一对应，用于二分查找
+        self._messages: List[Tuple[str, Any]] = []
+        self._last_id: StreamId = (0, 0)
+        self._condition = asyncio.Condition()
+        self._expire_handle: Optional[asyncio.TimerHandle] = None
+
+    @classmethod
+    def get_or_create(cls, stream_name: str, **kwargs) -> "MemoryMessageQueue":
+        """获取进程内同名的消息队列，不存在时创建"""
+        queue = cls._registry.get(stream_name)
+        if queue is None:
+            queue = cls._registry[stream_name] = cls(stream_name, **kwargs)
+        return queue
+
+    def _next_id(self) -> StreamId:
+        ms = int(time.time() * 1000)
+        self._last_id = (ms, 0) if ms > self._last_id[0] else (self._last_id[0], self._last_id[1] + 1)
+        return self._last_id
+
+    def _has_space(self) -> bool:
+        return len(self._messages) < self._max_size
+
+    def _append(self, message: Any) -> str:
+        """追加一条消息并按时间与长度裁剪，调用方需持有锁"""
+        stream_id = self._next_id()
+        message_id = f"{stream_id[0]}-{stream_id[1]}"
+        self._ids.append(stream_id)
+        self._messages.append((message_id, message))
+
+        drop = 0
+        if self._max_age_seconds > 0:
+            drop = bisect_left(self._ids, (int((time.time() - self._max_age_seconds) * 1000), 0))
+        if not self._backpressure:
+            drop = max(drop, len(self._messages) - self._max_size)
+        if drop > 0:
+            del self._ids[:drop]
+            del self._messages[:drop]
+        return message_id
+
+    async def _wait(self, predicate, block_ms: Optional[int]) -> bool:
+        """等待条件满足，block_ms 为空时不等待，为 0 时一直等待，与 XREAD 的 BLOCK 语义一致"""
+        if predicate():
+            return True
+        if block_ms is None:
+            return False
+        try:
+            await asyncio.wait_for(self._condition.wait_for(predicate), timeout=block_ms / 1000 if block_ms else None)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def put(self, message: Any) -> str:
+        """往消息队列中添加一条消息，开启 backpressure 且队列已满时等待"""
+        async with self._condition:
+            if self._backpressure:
+                await self._condition.wait_for(self._has_space)
+            message_id = self._append(message)
+            self._condition.notify_all()
+            return message_id
+
+    async def put_many(self, messages: List[Any]) -> List[str]:
+        """按顺序往消息队列中批量添加消息"""
+        message_ids = []
+        async with self._condition:
+            for message in messages:
+                if self._backpressure and not self._has_space():
+                    # 等待空间前先唤醒读取方，避免双方互相等待
+                    self._condition.notify_all()
+                    await self._condition.wait_for(self._has_space)
+                message_ids.append(self._append(message))
+            self._condition.notify_all()
+        return message_ids
+
+    async def get(self, start_id: str = None, block_ms: int = None) -> Tuple[str, Any]:
+        """获取 start_id 之后的 1 条数据"""
+        messages = await self.get_many(start_id, count=1, block_ms=block_ms)
+        return messages[0] if messages else (None, None)
+
+    async def get_many(self, start_id: str = None, count: int = None, block_ms: int = None) -> List[Tuple[str, Any]]:
+        """获取 start_id 之后的一批消息，没有消息时最多阻塞 block_ms 毫秒"""
+        count = count or get_settings().message_queue_read_batch_size
+        async with self._condition:
+            start = self._last_id if start_id == "$" else parse_stream_id(start_id or "0")
+            if not await self._wait(lambda: bool(self._ids) and self._ids[-1] > start, block_ms):
+                return []
+            index = bisect_right(self._ids, start)
+            return self._messages[index:index + count]
+
+    async def subscribe(self, start_id: str = None, count: int = None, block_ms: int = None) -> AsyncIterator[Tuple[str, Any]]:
+        """从 start_id 之后开始持续按顺序迭代消息，没有新消息时阻塞等待，由调用方决定何时停止迭代"""
+        last_id = start_id or "0"
+        if block_ms is None:
+            block_ms = get_settings().message_queue_block_ms
+
+        while True:
+            for message_id, data in await self.get_many(last_id, count=count, block_ms=block_ms):
+                last_id = message_id
+                yield message_id, data
+
+    async def pop(self, block_ms: int = None) -> Tuple[str, Any]:
+        """获取并移出消息队列中的第一条消息，传递 block_ms 时阻塞等待新消息"""
+        async with self._condition:
+            if not await self._wait(lambda: bool(self._messages), block_ms):
+                return None, None
+            del self._ids[0]
+            message = self._messages.pop(0)
+            self._condition.notify_all()
+            return message
+
+    async def ack(self, message_id: str) -> bool:
+        """消息在 pop 时已经移出，无需确认"""
+        return True
+
+    async def clear(self) -> None:
+        """清空消息队列"""
+        async with self._condition:
+            self._ids.clear()
+            self._messages.clear()
+            self._condition.notify_all()
+
+    async def is_empty(self) -> bool:
+        """判断消息队列是否为空"""
+        return not self._messages
+
+    async def size(self) -> int:
+        """获取消息队列的长度"""
+        return len(self._messages)
+
+    async def delete_message(self, message_id: str) -> bool:
+        """根据传递的消息 id 删除对应的消息"""
+        async with self._condition:
+            stream_id = parse_stream_id(message_id)
+            index = bisect_left(self._ids, stream_id)
+            if index < len(self._ids) and self._ids[index] == stream_id:
+                del self._ids[index]
+                del self._messages[index]
+                self._condition.notify_all()
+            return True
+
+    def _expire(self) -> None:
+        self._expire_handle = None
+        if MemoryMessageQueue._registry.get(self._stream_name) is self:
+            del MemoryMessageQueue._registry[self._stream_name]
+        self._ids.clear()
+        self._messages.clear()
+
+    async def expire(self, seconds: int) -> bool:
+        """在 seconds 秒后清空消息队列并从进程内注册表中移除"""
+        await self.persist()
+        self._expire_handle = asyncio.get_running_loop().call_later(seconds, self._expire)
+        return True
+
+    async def persist(self) -> bool:
+        """取消消息队列的过期时间"""
+        if self._expire_handle is None:
+            return False
+        self._expire_handle.cancel()
+        self._expire_handle = None
+        return True
+
+    async def memory_usage(self) -> int:
+        """粗略估算消息队列占用的内存字节数"""
+        return sum(sys.getsizeof(message_id) + sys.getsizeof(data) for message_id, data in self._messages)
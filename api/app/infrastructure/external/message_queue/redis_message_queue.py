@@ -1,20 +1,76 @@
 import asyncio
+import os
+import socket
+import time
 import uuid
 from typing import Optional
 import logging
-from typing import Any, Tuple
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from redis.exceptions import ResponseError
+
 from app.domain.external.message_queue import MessageQueue
 from app.infrastructure.storage.redis import get_redis
+from core.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# 释放锁的 lua 脚本，只有锁的值与持有者一致时才删除，避免误删其他消费者的锁
+RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+else
+    return 0
+end
+"""
+
+def min_stream_id(max_age_seconds: float) -> str:
+    """计算保留 max_age_seconds 内消息时的最小消息 id，消息 id 的前半部分为写入时的毫秒时间戳"""
+    return str(int((time.time() - max_age_seconds) * 1000))
+
+def default_consumer_name() -> str:
+    """默认的消费者名字，使用 主机名:进程号 区分不同的工作进程"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
 class RedisStreamMessageQueue(MessageQueue):
-    """基于 Redis Stream 的消息队列"""
+    """基于 Redis Stream 的消息队列
 
-    def __init__(self, stream_name: str) -> None:
+    未指定消费者组时，pop 通过分布式锁 + XRANGE/XDEL 取出消息；
+    写入时可以按 maxlen(MAXLEN ~) 或 max_age_seconds(MINID ~) 近似裁剪，避免流无限增长；
+    指定消费者组(consumer_group)时，pop 使用 XREADGROUP 阻塞读取，无需加锁即可在多个消费者之间分发消息，
+    消息处理完成后需要调用 ack 确认，未确认且空闲超过 claim_idle_ms 的消息(如消费者崩溃)会通过 XAUTOCLAIM 被其他消费者重新领取，
+    从而保证消息至少被处理一次。
+    """
+
+    def __init__(
+        self,
+        stream_name: str,
+        consumer_group: Optional[str] = None, # 消费者组名字，为空时使用加锁的 pop
+        consumer_name: Optional[str] = None, # 消费者名字，默认为 主机名:进程号
+        claim_idle_ms: Optional[int] = None, # 未确认的消息空闲多久后允许被其他消费者重新领取
+        maxlen: int = 0, # 写入时保留的最大消息数(近似)，0 表示不按长度裁剪
+        max_age_seconds: int = 0, # 写入时保留的最长消息时间(近似)，只在未设置 maxlen 时生效，0 表示不按时间裁剪
+    ) -> None:
         self._stream_name = stream_name
         self._redis = get_redis()
         self._lock_expire_seconds = 10
+        self._release_script = None
+
+        self._consumer_group = consumer_group
+        self._consumer_name = consumer_name or default_consumer_name()
+        self._claim_idle_ms = claim_idle_ms if claim_idle_ms is not None else get_settings().message_queue_claim_idle_ms
+        self._group_created = False
+        self._next_claim_at = 0.0 # 下一次尝试重新领取空闲消息的时间
+        self._maxlen = maxlen
+        self._max_age_seconds = max_age_seconds
+
+    def _trim_kwargs(self) -> Dict[str, Any]:
+        """计算 XADD 的裁剪参数，使用近似裁剪以保证写入性能"""
+        if self._maxlen > 0:
+            return {"maxlen": self._maxlen, "approximate": True}
+        if self._max_age_seconds > 0:
+            return {"minid": min_stream_id(self._max_age_seconds), "approximate": True}
+        return {}
 
     async def _acquire_lock(self, lock_key: str, timeout_seconds: int = 5) -> Optional[str]:
         lock_value = str(uuid.uuid4())
@@ -25,94 +81,210 @@ class RedisStreamMessageQueue(MessageQueue):
                 lock_key,
                 lock_value,
                 nx=True,
-                ex=timeout_seconds,
+                ex=self._lock_expire_seconds,
             )
             if result:
                 return lock_value
-            
+
             await asyncio.sleep(0.1)
             end_time -= 0.1
-        
+
         return None
-    
+
     async def _release_lock(self, lock_key: str, lock_value: str) -> bool:
-        release_script = """
-        if redis.call("GET", KEYS[1]) == ARGV[1] then
-            return redis.call("DELETE", KEYS[1])
-        else
-            return 0
-        end
-        """
         try:
-            script = self._redis.client.register_script(release_script)
-            result = await script(keys=[lock_key], args=[lock_value])
+            # 脚本只注册一次，之后通过 EVALSHA 执行
+            if self._release_script is None:
+                self._release_script = self._redis.client.register_script(RELEASE_LOCK_SCRIPT)
+            result = await self._release_script(keys=[lock_key], args=[lock_value])
             return result == 1
         except Exception as e:
             logger.error(f"释放锁[{lock_key}:{lock_value}]失败: {str(e)}")
             return False
-    
+
+    async def _ensure_group(self, force: bool = False) -> None:
+        """创建消费者组，从流的起始位置开始消费，保证创建消费者组之前写入的消息也能被消费"""
+        if self._group_created and not force:
+            return
+
+        try:
+            await self._redis.client.xgroup_create(self._stream_name, self._consumer_group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_created = True
+
+    async def _claim_idle(self) -> Tuple[str, Any]:
+        """重新领取其他消费者长时间未确认的消息，没有可领取的消息时推迟下一次尝试"""
+        now = time.monotonic()
+        if now < self._next_claim_at:
+            return None, None
+
+        result = await self._redis.client.xautoclaim(
+            self._stream_name,
+            self._consumer_group,
+            self._consumer_name,
+            min_idle_time=self._claim_idle_ms,
+            start_id="0-0",
+            count=1,
+        )
+        for message_id, message_data in result[1] if result else []:
+            # Redis 7 之前已被删除的消息以空数据返回，直接确认避免重复领取
+            if message_data is None:
+                await self._redis.client.xack(self._stream_name, self._consumer_group, message_id)
+                continue
+            logger.info(f"消费者[{self._consumer_name}]重新领取消息队列[{self._stream_name}]中的消息[{message_id}]")
+            return message_id, message_data.get("data")
+
+        self._next_claim_at = now + self._claim_idle_ms / 1000
+        return None, None
+
+    async def _read_group(self, block_ms: Optional[int]) -> Tuple[str, Any]:
+        """通过消费者组读取 1 条新消息，优先重新领取空闲的未确认消息"""
+        await self._ensure_group()
+
+        message_id, data = await self._claim_idle()
+        if message_id is not None:
+            return message_id, data
+
+        messages = await self._redis.client.xreadgroup(
+            self._consumer_group,
+            self._consumer_name,
+            {self._stream_name: ">"},
+            count=1,
+            block=block_ms,
+        )
+        if not messages:
+            return None, None
+
+        stream_messages = messages[0][1]
+        if not stream_messages:
+            return None, None
+
+        message_id, message_data = stream_messages[0]
+        return message_id, message_data.get("data")
+
     async def put(self, message: Any) -> str:
         """往消息队列中添加一条消息"""
         logger.debug(f"往消息队列[{self._stream_name}]中添加一条消息: {message}")
-        return await self._redis.client.xadd(self._stream_name, {"data": message})
+        return await self._redis.client.xadd(self._stream_name, {"data": message}, **self._trim_kwargs())
+
+    async def put_many(self, messages: List[Any]) -> List[str]:
+        """通过 pipeline 在一次往返中按顺序添加多条消息"""
+        if not messages:
+            return []
+
+        logger.debug(f"往消息队列[{self._stream_name}]中批量添加 {len(messages)} 条消息")
+        trim_kwargs = self._trim_kwargs()
+        async with self._redis.client.pipeline(transaction=False) as pipe:
+            for message in messages:
+                pipe.xadd(self._stream_name, {"data": message}, **trim_kwargs)
+            return await pipe.execute()
 
     async def get(self, start_id: str = None, block_ms: int = None) -> Tuple[str, Any]:
-        """根据传递的开始 id + 阻塞实践，获取 1 条数据"""
-        logger.debug(f"从消息队列[{self._stream_name}]中获取一条消息")
+        """根据传递的开始 id + 阻塞实践，获取 start_id 之后的 1 条数据"""
+        messages = await self.get_many(start_id, count=1, block_ms=block_ms)
+        return messages[0] if messages else (None, None)
+
+    async def get_many(self, start_id: str = None, count: int = None, block_ms: int = None) -> List[Tuple[str, Any]]:
+        """通过 XREAD 获取 start_id 之后的一批消息，一次往返最多读取 count 条，没有消息时最多阻塞 block_ms 毫秒"""
+        logger.debug(f"从消息队列[{self._stream_name}]中批量获取消息")
         if start_id is None:
             start_id = '0'
-        
-        messages = await self._redis.client.xrange(
+
+        messages = await self._redis.client.xread(
             {self._stream_name: start_id},
-            count=1,
+            count=count or get_settings().message_queue_read_batch_size,
             block=block_ms,
         )
         if not messages:
-            return None, None
-        
-        stream_messages = messages[0][1]
-        if not stream_messages:
-            return None, None
-        
-        message_id, message_data = stream_messages[0]
-        try:
-            return message_id, message_data.get("data")
-        except Exception as e:
-            logger.error(f"从消息队列[{self._stream_name}]获取数据失败: {str(e)}")
-    
-    async def pop(self) -> Tuple[str, Any]:
-        """获取并移出消息队列中的第一条消息"""
+            return []
+
+        return [(message_id, message_data.get("data")) for message_id, message_data in messages[0][1]]
+
+    async def subscribe(self, start_id: str = None, count: int = None, block_ms: int = None) -> AsyncIterator[Tuple[str, Any]]:
+        """从 start_id 之后开始持续按顺序迭代消息，每次批量读取，没有新消息时阻塞等待，由调用方决定何时停止迭代"""
+        last_id = start_id or '0'
+        if block_ms is None:
+            block_ms = get_settings().message_queue_block_ms
+
+        while True:
+            for message_id, data in await self.get_many(last_id, count=count, block_ms=block_ms):
+                last_id = message_id
+                yield message_id, data
+
+    async def pop(self, block_ms: int = None) -> Tuple[str, Any]:
+        """获取并移出消息队列中的第一条消息，消费者组模式下需要在处理完成后调用 ack 确认"""
         logger.debug(f"从消息队列[{self._stream_name}]中弹出第一条消息")
+        if self._consumer_group:
+            try:
+                return await self._read_group(block_ms)
+            except ResponseError as e:
+                # 流被删除或过期后消费者组随之消失，重新创建后再读取一次
+                if "NOGROUP" not in str(e):
+                    raise
+                await self._ensure_group(force=True)
+                return await self._read_group(block_ms)
+
         lock_key = f"lock:{self._stream_name}:pop"
 
         lock_value = await self._acquire_lock(lock_key)
         if not lock_value:
-            return None
-        
+            return None, None
+
         try:
             messages = await self._redis.client.xrange(self._stream_name, "-", "+", count=1)
             if not messages:
                 return None, None
-            
+
             message_id, message_data = messages[0]
             await self._redis.client.xdel(self._stream_name, message_id)
             return message_id, message_data.get("data")
         except Exception as e:
             logger.error(f"解析消息队列[{self._stream_name}]出错: {str(e)}")
+            return None, None
         finally:
             await self._release_lock(lock_key, lock_value)
 
+    async def ack(self, message_id: str) -> bool:
+        """确认消息已处理完成，消费者组模式下确认后从流中删除该消息，其他模式下消息在 pop 时已经移出"""
+        if not self._consumer_group:
+            return True
+
+        try:
+            async with self._redis.client.pipeline(transaction=True) as pipe:
+                pipe.xack(self._stream_name, self._consumer_group, message_id)
+                pipe.xdel(self._stream_name, message_id)
+                acked, _ = await pipe.execute()
+            return acked == 1
+        except Exception as e:
+            logger.error(f"确认消息 {message_id} 出错: {str(e)}")
+            return False
+
     async def clear(self) -> None:
         """清空消息队列"""
-        await self._redis.client.xtrim(self._stream_name, maxlen=0)
-    
+        await self._redis.client.xtrim(self._stream_name, maxlen=0, approximate=False)
+
     async def is_empty(self) -> bool:
         """判断消息队列是否为空"""
         return await self.size() == 0
 
     async def size(self) -> int:
-        """获取消息队列的长度"""
-        return await self._redis.client.xlen(self._stream_name)
+        """获取消息队列中尚未被取出的消息数，消费者组模式下不计算已投递但未确认的消息"""
+        if not self._consumer_group:
+            return await self._redis.client.xlen(self._stream_name)
+
+        try:
+            async with self._redis.client.pipeline(transaction=False) as pipe:
+                pipe.xlen(self._stream_name)
+                pipe.xpending(self._stream_name, self._consumer_group)
+                length, pending = await pipe.execute()
+        except ResponseError as e:
+            # 消费者组尚未创建(或随流过期)时所有消息都未被取出
+            if "NOGROUP" not in str(e):
+                raise
+            return await self._redis.client.xlen(self._stream_name)
+        return max(0, length - pending["pending"])
 
     async def delete_message(self, message_id: str) -> bool:
         """根据传递的消息 id 删除对应的消息"""
@@ -121,4 +293,16 @@ class RedisStreamMessageQueue(MessageQueue):
             return True
         except Exception as e:
             logger.error(f"删除消息 {message_id} 出错: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+
+    async def expire(self, seconds: int) -> bool:
+        """设置消息队列的过期时间，任务结束后调用，过期后消息流与消费者组一起被删除"""
+        return bool(await self._redis.client.expire(self._stream_name, seconds))
+
+    async def persist(self) -> bool:
+        """移除消息队列的过期时间，恢复已结束的任务时调用"""
+        return bool(await self._redis.client.persist(self._stream_name))
+
+    async def memory_usage(self) -> int:
+        """获取消息队列在 Redis 中占用的内存字节数，消息队列不存在时返回 0"""
+        return await self._redis.client.memory_usage(self._stream_name) or 0
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import time
+from functools import lru_cache
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.domain.external.blob_store import BlobStore
+from app.domain.external.task_lease import TaskLease
+from app.domain.repositories.checkpoint_repository import CheckpointRepository
+from app.domain.services.tools.blob import tool_result_blob_prefix
+from app.infrastructure.external.blob_store.factory import get_blob_store
+from app.infrastructure.external.message_queue.redis_message_queue import min_stream_id
+from app.infrastructure.external.task.redis_task_lease import get_task_lease
+from app.infrastructure.repositories.redis_checkpoint_repository import RedisCheckpointRepository
+from app.infrastructure.storage.redis import get_redis
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class StreamSweepStats(BaseModel):
+    """一次清理得到的消息流统计信息"""
+    streams: int = 0 # 扫描到的消息流数量
+    entries: int = 0 # 消息总条数
+    memory_bytes: int = 0 # 消息流占用的内存字节数
+    expiring: int = 0 # 已设置过期时间的消息流数量
+    orphaned: int = 0 # 本次设置过期时间的孤儿消息流数量
+    alive: int = 0 # 写入空闲但任务仍存在检查点或租约、没有回收的消息流数量
+    trimmed: int = 0 # 本次按时间裁剪掉的消息数
+
+
+class StreamSweeper:
+    """任务消息流清理器，定期扫描 task:* 消息流，统计内存占用并回收孤儿消息流
+
+    1. 任务正常结束时由 RedisStreamTask 设置过期时间，进程崩溃等原因没有设置过期时间、
+       且超过 idle_seconds 没有写入消息的消息流视为孤儿，设置 expire_seconds 后过期；
+       任务仍存在检查点(如等待用户输入、等待恢复)或租约(仍在运行)时不视为孤儿；
+    2. 设置了 max_age_seconds 时，同时按 MINID 裁剪消息流中过旧的消息；
+    3. 传递大对象存储时，孤儿消息流对应任务单独存储的工具结果一并删除。
+    """
+
+    def __init__(
+        self,
+        match: str = "task:*",
+        interval_seconds: Optional[float] = None,
+        idle_seconds: Optional[int] = None,
+        expire_seconds: Optional[int] = None,
+        max_age_seconds: Optional[int] = None,
+        blob_store: Optional[BlobStore] = None, # 大对象存储，为空时不删除孤儿任务的工具结果
+        checkpoint_repository: Optional[CheckpointRepository] = None, # 检查点仓库，存在检查点的任务不视为孤儿
+        task_lease: Optional[TaskLease] = None, # 任务租约，租约被持有的任务不视为孤儿
+    ) -> None:
+        settings = get_settings()
+        self._match = match
+        self._interval = interval_seconds if interval_seconds is not None else settings.task_stream_sweep_interval_seconds
+        self._idle_seconds = idle_seconds if idle_seconds is not None else settings.task_stream_idle_seconds
+        self._expire_seconds = expire_seconds if expire_seconds is not None else settings.task_stream_expire_seconds
+        self._max_age_seconds = max_age_seconds if max_age_seconds is not None else settings.task_stream_max_age_seconds
+        self._blob_store = blob_store
+        self._checkpoint_repository = checkpoint_repository
+        self._task_lease = task_lease
+        self._task: Optional[asyncio.Task] = None
+        self._last_stats = StreamSweepStats()
+
+    @staticmethod
+    def _task_id(key: str) -> str:
+        """从消息流名字(task:input:{id}/task:output:{id})中取出任务 ID"""
+        return key.split(":", 2)[-1]
+
+    async def _task_alive(self, task_id: str) -> bool:
+        """判断任务是否仍然存活：存在检查点或租约被持有，查询失败时保守地视为存活"""
+        try:
+            if self._task_lease is not None and await self._task_lease.is_held(task_id):
+                return True
+            if self._checkpoint_repository is not None and await self._checkpoint_repository.load(task_id) is not None:
+                return True
+        except Exception as e:
+            logger.warning(f"查询任务[{task_id}]的检查点与租约失败，本次不回收: {str(e)}")
+            return True
+        return False
+
+    async def _delete_blobs(self, task_id: str) -> None:
+        """删除孤儿任务单独存储的工具结果"""
+        if self._blob_store is None:
+            return
+
+        try:
+            await self._blob_store.delete_prefix(tool_result_blob_prefix(task_id))
+        except Exception as e:
+            logger.warning(f"删除任务[{task_id}]单独存储的工具结果失败: {str(e)}")
+
+    async def sweep(self) -> StreamSweepStats:
+        """扫描一次所有任务消息流，每个消息流的状态通过一次 pipeline 获取"""
+        client = get_redis().client
+        stats = StreamSweepStats()
+        now_ms = int(time.time() * 1000)
+
+        async for key in client.scan_iter(match=self._match, count=100, _type="stream"):
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    pipe.ttl(key)
+                    pipe.xinfo_stream(key)
+                    pipe.memory_usage(key)
+                    ttl, info, memory = await pipe.execute()
+            except Exception as e:
+                # 扫描与读取之间消息流可能已经过期
+                logger.debug(f"读取消息流[{key}]信息失败: {str(e)}")
+                continue
+
+            stats.streams += 1
+            stats.entries += info.get("length", 0)
+            stats.memory_bytes += memory or 0
+
+            if ttl >= 0:
+                stats.expiring += 1
+            else:
+                last_ms = int(str(info.get("last-generated-id", "0-0")).split("-")[0])
+                if now_ms - last_ms > self._idle_seconds * 1000:
+                    task_id = self._task_id(key)
+                    if await self._task_alive(task_id):
+                        stats.alive += 1
+                    else:
+                        await client.expire(key, self._expire_seconds)
+                        await self._delete_blobs(task_id)
+                        stats.orphaned += 1
+                        stats.expiring += 1
+
+            if self._max_age_seconds > 0:
+                stats.trimmed += await client.xtrim(key, minid=min_stream_id(self._max_age_seconds), approximate=True)
+
+        self._last_stats = stats
+        if stats.orphaned or stats.trimmed:
+            logger.info(
+                f"清理任务消息流: 共 {stats.streams} 个，占用 {stats.memory_bytes} 字节，"
+                f"回收孤儿消息流 {stats.orphaned} 个，裁剪消息 {stats.trimmed} 条"
+            )
+        return stats
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"清理任务消息流失败: {str(e)}")
+            await asyncio.sleep(self._interval)
+
+    def start(self) -> None:
+        """在后台定期执行清理，interval_seconds 为 0 时不启动"""
+        if self._interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止后台清理"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> StreamSweepStats:
+        """返回最近一次清理得到的统计信息"""
+        return self._last_stats.model_copy()
+
+
+@lru_cache
+def get_stream_sweeper() -> StreamSweeper:
+    """获取进程内共享的任务消息流清理器"""
+    return StreamSweeper(
+        blob_store=get_blob_store(),
+        checkpoint_repository=RedisCheckpointRepository(),
+        task_lease=get_task_lease(),
+    )
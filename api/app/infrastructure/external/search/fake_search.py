@@ -0,0 +1,48 @@
+import asyncio
+import hashlib
+from typing import Optional
+
+from app.domain.external.search import SearchEngine
+from app.domain.models.search import SearchResult, SearchResultItem
+from app.domain.models.tool_result import ToolResult
+
+
+class FakeSearchEngine(SearchEngine):
+    """本地搜索引擎替身，根据 query 生成确定性的搜索结果，用于测试与压测"""
+
+    def __init__(
+        self,
+        latency_ms: float = 0, # 每次搜索的延迟
+        results: int = 5, # 每次搜索返回的结果条数
+        snippet_chars: int = 200, # 每条结果摘要的字符数
+    ) -> None:
+        self._latency = latency_ms / 1000
+        self._results = results
+        self._snippet_chars = snippet_chars
+        self.calls = 0 # 累计调用次数
+
+    async def invoke(self, query: str, date_range: Optional[str] = None) -> ToolResult[SearchResult]:
+        """根据传递的 query + date_range(时间筛选) 返回确定性的搜索结果"""
+        self.calls += 1
+        if self._latency > 0:
+            await asyncio.sleep(self._latency)
+
+        digest = hashlib.md5(f"{query}:{date_range}".encode("utf-8")).hexdigest()
+        items = []
+        for index in range(self._results):
+            snippet = f"{query} 的第 {index + 1} 条搜索结果 {digest} "
+            items.append(SearchResultItem(
+                url=f"https://example.com/{digest[:8]}/{index}",
+                title=f"{query} - 结果 {index + 1}",
+                snippet=(snippet * (self._snippet_chars // len(snippet) + 1))[:self._snippet_chars],
+            ))
+
+        return ToolResult(
+            success=True,
+            data=SearchResult(
+                query=query,
+                date_range=date_range,
+                total_results=len(items),
+                results=items,
+            ),
+        )
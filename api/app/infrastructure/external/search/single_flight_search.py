@@ -0,0 +1,38 @@
+import logging
+from functools import lru_cache
+from typing import Optional
+
+from app.domain.external.search import SearchEngine
+from app.domain.models.search import SearchResult
+from app.domain.models.tool_result import ToolResult
+from app.infrastructure.concurrency.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache
+def get_search_single_flight() -> SingleFlight[ToolResult[SearchResult]]:
+    """获取进程内共享的搜索请求合并器"""
+    return SingleFlight(
+        name="search",
+        dumps=lambda result: result.model_dump_json(),
+        loads=ToolResult[SearchResult].model_validate_json,
+    )
+
+
+class SingleFlightSearchEngine(SearchEngine):
+    """合并相同并发请求的搜索引擎，包装任意搜索引擎实现，相同 query+date_range 的并发搜索只会执行一次"""
+
+    def __init__(
+        self,
+        search_engine: SearchEngine,
+        single_flight: Optional[SingleFlight[ToolResult[SearchResult]]] = None,
+    ) -> None:
+        self._search_engine = search_engine
+        self._single_flight = single_flight if single_flight is not None else get_search_single_flight()
+
+    async def invoke(self, query: str, date_range: Optional[str] = None) -> ToolResult[SearchResult]:
+        """根据传递的 query + date_range(时间筛选) 调用搜索引擎，相同的并发搜索共享结果"""
+        key = f"{type(self._search_engine).__name__}:{query.strip()}:{date_range or 'all'}"
+        result = await self._single_flight.do(key, lambda: self._search_engine.invoke(query, date_range))
+        return result.model_copy(deep=True)
@@ -8,26 +8,52 @@ import uuid
 from app.domain.external.message_queue import MessageQueue
 from app.domain.external.task import TaskRunner
 from app.domain.external.task import Task
-from app.infrastructure.external.message_queue.redis_message_queue import RedisStreamMessageQueue
+from app.infrastructure.external.message_queue.buffered_message_queue import BufferedMessageQueue
+from app.infrastructure.external.message_queue.factory import create_message_queue
+from core.config import get_settings
 
 logger = logging.getLogger(__name__)
 
 class RedisStreamTask(Task):
-    """基于 Redis Strean 的任务类"""
+    """基于 Redis Strean 的任务类，消息队列后端可以通过 message_queue_backend 配置切换为进程内队列"""
 
     _task_registry: Dict[str, "RedisStreamTask"] = {}
 
-    def __init__(self, task_runner: TaskRunner) -> None:
-        """构造函数，传递任务运行器，完成 Task 初始化"""
+    def __init__(self, task_runner: TaskRunner, task_id: Optional[str] = None) -> None:
+        """构造函数，传递任务运行器，完成 Task 初始化，恢复中断的任务时传递原任务 ID 以复用原来的输入/输出流"""
         self._task_runner = task_runner
-        self._id = str(uuid.uuid4())
+        self._id = task_id or str(uuid.uuid4())
         self._execution_task: Optional[asyncio.Task] = None # 定义在后台执行的任务
 
         input_stream_name =f"task:input:{self._id}"
         output_stream_name = f"task:output:{self._id}"
 
-        self._input_stream = RedisStreamMessageQueue(input_stream_name)
-        self._output_stream = RedisStreamMessageQueue(output_stream_name)
+        settings = get_settings()
+
+        # 输入流通过消费者组消费，阻塞读取且无需加锁，处理失败的消息可以被重新领取
+        # 消息队列后端由 message_queue_backend 配置决定，进程内队列的输入流已满时阻塞写入方
+        self._input_stream = create_message_queue(
+            input_stream_name,
+            consumer_group=settings.task_input_consumer_group or None,
+            maxlen=settings.task_stream_maxlen,
+            max_age_seconds=settings.task_stream_max_age_seconds,
+            backpressure=True,
+        )
+        self._output_stream = create_message_queue(
+            output_stream_name,
+            maxlen=settings.task_stream_maxlen,
+            max_age_seconds=settings.task_stream_max_age_seconds,
+        )
+        self._streams = [self._input_stream, self._output_stream] # 需要管理生命周期的底层消息流
+        self._resumed = task_id is not None # 是否为恢复的任务
+
+        # 输出流开启写缓冲时，并发产生的事件合并成一批后通过 pipeline 写入
+        if settings.message_queue_write_buffer_size > 0:
+            self._output_stream = BufferedMessageQueue(
+                self._output_stream,
+                max_size=settings.message_queue_write_buffer_size,
+                max_delay_ms=settings.message_queue_write_buffer_ms,
+            )
 
         RedisStreamTask._task_registry[self._id] = self
 
@@ -38,13 +64,33 @@ class RedisStreamTask(Task):
 
     async def _on_task_done(self) -> None:
         """任务结束时的回调函数"""
-        # 1. 执行回调函数
+        # 1. 写入输出流中缓冲的事件，保证任务结束前的事件全部可见
+        if isinstance(self._output_stream, BufferedMessageQueue):
+            try:
+                await self._output_stream.flush()
+            except Exception as e:
+                logger.error(f"任务[{self._id}]写入缓冲事件失败: {str(e)}")
+
+        # 2. 为输入/输出流设置过期时间，保留一段时间供客户端读取剩余事件
+        expire_seconds = get_settings().task_stream_expire_seconds
+        if expire_seconds > 0:
+            await self._expire_streams(expire_seconds)
+
+        # 3. 执行回调函数
         if self._task_runner:
             asyncio.create_task(self._task_runner.on_done(self))
 
-        # 2. 清除当前任务对应的资源
+        # 4. 清除当前任务对应的资源
         self._cleanup_registry()
 
+    async def _expire_streams(self, seconds: int) -> None:
+        """设置输入/输出流的过期时间，seconds 为 0 时移除过期时间"""
+        try:
+            for stream in self._streams:
+                await (stream.expire(seconds) if seconds > 0 else stream.persist())
+        except Exception as e:
+            logger.error(f"任务[{self._id}]设置消息流过期时间失败: {str(e)}")
+
     async def _execute_task(self) -> None:
         """使用 TaskRunner 执行任务"""
         try:
@@ -58,13 +104,16 @@ class RedisStreamTask(Task):
 
     async def invoke(self) -> None:
         """运行当前任务"""
-        if not self.done():
-            self._execution_task = asyncio.create_task(self._execution_task())
+        if self.done:
+            # 恢复的任务的消息流可能已经设置了过期时间，执行期间需要保留
+            if self._resumed:
+                await self._expire_streams(0)
+            self._execution_task = asyncio.create_task(self._execute_task())
             logger.info(f"任务[{self._id}]开始执行")
 
     def cancel(self) -> bool:
         """取消当前任务"""
-        if not self.done():
+        if not self.done:
             self._execution_task.cancel()
             logger.info(f"任务[{self._id}]已取消")
         
@@ -100,15 +149,15 @@ class RedisStreamTask(Task):
         return RedisStreamTask._task_registry.get(task_id)
 
     @classmethod
-    def create(cls, task_runner: TaskRunner) -> "Task":
-        """类方法，根据传递的任务运行器创建任务"""
-        return cls(task_runner)
+    def create(cls, task_runner: TaskRunner, task_id: Optional[str] = None) -> "Task":
+        """类方法，根据传递的任务运行器创建任务，传递 task_id 时恢复对应的任务"""
+        return cls(task_runner, task_id)
     
     @classmethod
     async def destory(cls) -> None:
         """销毁所有任务实例"""
-        for task_id in RedisStreamTask._task_registry:
-            task = RedisStreamTask._task_registry[task_id]
+        # cancel 会将任务移出注册中心，遍历注册中心的副本
+        for task in list(RedisStreamTask._task_registry.values()):
             task.cancel()
 
             if task._task_runner:
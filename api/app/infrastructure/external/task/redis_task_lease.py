@@ -0,0 +1,74 @@
+import logging
+import uuid
+from functools import lru_cache
+from typing import Optional
+
+from app.domain.external.task_lease import TaskLease
+from app.infrastructure.storage.redis import get_redis
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# 只有凭证一致时才续期，避免为其他持有者的租约续期
+_RENEW_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+else
+    return 0
+end
+"""
+
+# 只有凭证一致时才删除，避免误删其他持有者的租约
+_RELEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+else
+    return 0
+end
+"""
+
+
+class RedisTaskLease(TaskLease):
+    """基于 Redis SET NX EX 的任务租约，多个工作进程/滚动发布时新旧实例之间保证同一任务只运行一份"""
+
+    def __init__(self, ttl_seconds: Optional[float] = None, key_prefix: str = "task-lease:") -> None:
+        self._ttl_seconds = ttl_seconds if ttl_seconds is not None else get_settings().task_lease_ttl_seconds
+        self._key_prefix = key_prefix
+
+    @property
+    def ttl_seconds(self) -> float:
+        """租约的有效期"""
+        return self._ttl_seconds
+
+    async def acquire(self, task_id: str) -> Optional[str]:
+        """通过 SET NX PX 获取租约"""
+        token = str(uuid.uuid4())
+        acquired = await get_redis().client.set(
+            self._key_prefix + task_id,
+            token,
+            nx=True,
+            px=int(self._ttl_seconds * 1000),
+        )
+        return token if acquired else None
+
+    async def renew(self, task_id: str, token: str) -> bool:
+        """凭证一致时重新设置租约的过期时间"""
+        result = await get_redis().client.eval(
+            _RENEW_SCRIPT, 1, self._key_prefix + task_id, token, int(self._ttl_seconds * 1000),
+        )
+        return result == 1
+
+    async def release(self, task_id: str, token: str) -> bool:
+        """凭证一致时删除租约"""
+        result = await get_redis().client.eval(_RELEASE_SCRIPT, 1, self._key_prefix + task_id, token)
+        return result == 1
+
+    async def is_held(self, task_id: str) -> bool:
+        """租约键存在即表示任务正在运行"""
+        return bool(await get_redis().client.exists(self._key_prefix + task_id))
+
+
+@lru_cache
+def get_task_lease() -> RedisTaskLease:
+    """获取进程内共享的任务租约"""
+    return RedisTaskLease()
@@ -0,0 +1,25 @@
+import logging
+from functools import lru_cache
+from typing import Optional
+
+from app.domain.external.tokenizer import Tokenizer
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache
+def get_tokenizer() -> Optional[Tokenizer]:
+    """根据配置获取进程内共享的记忆分词器：estimate 返回 None 表示按字符估算，tiktoken 使用 tiktoken 分词"""
+    settings = get_settings()
+    backend = settings.memory_tokenizer
+    if backend == "estimate":
+        return None
+    if backend == "tiktoken":
+        from app.infrastructure.external.tokenizer.tiktoken_tokenizer import TiktokenTokenizer
+        try:
+            return TiktokenTokenizer(settings.memory_tokenizer_encoding)
+        except ImportError as e:
+            logger.warning(f"{str(e)}，回退到按字符估算 token 数")
+            return None
+    raise ValueError(f"不支持的记忆分词器: {backend}")
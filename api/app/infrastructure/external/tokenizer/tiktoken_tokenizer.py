@@ -0,0 +1,21 @@
+import logging
+
+from app.domain.external.tokenizer import Tokenizer
+
+logger = logging.getLogger(__name__)
+
+class TiktokenTokenizer(Tokenizer):
+    """基于 tiktoken 的本地分词器，tiktoken 为可选依赖，需要单独安装"""
+
+    def __init__(self, encoding_name: str = "cl100k_base") -> None:
+        """构造函数，加载对应的编码，tiktoken 未安装时抛出 ImportError"""
+        try:
+            import tiktoken
+        except ImportError as e:
+            raise ImportError("使用 TiktokenTokenizer 需要先安装 tiktoken: pip install tiktoken") from e
+
+        self._encoding = tiktoken.get_encoding(encoding_name)
+
+    def count(self, text: str) -> int:
+        """返回传递文本的 token 数"""
+        return len(self._encoding.encode(text, disallowed_special=()))
@@ -0,0 +1,72 @@
+import asyncio
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from pydantic import BaseModel
+
+from app.domain.external.tool_cache import ToolResultCache
+from app.domain.models.tool_result import ToolResult
+from core.config import get_settings
+
+
+class ToolCacheStats(BaseModel):
+    """工具结果缓存统计信息"""
+    hits: int = 0 # 命中次数
+    misses: int = 0 # 未命中次数
+    size: int = 0 # 当前条目数
+
+    @property
+    def hit_rate(self) -> float:
+        """缓存命中率"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class MemoryToolResultCache(ToolResultCache):
+    """进程内工具结果缓存，按条目过期时间 + LRU 淘汰"""
+
+    def __init__(self, max_size: Optional[int] = None) -> None:
+        self._max_size = max_size if max_size is not None else get_settings().tool_cache_max_size
+        self._entries: "OrderedDict[str, Tuple[float, ToolResult]]" = OrderedDict()
+        self._lock = asyncio.Lock()
+        self._stats = ToolCacheStats()
+
+    async def get(self, key: str) -> Optional[ToolResult]:
+        """根据缓存键获取工具结果，返回副本避免调用方修改缓存内容"""
+        async with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self._stats.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return entry[1].model_copy(deep=True)
+
+    async def set(self, key: str, result: ToolResult, ttl_seconds: float) -> None:
+        """写入工具结果，超出最大条目数时淘汰最久未使用的条目"""
+        async with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, result.model_copy(deep=True))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._entries.clear()
+
+    def stats(self) -> ToolCacheStats:
+        """返回缓存统计信息"""
+        return self._stats.model_copy(update={"size": len(self._entries)})
+
+
+@lru_cache
+def get_memory_tool_cache() -> MemoryToolResultCache:
+    """获取进程内共享的工具结果缓存"""
+    return MemoryToolResultCache()
@@ -0,0 +1,43 @@
+import logging
+from functools import lru_cache
+from typing import Optional
+
+from app.domain.external.tool_cache import ToolResultCache
+from app.domain.models.tool_result import ToolResult
+from app.infrastructure.storage.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class RedisToolResultCache(ToolResultCache):
+    """基于 Redis 的工具结果缓存，多个节点共享，Redis 不可用时视为未命中"""
+
+    def __init__(self, key_prefix: str = "tool:cache:") -> None:
+        self._key_prefix = key_prefix
+
+    async def get(self, key: str) -> Optional[ToolResult]:
+        """根据缓存键获取工具结果，结果数据以 JSON 形式还原"""
+        try:
+            data = await get_redis().client.get(self._key_prefix + key)
+        except Exception as e:
+            logger.warning(f"读取工具结果 Redis 缓存失败: {str(e)}")
+            return None
+
+        return ToolResult.model_validate_json(data) if data else None
+
+    async def set(self, key: str, result: ToolResult, ttl_seconds: float) -> None:
+        """写入工具结果并设置过期时间"""
+        try:
+            await get_redis().client.set(
+                self._key_prefix + key,
+                result.model_dump_json(),
+                ex=max(1, int(ttl_seconds)),
+            )
+        except Exception as e:
+            logger.warning(f"写入工具结果 Redis 缓存失败: {str(e)}")
+
+
+@lru_cache
+def get_redis_tool_cache() -> RedisToolResultCache:
+    """获取进程内共享的 Redis 工具结果缓存"""
+    return RedisToolResultCache()
@@ -0,0 +1,41 @@
+import logging
+from typing import List, Optional
+
+from app.domain.models.checkpoint import Checkpoint
+from app.domain.repositories.checkpoint_repository import CheckpointRepository
+from app.infrastructure.storage.redis import get_redis
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class RedisCheckpointRepository(CheckpointRepository):
+    """基于 Redis 的任务检查点仓库，每个任务只保留最新的检查点并设置过期时间"""
+
+    def __init__(self, ttl_seconds: Optional[int] = None, key_prefix: str = "checkpoint:") -> None:
+        self._ttl_seconds = ttl_seconds if ttl_seconds is not None else get_settings().checkpoint_ttl_seconds
+        self._key_prefix = key_prefix
+
+    async def save(self, checkpoint: Checkpoint) -> None:
+        """将检查点序列化为 JSON 写入 Redis"""
+        await get_redis().client.set(
+            self._key_prefix + checkpoint.task_id,
+            checkpoint.model_dump_json(exclude_none=True),
+            ex=self._ttl_seconds,
+        )
+
+    async def load(self, task_id: str) -> Optional[Checkpoint]:
+        """从 Redis 中读取检查点"""
+        data = await get_redis().client.get(self._key_prefix + task_id)
+        return Checkpoint.model_validate_json(data) if data else None
+
+    async def delete(self, task_id: str) -> None:
+        """删除任务的检查点"""
+        await get_redis().client.delete(self._key_prefix + task_id)
+
+    async def list_task_ids(self) -> List[str]:
+        """使用 SCAN 遍历检查点键，避免 KEYS 阻塞 Redis"""
+        task_ids = []
+        async for key in get_redis().client.scan_iter(match=self._key_prefix + "*", count=100):
+            task_ids.append(key[len(self._key_prefix):])
+        return task_ids
@@ -0,0 +1,96 @@
+import logging
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Body, Depends
+
+from app.application.services.llm_router_service import LLMRouterService
+from app.domain.models.app_config import LLMEndpointConfig, LLMRouterConfig
+from app.domain.models.llm_router import LLMEndpointStats
+from app.interfaces.schemas.base import Response
+from app.interfaces.service_dependencies import get_llm_router_service
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/app-config/llm-router", tags=["设置模块"])
+
+# 返回路由配置时隐藏所有端点的 api_key
+_EXCLUDE_API_KEYS = {"endpoints": {"__all__": {"api_key"}}}
+
+@router.get(
+    path="",
+    response_model=Response[Optional[Dict]],
+    summary="获取多端点 LLM 路由配置",
+    description="包含所有 LLM 端点配置、滑动窗口大小、健康判定阈值、对冲请求配置"
+)
+async def get_llm_router_config(
+    llm_router_service: LLMRouterService = Depends(get_llm_router_service)
+) -> Response[Optional[Dict]]:
+    router_config = await llm_router_service.get_router_config()
+    return Response.success(data=router_config.model_dump(exclude=_EXCLUDE_API_KEYS))
+
+@router.post(
+    path="",
+    response_model=Response[Optional[Dict]],
+    summary="更新多端点 LLM 路由配置",
+    description="整体更新 LLM 路由配置，端点的 api_key 为空时表示不更新该字段"
+)
+async def update_llm_router_config(
+    router_config: LLMRouterConfig,
+    llm_router_service: LLMRouterService = Depends(get_llm_router_service)
+) -> Response[Optional[Dict]]:
+    updated_router_config = await llm_router_service.update_router_config(router_config)
+    return Response.success(
+        msg="更新 LLM 路由配置成功",
+        data=updated_router_config.model_dump(exclude=_EXCLUDE_API_KEYS),
+    )
+
+@router.get(
+    path="/stats",
+    response_model=Response[List[LLMEndpointStats]],
+    summary="获取 LLM 端点运行统计",
+    description="获取所有已启用端点的请求数、错误率、p50/p99 延迟、健康状态等运行统计"
+)
+async def get_llm_endpoint_stats(
+    llm_router_service: LLMRouterService = Depends(get_llm_router_service)
+) -> Response[List[LLMEndpointStats]]:
+    stats = await llm_router_service.get_endpoint_stats()
+    return Response.success(data=stats)
+
+@router.post(
+    path="/endpoints",
+    response_model=Response[Optional[Dict]],
+    summary="新增 LLM 端点，支持传递一个或多个端点",
+    description="传递端点名字到端点配置的映射，新增或更新 LLM 端点"
+)
+async def create_llm_endpoints(
+    endpoints: Dict[str, LLMEndpointConfig],
+    llm_router_service: LLMRouterService = Depends(get_llm_router_service)
+) -> Response[Optional[Dict]]:
+    await llm_router_service.update_and_create_endpoints(endpoints)
+    return Response.success(msg="新增 LLM 端点成功")
+
+@router.post(
+    path="/endpoints/{endpoint_name}/delete",
+    response_model=Response[Optional[Dict]],
+    summary="删除 LLM 端点",
+    description="根据传递的端点名字删除指定的 LLM 端点"
+)
+async def delete_llm_endpoint(
+    endpoint_name: str,
+    llm_router_service: LLMRouterService = Depends(get_llm_router_service)
+) -> Response[Optional[Dict]]:
+    await llm_router_service.delete_endpoint(endpoint_name)
+    return Response.success(msg="删除 LLM 端点成功")
+
+@router.post(
+    path="/endpoints/{endpoint_name}/enabled",
+    response_model=Response[Optional[Dict]],
+    summary="更新 LLM 端点的启用状态",
+    description="根据传递的端点名字 + enabled 更新启用状态"
+)
+async def set_llm_endpoint_enabled(
+    endpoint_name: str,
+    enabled: bool = Body(...),
+    llm_router_service: LLMRouterService = Depends(get_llm_router_service)
+) -> Response[Optional[Dict]]:
+    await llm_router_service.set_endpoint_enabled(endpoint_name, enabled)
+    return Response.success(msg="更新 LLM 端点启用状态成功")
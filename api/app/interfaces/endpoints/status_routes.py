@@ -17,7 +17,7 @@ router = APIRouter(prefix="/status", tags=["状态模块"])
     path="",
     response_model=Response[List[HealthStatus]],
     summary="系统监控检查",
-    description="检查系统的 postgres/redis/fastapi 等组件的状态信息。"
+    description="检查系统的 postgres/redis/fastapi 等组件的状态信息，task_streams 的详情为最近一次清理得到的任务消息流数量与内存占用。"
 )
 async def get_status(
     status_service: StatusService = Depends(get_status_service),
@@ -1,5 +1,6 @@
 from app.infrastructure.external.health_checker.redis_health_checker import RedisHealthChecker
 from app.infrastructure.external.health_checker.postgres_health_checker import PostgresHealthChecker
+from app.infrastructure.external.health_checker.stream_health_checker import StreamHealthChecker
 from app.infrastructure.storage.redis import get_redis
 from app.infrastructure.storage.redis import RedisClient
 from app.infrastructure.storage.posgres import get_db_session
@@ -11,7 +12,23 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.application.services.status_service import StatusService
 from app.application.services.app_config_service import AppConfigService
+from app.application.services.llm_router_service import LLMRouterService
+from app.application.services.agent_service import AgentService
+from app.domain.models.tool_cache import ToolCacheScope
+from app.infrastructure.external.blob_store.factory import get_blob_store
+from app.infrastructure.external.json_parser.repair_json_parser import RepairJsonParser
+from app.infrastructure.external.llm.factory import create_llm, wrap_llm
+from app.infrastructure.external.llm.latency_aware_llm_router import get_llm_router
+from app.infrastructure.external.message_queue.stream_sweeper import get_stream_sweeper
+from app.infrastructure.external.search.bing_search import BingSearchEngine
+from app.infrastructure.external.search.single_flight_search import SingleFlightSearchEngine
+from app.infrastructure.external.task.redis_stream_task import RedisStreamTask
+from app.infrastructure.external.task.redis_task_lease import get_task_lease
+from app.infrastructure.external.tokenizer.factory import get_tokenizer
+from app.infrastructure.external.tool_cache.memory_tool_cache import get_memory_tool_cache
+from app.infrastructure.external.tool_cache.redis_tool_cache import get_redis_tool_cache
 from app.infrastructure.repositories.file_app_config_repository import FileAppConfigRepository
+from app.infrastructure.repositories.redis_checkpoint_repository import RedisCheckpointRepository
 from core.config import get_settings
 
 
@@ -29,6 +46,17 @@ def get_app_config_service() -> AppConfigService:
     # 2. 实例化 AppConfigService
     return AppConfigService(app_config_repository=file_app_config_repository)
 
+@lru_cache()
+def get_llm_router_service() -> LLMRouterService:
+    """获取 LLM 路由管理服务"""
+
+    # 1. 获取数据仓库并打印日志
+    logger.info("加载获取 LLMRouterService")
+    file_app_config_repository = FileAppConfigRepository(settings.app_config_file_path)
+
+    # 2. 实例化 LLMRouterService，使用进程内共享的 LLM 路由
+    return LLMRouterService(app_config_repository=file_app_config_repository, llm_router=get_llm_router())
+
 @lru_cache
 def get_status_service(
     db_session: AsyncSession = Depends(get_db_session),
@@ -38,8 +66,37 @@ def get_status_service(
 
     postgres_checker = PostgresHealthChecker(db_session)
     redis_checker = RedisHealthChecker(redis_client)
+    stream_checker = StreamHealthChecker(get_stream_sweeper())
 
     logger.info("加载获取 StatusService")
 
-    return StatusService(checkers=[postgres_checker, redis_checker])
+    return StatusService(checkers=[postgres_checker, redis_checker, stream_checker])
+
+
+@lru_cache()
+def get_agent_service() -> AgentService:
+    """获取 Agent 任务服务"""
+
+    # 1. 获取数据仓库并打印日志
+    logger.info("加载获取 AgentService")
+    file_app_config_repository = FileAppConfigRepository(settings.app_config_file_path)
 
+    # 2. 实例化 AgentService，任务的流程与运行器共用同一个检查点仓库
+    return AgentService(
+        app_config_repository=file_app_config_repository,
+        checkpoint_repository=RedisCheckpointRepository(),
+        task_cls=RedisStreamTask,
+        llm_factory=create_llm,
+        # 缓存与请求合并包装在路由之外，缓存命中不会被计入端点的延迟统计
+        llm_router=wrap_llm(get_llm_router()),
+        json_parser=RepairJsonParser(),
+        search_engine=SingleFlightSearchEngine(BingSearchEngine()),
+        tool_caches={
+            ToolCacheScope.PROCESS: get_memory_tool_cache(),
+            ToolCacheScope.REDIS: get_redis_tool_cache(),
+        },
+        blob_store=get_blob_store(),
+        task_lease=get_task_lease(),
+        tokenizer=get_tokenizer(),
+        input_block_ms=settings.task_input_idle_ms,
+    )
@@ -7,8 +7,12 @@ from app.infrastructure.logging import setup_logging
 from app.infrastructure.storage.redis import get_redis
 from app.infrastructure.storage.posgres import get_postgres
 from app.infrastructure.storage.oss import get_oss
+from app.infrastructure.external.llm.openai_client_pool import get_openai_client_pool
+from app.infrastructure.external.message_queue.stream_sweeper import get_stream_sweeper
 from app.interfaces.endpoints.routes import router
 from app.interfaces.errors.exception_handlers import register_exeception_handlers
+from app.interfaces.service_dependencies import get_agent_service, get_llm_router_service
+from app.infrastructure.external.task.redis_stream_task import RedisStreamTask
 from core.config import get_settings
 
 
@@ -42,14 +46,34 @@ async def liftspan(app: FastAPI):
     postgres = get_postgres()
     await postgres.init()
 
+    # 使用 Redis Stream 时启动任务消息流清理器
+    if settings.message_queue_backend == "redis":
+        get_stream_sweeper().start()
+
+    # 将持久化的 LLM 路由配置应用到进程内共享的 LLM 路由上
+    try:
+        await get_llm_router_service().load_router_config()
+    except Exception as e:
+        logger.error(f"加载 LLM 路由配置失败: {str(e)}")
+
+    # 恢复进程重启前中断的任务，从各自的检查点继续执行
+    if settings.checkpoint_resume_on_startup:
+        try:
+            await get_agent_service().resume_tasks()
+        except Exception as e:
+            logger.error(f"恢复中断的任务失败: {str(e)}")
+
     try:
         # lifespan 节点/分界
         yield
     finally:
         logger.info("MiniManus 开始关闭...")
+        await RedisStreamTask.destory()
+        await get_stream_sweeper().stop()
         await get_redis().shutdown()
         await get_postgres().shutdown()
         await get_oss().shutdown()
+        await get_openai_client_pool().shutdown()
         logger.info("MiniManus 关闭完成...")
 
 # 启动 fastapi
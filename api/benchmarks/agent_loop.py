@@ -0,0 +1,259 @@
+"""
+Agent 循环压测：使用 FakeLLM + FakeSearchEngine 驱动 PlannerReActFlow 端到端运行，衡量框架自身的开销。
+
+运行方式(在 api 目录下)：
+    python -m benchmarks.agent_loop --tasks 100 --concurrency 20 --steps 4 --tool-rounds 2
+    python -m benchmarks.agent_loop --llm-latency-ms 200 --search-latency-ms 100 --json
+
+输出指标：
+- tasks/sec：每秒完成的任务数；
+- 事件延迟：同一任务相邻两个事件之间的间隔(p50/p99)以及首个事件的延迟；
+- 记忆增长：每个任务结束时 Agent 记忆中的消息数与 token 数，开启 --trace-memory 时额外统计每个任务占用的内存；
+- 分阶段耗时：规划、执行、更新规划、汇总四个阶段的平均耗时。
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.domain.models.app_config import AgentConfig, ReplanMode
+from app.domain.models.event import BaseEvent, ErrorEvent
+from app.domain.models.message import Message
+from app.domain.models.tool_cache import ToolCacheScope
+from app.domain.services.flows.base import FlowStatus
+from app.domain.services.flows.planner_react import PlannerReActFlow
+from app.domain.services.tools.search import SearchTool
+from app.infrastructure.external.json_parser.repair_json_parser import RepairJsonParser
+from app.infrastructure.external.llm.fake_llm import FakeLLM
+from app.infrastructure.external.llm.fake_scenario import PlannerReActScript
+from app.infrastructure.external.search.fake_search import FakeSearchEngine
+from app.infrastructure.external.tool_cache.memory_tool_cache import MemoryToolResultCache
+
+
+class BenchmarkConfig(BaseModel):
+    """压测配置"""
+    tasks: int = Field(default=20, gt=0) # 任务总数
+    concurrency: int = Field(default=10, gt=0) # 同时运行的任务数
+    steps: int = Field(default=3, gt=0) # 每个规划的步骤数
+    tool_rounds: int = Field(default=2, ge=0) # 每个步骤调用工具的轮数
+    tool_calls_per_round: int = Field(default=1, gt=0) # 每轮返回的工具调用数
+    parallel_tool_calls: bool = False # 是否并行执行同一轮的多个工具调用
+    max_parallel_steps: int = Field(default=1, gt=0) # 同时执行的最大步骤数
+    replan_mode: ReplanMode = ReplanMode.ALWAYS # 子步骤完成后的重新规划策略
+    result_chars: int = Field(default=200, ge=0) # 每个步骤结果的字符数
+    llm_latency_ms: float = Field(default=0, ge=0) # FakeLLM 首 token 延迟
+    tokens_per_second: float = Field(default=0, ge=0) # FakeLLM 每秒输出 token 数，0 表示不模拟
+    search_latency_ms: float = Field(default=0, ge=0) # FakeSearchEngine 延迟
+    search_results: int = Field(default=5, ge=0) # 每次搜索返回的结果条数
+    stream: bool = False # 是否开启流式输出
+    tool_cache: bool = False # 是否在任务之间共享进程内工具结果缓存
+    trace_memory: bool = False # 是否使用 tracemalloc 统计内存占用(会显著降低吞吐)
+
+
+class TaskMetrics(BaseModel):
+    """单个任务的运行指标"""
+    seconds: float = 0 # 任务总耗时
+    events: int = 0 # 事件数量
+    event_gaps: List[float] = Field(default_factory=list) # 相邻事件之间的间隔
+    phase_seconds: Dict[str, float] = Field(default_factory=dict) # 各阶段耗时
+    memory_messages: int = 0 # 任务结束时记忆中的消息数
+    memory_tokens: int = 0 # 任务结束时记忆中的 token 数
+    replans_skipped: int = 0 # 跳过更新规划的次数
+    error: Optional[str] = None # 任务失败原因
+
+
+class BenchmarkReport(BaseModel):
+    """压测报告"""
+    tasks: int = 0 # 任务总数
+    errors: int = 0 # 失败任务数
+    wall_seconds: float = 0 # 总耗时
+    tasks_per_second: float = 0 # 每秒完成的任务数
+    events: int = 0 # 事件总数
+    event_latency_p50_ms: float = 0 # 相邻事件间隔 p50
+    event_latency_p99_ms: float = 0 # 相邻事件间隔 p99
+    first_event_p50_ms: float = 0 # 首个事件延迟 p50
+    task_latency_p50_ms: float = 0 # 任务耗时 p50
+    task_latency_p99_ms: float = 0 # 任务耗时 p99
+    llm_calls: int = 0 # LLM 调用总次数
+    search_calls: int = 0 # 搜索调用总次数
+    replans_skipped: int = 0 # 跳过更新规划的总次数
+    phase_avg_ms: Dict[str, float] = Field(default_factory=dict) # 每个任务各阶段的平均耗时
+    memory_messages_avg: float = 0 # 每个任务结束时记忆中的平均消息数
+    memory_tokens_avg: float = 0 # 每个任务结束时记忆中的平均 token 数
+    traced_memory_per_task_kb: Optional[float] = None # 每个任务保留的内存(开启 trace_memory 时统计)
+    traced_memory_peak_mb: Optional[float] = None # 内存峰值(开启 trace_memory 时统计)
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percentile / 100))]
+
+
+async def run_task(flow: PlannerReActFlow, message: Message) -> TaskMetrics:
+    """运行单个任务并记录事件间隔与各阶段耗时，两个事件之间的耗时计入后一个事件到达时流程所处的阶段"""
+    metrics = TaskMetrics()
+    start = last = time.perf_counter()
+    try:
+        async for event in flow.invoke(message):
+            now = time.perf_counter()
+            metrics.events += 1
+            metrics.event_gaps.append(now - last)
+            phase = flow.status.value
+            metrics.phase_seconds[phase] = metrics.phase_seconds.get(phase, 0.0) + now - last
+            last = now
+            if isinstance(event, ErrorEvent):
+                metrics.error = event.error
+    except Exception as e:
+        metrics.error = str(e)
+
+    metrics.seconds = time.perf_counter() - start
+    metrics.memory_messages = len(flow.planner.memory.get_messages()) + len(flow.react.memory.get_messages())
+    metrics.memory_tokens = flow.planner.memory.total_tokens + flow.react.memory.total_tokens
+    metrics.replans_skipped = flow.replan_policy.stats().skipped
+    return metrics
+
+
+def create_flow(
+    config: BenchmarkConfig,
+    llm: FakeLLM,
+    search_engine: FakeSearchEngine,
+    tool_cache: Optional[MemoryToolResultCache] = None,
+) -> PlannerReActFlow:
+    """使用本地替身创建流程，未传递共享缓存时搜索结果只在任务内缓存"""
+    search_tool = SearchTool(search_engine)
+    if tool_cache is not None:
+        search_tool.set_cache(ToolCacheScope.PROCESS, tool_cache)
+
+    return PlannerReActFlow(
+        agent_config=AgentConfig(
+            max_iterations=99,
+            stream=config.stream,
+            parallel_tool_calls=config.parallel_tool_calls,
+            max_parallel_steps=config.max_parallel_steps,
+            replan_mode=config.replan_mode,
+        ),
+        llm=llm,
+        json_parser=RepairJsonParser(),
+        tools=[search_tool],
+    )
+
+
+async def run_benchmark(config: BenchmarkConfig) -> BenchmarkReport:
+    """按配置并发运行任务并汇总压测报告"""
+    llm = FakeLLM(
+        script=PlannerReActScript(
+            steps=config.steps,
+            tool_rounds=config.tool_rounds,
+            tool_calls_per_round=config.tool_calls_per_round,
+            result_chars=config.result_chars,
+        ),
+        latency_ms=config.llm_latency_ms,
+        tokens_per_second=config.tokens_per_second,
+    )
+    search_engine = FakeSearchEngine(latency_ms=config.search_latency_ms, results=config.search_results)
+    tool_cache = MemoryToolResultCache() if config.tool_cache else None
+    semaphore = asyncio.Semaphore(config.concurrency)
+    flows: List[PlannerReActFlow] = []
+
+    async def worker(index: int) -> TaskMetrics:
+        async with semaphore:
+            flow = create_flow(config, llm, search_engine, tool_cache)
+            if config.trace_memory:
+                flows.append(flow)
+            return await run_task(flow, Message(message=f"压测任务 {index}"))
+
+    if config.trace_memory:
+        tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0] if config.trace_memory else 0
+
+    start = time.perf_counter()
+    results: List[TaskMetrics] = await asyncio.gather(*(worker(index) for index in range(config.tasks)))
+    wall_seconds = time.perf_counter() - start
+
+    report = BenchmarkReport(
+        tasks=config.tasks,
+        errors=sum(1 for result in results if result.error),
+        wall_seconds=wall_seconds,
+        tasks_per_second=config.tasks / wall_seconds if wall_seconds else 0.0,
+        events=sum(result.events for result in results),
+        llm_calls=llm.calls,
+        search_calls=search_engine.calls,
+        replans_skipped=sum(result.replans_skipped for result in results),
+    )
+
+    gaps = [gap for result in results for gap in result.event_gaps]
+    report.event_latency_p50_ms = _percentile(gaps, 50) * 1000
+    report.event_latency_p99_ms = _percentile(gaps, 99) * 1000
+    report.first_event_p50_ms = _percentile([r.event_gaps[0] for r in results if r.event_gaps], 50) * 1000
+    report.task_latency_p50_ms = _percentile([result.seconds for result in results], 50) * 1000
+    report.task_latency_p99_ms = _percentile([result.seconds for result in results], 99) * 1000
+
+    for phase in FlowStatus:
+        total = sum(result.phase_seconds.get(phase.value, 0.0) for result in results)
+        if total > 0:
+            report.phase_avg_ms[phase.value] = total / len(results) * 1000
+    report.memory_messages_avg = sum(result.memory_messages for result in results) / len(results)
+    report.memory_tokens_avg = sum(result.memory_tokens for result in results) / len(results)
+
+    if config.trace_memory:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report.traced_memory_per_task_kb = (current - baseline) / len(results) / 1024
+        report.traced_memory_peak_mb = peak / 1024 / 1024
+
+    return report
+
+
+def print_report(config: BenchmarkConfig, report: BenchmarkReport) -> None:
+    """以可读的格式输出压测报告"""
+    print(
+        f"任务数: {report.tasks} (失败 {report.errors})  并发: {config.concurrency}  "
+        f"步骤数: {config.steps}  工具轮数: {config.tool_rounds}x{config.tool_calls_per_round}  "
+        f"并行工具: {config.parallel_tool_calls}  并行步骤: {config.max_parallel_steps}  流式: {config.stream}  "
+        f"工具缓存: {config.tool_cache}  重新规划: {config.replan_mode.value}"
+    )
+    print(f"吞吐: {report.tasks_per_second:.2f} tasks/sec  总耗时: {report.wall_seconds:.3f}s")
+    print(f"任务耗时: p50 {report.task_latency_p50_ms:.2f}ms  p99 {report.task_latency_p99_ms:.2f}ms")
+    print(
+        f"事件: {report.events}  间隔 p50 {report.event_latency_p50_ms:.3f}ms  "
+        f"p99 {report.event_latency_p99_ms:.3f}ms  首个事件 p50 {report.first_event_p50_ms:.3f}ms"
+    )
+    print(f"调用: LLM {report.llm_calls} 次  搜索 {report.search_calls} 次  跳过更新规划 {report.replans_skipped} 次")
+    print("分阶段平均耗时: " + "  ".join(f"{phase} {ms:.2f}ms" for phase, ms in report.phase_avg_ms.items()))
+    print(f"记忆: 平均 {report.memory_messages_avg:.1f} 条消息 / {report.memory_tokens_avg:.0f} tokens")
+    if report.traced_memory_per_task_kb is not None:
+        print(
+            f"内存: 每个任务 {report.traced_memory_per_task_kb:.1f}KB  "
+            f"峰值 {report.traced_memory_peak_mb:.2f}MB"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="PlannerAgent + ReActAgent 循环压测")
+    for name, field in BenchmarkConfig.model_fields.items():
+        flag = "--" + name.replace("_", "-")
+        if field.annotation is bool:
+            parser.add_argument(flag, action="store_true", help=field.description)
+        else:
+            parser.add_argument(flag, type=field.annotation, default=field.default)
+    parser.add_argument("--json", action="store_true", help="以 JSON 格式输出报告")
+    args = vars(parser.parse_args())
+
+    output_json = args.pop("json")
+    config = BenchmarkConfig(**args)
+    report = asyncio.run(run_benchmark(config))
+    if output_json:
+        print(json.dumps(report.model_dump(), ensure_ascii=False, indent=2))
+    else:
+        print_report(config, report)
+
+
+if __name__ == "__main__":
+    main()
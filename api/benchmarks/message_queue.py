@@ -0,0 +1,168 @@
+"""
+消息队列压测：对比进程内队列与 Redis Stream 在任务事件流场景下的吞吐与投递延迟。
+
+运行方式(在 api 目录下，Redis 不可用时只压测进程内队列)：
+    python -m benchmarks.message_queue --messages 10000 --subscribers 4
+    python -m benchmarks.message_queue --backends memory --batch-size 32 --json
+
+输出指标：
+- 写入吞吐：生产者写入全部消息的速率，--batch-size 大于 1 时通过 put_many 批量写入；
+- 投递延迟：消息写入到被订阅方读取之间的间隔(p50/p99)；
+- 弹出吞吐：通过 pop 逐条取出消息的速率(模拟任务运行器消费输入流)。
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.domain.external.message_queue import MessageQueue
+from app.infrastructure.external.message_queue.memory_message_queue import MemoryMessageQueue
+
+
+class BenchmarkConfig(BaseModel):
+    """压测配置"""
+    backends: str = "memory,redis" # 需要压测的后端，逗号分隔
+    messages: int = Field(default=5000, gt=0) # 写入的消息数
+    subscribers: int = Field(default=2, ge=0) # 同时订阅输出流的客户端数
+    batch_size: int = Field(default=1, gt=0) # 每次写入的消息数，大于 1 时使用 put_many
+    read_batch_size: int = Field(default=100, gt=0) # 订阅方每次读取的消息数
+    payload_chars: int = Field(default=200, ge=0) # 每条消息的字符数
+
+
+class BackendReport(BaseModel):
+    """单个后端的压测报告"""
+    backend: str
+    put_per_second: float = 0 # 写入吞吐
+    delivery_p50_ms: float = 0 # 投递延迟 p50
+    delivery_p99_ms: float = 0 # 投递延迟 p99
+    pop_per_second: float = 0 # 弹出吞吐
+    error: Optional[str] = None # 后端不可用时的错误信息
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _create_queue(backend: str, stream_name: str) -> MessageQueue:
+    """创建待压测的消息队列，Redis 后端需要先初始化客户端"""
+    if backend == "memory":
+        return MemoryMessageQueue(stream_name, max_size=10 ** 9)
+
+    from app.infrastructure.external.message_queue.redis_message_queue import RedisStreamMessageQueue
+    from app.infrastructure.storage.redis import get_redis
+    redis = get_redis()
+    if redis._client is None:
+        await redis.init()
+    return RedisStreamMessageQueue(stream_name)
+
+
+async def run_backend(config: BenchmarkConfig, backend: str) -> BackendReport:
+    """压测单个后端：先在订阅的同时写入，再逐条弹出"""
+    report = BackendReport(backend=backend)
+    queue = await _create_queue(backend, f"benchmark:{uuid.uuid4()}")
+    payload = "x" * config.payload_chars
+    sent_at: Dict[int, float] = {}
+    latencies: List[float] = []
+
+    async def subscriber() -> None:
+        received = 0
+        async for _, data in queue.subscribe(count=config.read_batch_size, block_ms=1000):
+            latencies.append(time.perf_counter() - sent_at[int(data.split(":", 1)[0])])
+            received += 1
+            if received == config.messages:
+                return
+
+    try:
+        subscriber_tasks = [asyncio.create_task(subscriber()) for _ in range(config.subscribers)]
+        await asyncio.sleep(0.01)
+
+        start = time.perf_counter()
+        for offset in range(0, config.messages, config.batch_size):
+            indexes = range(offset, min(offset + config.batch_size, config.messages))
+            now = time.perf_counter()
+            for index in indexes:
+                sent_at[index] = now
+            messages = [f"{index}:{payload}" for index in indexes]
+            if config.batch_size > 1:
+                await queue.put_many(messages)
+            else:
+                await queue.put(messages[0])
+            # 模拟 Agent 循环逐个产生事件，每次写入后让出事件循环，避免进程内队列的生产者独占事件循环
+            await asyncio.sleep(0)
+        report.put_per_second = config.messages / (time.perf_counter() - start)
+
+        await asyncio.wait_for(asyncio.gather(*subscriber_tasks), timeout=60)
+        report.delivery_p50_ms = _percentile(latencies, 50) * 1000
+        report.delivery_p99_ms = _percentile(latencies, 99) * 1000
+
+        start = time.perf_counter()
+        for _ in range(config.messages):
+            await queue.pop()
+        report.pop_per_second = config.messages / (time.perf_counter() - start)
+    finally:
+        await queue.clear()
+        if backend == "redis":
+            from app.infrastructure.storage.redis import get_redis
+            await get_redis().client.delete(queue._stream_name)
+    return report
+
+
+async def run_benchmark(config: BenchmarkConfig) -> List[BackendReport]:
+    """依次压测各个后端，后端不可用时记录错误并继续"""
+    reports = []
+    for backend in [backend.strip() for backend in config.backends.split(",") if backend.strip()]:
+        try:
+            reports.append(await run_backend(config, backend))
+        except Exception as e:
+            reports.append(BackendReport(backend=backend, error=str(e) or type(e).__name__))
+
+    if any(report.backend == "redis" and report.error is None for report in reports):
+        from app.infrastructure.storage.redis import get_redis
+        await get_redis().shutdown()
+    return reports
+
+
+def print_report(config: BenchmarkConfig, reports: List[BackendReport]) -> None:
+    """以可读的格式输出压测报告"""
+    print(
+        f"消息数: {config.messages}  订阅方: {config.subscribers}  写入批量: {config.batch_size}  "
+        f"读取批量: {config.read_batch_size}  消息大小: {config.payload_chars} 字符"
+    )
+    for report in reports:
+        if report.error is not None:
+            print(f"[{report.backend}] 不可用: {report.error}")
+            continue
+        print(
+            f"[{report.backend}] 写入 {report.put_per_second:.0f} msg/s  "
+            f"投递延迟 p50 {report.delivery_p50_ms:.3f}ms  p99 {report.delivery_p99_ms:.3f}ms  "
+            f"弹出 {report.pop_per_second:.0f} msg/s"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="消息队列后端压测")
+    for name, field in BenchmarkConfig.model_fields.items():
+        parser.add_argument("--" + name.replace("_", "-"), type=field.annotation, default=field.default)
+    parser.add_argument("--json", action="store_true", help="以 JSON 格式输出报告")
+    args = vars(parser.parse_args())
+
+    output_json = args.pop("json")
+    config = BenchmarkConfig(**args)
+    reports = asyncio.run(run_benchmark(config))
+    if output_json:
+        print(json.dumps([report.model_dump() for report in reports], ensure_ascii=False, indent=2))
+    else:
+        print_report(config, reports)
+
+
+if __name__ == "__main__":
+    main()
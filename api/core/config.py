@@ -18,6 +18,67 @@ class Settings(BaseSettings):
     redis_db: int = 0
     redis_password: str | None = ""
 
+    # 消息队列相关配置
+    message_queue_backend: str = "redis" # 消息队列后端: redis 表示 Redis Stream，memory 表示进程内队列(只适用于单节点部署)
+    message_queue_memory_max_size: int = 10000 # 进程内队列默认的最大消息数
+    task_input_consumer_group: str = "" # 任务输入流的消费者组，为空时不使用消费者组(开启后消费方必须在处理完成后调用 ack)
+    message_queue_claim_idle_ms: int = 30000 # 未确认的消息空闲多久后允许被其他消费者重新领取
+    message_queue_read_batch_size: int = 100 # 批量读取/订阅时每次最多读取的消息数
+    message_queue_block_ms: int = 5000 # 订阅时每次阻塞等待新消息的时间
+    message_queue_write_buffer_size: int = 0 # 任务输出流每批合并写入的最大消息数，并发写入的消息通过 pipeline 批量写入，0 表示不缓冲
+    message_queue_write_buffer_ms: float = 0 # 任务输出流每轮写入前等待更多消息加入的时间，会增加每条消息的写入延迟，0 表示不等待
+
+    # 任务消息流保留相关配置
+    task_stream_maxlen: int = 10000 # 写入时每个任务消息流保留的最大消息数(近似)，0 表示不按长度裁剪
+    task_stream_max_age_seconds: int = 0 # 消息流中消息的最长保留时间，未设置 maxlen 时写入时裁剪，清理器也会按该时间裁剪，0 表示不按时间裁剪
+    task_stream_expire_seconds: int = 3600 # 任务结束后消息流的保留时间
+    task_stream_idle_seconds: int = 86400 # 没有设置过期时间的消息流超过该时间没有写入时视为孤儿
+    task_stream_sweep_interval_seconds: float = 600 # 清理器的执行间隔，0 表示不启动清理器
+
+    # LLM 响应缓存相关配置
+    llm_cache_max_size: int = 1024 # 进程内 LRU 缓存的最大条目数
+    llm_cache_ttl_seconds: int = 3600 # 缓存过期时间
+    llm_cache_redis_enabled: bool = True # 是否启用 Redis 二级缓存
+    llm_cache_allow_sampling: bool = False # 温度大于 0 时是否依旧缓存
+
+    # 相同请求合并(single-flight)相关配置
+    single_flight_scope: str = "process" # 合并范围: process 表示进程内，cluster 表示通过 Redis 跨节点合并
+    single_flight_lock_ttl_seconds: int = 120 # 跨节点合并时 Redis 锁的过期时间
+    single_flight_result_ttl_seconds: int = 10 # 跨节点合并时执行结果在 Redis 中的保留时间
+    single_flight_poll_interval_ms: int = 100 # 跨节点合并时等待结果的轮询间隔
+
+    # LLM 限流相关配置，0 表示不限制
+    llm_rate_limit_rpm: int = 0 # 每分钟最大请求数
+    llm_rate_limit_tpm: int = 0 # 每分钟最大 token 数(按本地估算)
+    llm_rate_limit_redis_enabled: bool = False # 是否通过 Redis 在多个节点之间共享限流配额
+
+    # LLM 熔断相关配置
+    llm_circuit_breaker_failure_threshold: int = 5 # 连续失败多少次后打开熔断器
+    llm_circuit_breaker_reset_seconds: float = 30 # 熔断器打开多久后放行探测请求
+
+    # LLM 客户端连接池相关配置
+    llm_http_max_connections: int = 200 # 每个客户端的最大连接数
+    llm_http_max_keepalive_connections: int = 50 # 每个客户端保持的最大空闲连接数
+    llm_http_keepalive_expiry: float = 60 # 空闲连接的保持时间
+    llm_http2_enabled: bool = False # 是否启用 HTTP/2(需要安装 h2，未安装时回退到 HTTP/1.1)
+
+    # 工具结果缓存相关配置，缓存时长与范围由各工具的 @tool(cache=...) 声明
+    tool_cache_max_size: int = 4096 # 进程内工具结果缓存的最大条目数
+
+    # 任务检查点相关配置
+    checkpoint_ttl_seconds: int = 86400 # 检查点在 Redis 中的保留时间
+    checkpoint_resume_on_startup: bool = True # 进程启动时是否恢复所有存在检查点的任务
+    task_input_idle_ms: int = 5000 # 任务运行器等待新的用户消息的时间，超时后任务结束运行，等待用户输入的流程保留检查点
+    task_lease_ttl_seconds: float = 30 # 任务运行租约的有效期，运行器每隔 1/3 有效期续期一次，进程崩溃后租约在有效期后释放
+
+    # 记忆分词器相关配置，用于计算记忆的 token 数
+    memory_tokenizer: str = "estimate" # 分词器: estimate 表示按字符粗略估算，tiktoken 表示使用 tiktoken 分词(需要单独安装，未安装时回退到 estimate)
+    memory_tokenizer_encoding: str = "cl100k_base" # tiktoken 使用的编码名字
+
+    # 大对象存储相关配置，用于存放体积较大的工具结果
+    blob_store_backend: str = "local" # 存储后端: local 表示本地磁盘，oss 表示阿里云 OSS
+    blob_store_local_dir: str = "storage/blobs" # 本地磁盘存储目录
+
     # 对象存储相关配置
     oss_access_key_id: str = ""
     oss_access_key_secret: str = ""
@@ -0,0 +1,271 @@
+import asyncio
+import json
+import uuid
+from typing import Dict, List, Optional
+
+import pytest
+
+from app.application.services.agent_service import AgentService
+from app.domain.models.app_config import AgentConfig, AppConfig, LLMConfig, LLMEndpointConfig, LLMRouterConfig, MCPConfig
+from app.domain.models.event import StepEvent, ToolEvent, ToolEventStatus
+from app.domain.models.message import Message
+from app.domain.models.tool_cache import ToolCacheScope
+from app.domain.services.flows.planner_react import PlannerReActFlow
+from app.domain.services.tools.search import SearchTool
+from app.infrastructure.external.blob_store.local_blob_store import LocalBlobStore
+from app.infrastructure.external.json_parser.repair_json_parser import RepairJsonParser
+from app.infrastructure.external.llm.fake_llm import FakeLLM
+from app.infrastructure.external.llm.cached_llm import LLMResponseCache
+from app.infrastructure.external.llm.factory import wrap_llm
+from app.infrastructure.external.llm.fake_scenario import PlannerReActScript
+from app.infrastructure.external.llm.latency_aware_llm_router import LatencyAwareLLMRouter
+from app.infrastructure.external.search.fake_search import FakeSearchEngine
+from app.infrastructure.external.task.redis_stream_task import RedisStreamTask
+from app.infrastructure.external.tool_cache.memory_tool_cache import MemoryToolResultCache
+from core.config import get_settings
+from tests.app.domain.services.flows.test_planner_react import MemoryCheckpointRepository
+
+class MemoryAppConfigRepository:
+    """测试用的应用配置仓库"""
+
+    def __init__(self, app_config: AppConfig) -> None:
+        self.app_config = app_config
+
+    async def load(self) -> AppConfig:
+        await asyncio.sleep(0) # 模拟读取配置时让出事件循环
+        return self.app_config
+
+    async def save(self, app_config: AppConfig) -> None:
+        self.app_config = app_config
+
+class MemoryTaskLease:
+    """测试用的任务租约，多个服务共享同一个实例即模拟共享同一个 Redis 的多个进程"""
+
+    ttl_seconds: float = 30
+
+    def __init__(self) -> None:
+        self.holders: Dict[str, str] = {}
+        self.acquired: List[str] = []
+
+    async def acquire(self, task_id: str) -> Optional[str]:
+        await asyncio.sleep(0) # 模拟访问 Redis 时让出事件循环
+        if task_id in self.holders:
+            return None
+        self.holders[task_id] = str(uuid.uuid4())
+        self.acquired.append(task_id)
+        return self.holders[task_id]
+
+    async def renew(self, task_id: str, token: str) -> bool:
+        return self.holders.get(task_id) == token
+
+    async def release(self, task_id: str, token: str) -> bool:
+        if self.holders.get(task_id) != token:
+            return False
+        del self.holders[task_id]
+        return True
+
+    async def is_held(self, task_id: str) -> bool:
+        return task_id in self.holders
+
+@pytest.fixture(autouse=True)
+def memory_backend(monkeypatch):
+    """任务消息流使用进程内队列，不依赖 Redis"""
+    monkeypatch.setattr(get_settings(), "message_queue_backend", "memory")
+    monkeypatch.setattr(get_settings(), "message_queue_write_buffer_size", 0)
+
+def create_service(llm: FakeLLM, repository: MemoryCheckpointRepository, **kwargs) -> AgentService:
+    agent_config = kwargs.pop("agent_config", AgentConfig())
+    llm_router_config = kwargs.pop("llm_router_config", LLMRouterConfig())
+    app_config = AppConfig(
+        llm_config=LLMConfig(),
+        agent_config=agent_config,
+        mcp_config=MCPConfig(),
+        llm_router_config=llm_router_config,
+    )
+    return AgentService(
+        app_config_repository=MemoryAppConfigRepository(app_config),
+        checkpoint_repository=repository,
+        task_cls=RedisStreamTask,
+        llm_factory=lambda llm_config: llm,
+        llm_router=kwargs.pop("llm_router", None),
+        json_parser=RepairJsonParser(),
+        search_engine=kwargs.pop("search_engine", FakeSearchEngine()),
+        input_block_ms=10,
+        **kwargs,
+    )
+
+async def run_until_done(task_id: str) -> List[dict]:
+    """等待任务运行结束并返回输出流中的所有事件"""
+    task = RedisStreamTask.get(task_id)
+    await task._execution_task
+    return [json.loads(data) for _, data in await task.output_stream.get_many(count=1000)]
+
+def test_agent_service_chat_runs_task_and_deletes_checkpoint() -> None:
+    """测试发送消息后任务运行器执行流程、将事件写入输出流，流程结束后删除检查点"""
+    repository = MemoryCheckpointRepository()
+    service = create_service(FakeLLM(script=PlannerReActScript(steps=2, tool_rounds=1)), repository)
+
+    async def main():
+        task_id = await service.chat(Message(message="帮我搜索资料"))
+        return task_id, await run_until_done(task_id)
+
+    task_id, events = asyncio.run(main())
+
+    assert events[-1]["type"] == "done"
+    assert [event["step"]["id"] for event in events if event["type"] == "step" and event["status"] == "started"] == ["1", "2"]
+    assert repository.saves > 0
+    assert task_id not in repository.data
+
+def test_agent_service_resumes_tasks_from_checkpoints() -> None:
+    """测试进程重启后 resume_tasks 为每个检查点重新创建任务，从中断的子步骤继续执行"""
+    llm = FakeLLM(script=PlannerReActScript(steps=3, tool_rounds=1))
+    repository = MemoryCheckpointRepository()
+
+    async def crash() -> None:
+        # 第 2 个子步骤发起工具调用时模拟进程崩溃
+        flow = PlannerReActFlow(
+            agent_config=AgentConfig(),
+            llm=llm,
+            json_parser=RepairJsonParser(),
+            tools=[SearchTool(FakeSearchEngine())],
+            task_id="task-resume",
+            checkpoint_repository=repository,
+        )
+        events = flow.invoke(Message(message="可恢复的任务"))
+        async for event in events:
+            if isinstance(event, ToolEvent) and event.status == ToolEventStatus.CALLING and flow.plan.steps[1].status == "running":
+                break
+        await events.aclose()
+
+    async def resume():
+        resumed = await create_service(llm, repository).resume_tasks()
+        return resumed, await run_until_done("task-resume")
+
+    asyncio.run(crash())
+    resumed, events = asyncio.run(resume())
+
+    assert resumed == ["task-resume"]
+    assert [event["step"]["id"] for event in events if event["type"] == "step" and event["status"] == "started"] == ["2", "3"]
+    assert events[-1]["type"] == "done"
+    assert "task-resume" not in repository.data
+
+def test_agent_service_tasks_share_process_tool_cache() -> None:
+    """测试服务创建的工具安装了共享的进程内缓存，不同任务的相同搜索只请求一次搜索引擎"""
+    search_engine = FakeSearchEngine()
+    tool_cache = MemoryToolResultCache()
+    service = create_service(
+        FakeLLM(script=PlannerReActScript(steps=2, tool_rounds=1)),
+        MemoryCheckpointRepository(),
+        search_engine=search_engine,
+        tool_caches={ToolCacheScope.PROCESS: tool_cache},
+    )
+
+    async def main():
+        for _ in range(2):
+            await run_until_done(await service.chat(Message(message="帮我搜索资料")))
+
+    asyncio.run(main())
+
+    assert search_engine.calls == 2
+    assert tool_cache.stats().hits == 2
+
+def test_agent_service_router_backed_tasks_hit_llm_cache() -> None:
+    """测试启用 LLM 路由端点时，路由外层的响应缓存生效，相同的任务不再请求端点"""
+    endpoint_llm = FakeLLM(script=PlannerReActScript(steps=2, tool_rounds=1))
+    router_config = LLMRouterConfig(endpoints={"primary": LLMEndpointConfig()})
+    cache = LLMResponseCache(use_redis=False)
+    service = create_service(
+        FakeLLM(script=PlannerReActScript(steps=2, tool_rounds=1)),
+        MemoryCheckpointRepository(),
+        llm_router_config=router_config,
+        llm_router=wrap_llm(LatencyAwareLLMRouter(router_config, llm_factory=lambda config: endpoint_llm), cache=cache),
+    )
+
+    async def main():
+        await run_until_done(await service.chat(Message(message="帮我搜索资料")))
+        calls = endpoint_llm.calls
+        await run_until_done(await service.chat(Message(message="帮我搜索资料")))
+        return calls
+
+    first_calls = asyncio.run(main())
+
+    assert first_calls > 0
+    assert cache.stats().memory_hits > 0
+    assert endpoint_llm.calls < 2 * first_calls
+
+class RecordingBlobStore(LocalBlobStore):
+    """记录写入键的本地大对象存储"""
+
+    def __init__(self, root_dir: str) -> None:
+        super().__init__(root_dir)
+        self.keys: List[str] = []
+
+    async def put(self, key: str, content: str) -> None:
+        self.keys.append(key)
+        await super().put(key, content)
+
+def test_agent_service_deletes_task_blobs_when_flow_completes(tmp_path) -> None:
+    """测试工具结果按任务 ID 单独存储，流程完成、任务结束后删除该任务的所有工具结果"""
+    blob_store = RecordingBlobStore(str(tmp_path))
+    service = create_service(
+        FakeLLM(script=PlannerReActScript(steps=2, tool_rounds=1)),
+        MemoryCheckpointRepository(),
+        search_engine=FakeSearchEngine(results=10),
+        agent_config=AgentConfig(tool_result_offload_chars=200),
+        blob_store=blob_store,
+    )
+
+    async def main():
+        task_id = await service.chat(Message(message="帮我搜索资料"))
+        await run_until_done(task_id)
+        # on_done 回调在任务结束后异步执行，删除文件在线程池中进行
+        task_dir = tmp_path / "tool-results" / task_id
+        for _ in range(100):
+            if not task_dir.exists():
+                break
+            await asyncio.sleep(0.01)
+        return task_id
+
+    task_id = asyncio.run(main())
+
+    assert blob_store.keys
+    assert all(key.startswith(f"tool-results/{task_id}/") for key in blob_store.keys)
+    assert not (tmp_path / "tool-results" / task_id).exists()
+
+def test_agent_service_resumes_each_task_in_only_one_process() -> None:
+    """测试两个共享检查点仓库与租约的服务(模拟滚动发布时的新旧进程)同时恢复任务，每个任务只被一个服务恢复，运行结束后释放租约"""
+    llm = FakeLLM(script=PlannerReActScript(steps=2, tool_rounds=1))
+    repository = MemoryCheckpointRepository()
+    task_lease = MemoryTaskLease()
+
+    async def crash() -> None:
+        flow = PlannerReActFlow(
+            agent_config=AgentConfig(),
+            llm=llm,
+            json_parser=RepairJsonParser(),
+            tools=[SearchTool(FakeSearchEngine())],
+            task_id="task-lease",
+            checkpoint_repository=repository,
+        )
+        events = flow.invoke(Message(message="可恢复的任务"))
+        async for event in events:
+            if isinstance(event, ToolEvent) and event.status == ToolEventStatus.CALLING:
+                break
+        await events.aclose()
+
+    async def resume():
+        old_service = create_service(llm, repository, task_lease=task_lease)
+        new_service = create_service(llm, repository, task_lease=task_lease)
+        resumed = await asyncio.gather(old_service.resume_tasks(), new_service.resume_tasks())
+        held_while_running = await task_lease.is_held("task-lease")
+        events = await run_until_done("task-lease")
+        return resumed, held_while_running, events
+
+    asyncio.run(crash())
+    resumed, held_while_running, events = asyncio.run(resume())
+
+    assert sorted(resumed) == [[], ["task-lease"]]
+    assert task_lease.acquired == ["task-lease"]
+    assert held_while_running
+    assert not task_lease.holders
+    assert events[-1]["type"] == "done"
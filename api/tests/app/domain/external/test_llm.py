@@ -0,0 +1,29 @@
+from app.domain.external.llm import merge_message_delta
+
+def test_merge_message_delta_content() -> None:
+    """测试流式文本增量合并后与完整消息一致"""
+    message = {}
+    for delta in [{"role": "assistant", "content": ""}, {"content": "你好"}, {"content": "，世界"}]:
+        merge_message_delta(message, delta)
+
+    assert message["role"] == "assistant"
+    assert message["content"] == "你好，世界"
+    assert "tool_calls" not in message
+
+def test_merge_message_delta_tool_calls() -> None:
+    """测试流式工具调用增量按 index 合并参数"""
+    message = {}
+    deltas = [
+        {"role": "assistant", "tool_calls": [{"index": 0, "id": "call_1", "type": "function", "function": {"name": "search_web", "arguments": ""}}]},
+        {"tool_calls": [{"index": 0, "function": {"arguments": "{\"query\": "}}]},
+        {"tool_calls": [{"index": 0, "function": {"arguments": "\"gemini\"}"}}]},
+    ]
+    for delta in deltas:
+        merge_message_delta(message, delta)
+
+    assert message["content"] is None
+    assert message["tool_calls"] == [{
+        "id": "call_1",
+        "type": "function",
+        "function": {"name": "search_web", "arguments": "{\"query\": \"gemini\"}"},
+    }]
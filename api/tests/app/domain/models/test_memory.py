@@ -0,0 +1,120 @@
+from app.domain.models.memory import REMOVED_CONTENT, TRUNCATED_SUFFIX, CompactMode, CompactPolicy, Memory
+
+class WordTokenizer:
+    """按空格分词的测试分词器"""
+
+    def count(self, text: str) -> int:
+        return len(text.split())
+
+def test_memory_tracks_token_counts() -> None:
+    """测试记忆在添加/回滚消息时维护 token 数"""
+    memory = Memory()
+    memory.set_tokenizer(WordTokenizer())
+    memory.add_messages([
+        {"role": "system", "content": "you are an agent"},
+        {"role": "user", "content": "hello world"},
+    ])
+    assert memory.total_tokens == (4 + 4) + (4 + 2)
+
+    memory.roll_back()
+    assert memory.total_tokens == 4 + 4
+
+def test_memory_get_messages_within_budget() -> None:
+    """测试超出预算时保留系统消息和最新消息，且不以孤立的工具结果开头"""
+    memory = Memory()
+    memory.set_tokenizer(WordTokenizer())
+    memory.add_messages([
+        {"role": "system", "content": "system"},
+        {"role": "user", "content": "step one " * 10},
+        {"role": "assistant", "content": None, "tool_calls": [{"id": "1", "function": {"name": "search_web", "arguments": "{}"}}]},
+        {"role": "tool", "tool_call_id": "1", "content": "result " * 20},
+        {"role": "user", "content": "step two"},
+    ])
+
+    assert memory.get_messages_within(memory.total_tokens) == memory.messages
+
+    messages = memory.get_messages_within(30)
+    assert [message["role"] for message in messages] == ["system", "user"]
+    assert messages[-1]["content"] == "step two"
+
+def test_memory_get_messages_within_keeps_trailing_tool_call() -> None:
+    """测试以工具结果结尾且工具调用消息超出预算时，工具调用消息与工具结果一起保留"""
+    memory = Memory()
+    memory.add_messages([
+        {"role": "system", "content": "system"},
+        {"role": "user", "content": "task"},
+        {"role": "assistant", "content": "x" * 4000, "tool_calls": [{"id": "1", "function": {"name": "search_web", "arguments": "{}"}}]},
+        {"role": "tool", "tool_call_id": "1", "content": "result"},
+    ])
+
+    messages = memory.get_messages_within(100)
+    assert [message["role"] for message in messages] == ["system", "assistant", "tool"]
+    assert messages[1]["tool_calls"][0]["id"] == messages[2]["tool_call_id"]
+
+def test_memory_compact_with_policies() -> None:
+    """测试按照工具保留策略压缩历史工具结果，且重复压缩结果不变"""
+    def tool_turn(call_id: str, function_name: str, content: str):
+        return [
+            {"role": "assistant", "content": None, "tool_calls": [{"id": call_id, "function": {"name": function_name, "arguments": "{}"}}]},
+            {"role": "tool", "tool_call_id": call_id, "function_name": function_name, "content": content},
+        ]
+
+    memory = Memory()
+    memory.add_messages([{"role": "system", "content": "system"}])
+    memory.add_messages(tool_turn("1", "search_web", "a" * 50))
+    memory.add_messages(tool_turn("2", "browser_view", "b" * 50))
+    memory.add_messages(tool_turn("3", "browser_view", "c" * 50))
+    memory.add_messages([{"role": "assistant", "content": "done"}])
+
+    policies = {
+        "search_web": CompactPolicy(mode=CompactMode.TRUNCATE, max_chars=10),
+        "browser_view": CompactPolicy(mode=CompactMode.KEEP_LAST, keep_last=1),
+    }
+    memory.compact(policies)
+    memory.compact(policies)
+
+    tool_contents = [message["content"] for message in memory.messages if message["role"] == "tool"]
+    assert tool_contents == ["a" * 10 + TRUNCATED_SUFFIX, REMOVED_CONTENT, "c" * 50]
+    assert memory.total_tokens == sum(memory.count_message_tokens(message) for message in memory.messages)
+
+def test_memory_fold() -> None:
+    """测试将早期消息折叠为摘要时保留系统消息和最近的消息"""
+    memory = Memory()
+    memory.add_messages([
+        {"role": "system", "content": "system"},
+        {"role": "user", "content": "step one"},
+        {"role": "assistant", "content": "result one"},
+        {"role": "user", "content": "step two"},
+        {"role": "assistant", "content": "result two"},
+    ])
+
+    start, end = memory.get_foldable_range(keep_recent=1)
+    assert (start, end) == (1, 3)
+
+    memory.fold(start, end, "step one done")
+    assert [message["role"] for message in memory.messages] == ["system", "user", "user", "assistant"]
+    assert "step one done" in memory.messages[1]["content"]
+
+def test_memory_fold_within_single_step() -> None:
+    """测试单个步骤内的多轮工具调用可以在发起工具调用的助手消息之前折叠，且不拆散工具调用/工具结果对"""
+    def tool_turn(call_id: str):
+        return [
+            {"role": "assistant", "content": None, "tool_calls": [{"id": call_id, "function": {"name": "search_web", "arguments": "{}"}}]},
+            {"role": "tool", "tool_call_id": call_id, "function_name": "search_web", "content": f"result {call_id}"},
+        ]
+
+    memory = Memory()
+    memory.add_messages([
+        {"role": "system", "content": "system"},
+        {"role": "user", "content": "step one"},
+    ])
+    for call_id in ["1", "2", "3"]:
+        memory.add_messages(tool_turn(call_id))
+
+    start, end = memory.get_foldable_range(keep_recent=1)
+    assert (start, end) == (1, 6)
+    assert memory.messages[end]["tool_calls"][0]["id"] == "3"
+
+    memory.fold(start, end, "searched 1 and 2")
+    assert [message["role"] for message in memory.messages] == ["system", "user", "assistant", "tool"]
+    assert memory.messages[2]["tool_calls"][0]["id"] == memory.messages[3]["tool_call_id"]
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import time
+
+from app.domain.models.app_config import AgentConfig
+from app.domain.models.event import MessageDeltaEvent, MessageEvent, ToolEvent
+from app.domain.models.memory import Memory
+from app.domain.services.agents.react import ReActAgent
+from app.domain.services.tools.blob import BlobTool
+from app.domain.services.tools.search import SearchTool
+from app.infrastructure.external.blob_store.local_blob_store import LocalBlobStore
+from app.infrastructure.external.json_parser.repair_json_parser import RepairJsonParser
+from app.infrastructure.external.llm.fake_llm import FakeLLM, fake_tool_call
+from app.infrastructure.external.search.fake_search import FakeSearchEngine
+
+def test_parallel_tool_calls_run_concurrently_in_order() -> None:
+    """测试并行模式下同一轮的多个工具调用并发执行，事件与工具消息保持调用顺序"""
+    llm = FakeLLM(script=[
+        {"content": None, "tool_calls": [
+            fake_tool_call(f"call_{index}", "search_web", {"query": f"query {index}"}) for index in range(3)
+        ]},
+        {"content": "完成"},
+    ])
+    agent = ReActAgent(
+        agent_config=AgentConfig(parallel_tool_calls=True),
+        llm=llm,
+        memory=Memory(),
+        json_parser=RepairJsonParser(),
+        tools=[SearchTool(FakeSearchEngine(latency_ms=100))],
+    )
+
+    async def main():
+        return [event async for event in agent.invoke("搜索", format="text")]
+
+    start = time.perf_counter()
+    events = asyncio.run(main())
+    elapsed = time.perf_counter() - start
+
+    tool_events = [(event.tool_call_id, event.status) for event in events if isinstance(event, ToolEvent)]
+    assert tool_events == [
+        ("call_0", "calling"), ("call_1", "calling"), ("call_2", "calling"),
+        ("call_0", "called"), ("call_1", "called"), ("call_2", "called"),
+    ]
+    assert elapsed < 0.25
+    tool_messages = [message for message in agent.memory.get_messages() if message["role"] == "tool"]
+    assert [message["tool_call_id"] for message in tool_messages] == ["call_0", "call_1", "call_2"]
+
+def test_large_tool_result_offloaded_to_blob_store(tmp_path) -> None:
+    """测试超过阈值的工具结果写入大对象存储，记忆中只保留引用，并可以通过 read_tool_result 读取完整内容"""
+    llm = FakeLLM(script=[
+        {"content": None, "tool_calls": [fake_tool_call("call_0", "search_web", {"query": "big"})]},
+        {"content": "完成"},
+    ])
+    blob_store = LocalBlobStore(str(tmp_path))
+    agent = ReActAgent(
+        agent_config=AgentConfig(tool_result_offload_chars=200, tool_result_preview_chars=50),
+        llm=llm,
+        memory=Memory(),
+        json_parser=RepairJsonParser(),
+        tools=[SearchTool(FakeSearchEngine(results=10)), BlobTool(blob_store)],
+        blob_store=blob_store,
+    )
+
+    async def main():
+        return [event async for event in agent.invoke("搜索", format="text")]
+
+    asyncio.run(main())
+
+    tool_message = next(message for message in agent.memory.get_messages() if message["role"] == "tool")
+    reference = tool_message["content"]
+    blob_key = reference["data"]["blob_key"]
+    assert len(reference["data"]["preview"]) == 50
+    assert reference["data"]["total_chars"] > 200
+
+    blob_tool = BlobTool(blob_store)
+    result = asyncio.run(blob_tool.invoke("read_tool_result", blob_key=blob_key, offset=0, length=100000))
+    assert result.success
+    assert result.data["content"].startswith(reference["data"]["preview"])
+    assert len(result.data["content"]) == reference["data"]["total_chars"]
+    assert not result.data["has_more"]
+    assert not asyncio.run(blob_tool.invoke("read_tool_result", blob_key="tool-results/missing.json")).success
+
+class BrokenStreamLLM(FakeLLM):
+    """首次流式调用返回 message 字段的部分内容后断开连接的 LLM"""
+
+    async def stream(self, messages, tools=None, response_format=None, tool_choice=None):
+        broken = self.calls == 0
+        content = ""
+        async for delta in super().stream(messages, tools, response_format, tool_choice):
+            yield delta
+            content += delta.get("content") or ""
+            if broken and "任务" in content:
+                raise ConnectionError("流式连接断开")
+
+def test_streaming_json_reply_only_emits_decoded_message_field() -> None:
+    """测试流式 JSON 回复只返回 message 字段解码后的增量，调用中断重试时先返回作废事件"""
+    reply = json.dumps({"message": "任务完成\n结果见\"附件\"", "attachments": ["a.md"]}, ensure_ascii=False)
+    llm = BrokenStreamLLM(script=[{"content": reply}, {"content": reply}], stream_chunk_chars=3)
+    agent = ReActAgent(
+        agent_config=AgentConfig(stream=True),
+        llm=llm,
+        memory=Memory(),
+        json_parser=RepairJsonParser(),
+        tools=[],
+    )
+    agent._retry_interval = 0
+
+    async def main():
+        return [event async for event in agent.invoke("汇总", format="json_object")]
+
+    events = asyncio.run(main())
+
+    deltas = [event for event in events if isinstance(event, MessageDeltaEvent)]
+    aborted = [event for event in deltas if event.aborted]
+    assert len(aborted) == 1
+    first_id = aborted[0].message_id
+    assert "".join(event.delta for event in deltas if event.message_id == first_id) == "任务"
+    retried = [event for event in deltas if event.message_id != first_id]
+    assert "".join(event.delta for event in retried) == "任务完成\n结果见\"附件\""
+    assert all("{" not in event.delta and "attachments" not in event.delta for event in retried)
+    assert isinstance(events[-1], MessageEvent)
+
+def test_blob_tool_rejects_keys_outside_its_prefix(tmp_path) -> None:
+    """测试大对象工具只能读取所属任务前缀下的工具结果"""
+    blob_store = LocalBlobStore(str(tmp_path))
+    asyncio.run(blob_store.put("tool-results/task-a/result.json", "任务 A 的结果"))
+    asyncio.run(blob_store.put("tool-results/task-b/result.json", "任务 B 的结果"))
+    blob_tool = BlobTool(blob_store, "tool-results/task-a/")
+
+    async def read(blob_key: str):
+        return await blob_tool.invoke("read_tool_result", blob_key=blob_key)
+
+    assert asyncio.run(read("tool-results/task-a/result.json")).data["content"] == "任务 A 的结果"
+    assert not asyncio.run(read("tool-results/task-b/result.json")).success
+    assert not asyncio.run(read("tool-results/task-a/../task-b/result.json")).success
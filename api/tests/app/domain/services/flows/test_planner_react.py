@@ -0,0 +1,271 @@
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional
+
+from app.domain.models.app_config import AgentConfig
+from app.domain.models.checkpoint import Checkpoint
+from app.domain.models.memory import Memory
+from app.domain.models.event import DoneEvent, MessageEvent, PlanEvent, PlanEventStatus, StepEvent, ToolEvent, ToolEventStatus, WaitEvent
+from app.domain.models.message import Message
+from app.domain.models.plan import ExecutionStatus
+from app.domain.models.tool_result import ToolResult
+from app.domain.services.flows.base import FlowStatus
+from app.domain.services.flows.planner_react import PlannerReActFlow
+from app.domain.services.tools.base import BaseTool, tool
+from app.domain.services.tools.search import SearchTool
+from app.infrastructure.external.json_parser.repair_json_parser import RepairJsonParser
+from app.infrastructure.external.llm.fake_llm import FakeLLM, fake_tool_call
+from app.infrastructure.external.llm.fake_scenario import PlannerReActScript
+from app.infrastructure.external.search.fake_search import FakeSearchEngine
+from tests.app.domain.models.test_memory import WordTokenizer
+
+def test_planner_react_flow_runs_end_to_end() -> None:
+    """测试使用本地替身驱动规划 -> 执行(含工具调用) -> 更新规划 -> 汇总的完整流程"""
+    llm = FakeLLM(script=[
+        {"content": json.dumps({
+            "message": "好的", "language": "zh", "goal": "目标", "title": "标题",
+            "steps": [{"id": "1", "description": "搜索资料"}],
+        })},
+        {"content": None, "tool_calls": [fake_tool_call("call_1", "search_web", {"query": "资料"})]},
+        {"content": json.dumps({"success": True, "result": "找到了资料", "attachments": []})},
+        {"content": json.dumps({"steps": []})},
+        {"content": json.dumps({"message": "任务完成", "attachments": []})},
+    ])
+    search_engine = FakeSearchEngine(results=2)
+    flow = PlannerReActFlow(
+        agent_config=AgentConfig(),
+        llm=llm,
+        json_parser=RepairJsonParser(),
+        tools=[SearchTool(search_engine)],
+    )
+
+    async def main():
+        return [event async for event in flow.invoke(Message(message="帮我搜索资料"))]
+
+    events = asyncio.run(main())
+
+    assert llm.calls == 5
+    assert search_engine.calls == 1
+    assert [event.status for event in events if isinstance(event, ToolEvent)] == ["calling", "called"]
+    assert [event.status for event in events if isinstance(event, StepEvent)] == ["started", "completed"]
+    assert [event.message for event in events if isinstance(event, MessageEvent)][-1] == "任务完成"
+    plan_events = [event for event in events if isinstance(event, PlanEvent)]
+    assert plan_events[-1].status == PlanEventStatus.COMPLETED
+    assert plan_events[-1].plan.steps[0].result == "找到了资料"
+    assert plan_events[-1].plan.status == ExecutionStatus.COMPLETED
+    assert isinstance(events[-1], DoneEvent)
+    assert flow.status == FlowStatus.COMPLETED
+
+def test_planner_react_flow_runs_independent_steps_in_parallel() -> None:
+    """测试依赖已满足的子步骤在独立的 Agent 上并行执行，结果合并回主记忆后再执行依赖它们的步骤"""
+    llm = FakeLLM(script=PlannerReActScript(steps=3, tool_rounds=1), latency_ms=50)
+    flow = PlannerReActFlow(
+        agent_config=AgentConfig(max_parallel_steps=4),
+        llm=llm,
+        json_parser=RepairJsonParser(),
+        tools=[SearchTool(FakeSearchEngine())],
+    )
+
+    async def main():
+        return [event async for event in flow.invoke(Message(message="并行任务"))]
+
+    start = time.perf_counter()
+    events = asyncio.run(main())
+    elapsed = time.perf_counter() - start
+
+    started = [event.step.id for event in events if isinstance(event, StepEvent) and event.status == "started"]
+    assert started[:2] == ["1", "2"] and started[2] == "3"
+    assert all(step.success for step in flow.plan.steps)
+    # 并行执行时依次经历 8 次 LLM 延迟(400ms)，串行执行时为 11 次(550ms)
+    assert elapsed < 0.5
+    # 并行步骤的执行记录合并回主记忆
+    contents = [message.get("content") or "" for message in flow.react.memory.get_messages()]
+    assert any("步骤 1 已完成" in content for content in contents)
+    assert any("步骤 2 已完成" in content for content in contents)
+
+class AskUserTool(BaseTool):
+    """测试用的询问用户工具"""
+    name: str = "message"
+
+    @tool(name="message_ask_user", description="询问用户", parameters={"text": {"type": "string"}}, required=["text"])
+    async def message_ask_user(self, text: str) -> ToolResult:
+        return ToolResult(success=True)
+
+def test_parallel_steps_stop_and_resume_when_one_step_waits() -> None:
+    """测试并行执行时某个子步骤等待用户输入，其余子步骤被中断并重新执行，主记忆以询问用户的工具调用结尾"""
+    flow = PlannerReActFlow(
+        agent_config=AgentConfig(max_parallel_steps=4),
+        llm=FakeLLM(script=PlannerReActScript(steps=3, tool_rounds=1, ask_user_steps=["1"]), latency_ms=20),
+        json_parser=RepairJsonParser(),
+        tools=[SearchTool(FakeSearchEngine(latency_ms=100)), AskUserTool()],
+    )
+
+    async def main():
+        first = [event async for event in flow.invoke(Message(message="需要确认的任务"))]
+        waiting = flow.waiting
+        statuses = [step.status for step in flow.plan.steps]
+        last_message = flow.react.memory.get_last_message()
+        second = [event async for event in flow.invoke(Message(message="确认"))]
+        return first, waiting, statuses, last_message, second
+
+    first, waiting, statuses, last_message, second = asyncio.run(main())
+
+    assert isinstance(first[-1], WaitEvent)
+    assert waiting
+    assert statuses == [ExecutionStatus.RUNNING, ExecutionStatus.PENDING, ExecutionStatus.PENDING]
+    assert last_message["tool_calls"][0]["function"]["name"] == "message_ask_user"
+
+    assert isinstance(second[-1], DoneEvent)
+    assert all(step.success for step in flow.plan.steps)
+    messages = flow.react.memory.get_messages()
+    for index, message in enumerate(messages):
+        if message.get("tool_calls"):
+            assert messages[index + 1]["role"] == "tool"
+
+class MemoryCheckpointRepository:
+    """测试用的检查点仓库，按 JSON 保存检查点，模拟持久化存储"""
+
+    def __init__(self) -> None:
+        self.data: Dict[str, str] = {}
+        self.saves = 0
+
+    async def save(self, checkpoint: Checkpoint) -> None:
+        self.saves += 1
+        self.data[checkpoint.task_id] = checkpoint.model_dump_json()
+
+    async def load(self, task_id: str) -> Optional[Checkpoint]:
+        data = self.data.get(task_id)
+        return Checkpoint.model_validate_json(data) if data else None
+
+    async def delete(self, task_id: str) -> None:
+        self.data.pop(task_id, None)
+
+    async def list_task_ids(self) -> List[str]:
+        return list(self.data)
+
+def test_planner_react_flow_resumes_from_checkpoint() -> None:
+    """测试流程中断后从检查点重建 Agent 继续执行，已完成的子步骤不会重复执行"""
+    llm = FakeLLM(script=PlannerReActScript(steps=3, tool_rounds=1))
+    repository = MemoryCheckpointRepository()
+
+    def create_flow() -> PlannerReActFlow:
+        return PlannerReActFlow(
+            agent_config=AgentConfig(),
+            llm=llm,
+            json_parser=RepairJsonParser(),
+            tools=[SearchTool(FakeSearchEngine())],
+            task_id="task-1",
+            checkpoint_repository=repository,
+        )
+
+    async def crash() -> None:
+        # 第 2 个子步骤发起工具调用时模拟进程崩溃
+        flow = create_flow()
+        events = flow.invoke(Message(message="可恢复的任务"))
+        async for event in events:
+            if isinstance(event, ToolEvent) and event.status == ToolEventStatus.CALLING and flow.plan.steps[1].status == "running":
+                break
+        await events.aclose()
+
+    async def resume():
+        flow = create_flow()
+        flow.restore(await repository.load("task-1"))
+        return flow, [event async for event in flow.resume()]
+
+    asyncio.run(crash())
+    checkpoint = asyncio.run(repository.load("task-1"))
+    assert checkpoint.plan.steps[0].status == ExecutionStatus.COMPLETED
+    assert checkpoint.react_memory.get_last_message().get("tool_calls")
+
+    flow, events = asyncio.run(resume())
+    started = [event.step.id for event in events if isinstance(event, StepEvent) and event.status == "started"]
+    assert started == ["2", "3"]
+    assert all(step.success for step in flow.plan.steps)
+    assert isinstance(events[-1], DoneEvent)
+    assert "task-1" not in repository.data
+    # 恢复时丢弃了没有结果的工具调用，记忆中的每个工具调用都紧跟对应的工具结果
+    messages = flow.react.memory.get_messages()
+    for index, message in enumerate(messages):
+        if message.get("tool_calls"):
+            assert messages[index + 1]["role"] == "tool"
+
+def test_planner_react_flow_sets_tokenizer_on_created_and_restored_memories() -> None:
+    """测试流程创建 Agent 以及从检查点恢复后，记忆都使用传递的分词器计算 token 数"""
+    tokenizer = WordTokenizer()
+
+    def create_flow() -> PlannerReActFlow:
+        return PlannerReActFlow(
+            agent_config=AgentConfig(),
+            llm=FakeLLM(script=PlannerReActScript(steps=1, tool_rounds=1)),
+            json_parser=RepairJsonParser(),
+            tools=[SearchTool(FakeSearchEngine())],
+            task_id="task-1",
+            tokenizer=tokenizer,
+        )
+
+    def word_tokens(memory: Memory) -> int:
+        expected = Memory(messages=memory.get_messages())
+        expected.set_tokenizer(tokenizer)
+        return expected.total_tokens
+
+    async def main():
+        return [event async for event in flow.invoke(Message(message="需要计算 token 数的任务"))]
+
+    flow = create_flow()
+    asyncio.run(main())
+    assert flow.react.memory.total_tokens == word_tokens(flow.react.memory)
+
+    # 检查点经过序列化后不包含分词器，恢复时重新设置
+    checkpoint = Checkpoint.model_validate_json(flow.checkpoint().model_dump_json())
+    restored = create_flow()
+    restored.restore(checkpoint)
+    for memory in (restored.planner.memory, restored.react.memory):
+        assert memory.total_tokens == word_tokens(memory)
+        assert memory.total_tokens != Memory(messages=memory.get_messages()).total_tokens
+
+def test_planner_react_flow_skips_turn_checkpoints_while_plan_unchanged() -> None:
+    """测试同一个子步骤内的多轮 LLM 回复不会每轮都保存检查点，只在步骤状态变化或达到间隔时保存"""
+    def run(checkpoint_turn_interval: int) -> int:
+        repository = MemoryCheckpointRepository()
+        flow = PlannerReActFlow(
+            agent_config=AgentConfig(checkpoint_turn_interval=checkpoint_turn_interval),
+            llm=FakeLLM(script=PlannerReActScript(steps=1, tool_rounds=8)),
+            json_parser=RepairJsonParser(),
+            tools=[SearchTool(FakeSearchEngine())],
+            task_id="task-1",
+            checkpoint_repository=repository,
+        )
+
+        async def main():
+            return [event async for event in flow.invoke(Message(message="多轮工具调用的任务"))]
+
+        asyncio.run(main())
+        return repository.saves
+
+    # 共 12 轮 LLM 回复，间隔为 1 时每轮都保存
+    assert run(1) > 12
+    assert run(3) < run(1)
+    assert run(0) < run(3)
+
+def test_planner_react_flow_winds_down_when_budget_runs_low() -> None:
+    """测试工具调用预算不足时停止调用工具与执行剩余步骤，直接汇总已有结果"""
+    search_engine = FakeSearchEngine()
+    flow = PlannerReActFlow(
+        agent_config=AgentConfig(max_tool_calls=3, budget_wind_down_ratio=1),
+        llm=FakeLLM(script=PlannerReActScript(steps=3, tool_rounds=2)),
+        json_parser=RepairJsonParser(),
+        tools=[SearchTool(search_engine)],
+    )
+
+    async def main():
+        return [event async for event in flow.invoke(Message(message="预算有限的任务"))]
+
+    events = asyncio.run(main())
+
+    assert search_engine.calls == 3
+    assert flow.budget.tool_calls == 3 and flow.budget.winding_down
+    assert flow.budget.prompt_tokens > 0 and flow.budget.completion_tokens > 0
+    assert any(isinstance(event, MessageEvent) and "预算不足" in event.message for event in events)
+    assert flow.plan.steps[2].status == ExecutionStatus.PENDING
+    assert isinstance(events[-1], DoneEvent)
@@ -0,0 +1,36 @@
+from app.domain.models.app_config import ReplanMode
+from app.domain.models.plan import ExecutionStatus, Plan, Step
+from app.domain.services.flows.replan import ReplanPolicy
+
+def create_plan(count: int) -> Plan:
+    return Plan(steps=[Step(id=str(index + 1), description=f"步骤 {index + 1}") for index in range(count)])
+
+def complete(step: Step, result: str = "已完成", success: bool = True) -> Step:
+    step.status = ExecutionStatus.COMPLETED
+    step.success = success
+    step.result = result
+    return step
+
+def test_replan_policy_skips_expected_steps() -> None:
+    """测试不同的重新规划策略只在需要时更新规划，并统计跳过的次数"""
+    plan = create_plan(4)
+    on_failure = ReplanPolicy(mode=ReplanMode.ON_FAILURE)
+    assert not on_failure.should_replan(plan, [complete(plan.steps[0])])
+    assert on_failure.should_replan(plan, [complete(plan.steps[1], success=False)])
+    assert on_failure.stats().skipped == 1 and on_failure.stats().replanned == 1
+
+    plan = create_plan(4)
+    on_divergence = ReplanPolicy(mode=ReplanMode.ON_DIVERGENCE)
+    assert not on_divergence.should_replan(plan, [complete(plan.steps[0])])
+    assert on_divergence.should_replan(plan, [complete(plan.steps[1], result="没有找到相关资料")])
+
+    plan = create_plan(5)
+    every_n = ReplanPolicy(mode=ReplanMode.EVERY_N, every_n_steps=2)
+    assert not every_n.should_replan(plan, [complete(plan.steps[0])])
+    assert every_n.should_replan(plan, [complete(plan.steps[1])])
+    assert not every_n.should_replan(plan, [complete(plan.steps[2])])
+
+    # 没有未完成的子步骤时不再更新规划，always 策略保持原有行为
+    plan = create_plan(1)
+    assert not every_n.should_replan(plan, [complete(plan.steps[0], success=False)])
+    assert ReplanPolicy().should_replan(plan, plan.steps)
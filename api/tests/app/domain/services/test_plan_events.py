@@ -0,0 +1,47 @@
+import asyncio
+
+from app.domain.models.app_config import AgentConfig, PlanEventMode
+from app.domain.models.event import PlanDiffEvent, PlanEvent
+from app.domain.models.message import Message
+from app.domain.services.flows.planner_react import PlannerReActFlow
+from app.domain.services.plan_events import PlanReconstructor
+from app.domain.services.tools.search import SearchTool
+from app.infrastructure.external.json_parser.repair_json_parser import RepairJsonParser
+from app.infrastructure.external.llm.fake_llm import FakeLLM
+from app.infrastructure.external.llm.fake_scenario import PlannerReActScript
+from app.infrastructure.external.search.fake_search import FakeSearchEngine
+
+def test_plan_diff_events_reconstruct_plan() -> None:
+    """测试 diff 模式下输出规划差异事件，客户端按序号重建的规划与流程中的规划一致，丢失事件时等待快照重新同步"""
+    flow = PlannerReActFlow(
+        agent_config=AgentConfig(plan_event_mode=PlanEventMode.DIFF, plan_snapshot_interval=3),
+        llm=FakeLLM(script=PlannerReActScript(steps=4, tool_rounds=1, result_chars=2000)),
+        json_parser=RepairJsonParser(),
+        tools=[SearchTool(FakeSearchEngine())],
+    )
+
+    async def main():
+        return [event async for event in flow.invoke(Message(message="长规划任务"))]
+
+    plan_events = [event for event in asyncio.run(main()) if isinstance(event, (PlanEvent, PlanDiffEvent))]
+
+    assert [event.sequence for event in plan_events] == list(range(1, len(plan_events) + 1))
+    assert isinstance(plan_events[0], PlanEvent)
+    assert any(isinstance(event, PlanDiffEvent) for event in plan_events)
+    # 差异事件只携带变化的步骤，不包含此前步骤的结果文本
+    assert all(len(event.model_dump_json()) < 3000 for event in plan_events if isinstance(event, PlanDiffEvent))
+
+    reconstructor = PlanReconstructor()
+    for event in plan_events:
+        reconstructor.apply(event)
+    assert reconstructor.plan == flow.plan
+
+    # 跳过一个差异事件后需要等待下一个完整快照
+    reconstructor = PlanReconstructor()
+    skipped = next(index for index, event in enumerate(plan_events) if isinstance(event, PlanDiffEvent))
+    for event in plan_events[:skipped] + plan_events[skipped + 1:]:
+        reconstructor.apply(event)
+        if isinstance(event, PlanDiffEvent) and event.sequence == skipped + 2:
+            assert reconstructor.needs_resync
+    assert not reconstructor.needs_resync
+    assert reconstructor.plan == flow.plan
@@ -0,0 +1,210 @@
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+
+from app.domain.models.tool_cache import ToolCachePolicy, ToolCacheScope
+from app.domain.models.tool_result import ToolResult
+from app.domain.services.tools.base import BaseTool, tool
+from app.domain.services.tools.registry import ToolRegistry
+from app.infrastructure.external.tool_cache.memory_tool_cache import MemoryToolResultCache
+
+class EchoTool(BaseTool):
+    name: str = "echo"
+
+    @tool(name="echo", description="回显文本", parameters={"text": {"type": "string"}}, required=["text"])
+    async def echo(self, text: str) -> ToolResult[str]:
+        return ToolResult(data=text)
+
+class LoudEchoTool(EchoTool):
+    name: str = "loud_echo"
+
+    @tool(name="shout", description="大写回显文本", parameters={"text": {"type": "string"}}, required=["text"])
+    async def shout(self, text: str) -> ToolResult[str]:
+        return ToolResult(data=text.upper())
+
+def test_tool_registry_is_built_at_class_definition() -> None:
+    """测试工具注册表在类定义时生成，包含继承的工具，调用时过滤多余参数"""
+    assert EchoTool._tool_methods == {"echo": "echo"}
+    assert LoudEchoTool._tool_methods == {"echo": "echo", "shout": "shout"}
+    assert [schema["function"]["name"] for schema in LoudEchoTool().get_tools()] == ["echo", "shout"]
+
+    loud_echo = LoudEchoTool()
+    assert loud_echo.has_tool("shout")
+    assert not loud_echo.has_tool("whisper")
+    result = asyncio.run(loud_echo.invoke("shout", text="hi", unknown="ignored"))
+    assert result.data == "HI"
+
+    with pytest.raises(ValueError):
+        asyncio.run(loud_echo.invoke("whisper", text="hi"))
+
+class DynamicTool(BaseTool):
+    """模拟 MCP 这类在运行时加载工具的工具集"""
+    name: str = "dynamic"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.loaded: Dict[str, str] = {}
+
+    def get_tool_names(self) -> List[str]:
+        return list(self.loaded)
+
+    def get_tools(self) -> List[Dict[str, Any]]:
+        return [
+            {"type": "function", "function": {"name": tool_name, "description": description, "parameters": {"type": "object", "properties": {}}}}
+            for tool_name, description in self.loaded.items()
+        ]
+
+    async def invoke(self, tool_name: str, **kwargs) -> ToolResult:
+        return ToolResult(data=f"{tool_name}: {kwargs}")
+
+def test_tool_registry_indexes_toolsets() -> None:
+    """测试工具索引按工具名定位工具集，同名工具以先注册的工具集为准，暴露的工具声明与分发保持一致"""
+    echo, loud_echo = EchoTool(), LoudEchoTool()
+    registry = ToolRegistry([echo, loud_echo])
+
+    assert registry.get("echo") is echo
+    assert registry.get("shout") is loud_echo
+    assert registry.get("mcp_weather") is None
+    # 同名工具只暴露一次
+    assert [schema["function"]["name"] for schema in registry.get_tools()] == ["echo", "shout"]
+
+    # 动态工具集加载工具后重新注册，新工具同时被暴露并可以分发
+    dynamic = DynamicTool()
+    registry.register(dynamic)
+    assert "mcp_weather" not in registry
+    dynamic.loaded["mcp_weather"] = "查询天气"
+    registry.register(dynamic)
+    assert "mcp_weather" in registry
+    assert len(registry) == 3
+    assert [schema["function"]["name"] for schema in registry.get_tools()] == ["echo", "shout", "mcp_weather"]
+    result = asyncio.run(registry.get("mcp_weather").invoke("mcp_weather", city="北京"))
+    assert result.data == "mcp_weather: {'city': '北京'}"
+
+    # 动态工具被卸载后不再暴露
+    dynamic.loaded.clear()
+    registry.register(dynamic)
+    assert "mcp_weather" not in registry
+    registry.unregister(loud_echo)
+    assert [schema["function"]["name"] for schema in registry.get_tools()] == ["echo"]
+
+class CountingTool(BaseTool):
+    name: str = "counting"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = 0
+
+    @tool(
+        name="lookup",
+        description="查询文本",
+        parameters={"text": {"type": "string"}},
+        required=["text"],
+        cache=ToolCachePolicy(scope=ToolCacheScope.PROCESS, key_normalizer=lambda args: {"text": args["text"].lower()}),
+    )
+    async def lookup(self, text: str) -> ToolResult[str]:
+        self.calls += 1
+        return ToolResult(success=text != "fail", data=text)
+
+def test_tool_cache_serves_hits_without_invoking_method() -> None:
+    """测试声明了缓存策略的工具命中缓存时不再执行方法，并标记结果来自缓存"""
+    counting = CountingTool()
+    first = asyncio.run(counting.invoke("lookup", text="Hello"))
+    second = asyncio.run(counting.invoke("lookup", text=" hello "))
+    assert counting.calls == 1
+    assert not first.cached and second.cached
+    assert "cached" not in second.model_dump()
+
+    # 失败的结果不做缓存
+    asyncio.run(counting.invoke("lookup", text="fail"))
+    asyncio.run(counting.invoke("lookup", text="fail"))
+    assert counting.calls == 3
+
+    # 未设置共享缓存时只在工具集实例内缓存，设置后多个实例共享缓存
+    cache = MemoryToolResultCache(max_size=8)
+    first_tool, second_tool = CountingTool(), CountingTool()
+    first_tool.set_cache(ToolCacheScope.PROCESS, cache)
+    second_tool.set_cache(ToolCacheScope.PROCESS, cache)
+    asyncio.run(first_tool.invoke("lookup", text="shared"))
+    assert asyncio.run(second_tool.invoke("lookup", text="shared")).cached
+    assert second_tool.calls == 0
+    assert cache.stats().hits == 1
+
+class SlowTool(BaseTool):
+    name: str = "slow"
+    max_concurrency: int = 2
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.cancelled = 0
+
+    @tool(name="sleep", description="等待指定秒数", parameters={"seconds": {"type": "number"}}, required=["seconds"], timeout=0.05)
+    async def sleep(self, seconds: float) -> ToolResult[float]:
+        try:
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return ToolResult(data=seconds)
+
+    @tool(name="wait", description="等待指定秒数", parameters={"seconds": {"type": "number"}}, required=["seconds"], max_concurrency=1)
+    async def wait(self, seconds: float) -> ToolResult[float]:
+        await asyncio.sleep(seconds)
+        return ToolResult(data=seconds)
+
+def test_tool_timeout_and_concurrency_limits() -> None:
+    """测试工具超时后取消执行并返回超时结果，工具并发数不超过声明的上限"""
+    slow = SlowTool()
+    result = asyncio.run(slow.invoke("sleep", seconds=1))
+    assert not result.success and result.timed_out
+    assert slow.cancelled == 1
+    assert asyncio.run(slow.invoke("sleep", seconds=0)).data == 0
+
+    async def run_waits() -> None:
+        await asyncio.gather(*(slow.invoke("wait", seconds=0.01) for _ in range(3)))
+
+    asyncio.run(run_waits())
+    stats = slow.get_stats()
+    assert stats["sleep"].timeouts == 1 and stats["sleep"].calls == 2
+    assert stats["wait"].calls == 3 and stats["wait"].max_in_flight == 1
+    assert slow.get_timeout("wait") == SlowTool.timeout
+
+class SharedLimitTool(BaseTool):
+    name: str = "shared_limit"
+    max_concurrency: int = 2
+    in_flight: Dict[str, int] = {}
+    max_in_flight: Dict[str, int] = {}
+
+    async def _track(self, tool_name: str) -> ToolResult[None]:
+        """记录每个工具与整个工具集(*)的最大同时执行数"""
+        for name in [tool_name, "*"]:
+            SharedLimitTool.in_flight[name] = SharedLimitTool.in_flight.get(name, 0) + 1
+            SharedLimitTool.max_in_flight[name] = max(SharedLimitTool.max_in_flight.get(name, 0), SharedLimitTool.in_flight[name])
+        await asyncio.sleep(0.01)
+        for name in [tool_name, "*"]:
+            SharedLimitTool.in_flight[name] -= 1
+        return ToolResult()
+
+    @tool(name="limited", description="并发数为 1 的工具", parameters={}, required=[], max_concurrency=1)
+    async def limited(self) -> ToolResult[None]:
+        return await self._track("limited")
+
+    @tool(name="bulkhead", description="只受工具集舱壁限制的工具", parameters={}, required=[])
+    async def bulkhead(self) -> ToolResult[None]:
+        return await self._track("bulkhead")
+
+def test_concurrency_limits_are_shared_across_instances() -> None:
+    """测试工具并发限制与工具集舱壁在同一工具集类的多个实例(不同任务)之间共享"""
+    tools = [SharedLimitTool(), SharedLimitTool(), SharedLimitTool()]
+
+    async def main() -> None:
+        await asyncio.gather(*(
+            tool_set.invoke(tool_name) for tool_set in tools for tool_name in ["limited", "bulkhead", "bulkhead"]
+        ))
+
+    asyncio.run(main())
+    # 第二次运行使用新的事件循环，共享的信号量随之重新创建
+    asyncio.run(main())
+
+    assert SharedLimitTool.max_in_flight["limited"] == 1
+    assert SharedLimitTool.max_in_flight["*"] == 2
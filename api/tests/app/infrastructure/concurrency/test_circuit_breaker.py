@@ -0,0 +1,35 @@
+import time
+
+from app.infrastructure.concurrency.circuit_breaker import CircuitBreaker, CircuitState
+
+def test_circuit_breaker_opens_and_recovers() -> None:
+    """测试连续失败后熔断器打开，冷却结束后只放行一个探测请求，探测成功后关闭"""
+    circuit_breaker = CircuitBreaker("test", failure_threshold=2, reset_seconds=0.05)
+
+    circuit_breaker.record_failure()
+    assert circuit_breaker.allow()
+    circuit_breaker.record_failure()
+    assert circuit_breaker.state == CircuitState.OPEN
+    assert not circuit_breaker.allow()
+
+    time.sleep(0.06)
+    assert circuit_breaker.allow()
+    assert not circuit_breaker.allow()
+    circuit_breaker.record_success()
+
+    stats = circuit_breaker.stats()
+    assert stats.state == CircuitState.CLOSED
+    assert stats.opened == 1
+    assert stats.rejected == 2
+
+def test_circuit_breaker_half_open_failure_reopens() -> None:
+    """测试半开状态下探测失败会重新打开熔断器"""
+    circuit_breaker = CircuitBreaker("test", failure_threshold=1, reset_seconds=0.05)
+    circuit_breaker.record_failure()
+
+    time.sleep(0.06)
+    assert circuit_breaker.allow()
+    circuit_breaker.record_failure()
+
+    assert circuit_breaker.state == CircuitState.OPEN
+    assert circuit_breaker.stats().opened == 2
@@ -0,0 +1,40 @@
+import asyncio
+
+from app.infrastructure.concurrency.rate_limiter import RateLimiter
+
+def test_rate_limiter_throttles_requests_in_arrival_order() -> None:
+    """测试请求桶耗尽后调用方按到达顺序排队放行"""
+    # 每分钟 600 次请求，即每 0.1s 补充 1 次
+    rate_limiter = RateLimiter("test", requests_per_minute=600)
+    rate_limiter._requests.level = 1
+    order = []
+
+    async def call(index: int) -> None:
+        await rate_limiter.acquire()
+        order.append(index)
+
+    async def main():
+        await asyncio.gather(*(call(index) for index in range(3)))
+
+    asyncio.run(main())
+
+    assert order == [0, 1, 2]
+    stats = rate_limiter.stats()
+    assert stats.acquired == 3
+    assert stats.throttled == 2
+    assert stats.waiting == 0
+    assert stats.max_wait_ms >= 150
+
+def test_rate_limiter_consume_delays_next_caller() -> None:
+    """测试请求完成后补扣的 token 会让后续调用方等待"""
+    rate_limiter = RateLimiter("test", tokens_per_minute=6000)
+
+    async def main():
+        assert await rate_limiter.acquire(100) < 0.01
+        await rate_limiter.consume(5950)
+        return await rate_limiter.acquire(100)
+
+    waited = asyncio.run(main())
+
+    # 余量为 -50，需要补充 150 个 token，每秒补充 100 个
+    assert waited >= 1.4
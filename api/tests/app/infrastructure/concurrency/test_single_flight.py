@@ -0,0 +1,122 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.infrastructure.concurrency import single_flight as single_flight_module
+from app.infrastructure.concurrency.single_flight import SingleFlight, SingleFlightScope
+
+def test_single_flight_coalesces_concurrent_calls() -> None:
+    """测试相同 key 的并发调用只执行一次并共享结果"""
+    single_flight = SingleFlight("test", scope=SingleFlightScope.PROCESS)
+    executions = 0
+
+    async def fetch() -> str:
+        nonlocal executions
+        executions += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(single_flight.do("key", fetch) for _ in range(5)))
+
+    results = asyncio.run(main())
+
+    assert results == ["result"] * 5
+    assert executions == 1
+    stats = single_flight.stats()
+    assert stats.calls == 5
+    assert stats.saved == 4
+    assert stats.in_flight == 0
+
+def test_single_flight_shares_exceptions() -> None:
+    """测试执行失败时所有等待者都收到同一个异常，且失败后可以重新执行"""
+    single_flight = SingleFlight("test", scope=SingleFlightScope.PROCESS)
+
+    async def fail() -> str:
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        return await asyncio.gather(*(single_flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+
+    assert all(isinstance(result, ValueError) for result in results)
+    with pytest.raises(ValueError):
+        asyncio.run(single_flight.do("key", fail))
+    assert single_flight.stats().executions == 2
+
+def test_cluster_follower_runs_locally_when_polling_fails(monkeypatch) -> None:
+    """测试 cluster 范围下其他节点持有锁、轮询结果时 Redis 出错，当前节点自行执行请求"""
+    class FlakyRedis:
+        async def set(self, *args, **kwargs) -> bool:
+            return False # 锁被其他节点持有
+
+        async def get(self, key: str):
+            raise ConnectionError("redis down")
+
+        async def exists(self, key: str) -> int:
+            raise ConnectionError("redis down")
+
+    monkeypatch.setattr(single_flight_module, "get_redis", lambda: SimpleNamespace(client=FlakyRedis()))
+    single_flight = SingleFlight("test", scope=SingleFlightScope.CLUSTER, dumps=str, loads=str)
+
+    async def fetch() -> str:
+        return "local"
+
+    assert asyncio.run(single_flight.do("key", fetch)) == "local"
+    stats = single_flight.stats()
+    assert stats.executions == 1
+    assert stats.saved == 0
+
+class MemoryRedis:
+    """只实现锁与结果读写的内存 Redis"""
+
+    def __init__(self) -> None:
+        self.data = {}
+
+    async def set(self, key: str, value: str, nx: bool = False, ex=None) -> bool:
+        if nx and key in self.data:
+            return False
+        self.data[key] = value
+        return True
+
+    async def get(self, key: str):
+        return self.data.get(key)
+
+    async def eval(self, script: str, numkeys: int, key: str, value: str) -> int:
+        if self.data.get(key) != value:
+            return 0
+        del self.data[key]
+        return 1
+
+def test_cluster_follower_reads_result_of_current_leader(monkeypatch) -> None:
+    """测试 cluster 范围下等待的节点只读取当前 leader 写入的结果，忽略之前执行遗留的结果"""
+    redis = MemoryRedis()
+    monkeypatch.setattr(single_flight_module, "get_redis", lambda: SimpleNamespace(client=redis))
+    monkeypatch.setattr(single_flight_module.get_settings(), "single_flight_poll_interval_ms", 5)
+    single_flight = SingleFlight("test", scope=SingleFlightScope.CLUSTER, dumps=str, loads=str)
+
+    # 上一次执行的结果尚未过期，另一个节点正在执行新的一次
+    redis.data["singleflight:test:result:key:previous-leader"] = "stale"
+    redis.data["singleflight:test:lock:key"] = "current-leader"
+
+    async def leader() -> None:
+        await asyncio.sleep(0.03)
+        redis.data["singleflight:test:result:key:current-leader"] = "fresh"
+        del redis.data["singleflight:test:lock:key"]
+
+    async def fetch() -> str:
+        return "local"
+
+    async def main():
+        leader_task = asyncio.create_task(leader())
+        result = await single_flight.do("key", fetch)
+        await leader_task
+        return result
+
+    assert asyncio.run(main()) == "fresh"
+    stats = single_flight.stats()
+    assert stats.executions == 0
+    assert stats.saved == 1
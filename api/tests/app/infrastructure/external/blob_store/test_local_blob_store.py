@@ -0,0 +1,35 @@
+import asyncio
+
+import pytest
+
+from app.infrastructure.external.blob_store.local_blob_store import LocalBlobStore
+
+
+def test_delete_and_delete_prefix(tmp_path) -> None:
+    """测试删除单个对象，以及按目录前缀与文件名前缀批量删除对象"""
+    blob_store = LocalBlobStore(str(tmp_path))
+
+    async def main():
+        for key in ["tool-results/a/1.json", "tool-results/a/2.json", "tool-results/b/1.json", "tool-results/b/2.json"]:
+            await blob_store.put(key, key)
+
+        await blob_store.delete("tool-results/b/1.json")
+        await blob_store.delete("tool-results/b/missing.json")
+        deleted_dir = await blob_store.delete_prefix("tool-results/a/")
+        deleted_missing = await blob_store.delete_prefix("tool-results/missing/")
+        deleted_name = await blob_store.delete_prefix("tool-results/b/2")
+        return deleted_dir, deleted_missing, deleted_name
+
+    deleted_dir, deleted_missing, deleted_name = asyncio.run(main())
+
+    assert (deleted_dir, deleted_missing, deleted_name) == (2, 0, 1)
+    assert not (tmp_path / "tool-results" / "a").exists()
+    assert list((tmp_path / "tool-results" / "b").iterdir()) == []
+
+
+def test_delete_prefix_rejects_keys_outside_root(tmp_path) -> None:
+    """测试拒绝指向存储目录之外的前缀"""
+    blob_store = LocalBlobStore(str(tmp_path / "blobs"))
+
+    with pytest.raises(ValueError):
+        asyncio.run(blob_store.delete_prefix("../"))
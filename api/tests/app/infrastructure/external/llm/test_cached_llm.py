@@ -0,0 +1,118 @@
+import asyncio
+from typing import Any, Dict, List
+
+from app.domain.external.llm import merge_message_delta
+from app.infrastructure.external.llm import cached_llm
+from app.infrastructure.external.llm.cached_llm import CachedLLM, LLMResponseCache
+from app.infrastructure.external.llm.fake_llm import FakeLLM, fake_tool_call
+
+def echo(messages: List[Dict[str, Any]], tools) -> Dict[str, Any]:
+    """按最后一条消息回显，相同请求总是得到相同回复"""
+    return {"content": "回复: " + messages[-1]["content"]}
+
+def ask(llm: CachedLLM, text: str) -> Dict[str, Any]:
+    return asyncio.run(llm.invoke([{"role": "user", "content": text}]))
+
+def create_cache(**kwargs) -> LLMResponseCache:
+    return LLMResponseCache(**{"max_size": 16, "ttl_seconds": 60, "use_redis": False, **kwargs})
+
+def test_cached_llm_serves_repeated_requests_and_reports_stats() -> None:
+    """测试相同请求第二次命中缓存不再请求提供商，并统计命中与未命中次数"""
+    fake = FakeLLM(script=echo)
+    llm = CachedLLM(fake, cache=create_cache())
+
+    assert ask(llm, "你好")["content"] == "回复: 你好"
+    assert ask(llm, "你好")["content"] == "回复: 你好"
+    assert ask(llm, "再见")["content"] == "回复: 再见"
+
+    stats = llm.cache.stats()
+    assert fake.calls == 2
+    assert (stats.memory_hits, stats.misses, stats.size) == (1, 2, 2)
+    assert stats.hit_rate == 1 / 3
+
+    # 返回的是缓存消息的副本，调用方修改不影响缓存
+    ask(llm, "你好")["content"] = "被修改"
+    assert ask(llm, "你好")["content"] == "回复: 你好"
+
+def test_cached_llm_evicts_least_recently_used_entries() -> None:
+    """测试超过最大条目数时淘汰最久未使用的缓存"""
+    fake = FakeLLM(script=echo)
+    llm = CachedLLM(fake, cache=create_cache(max_size=2))
+
+    ask(llm, "a")
+    ask(llm, "b")
+    ask(llm, "a") # a 成为最近使用的条目
+    ask(llm, "c") # 淘汰 b
+    assert fake.calls == 3
+
+    ask(llm, "a")
+    assert fake.calls == 3
+    ask(llm, "b")
+    assert fake.calls == 4
+    assert llm.cache.stats().size == 2
+
+def test_cached_llm_entries_expire_after_ttl(monkeypatch) -> None:
+    """测试缓存条目超过 TTL 后失效，重新请求提供商"""
+    now = [1000.0]
+    monkeypatch.setattr(cached_llm.time, "monotonic", lambda: now[0])
+    fake = FakeLLM(script=echo)
+    llm = CachedLLM(fake, cache=create_cache(ttl_seconds=10))
+
+    ask(llm, "你好")
+    now[0] += 5
+    ask(llm, "你好")
+    assert fake.calls == 1
+
+    now[0] += 10
+    ask(llm, "你好")
+    assert fake.calls == 2
+
+def test_cached_llm_bypasses_sampling_and_empty_replies() -> None:
+    """测试温度大于 0 且未允许缓存采样结果时不走缓存，空回复不做缓存"""
+    fake = FakeLLM(script=echo, temperature=0.7)
+    llm = CachedLLM(fake, cache=create_cache(), allow_sampling=False)
+    ask(llm, "你好")
+    ask(llm, "你好")
+    assert fake.calls == 2
+    assert llm.cache.stats().bypassed == 2
+    assert llm.cache.stats().size == 0
+
+    # 允许缓存采样结果时温度大于 0 也走缓存
+    llm = CachedLLM(fake, cache=create_cache(), allow_sampling=True)
+    ask(llm, "你好")
+    ask(llm, "你好")
+    assert fake.calls == 3
+
+    fake = FakeLLM(script=[{"content": ""}, {"content": "有内容"}])
+    llm = CachedLLM(fake, cache=create_cache())
+    assert ask(llm, "你好")["content"] == ""
+    assert ask(llm, "你好")["content"] == "有内容"
+    assert fake.calls == 2
+
+def test_cached_llm_stream_replays_cached_tool_calls() -> None:
+    """测试流式调用的结果写入缓存，再次请求时以单个增量回放，合并后与原消息一致(包含工具调用)"""
+    tool_call = fake_tool_call("call_1", "search_web", {"query": "资料"})
+    fake = FakeLLM(script=[{"content": "我来搜索一下相关的资料", "tool_calls": [tool_call]}], stream_chunk_chars=4)
+    llm = CachedLLM(fake, cache=create_cache())
+    messages = [{"role": "user", "content": "帮我搜索资料"}]
+
+    async def collect() -> List[Dict[str, Any]]:
+        return [delta async for delta in llm.stream(messages)]
+
+    def merge(deltas: List[Dict[str, Any]]) -> Dict[str, Any]:
+        message: Dict[str, Any] = {}
+        for delta in deltas:
+            merge_message_delta(message, delta)
+        return message
+
+    first = asyncio.run(collect())
+    replayed = asyncio.run(collect())
+
+    assert fake.calls == 1
+    assert len(first) > 2
+    assert len(replayed) == 1
+    assert merge(replayed) == merge(first)
+    assert merge(replayed)["tool_calls"] == [tool_call]
+    # 流式写入的缓存同样可以被非流式调用读取
+    assert asyncio.run(llm.invoke(messages))["tool_calls"] == [tool_call]
+    assert fake.calls == 1
@@ -0,0 +1,30 @@
+from app.infrastructure.external.llm.fingerprint import llm_request_fingerprint, normalize_messages, tools_hash
+
+MESSAGES = [
+    {"role": "system", "content": "你是一个助手"},
+    {"role": "user", "content": "帮我搜索资料"},
+]
+TOOLS = [{"type": "function", "function": {"name": "search_web", "parameters": {"type": "object", "properties": {"query": {"type": "string"}}}}}]
+
+def fingerprint(**kwargs) -> str:
+    return llm_request_fingerprint(**{"model_name": "model", "temperature": 0, "messages": MESSAGES, "tools": TOOLS, **kwargs})
+
+def test_fingerprint_is_stable_and_ignores_key_order() -> None:
+    """测试相同请求的指纹稳定，字典键顺序、首尾空白以及不影响输出的字段不改变指纹"""
+    assert fingerprint() == fingerprint()
+
+    reordered_messages = [{"content": "你是一个助手", "role": "system"}, {"content": "  帮我搜索资料\n", "role": "user", "refusal": None}]
+    reordered_tools = [{"function": {"parameters": {"properties": {"query": {"type": "string"}}, "type": "object"}, "name": "search_web"}, "type": "function"}]
+    assert fingerprint(messages=reordered_messages, tools=reordered_tools) == fingerprint()
+    assert tools_hash(reordered_tools) == tools_hash(TOOLS)
+    assert normalize_messages([{"role": "assistant", "content": None, "tool_calls": []}]) == [{"role": "assistant"}]
+
+def test_fingerprint_changes_with_request_inputs() -> None:
+    """测试模型、温度、消息、工具 schema 与响应格式任何一项变化都会改变指纹"""
+    base = fingerprint()
+    assert fingerprint(model_name="other") != base
+    assert fingerprint(temperature=0.5) != base
+    assert fingerprint(messages=MESSAGES + [{"role": "user", "content": "继续"}]) != base
+    assert fingerprint(tools=None) != base
+    assert fingerprint(response_format={"type": "json_object"}) != base
+    assert fingerprint(tool_choice="none") != base
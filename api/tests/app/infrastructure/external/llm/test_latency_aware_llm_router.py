@@ -0,0 +1,142 @@
+import asyncio
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+import pytest
+
+from app.application.errors.exceptions import LLMBadRequestError
+from app.domain.external.llm import LLM
+from app.domain.models.app_config import LLMEndpointConfig, LLMRouterConfig
+from app.infrastructure.external.llm.latency_aware_llm_router import LatencyAwareLLMRouter
+
+class FakeEndpointLLM(LLM):
+    """可控制延迟与失败的端点替身，以模型名字区分端点"""
+
+    def __init__(self, config: LLMEndpointConfig) -> None:
+        self.config = config
+        self.latency = 0.0
+        self.fail = False
+        self.error: Optional[Exception] = None # 设置后调用时抛出该异常
+        self.calls = 0
+
+    @property
+    def model_name(self) -> str:
+        return self.config.model_name
+
+    @property
+    def temperature(self) -> float:
+        return self.config.temperature
+
+    @property
+    def max_tokens(self) -> int:
+        return self.config.max_tokens
+
+    async def invoke(self, messages, tools=None, response_format=None, tool_choice=None) -> Dict[str, Any]:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.error is not None:
+            raise self.error
+        if self.fail:
+            raise ConnectionError(f"端点[{self.model_name}]不可用")
+        return {"role": "assistant", "content": self.model_name}
+
+    async def stream(self, messages, tools=None, response_format=None, tool_choice=None) -> AsyncGenerator[Dict[str, Any], None]:
+        message = await self.invoke(messages)
+        yield {"role": "assistant", "content": message["content"]}
+
+def create_router(names: List[str], **kwargs) -> tuple:
+    llms: Dict[str, FakeEndpointLLM] = {}
+
+    def llm_factory(config: LLMEndpointConfig) -> FakeEndpointLLM:
+        llms[config.model_name] = FakeEndpointLLM(config)
+        return llms[config.model_name]
+
+    router_config = LLMRouterConfig(endpoints={name: LLMEndpointConfig(model_name=name) for name in names}, **kwargs)
+    return LatencyAwareLLMRouter(router_config, llm_factory=llm_factory), llms
+
+def ask(router: LatencyAwareLLMRouter, times: int = 1) -> List[str]:
+    async def main():
+        return [(await router.invoke([{"role": "user", "content": "你好"}]))["content"] for _ in range(times)]
+    return asyncio.run(main())
+
+def test_router_prefers_the_fastest_endpoint() -> None:
+    """测试没有样本的端点先被探测，之后请求集中到期望延迟最低的端点"""
+    router, llms = create_router(["slow", "fast"])
+    llms["slow"].latency = 0.03
+    llms["fast"].latency = 0.001
+
+    results = ask(router, 10)
+
+    assert set(results[:2]) == {"slow", "fast"}
+    assert results[2:] == ["fast"] * 8
+    stats = {item.name: item for item in router.stats()}
+    assert stats["slow"].requests == 1
+    assert stats["fast"].p50_ms < stats["slow"].p50_ms
+
+def test_router_fails_over_and_cools_down_unhealthy_endpoints() -> None:
+    """测试端点失败时切换到下一个端点，错误率超过阈值的端点进入冷却期不再被选择"""
+    router, llms = create_router(["broken", "ok"], min_samples=1, error_rate_threshold=0.5, cooldown_seconds=60)
+    llms["broken"].fail = True
+
+    assert ask(router, 6) == ["ok"] * 6
+    stats = {item.name: item for item in router.stats()}
+    assert not stats["broken"].healthy
+    assert stats["broken"].errors == llms["broken"].calls == 1
+    assert stats["ok"].requests == 6
+
+    # 所有端点都失败时抛出最后一个错误
+    llms["ok"].fail = True
+    with pytest.raises(ConnectionError):
+        ask(router)
+
+def test_router_raises_non_retryable_errors_without_failing_over() -> None:
+    """测试端点返回 400 等不可重试的错误时直接抛出，不切换端点也不计入端点错误率"""
+    router, llms = create_router(["bad-request", "ok"], min_samples=1)
+    llms["bad-request"].error = LLMBadRequestError()
+
+    async def main():
+        with pytest.raises(LLMBadRequestError):
+            await router.invoke([{"role": "user", "content": "你好"}])
+        with pytest.raises(LLMBadRequestError):
+            async for _ in router.stream([{"role": "user", "content": "你好"}]):
+                pass
+
+    asyncio.run(main())
+
+    assert llms["bad-request"].calls == 2
+    assert llms["ok"].calls == 0
+    stats = {item.name: item for item in router.stats()}
+    assert stats["bad-request"].errors == 0
+    assert stats["bad-request"].healthy
+
+def test_router_hedges_slow_requests_after_enough_samples() -> None:
+    """测试首个请求超过延迟分位数仍未返回时向次优端点发起对冲请求，样本不足时不对冲"""
+    router, llms = create_router(["a", "b"], hedge_enabled=True, hedge_percentile=50, hedge_min_samples=4)
+    llms["a"].latency = 0.005
+    llms["b"].latency = 0.02
+    # 先探测两个端点，之后请求集中到更快的 a，a 累计 3 个样本
+    assert ask(router, 4) == ["a", "b", "a", "a"]
+
+    # 样本不足 hedge_min_samples 时只等待首选端点
+    llms["a"].latency = 0.05
+    assert ask(router) == ["a"]
+    assert llms["b"].calls == 1
+
+    # 首选端点超过 p50 延迟仍未返回，由对冲的次优端点返回结果
+    llms["a"].latency = 0.5
+    assert ask(router) == ["b"]
+    stats = {item.name: item for item in router.stats()}
+    assert stats["b"].hedged == 1
+    assert stats["a"].in_flight == 0
+
+def test_router_configure_keeps_stats_of_unchanged_endpoints() -> None:
+    """测试重新配置时保留未变更端点的统计数据，禁用的端点被移除"""
+    router, llms = create_router(["a", "b"])
+    ask(router, 3)
+    requests = {item.name: item.requests for item in router.stats()}
+
+    router.configure(LLMRouterConfig(endpoints={
+        "a": LLMEndpointConfig(model_name="a"),
+        "b": LLMEndpointConfig(model_name="b", enabled=False),
+    }))
+
+    assert [(item.name, item.requests) for item in router.stats()] == [("a", requests["a"])]
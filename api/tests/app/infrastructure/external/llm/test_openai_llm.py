@@ -0,0 +1,60 @@
+import asyncio
+
+import httpx
+import openai
+
+from app.application.errors.exceptions import LLMBadRequestError, LLMRateLimitError, LLMTimeoutError
+from app.domain.models.app_config import LLMConfig
+from app.infrastructure.concurrency.circuit_breaker import CircuitState
+from app.infrastructure.external.llm.openai_client_pool import get_openai_client_pool
+from app.infrastructure.external.llm.openai_llm import OpenAILLM, classify_openai_error
+
+REQUEST = httpx.Request("POST", "https://api.example.com/v1/chat/completions")
+
+def test_classify_openai_error() -> None:
+    """测试 OpenAI 异常被转换为对应的 LLM 异常，并保留 Retry-After"""
+    response = httpx.Response(429, headers={"retry-after": "7"}, request=REQUEST)
+    error = classify_openai_error(openai.RateLimitError("rate limited", response=response, body=None))
+    assert isinstance(error, LLMRateLimitError)
+    assert error.retryable
+    assert error.retry_after == 7
+
+    response = httpx.Response(400, request=REQUEST)
+    error = classify_openai_error(openai.BadRequestError("bad request", response=response, body=None))
+    assert isinstance(error, LLMBadRequestError)
+    assert not error.retryable
+
+    error = classify_openai_error(openai.APITimeoutError(request=REQUEST))
+    assert isinstance(error, LLMTimeoutError)
+    assert error.retryable
+
+def test_openai_llm_shares_pooled_client() -> None:
+    """测试相同配置的 OpenAILLM 共享同一个客户端，不同配置使用不同客户端"""
+    pool = get_openai_client_pool()
+    config = LLMConfig(base_url="https://api.example.com/v1", api_key="key", model_name="model")
+
+    first = OpenAILLM(config)
+    second = OpenAILLM(config.model_copy(update={"temperature": 0.2}))
+    other = OpenAILLM(config.model_copy(update={"api_key": "other"}))
+
+    assert first._client is second._client
+    assert first._client is not other._client
+    asyncio.run(pool.shutdown())
+
+def test_openai_llm_bad_request_leaves_circuit_breaker_untouched() -> None:
+    """测试永久性错误不会重置连续失败次数，也不会关闭已打开的熔断器"""
+    llm = OpenAILLM(LLMConfig(base_url="https://breaker.example.com/v1", api_key="key", model_name="model"))
+    breaker = llm._circuit_breaker
+    bad_request = openai.BadRequestError("bad request", response=httpx.Response(400, request=REQUEST), body=None)
+    timeout = openai.APITimeoutError(request=REQUEST)
+
+    llm._handle_error(timeout)
+    llm._handle_error(bad_request)
+    assert breaker.stats().consecutive_failures == 1
+
+    for _ in range(10):
+        llm._handle_error(timeout)
+    assert breaker.state == CircuitState.OPEN
+    llm._handle_error(bad_request)
+    assert breaker.state == CircuitState.OPEN
+    asyncio.run(get_openai_client_pool().shutdown())
@@ -0,0 +1,179 @@
+import fnmatch
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from redis.exceptions import ResponseError
+
+
+def _parse_id(message_id: str) -> Tuple[int, int]:
+    ms, _, seq = str(message_id).partition("-")
+    return int(ms), int(seq or 0)
+
+
+class FakePipeline:
+    """记录命令并在 execute 时按顺序执行的 pipeline"""
+
+    def __init__(self, client: "FakeRedis") -> None:
+        self._client = client
+        self._commands: List[Tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, name: str):
+        def command(*args, **kwargs):
+            self._commands.append((name, args, kwargs))
+            return self
+        return command
+
+    async def execute(self) -> List[Any]:
+        self._client.pipelines += 1
+        return [await getattr(self._client, name)(*args, **kwargs) for name, args, kwargs in self._commands]
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._commands.clear()
+
+
+class FakeRedis:
+    """只实现消息队列与清理器用到的 Redis Stream 命令的内存实现，idle_offset_ms 用于模拟消息空闲时间"""
+
+    def __init__(self) -> None:
+        self.streams: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+        self.last_ids: Dict[str, Tuple[int, int]] = {}
+        self.groups: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.ttls: Dict[str, int] = {}
+        self.idle_offset_ms = 0
+        self.pipelines = 0
+
+    def _now_ms(self) -> int:
+        return int(time.time() * 1000) + self.idle_offset_ms
+
+    def _group(self, name: str, groupname: str) -> Dict[str, Any]:
+        group = self.groups.get(name, {}).get(groupname)
+        if group is None:
+            raise ResponseError(f"NOGROUP No such key '{name}' or consumer group '{groupname}'")
+        return group
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def xadd(self, name: str, fields: Dict[str, Any], maxlen: Optional[int] = None, approximate: bool = True, minid: Optional[str] = None) -> str:
+        ms = int(time.time() * 1000)
+        last = self.last_ids.get(name, (0, 0))
+        stream_id = (ms, 0) if ms > last[0] else (last[0], last[1] + 1)
+        self.last_ids[name] = stream_id
+        message_id = f"{stream_id[0]}-{stream_id[1]}"
+        self.streams.setdefault(name, []).append((message_id, dict(fields)))
+        await self.xtrim(name, maxlen=maxlen, minid=minid)
+        return message_id
+
+    async def xtrim(self, name: str, maxlen: Optional[int] = None, approximate: bool = True, minid: Optional[str] = None) -> int:
+        entries = self.streams.get(name, [])
+        before = len(entries)
+        if maxlen is not None:
+            entries[:] = entries[max(0, len(entries) - maxlen):]
+        if minid is not None:
+            entries[:] = [entry for entry in entries if _parse_id(entry[0]) >= _parse_id(minid)]
+        return before - len(entries)
+
+    async def xlen(self, name: str) -> int:
+        return len(self.streams.get(name, []))
+
+    async def xdel(self, name: str, *ids: str) -> int:
+        entries = self.streams.get(name, [])
+        before = len(entries)
+        entries[:] = [entry for entry in entries if entry[0] not in ids]
+        return before - len(entries)
+
+    async def xgroup_create(self, name: str, groupname: str, id: str = "$", mkstream: bool = False) -> bool:
+        if name not in self.streams:
+            if not mkstream:
+                raise ResponseError("ERR The XGROUP subcommand requires the key to exist")
+            self.streams[name] = []
+        if groupname in self.groups.get(name, {}):
+            raise ResponseError("BUSYGROUP Consumer Group name already exists")
+        last = self.last_ids.get(name, (0, 0)) if id == "$" else _parse_id(id)
+        self.groups.setdefault(name, {})[groupname] = {"last_delivered": last, "pending": {}}
+        return True
+
+    async def xreadgroup(self, groupname: str, consumername: str, streams: Dict[str, str], count: Optional[int] = None, block: Optional[int] = None) -> List[Any]:
+        name = next(iter(streams))
+        group = self._group(name, groupname)
+        entries = [entry for entry in self.streams.get(name, []) if _parse_id(entry[0]) > group["last_delivered"]]
+        entries = entries[:count] if count else entries
+        if not entries:
+            return []
+        for message_id, _ in entries:
+            group["pending"][message_id] = (consumername, self._now_ms())
+        group["last_delivered"] = _parse_id(entries[-1][0])
+        return [[name, entries]]
+
+    async def xautoclaim(self, name: str, groupname: str, consumername: str, min_idle_time: int, start_id: str = "0-0", count: Optional[int] = None) -> List[Any]:
+        group = self._group(name, groupname)
+        stored = dict(self.streams.get(name, []))
+        claimed, deleted = [], []
+        for message_id, (_, delivered_at) in sorted(group["pending"].items(), key=lambda item: _parse_id(item[0])):
+            if self._now_ms() - delivered_at < min_idle_time:
+                continue
+            if message_id not in stored:
+                deleted.append(message_id)
+                continue
+            group["pending"][message_id] = (consumername, self._now_ms())
+            claimed.append((message_id, stored[message_id]))
+            if count and len(claimed) >= count:
+                break
+        for message_id in deleted:
+            del group["pending"][message_id]
+        return ["0-0", claimed, deleted]
+
+    async def xack(self, name: str, groupname: str, *ids: str) -> int:
+        group = self._group(name, groupname)
+        return sum(1 for message_id in ids if group["pending"].pop(message_id, None) is not None)
+
+    async def xpending(self, name: str, groupname: str) -> Dict[str, Any]:
+        return {"pending": len(self._group(name, groupname)["pending"])}
+
+    async def xread(self, streams: Dict[str, str], count: Optional[int] = None, block: Optional[int] = None) -> List[Any]:
+        name, start_id = next(iter(streams.items()))
+        entries = [entry for entry in self.streams.get(name, []) if _parse_id(entry[0]) > _parse_id(start_id)]
+        entries = entries[:count] if count else entries
+        return [[name, entries]] if entries else []
+
+    async def xinfo_stream(self, name: str) -> Dict[str, Any]:
+        if name not in self.streams:
+            raise ResponseError("ERR no such key")
+        last = self.last_ids.get(name, (0, 0))
+        return {"length": len(self.streams[name]), "last-generated-id": f"{last[0]}-{last[1]}"}
+
+    async def memory_usage(self, name: str) -> Optional[int]:
+        if name not in self.streams:
+            return None
+        return sum(sys.getsizeof(str(entry)) for entry in self.streams[name]) + 64
+
+    async def ttl(self, name: str) -> int:
+        if name not in self.streams:
+            return -2
+        return self.ttls.get(name, -1)
+
+    async def expire(self, name: str, seconds: int) -> bool:
+        if name not in self.streams:
+            return False
+        self.ttls[name] = seconds
+        return True
+
+    async def persist(self, name: str) -> bool:
+        return self.ttls.pop(name, None) is not None
+
+    async def delete(self, *names: str) -> int:
+        deleted = 0
+        for name in names:
+            deleted += self.streams.pop(name, None) is not None
+            self.groups.pop(name, None)
+            self.ttls.pop(name, None)
+        return deleted
+
+    async def scan_iter(self, match: Optional[str] = None, count: Optional[int] = None, _type: Optional[str] = None):
+        for name in list(self.streams):
+            if match is None or fnmatch.fnmatchcase(name, match):
+                yield name
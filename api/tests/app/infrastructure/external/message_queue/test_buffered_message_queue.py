@@ -0,0 +1,83 @@
+import asyncio
+from typing import Any, List
+
+import pytest
+
+from app.infrastructure.external.message_queue.buffered_message_queue import BufferedMessageQueue
+
+
+class RecordingQueue:
+    """只记录批量写入的内存队列，failures 次写入失败后恢复，latency 模拟一次往返的耗时"""
+
+    def __init__(self, failures: int = 0, latency: float = 0.01) -> None:
+        self.messages: List[Any] = []
+        self.batches: List[int] = []
+        self.failures = failures
+        self.latency = latency
+
+    async def put_many(self, messages: List[Any]) -> List[str]:
+        await asyncio.sleep(self.latency)
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError("写入失败")
+        start = len(self.messages)
+        self.messages.extend(messages)
+        self.batches.append(len(messages))
+        return [f"{start + index}-0" for index in range(len(messages))]
+
+    async def size(self) -> int:
+        return len(self.messages)
+
+
+def test_buffered_queue_put_returns_real_ids_and_merges_concurrent_writes() -> None:
+    """测试 put 等待写入后返回真实的消息 id，写入期间并发到达的消息合并成一批，且消息顺序不变"""
+    inner = RecordingQueue()
+    queue = BufferedMessageQueue(inner, max_size=3)
+
+    async def main():
+        first = await queue.put("a")
+        rest = await asyncio.gather(*(queue.put(index) for index in range(5)))
+        return first, rest
+
+    first, rest = asyncio.run(main())
+
+    assert first == "0-0"
+    assert rest == ["1-0", "2-0", "3-0", "4-0", "5-0"]
+    assert inner.messages == ["a", 0, 1, 2, 3, 4]
+    # 顺序写入不等待，并发写入按 max_size 分批
+    assert inner.batches == [1, 3, 2]
+
+
+def test_buffered_queue_put_many_and_flush() -> None:
+    """测试 put_many 与并发的 put 合并写入并返回传递消息的 id，flush 等待缓冲消息全部写入"""
+    inner = RecordingQueue()
+    queue = BufferedMessageQueue(inner, max_size=10, max_delay_ms=20)
+
+    async def main():
+        put_a = asyncio.create_task(queue.put("a"))
+        put_bc = asyncio.create_task(queue.put_many(["b", "c"]))
+        await asyncio.sleep(0)
+        assert await queue.size() == 3
+        await queue.flush()
+        return await put_a, await put_bc
+
+    message_id, message_ids = asyncio.run(main())
+
+    assert inner.messages == ["a", "b", "c"]
+    assert inner.batches == [3]
+    assert message_id == "0-0"
+    assert message_ids == ["1-0", "2-0"]
+
+
+def test_buffered_queue_retries_failed_writes() -> None:
+    """测试后台写入失败时按退避重试，消息不丢失，重试耗尽后将异常传递给写入方"""
+    inner = RecordingQueue(failures=2)
+    queue = BufferedMessageQueue(inner, max_retries=3, retry_interval_ms=1)
+    assert asyncio.run(queue.put("a")) == "0-0"
+    assert inner.messages == ["a"]
+
+    inner = RecordingQueue(failures=5)
+    queue = BufferedMessageQueue(inner, max_retries=1, retry_interval_ms=1)
+    with pytest.raises(ConnectionError):
+        asyncio.run(queue.put("b"))
+    assert inner.messages == []
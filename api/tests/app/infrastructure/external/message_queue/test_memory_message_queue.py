@@ -0,0 +1,73 @@
+import asyncio
+
+from app.infrastructure.external.message_queue.memory_message_queue import MemoryMessageQueue, parse_stream_id
+
+
+def test_memory_queue_ids_and_reads_follow_stream_semantics() -> None:
+    """测试消息 id 严格递增，get/get_many 读取 start_id 之后的消息，pop 按顺序取出并移除"""
+    queue = MemoryMessageQueue("test:ids", max_size=100)
+
+    async def main():
+        message_ids = await queue.put_many(["a", "b", "c"])
+        message_ids.append(await queue.put("d"))
+        first = await queue.get()
+        after_first = await queue.get_many(message_ids[0], count=2)
+        nothing = await queue.get_many(message_ids[-1])
+        popped = await queue.pop()
+        return message_ids, first, after_first, nothing, popped, await queue.size()
+
+    message_ids, first, after_first, nothing, popped, size = asyncio.run(main())
+
+    assert [parse_stream_id(message_id) for message_id in message_ids] == sorted(
+        parse_stream_id(message_id) for message_id in message_ids
+    )
+    assert len(set(message_ids)) == 4
+    assert first == (message_ids[0], "a")
+    assert after_first == [(message_ids[1], "b"), (message_ids[2], "c")]
+    assert nothing == []
+    assert popped == (message_ids[0], "a")
+    assert size == 3
+
+
+def test_memory_queue_blocking_subscribe_and_backpressure() -> None:
+    """测试订阅方阻塞等待新消息，开启 backpressure 时写入方等待消息被取出"""
+    queue = MemoryMessageQueue("test:backpressure", max_size=2, backpressure=True)
+
+    async def main():
+        received = []
+
+        async def subscriber():
+            async for _, data in queue.subscribe(block_ms=1000):
+                received.append(data)
+                if len(received) == 3:
+                    return
+
+        subscriber_task = asyncio.create_task(subscriber())
+        await queue.put(1)
+        await queue.put(2)
+        producer = asyncio.create_task(queue.put(3))
+        await asyncio.sleep(0.05)
+        blocked = not producer.done()
+        await queue.pop()
+        await asyncio.wait_for(producer, timeout=1)
+        await asyncio.wait_for(subscriber_task, timeout=1)
+        return blocked, received, await queue.size()
+
+    blocked, received, size = asyncio.run(main())
+
+    assert blocked
+    assert received == [1, 2, 3]
+    assert size == 2
+
+
+def test_memory_queue_trims_oldest_without_backpressure() -> None:
+    """测试未开启 backpressure 时按 MAXLEN 语义丢弃最早的消息"""
+    queue = MemoryMessageQueue("test:trim", max_size=2)
+
+    async def main():
+        await queue.put_many([1, 2, 3])
+        return [data for _, data in await queue.get_many()]
+
+    remaining = asyncio.run(main())
+
+    assert remaining == [2, 3]
@@ -0,0 +1,136 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from app.infrastructure.external.message_queue.redis_message_queue import RedisStreamMessageQueue
+from tests.app.infrastructure.external.message_queue.fake_redis import FakeRedis
+
+
+def _group_queue(redis: FakeRedis, consumer_name: str) -> RedisStreamMessageQueue:
+    queue = RedisStreamMessageQueue(
+        "task:input:test",
+        consumer_group="task-runner",
+        consumer_name=consumer_name,
+        claim_idle_ms=1000,
+    )
+    queue._redis = SimpleNamespace(client=redis)
+    return queue
+
+
+def test_consumer_group_pop_ack_and_claim() -> None:
+    """测试消费者组模式下取出的消息不计入长度，ack 后删除，未确认的消息空闲超时后被其他消费者重新领取"""
+    redis = FakeRedis()
+    worker_a = _group_queue(redis, "worker-a")
+    worker_b = _group_queue(redis, "worker-b")
+
+    async def main():
+        await worker_a.put("m1")
+        await worker_a.put("m2")
+
+        first_id, first = await worker_a.pop()
+        size_after_pop = await worker_a.size()
+        acked = await worker_a.ack(first_id)
+        stream_length = await redis.xlen("task:input:test")
+
+        # worker-a 取出 m2 后崩溃，未确认
+        _, second = await worker_a.pop()
+        nothing_before_idle = await worker_b.pop()
+        redis.idle_offset_ms = 2000
+        claimed_id, claimed = await _group_queue(redis, "worker-c").pop()
+        await worker_b.ack(claimed_id)
+        return first, size_after_pop, acked, stream_length, second, nothing_before_idle, claimed, await worker_a.is_empty()
+
+    first, size_after_pop, acked, stream_length, second, nothing_before_idle, claimed, empty = asyncio.run(main())
+
+    assert first == "m1"
+    assert size_after_pop == 1
+    assert acked
+    assert stream_length == 1
+    assert second == "m2"
+    assert nothing_before_idle == (None, None)
+    assert claimed == "m2"
+    assert empty
+
+
+def test_consumer_group_recreated_after_stream_expired() -> None:
+    """测试消息流过期(消费者组随之删除)后 pop 重新创建消费者组并读取新消息"""
+    redis = FakeRedis()
+    queue = _group_queue(redis, "worker-a")
+
+    async def main():
+        await queue.put("before")
+        await queue.pop()
+        await redis.delete("task:input:test")
+        await queue.put("after")
+        return await queue.pop()
+
+    _, data = asyncio.run(main())
+
+    assert data == "after"
+    assert "task-runner" in redis.groups["task:input:test"]
+
+
+def test_size_without_consumer_group_counts_stream_length() -> None:
+    """测试未开启消费者组时长度即为消息流长度"""
+    redis = FakeRedis()
+    queue = RedisStreamMessageQueue("task:output:test")
+    queue._redis = SimpleNamespace(client=redis)
+
+    async def main():
+        await queue.put_many(["a", "b"])
+        return await queue.size()
+
+    assert asyncio.run(main()) == 2
+
+
+def test_put_trims_stream_by_maxlen() -> None:
+    """测试设置 maxlen 时写入(单条与批量)按长度裁剪消息流"""
+    redis = FakeRedis()
+    queue = RedisStreamMessageQueue("task:output:test", maxlen=3)
+    queue._redis = SimpleNamespace(client=redis)
+
+    async def main():
+        for index in range(4):
+            await queue.put(str(index))
+        await queue.put_many(["4", "5"])
+        return [message for _, message in await queue.get_many()]
+
+    assert asyncio.run(main()) == ["3", "4", "5"]
+
+
+def test_put_trims_stream_by_max_age() -> None:
+    """测试未设置 maxlen 而设置 max_age_seconds 时写入按 MINID 裁剪过旧的消息"""
+    redis = FakeRedis()
+    queue = RedisStreamMessageQueue("task:output:test", max_age_seconds=60)
+    queue._redis = SimpleNamespace(client=redis)
+    old_ms = int(time.time() * 1000) - 120 * 1000
+    redis.streams["task:output:test"] = [(f"{old_ms}-0", {"data": "old"})]
+    redis.last_ids["task:output:test"] = (old_ms, 0)
+
+    async def main():
+        await queue.put("new")
+        return [message for _, message in await queue.get_many()]
+
+    assert asyncio.run(main()) == ["new"]
+
+
+def test_expire_and_persist_stream() -> None:
+    """测试为消息流设置与移除过期时间，并读取消息流的内存占用"""
+    redis = FakeRedis()
+    queue = RedisStreamMessageQueue("task:output:test")
+    queue._redis = SimpleNamespace(client=redis)
+
+    async def main():
+        missing = await queue.expire(60), await queue.memory_usage()
+        await queue.put("a")
+        expired = await queue.expire(60)
+        ttl = await redis.ttl("task:output:test")
+        persisted = await queue.persist()
+        return missing, expired, ttl, persisted, await redis.ttl("task:output:test"), await queue.memory_usage()
+
+    missing, expired, ttl, persisted, ttl_after_persist, memory = asyncio.run(main())
+
+    assert missing == (False, 0)
+    assert expired and ttl == 60
+    assert persisted and ttl_after_persist == -1
+    assert memory > 0
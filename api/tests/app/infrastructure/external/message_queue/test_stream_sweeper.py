@@ -0,0 +1,142 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.infrastructure.external.health_checker.stream_health_checker import StreamHealthChecker
+from app.infrastructure.external.message_queue import stream_sweeper
+from app.infrastructure.external.message_queue.stream_sweeper import StreamSweeper
+from tests.app.infrastructure.external.message_queue.fake_redis import FakeRedis
+
+
+def _add_entries(redis: FakeRedis, name: str, *timestamps_ms: int) -> None:
+    """按指定的毫秒时间戳写入消息，模拟很久之前写入的消息流"""
+    redis.streams[name] = [(f"{ms}-0", {"data": str(ms)}) for ms in timestamps_ms]
+    redis.last_ids[name] = (timestamps_ms[-1], 0)
+
+
+@pytest.fixture
+def redis(monkeypatch) -> FakeRedis:
+    """清理器直接使用 get_redis().client，替换为内存实现"""
+    fake = FakeRedis()
+    monkeypatch.setattr(stream_sweeper, "get_redis", lambda: SimpleNamespace(client=fake))
+    return fake
+
+
+def test_sweep_expires_orphaned_streams(redis: FakeRedis) -> None:
+    """测试清理器为长时间没有写入且没有过期时间的消息流设置过期时间，并统计消息数与内存占用"""
+    now_ms = int(time.time() * 1000)
+    _add_entries(redis, "task:input:orphan", now_ms - 7200 * 1000)
+    _add_entries(redis, "task:output:active", now_ms)
+    _add_entries(redis, "task:output:finished", now_ms - 7200 * 1000, now_ms - 7100 * 1000)
+    redis.ttls["task:output:finished"] = 60
+    _add_entries(redis, "other:stream", now_ms - 7200 * 1000)
+
+    sweeper = StreamSweeper(interval_seconds=0, idle_seconds=3600, expire_seconds=120, max_age_seconds=0)
+    stats = asyncio.run(sweeper.sweep())
+
+    assert stats.streams == 3
+    assert stats.entries == 4
+    assert stats.memory_bytes > 0
+    assert stats.orphaned == 1
+    assert stats.expiring == 2
+    assert stats.trimmed == 0
+    assert redis.ttls == {"task:input:orphan": 120, "task:output:finished": 60}
+    assert "other:stream" not in redis.ttls
+    assert sweeper.stats() == stats
+
+
+def test_sweep_trims_entries_older_than_max_age(redis: FakeRedis) -> None:
+    """测试设置 max_age_seconds 时清理器按 MINID 裁剪过旧的消息"""
+    now_ms = int(time.time() * 1000)
+    _add_entries(redis, "task:output:test", now_ms - 300 * 1000, now_ms - 200 * 1000, now_ms)
+
+    sweeper = StreamSweeper(interval_seconds=0, idle_seconds=3600, expire_seconds=120, max_age_seconds=60)
+    stats = asyncio.run(sweeper.sweep())
+
+    assert stats.trimmed == 2
+    assert stats.orphaned == 0
+    assert [message_id for message_id, _ in redis.streams["task:output:test"]] == [f"{now_ms}-0"]
+
+
+def test_stream_health_checker_reports_last_sweep(redis: FakeRedis) -> None:
+    """测试健康检查返回清理器最近一次扫描的统计信息"""
+    _add_entries(redis, "task:output:test", int(time.time() * 1000))
+    sweeper = StreamSweeper(interval_seconds=0, idle_seconds=3600, expire_seconds=120, max_age_seconds=0)
+    checker = StreamHealthChecker(sweeper)
+
+    async def main():
+        await sweeper.sweep()
+        return await checker.check()
+
+    status = asyncio.run(main())
+
+    assert status.service == "task_streams"
+    assert status.status == "ok"
+    assert json.loads(status.details)["streams"] == 1
+
+
+class RecordingBlobStore:
+    """记录按前缀删除调用的大对象存储"""
+
+    def __init__(self) -> None:
+        self.deleted_prefixes = []
+
+    async def delete_prefix(self, prefix: str) -> int:
+        self.deleted_prefixes.append(prefix)
+        return 0
+
+
+def test_sweep_deletes_blobs_of_orphaned_tasks(redis: FakeRedis) -> None:
+    """测试回收孤儿消息流时删除对应任务单独存储的工具结果"""
+    now_ms = int(time.time() * 1000)
+    _add_entries(redis, "task:output:orphan", now_ms - 7200 * 1000)
+    _add_entries(redis, "task:output:active", now_ms)
+    blob_store = RecordingBlobStore()
+
+    sweeper = StreamSweeper(interval_seconds=0, idle_seconds=3600, expire_seconds=120, max_age_seconds=0, blob_store=blob_store)
+    asyncio.run(sweeper.sweep())
+
+    assert blob_store.deleted_prefixes == ["tool-results/orphan/"]
+
+
+class LiveTasks:
+    """测试用的检查点仓库与任务租约，只实现清理器需要的查询"""
+
+    def __init__(self, checkpoints=(), leases=()) -> None:
+        self.checkpoints = set(checkpoints)
+        self.leases = set(leases)
+
+    async def load(self, task_id: str):
+        return object() if task_id in self.checkpoints else None
+
+    async def is_held(self, task_id: str) -> bool:
+        return task_id in self.leases
+
+
+def test_sweep_keeps_idle_streams_of_tasks_with_checkpoint_or_lease(redis: FakeRedis) -> None:
+    """测试写入空闲但任务仍有检查点或租约时不回收消息流，也不删除工具结果"""
+    now_ms = int(time.time() * 1000)
+    _add_entries(redis, "task:output:waiting", now_ms - 7200 * 1000)
+    _add_entries(redis, "task:output:running", now_ms - 7200 * 1000)
+    _add_entries(redis, "task:output:orphan", now_ms - 7200 * 1000)
+    blob_store = RecordingBlobStore()
+    live_tasks = LiveTasks(checkpoints=["waiting"], leases=["running"])
+
+    sweeper = StreamSweeper(
+        interval_seconds=0,
+        idle_seconds=3600,
+        expire_seconds=120,
+        max_age_seconds=0,
+        blob_store=blob_store,
+        checkpoint_repository=live_tasks,
+        task_lease=live_tasks,
+    )
+    stats = asyncio.run(sweeper.sweep())
+
+    assert stats.orphaned == 1
+    assert stats.alive == 2
+    assert redis.ttls == {"task:output:orphan": 120}
+    assert blob_store.deleted_prefixes == ["tool-results/orphan/"]
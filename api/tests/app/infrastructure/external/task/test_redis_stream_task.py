@@ -0,0 +1,61 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.domain.external.task import Task, TaskRunner
+from app.infrastructure.external.message_queue import redis_message_queue
+from app.infrastructure.external.task.redis_stream_task import RedisStreamTask
+from core.config import get_settings
+from tests.app.infrastructure.external.message_queue.fake_redis import FakeRedis
+
+
+class EchoTaskRunner(TaskRunner):
+    """将输入流中的一条消息写入输出流的测试运行器"""
+
+    async def invoke(self, task: Task) -> None:
+        message_id, data = await task.input_stream.pop()
+        await task.output_stream.put(data)
+        await task.input_stream.ack(message_id)
+
+    async def destory(self) -> None:
+        pass
+
+    async def on_done(self, task: Task) -> None:
+        pass
+
+
+@pytest.fixture
+def redis(monkeypatch) -> FakeRedis:
+    """任务消息流使用 Redis 后端，输入流通过消费者组读取，Redis 客户端替换为内存实现"""
+    fake = FakeRedis()
+    monkeypatch.setattr(redis_message_queue, "get_redis", lambda: SimpleNamespace(client=fake))
+    monkeypatch.setattr(get_settings(), "message_queue_backend", "redis")
+    monkeypatch.setattr(get_settings(), "message_queue_write_buffer_size", 0)
+    monkeypatch.setattr(get_settings(), "task_input_consumer_group", "task-runner")
+    monkeypatch.setattr(get_settings(), "task_stream_expire_seconds", 120)
+    return fake
+
+
+def test_streams_expire_when_task_done_and_persist_on_resume(redis: FakeRedis) -> None:
+    """测试任务结束时输入/输出流设置过期时间，使用原任务 ID 恢复运行时移除过期时间"""
+    async def main():
+        task = RedisStreamTask.create(EchoTaskRunner())
+        await task.input_stream.put("hello")
+        await task.invoke()
+        await task._execution_task
+        ttls_after_done = {name: await redis.ttl(name) for name in redis.streams}
+
+        resumed = RedisStreamTask.create(EchoTaskRunner(), task.id)
+        await resumed.input_stream.put("again")
+        await resumed.invoke()
+        ttls_while_running = {name: await redis.ttl(name) for name in redis.streams}
+        await resumed._execution_task
+        return task.id, ttls_after_done, ttls_while_running
+
+    task_id, ttls_after_done, ttls_while_running = asyncio.run(main())
+
+    streams = [f"task:input:{task_id}", f"task:output:{task_id}"]
+    assert ttls_after_done == {name: 120 for name in streams}
+    assert ttls_while_running == {name: -1 for name in streams}
+    assert RedisStreamTask.get(task_id) is None
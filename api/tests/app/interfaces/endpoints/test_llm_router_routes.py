@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.application.services.llm_router_service import LLMRouterService
+from app.domain.models.app_config import AgentConfig, AppConfig, LLMConfig, LLMEndpointConfig, LLMRouterConfig, MCPConfig
+from app.infrastructure.external.llm.latency_aware_llm_router import LatencyAwareLLMRouter
+from app.interfaces.endpoints import llm_router_routes
+from app.interfaces.errors.exception_handlers import register_exeception_handlers
+from app.interfaces.service_dependencies import get_llm_router_service
+from tests.app.application.services.test_agent_service import MemoryAppConfigRepository
+from tests.app.infrastructure.external.llm.test_latency_aware_llm_router import FakeEndpointLLM
+
+def create_service(endpoints=None) -> LLMRouterService:
+    app_config = AppConfig(
+        llm_config=LLMConfig(),
+        agent_config=AgentConfig(),
+        mcp_config=MCPConfig(),
+        llm_router_config=LLMRouterConfig(endpoints=endpoints or {}),
+    )
+    return LLMRouterService(
+        app_config_repository=MemoryAppConfigRepository(app_config),
+        llm_router=LatencyAwareLLMRouter(llm_factory=FakeEndpointLLM),
+    )
+
+@pytest.fixture
+def service() -> LLMRouterService:
+    return create_service()
+
+@pytest.fixture
+def client(service: LLMRouterService) -> TestClient:
+    """只挂载 LLM 路由模块的应用，使用内存中的应用配置与替身端点"""
+    app = FastAPI()
+    register_exeception_handlers(app)
+    app.include_router(llm_router_routes.router, prefix="/api")
+    app.dependency_overrides[get_llm_router_service] = lambda: service
+    return TestClient(app)
+
+def test_llm_router_routes_manage_endpoints(client: TestClient, service: LLMRouterService) -> None:
+    """测试通过接口新增、禁用、删除端点，配置立即应用到 LLM 路由且不返回 api_key"""
+    response = client.post("/api/app-config/llm-router/endpoints", json={
+        "primary": {"model_name": "model-a", "api_key": "secret-a"},
+        "backup": {"model_name": "model-b", "api_key": "secret-b"},
+    })
+    assert response.json()["code"] == 200
+    assert [item.name for item in service.llm_router.stats()] == ["primary", "backup"]
+
+    data = client.get("/api/app-config/llm-router").json()["data"]
+    assert set(data["endpoints"]) == {"primary", "backup"}
+    assert all("api_key" not in endpoint for endpoint in data["endpoints"].values())
+
+    # api_key 为空时沿用原来的 api_key
+    client.post("/api/app-config/llm-router/endpoints", json={"primary": {"model_name": "model-a2", "api_key": ""}})
+    assert service.app_config_repository.app_config.llm_router_config.endpoints["primary"].api_key == "secret-a"
+
+    client.post("/api/app-config/llm-router/endpoints/backup/enabled", json=False)
+    stats = client.get("/api/app-config/llm-router/stats").json()["data"]
+    assert [(item["name"], item["model_name"]) for item in stats] == [("primary", "model-a2")]
+
+    assert client.post("/api/app-config/llm-router/endpoints/backup/delete").json()["code"] == 200
+    response = client.post("/api/app-config/llm-router/endpoints/missing/delete")
+    assert response.status_code == 404
+
+def test_load_router_config_applies_persisted_endpoints() -> None:
+    """测试进程启动时 load_router_config 将持久化的路由配置应用到新建的 LLM 路由上"""
+    service = create_service({
+        "primary": LLMEndpointConfig(model_name="model-a"),
+        "disabled": LLMEndpointConfig(model_name="model-b", enabled=False),
+    })
+    assert service.llm_router.stats() == []
+
+    asyncio.run(service.load_router_config())
+
+    assert [item.name for item in service.llm_router.stats()] == ["primary"]
+    assert service.llm_router.model_name == "model-a"